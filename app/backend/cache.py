@@ -0,0 +1,213 @@
+"""
+Response cache for polled REST endpoints.
+
+Identical GETs arriving while one is in flight share its result, and
+successful responses are replayed from memory for a per-route TTL with an
+ETag, so a client revalidating with If-None-Match gets a bodiless 304.
+The upstream handler (and TWS behind it) then runs at most once per TTL
+per distinct URL, however many dashboards are polling.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds a response of each cached route is replayed for. The current
+# time is left out: a replayed timestamp is stale by up to its TTL, and
+# live=true is a request to reach TWS.
+DEFAULT_TTLS: Dict[str, float] = {
+    "/api/tws/connection-status": 1.0,
+}
+
+# Headers that describe a body and so are dropped from a 304
+BODY_HEADERS = (b"content-length", b"content-type", b"content-encoding")
+
+CacheKey = Tuple[str, bytes]
+
+
+class CachedResponse(NamedTuple):
+    """A fully buffered upstream response."""
+
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: bytes
+    stored_at: float
+
+    @classmethod
+    def create(cls, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> "CachedResponse":
+        """Buffer a response, tagging it with a hash of its body."""
+        etag = b'"' + hashlib.blake2b(body, digest_size=12).hexdigest().encode() + b'"'
+        headers = [(name, value) for name, value in headers if name.lower() not in (b"etag", b"cache-control")]
+        return cls(status, headers, body, etag, time.monotonic())
+
+
+def etag_matches(if_none_match: bytes, etag: bytes) -> bool:
+    """
+    Check an If-None-Match header against an ETag using weak comparison.
+
+    Args:
+        if_none_match: Raw header value, a comma-separated list or "*"
+        etag: Quoted ETag of the cached response
+    """
+    for candidate in if_none_match.split(b","):
+        candidate = candidate.strip()
+        if candidate.startswith(b"W/"):
+            candidate = candidate[2:]
+        if candidate in (b"*", etag):
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Per-route TTL cache and in-flight table shared by the middleware.
+
+    Kept apart from the middleware so the application (and tests) can
+    inspect and clear it.
+    """
+
+    def __init__(self, ttls: Optional[Mapping[str, float]] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            ttls: Seconds to keep responses per request path; paths not
+                listed are never cached. Defaults to DEFAULT_TTLS.
+        """
+        self.ttls: Dict[str, float] = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._entries: Dict[CacheKey, CachedResponse] = {}
+        self._in_flight: Dict[CacheKey, "asyncio.Future[CachedResponse]"] = {}
+        self.upstream_calls = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.not_modified = 0
+
+    def ttl(self, path: str) -> Optional[float]:
+        """TTL of a path, or None if its responses are not cached."""
+        return self.ttls.get(path)
+
+    def get(self, key: CacheKey, ttl: float) -> Optional[CachedResponse]:
+        """Return the response stored under key if it is younger than ttl."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.stored_at >= ttl:
+            del self._entries[key]
+            return None
+        return entry
+
+    async def fetch(self, key: CacheKey, ttl: float, call_upstream) -> CachedResponse:
+        """
+        Serve key from the cache, from a request already in flight, or upstream.
+
+        The upstream call runs as its own task, so a caller that disconnects
+        does not cancel it for the others waiting on the same key.
+
+        Args:
+            key: Request path and raw query string
+            ttl: Seconds to keep a successful response
+            call_upstream: Coroutine function returning a CachedResponse
+
+        Returns:
+            CachedResponse: The shared response
+        """
+        entry = self.get(key, ttl)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.upstream_calls += 1
+        future = asyncio.ensure_future(call_upstream())
+        self._in_flight[key] = future
+        future.add_done_callback(lambda done: self._settle(key, done))
+        return await asyncio.shield(future)
+
+    def _settle(self, key: CacheKey, future: "asyncio.Future[CachedResponse]") -> None:
+        """Drop a finished upstream call from the in-flight table and store a 200."""
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.error(f"Upstream call for {key[0]} failed: {future.exception()}")
+            return
+        response = future.result()
+        if response.status == 200:
+            self._entries[key] = response
+
+    def clear(self) -> None:
+        """Forget every stored response."""
+        self._entries.clear()
+
+
+class ResponseCacheMiddleware:
+    """
+    ASGI middleware serving GET and HEAD requests of cached routes from a ResponseCache.
+
+    Responses are sent with their ETag, an Age in seconds and
+    "Cache-Control: no-cache", so browsers keep the body and revalidate on
+    every poll, getting a 304 while the content is unchanged.
+    """
+
+    def __init__(self, app, cache: ResponseCache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        ttl = self.cache.ttl(scope["path"])
+        if ttl is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def call_upstream() -> CachedResponse:
+            # Run the route as a GET so a HEAD shares and stores the full response
+            return await self._buffer(dict(scope, method="GET"), receive)
+
+        key = (scope["path"], scope.get("query_string", b""))
+        response = await self.cache.fetch(key, ttl, call_upstream)
+        await self._replay(scope, response, send)
+
+    async def _buffer(self, scope, receive) -> CachedResponse:
+        """Run the wrapped application and collect its response."""
+        start: Dict = {}
+        chunks: List[bytes] = []
+
+        async def capture(message) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        return CachedResponse.create(start["status"], list(start.get("headers", [])), b"".join(chunks))
+
+    async def _replay(self, scope, response: CachedResponse, send) -> None:
+        """Send a buffered response, or a 304 if the client already holds it."""
+        age = str(int(time.monotonic() - response.stored_at)).encode()
+        cache_headers = [(b"etag", response.etag), (b"cache-control", b"no-cache"), (b"age", age)]
+        if_none_match = dict(scope["headers"]).get(b"if-none-match")
+
+        if response.status == 200 and if_none_match is not None and etag_matches(if_none_match, response.etag):
+            self.cache.not_modified += 1
+            headers = [(name, value) for name, value in response.headers if name.lower() not in BODY_HEADERS]
+            await send({"type": "http.response.start", "status": 304, "headers": headers + cache_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers = response.headers + cache_headers if response.status == 200 else response.headers
+        await send({"type": "http.response.start", "status": response.status, "headers": headers})
+        body = b"" if scope["method"] == "HEAD" else response.body
+        await send({"type": "http.response.body", "body": body})
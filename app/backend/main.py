@@ -10,9 +10,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from .cache import ResponseCache, ResponseCacheMiddleware
 from .models import HealthResponse
-from .routers import tws
-from ..tws.client import TWSClient
+from .registry import ClientRegistry, RegistrySettings
+from .routers import account, bars, options, orders, scanner, stream, tws
 
 # Configure logging
 logging.basicConfig(
@@ -29,16 +30,11 @@ async def lifespan(app: FastAPI):
 
     # Startup
     try:
-        # Initialize TWS client
-        tws_client = TWSClient(host="127.0.0.1", port=7500, client_id=1)
-        app.state.tws_client = tws_client
-        logger.info("TWS client initialized")
-
-        # Optionally try to connect at startup
-        # if tws_client.connect():
-        #     logger.info("Connected to TWS at startup")
-        # else:
-        #     logger.warning("Could not connect to TWS at startup")
+        # The one registry every router resolves its TWS clients from
+        registry = ClientRegistry(RegistrySettings.from_env())
+        await registry.start()
+        app.state.tws_registry = registry
+        logger.info(f"TWS client registry initialized with {len(registry.pool.members)} connections")
 
     except Exception as e:
         logger.error(f"Error during startup: {e}")
@@ -47,8 +43,8 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     try:
-        if hasattr(app.state, 'tws_client'):
-            app.state.tws_client.disconnect()
+        if hasattr(app.state, 'tws_registry'):
+            await app.state.tws_registry.stop()
             logger.info("Disconnected from TWS")
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
@@ -64,6 +60,11 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Polled status routes are served once per TTL however many tabs poll them;
+# added before CORS so cached responses still get CORS headers
+response_cache = ResponseCache()
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -75,6 +76,12 @@ app.add_middleware(
 
 # Include routers
 app.include_router(tws.router, prefix="/api")
+app.include_router(bars.router, prefix="/api")
+app.include_router(orders.router, prefix="/api")
+app.include_router(account.router, prefix="/api")
+app.include_router(scanner.router, prefix="/api")
+app.include_router(options.router, prefix="/api")
+app.include_router(stream.router)
 
 
 @app.get("/")
@@ -89,8 +96,8 @@ async def health_check():
     tws_connected = False
 
     try:
-        if hasattr(app.state, 'tws_client'):
-            tws_connected = app.state.tws_client.is_connected()
+        if hasattr(app.state, 'tws_registry'):
+            tws_connected = app.state.tws_registry.is_connected()
     except Exception as e:
         logger.error(f"Error checking TWS connection: {e}")
 
@@ -3,8 +3,8 @@ Pydantic models for API requests and responses.
 """
 
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
 
 
 class TimeResponseAPI(BaseModel):
@@ -14,6 +14,7 @@ class TimeResponseAPI(BaseModel):
     current_time: Optional[datetime] = None
     server_version: Optional[int] = None
     connection_time: Optional[datetime] = None
+    uncertainty_ms: Optional[float] = None
     error_message: Optional[str] = None
 
     model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
@@ -27,13 +28,260 @@ class ConnectionStatusAPI(BaseModel):
     host: str
     port: int
     connection_time: Optional[datetime] = None
+    connect_latency_ms: Optional[float] = None
+    reconnects: int = 0
+    last_recovery_ms: Optional[float] = None
     error_message: Optional[str] = None
 
 
+class ClockStatusAPI(BaseModel):
+    """API response model for the estimated TWS server clock offset."""
+
+    synced: bool
+    offset_ms: Optional[float] = None
+    uncertainty_ms: Optional[float] = None
+    drift_ppm: float = 0.0
+    samples: int = 0
+    rejected: int = 0
+    min_rtt_ms: Optional[float] = None
+    last_sample: Optional[datetime] = None
+
+
+class PoolMemberAPI(BaseModel):
+    """API response model for one connection of the client pool."""
+
+    client_id: int
+    workload: str
+    connected: bool
+    healthy: bool
+    pending_requests: int
+    routed: int
+    health_failures: int = 0
+    health_rtt_ms: Optional[float] = None
+
+
+class PoolStatsAPI(BaseModel):
+    """API response model for client pool statistics."""
+
+    size: int
+    connected: int
+    healthy: int
+    fallbacks: int
+    members: List[PoolMemberAPI]
+
+
 class HealthResponse(BaseModel):
     """API response model for health check."""
 
     status: str
     version: str
     timestamp: datetime
-    tws_connected: bool
\ No newline at end of file
+    tws_connected: bool
+
+
+class BarSeriesAPI(BaseModel):
+    """API response model for a range of archived bars, stored column-wise."""
+
+    symbol: str
+    bar_size: str
+    time: List[int]
+    open: List[float]
+    high: List[float]
+    low: List[float]
+    close: List[float]
+    volume: List[float]
+    count: List[int]
+
+
+class IndicatorSeriesAPI(BaseModel):
+    """API response model for indicator values aligned with archived bar times."""
+
+    symbol: str
+    bar_size: str
+    time: List[int]
+    values: Dict[str, List[Optional[float]]] = Field(
+        ..., description="Indicator label, e.g. rsi:14, to its values; null while warming up"
+    )
+
+
+class OrderRequestAPI(BaseModel):
+    """API request model for placing a stock order."""
+
+    symbol: str
+    action: str = Field(..., description="BUY or SELL")
+    quantity: float = Field(..., gt=0)
+    order_type: str = Field("MKT", description="MKT, LMT, STP or STP LMT")
+    limit_price: Optional[float] = None
+    stop_price: Optional[float] = None
+    tif: str = "DAY"
+    exchange: str = "SMART"
+    currency: str = "USD"
+
+
+class OrderFillAPI(BaseModel):
+    """API response model for one execution of an order."""
+
+    exec_id: str
+    time: str
+    shares: float
+    price: float
+
+
+class OrderAPI(BaseModel):
+    """API response model for the live state of an order."""
+
+    order_id: int
+    perm_id: Optional[int] = None
+    client_id: Optional[int] = None
+    symbol: str
+    action: str
+    order_type: str
+    quantity: float
+    limit_price: Optional[float] = None
+    stop_price: Optional[float] = None
+    tif: str = ""
+    status: str
+    filled: float = 0.0
+    remaining: float = 0.0
+    avg_fill_price: Optional[float] = None
+    last_fill_price: Optional[float] = None
+    why_held: str = ""
+    error_code: Optional[int] = None
+    error_message: Optional[str] = None
+    submitted_at: datetime
+    updated_at: datetime
+    fills: List[OrderFillAPI] = []
+
+    model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
+
+
+class ContractInfoAPI(BaseModel):
+    """API response model for a resolved contract."""
+
+    con_id: int
+    symbol: str
+    sec_type: str
+    exchange: str
+    primary_exchange: str = ""
+    currency: str
+    local_symbol: str = ""
+    trading_class: str = ""
+    long_name: str = ""
+    min_tick: Optional[float] = None
+    time_zone: str = ""
+    resolved_at: datetime
+
+    model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
+
+
+class OrderBatchRequestAPI(BaseModel):
+    """API request model for placing a basket of orders."""
+
+    orders: List[OrderRequestAPI] = Field(..., min_length=1, max_length=1000)
+
+
+class BatchOrderResultAPI(BaseModel):
+    """API response model for one order of a batch operation, sent as one NDJSON line."""
+
+    index: int
+    order_id: Optional[int] = None
+    success: bool
+    order: Optional[OrderAPI] = None
+    error_message: Optional[str] = None
+
+
+class AccountValueAPI(BaseModel):
+    """API response model for one account value."""
+
+    account: str
+    key: str
+    value: str
+    currency: str = ""
+
+
+class AccountPnLAPI(BaseModel):
+    """API response model for account P&L."""
+
+    account: str
+    daily_pnl: Optional[float] = None
+    unrealized_pnl: Optional[float] = None
+    realized_pnl: Optional[float] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
+
+
+class AccountAPI(BaseModel):
+    """API response model for the cached account state."""
+
+    account: str
+    ready: bool = False
+    account_time: Optional[str] = None
+    values: List[AccountValueAPI] = []
+    pnl: Optional[AccountPnLAPI] = None
+
+
+class PositionAPI(BaseModel):
+    """API response model for a position."""
+
+    account: str
+    con_id: int
+    symbol: str
+    sec_type: str
+    currency: str
+    exchange: str = ""
+    position: float
+    avg_cost: Optional[float] = None
+    market_price: Optional[float] = None
+    market_value: Optional[float] = None
+    unrealized_pnl: Optional[float] = None
+    realized_pnl: Optional[float] = None
+    daily_pnl: Optional[float] = None
+    updated_at: datetime
+
+    model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
+
+
+class ScanRowAPI(BaseModel):
+    """API response model for one ranked contract of a market scanner; rank 0 is the top."""
+
+    rank: int
+    con_id: int
+    symbol: str
+    sec_type: str
+    exchange: str = ""
+    currency: str = ""
+    distance: str = ""
+    benchmark: str = ""
+    projection: str = ""
+
+
+class ScannerResultAPI(BaseModel):
+    """API response model for the full ranking of a scan."""
+
+    scan_code: str
+    instrument: str
+    location: str
+    results: List[ScanRowAPI] = []
+
+
+class OptionChainAPI(BaseModel):
+    """API response model for an option chain snapshot, stored column-wise."""
+
+    symbol: str
+    trading_class: str
+    multiplier: str
+    underlying_price: Optional[float] = None
+    expirations: List[str]
+    strikes: List[float]
+    calls: Dict[str, List[List[Optional[float]]]] = Field(
+        ..., description="Field, e.g. delta, to one row per expiration with one value per strike; null if not sent"
+    )
+    puts: Dict[str, List[List[Optional[float]]]]
+    requested: int
+    completed: int
+    failed: int
+    elapsed_ms: float
+    as_of: datetime
+
+    model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
@@ -0,0 +1,188 @@
+"""
+Application-wide registry owning the backend's TWS connections.
+"""
+
+import asyncio
+import logging
+import os
+from typing import List, Mapping, Optional
+
+from pydantic import BaseModel
+
+from ..tws.async_client import AsyncTWSClient
+from ..tws.bar_aggregator import DEFAULT_BAR_SIZES, BarAggregator
+from ..tws.bar_archive import BarArchive
+from ..tws.clock import ClockSync
+from ..tws.contract_resolver import ContractResolver
+from ..tws.contracts import stock_contract
+from ..tws.market_data import TickSubscription
+from ..tws.orders import OrderManager
+from ..tws.portfolio import PortfolioManager
+from ..tws.pool import ACCOUNT, MARKET_DATA, ORDERS, TWSClientPool
+from ..tws.tick_store import TickStore
+
+logger = logging.getLogger(__name__)
+
+ENV_PREFIX = "IBXTAC_"
+
+
+class RegistrySettings(BaseModel):
+    """Connection settings for the backend's TWS client pool."""
+
+    host: str = "127.0.0.1"
+    port: int = 7500
+    first_client_id: int = 1
+    warm_start: bool = False
+    presubscribe: List[str] = []
+    prewarm_contracts: List[str] = []
+    contract_db: Optional[str] = None
+    archive_dir: Optional[str] = None
+    bar_sizes: List[str] = list(DEFAULT_BAR_SIZES)
+    drain_timeout: float = 10.0
+    clock_interval: float = 30.0
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "RegistrySettings":
+        """
+        Read settings from IBXTAC_* environment variables.
+
+        IBXTAC_TWS_HOST, IBXTAC_TWS_PORT, IBXTAC_TWS_CLIENT_ID,
+        IBXTAC_WARM_START (1/true/yes), IBXTAC_PRESUBSCRIBE and
+        IBXTAC_PREWARM_CONTRACTS (comma-separated symbols), IBXTAC_DRAIN_TIMEOUT
+        and IBXTAC_CLOCK_INTERVAL (seconds), IBXTAC_CONTRACT_DB (SQLite
+        file of resolved contracts), IBXTAC_ARCHIVE_DIR (bar archive
+        directory) and IBXTAC_BAR_SIZES (comma-separated live bar sizes,
+        e.g. "1 secs,1 min,500 volume") override the defaults.
+        """
+        values = {}
+        for field, name in (
+            ("host", "TWS_HOST"),
+            ("port", "TWS_PORT"),
+            ("first_client_id", "TWS_CLIENT_ID"),
+            ("drain_timeout", "DRAIN_TIMEOUT"),
+            ("clock_interval", "CLOCK_INTERVAL"),
+            ("contract_db", "CONTRACT_DB"),
+            ("archive_dir", "ARCHIVE_DIR"),
+        ):
+            if ENV_PREFIX + name in environ:
+                values[field] = environ[ENV_PREFIX + name]
+        if ENV_PREFIX + "WARM_START" in environ:
+            values["warm_start"] = environ[ENV_PREFIX + "WARM_START"].strip().lower() in ("1", "true", "yes")
+        for field, name in (("presubscribe", "PRESUBSCRIBE"), ("prewarm_contracts", "PREWARM_CONTRACTS")):
+            if ENV_PREFIX + name in environ:
+                values[field] = [s.strip().upper() for s in environ[ENV_PREFIX + name].split(",") if s.strip()]
+        if ENV_PREFIX + "BAR_SIZES" in environ:
+            values["bar_sizes"] = [s.strip() for s in environ[ENV_PREFIX + "BAR_SIZES"].split(",") if s.strip()]
+        return cls(**values)
+
+
+class ClientRegistry:
+    """
+    Owns the single TWS connection pool shared by every router.
+
+    The application lifespan creates the registry, optionally warm-starts
+    it (connect and pre-subscribe before traffic is accepted) and stops it
+    on shutdown, draining in-flight TWS requests before disconnecting.
+    """
+
+    def __init__(self, settings: Optional[RegistrySettings] = None, pool: Optional[TWSClientPool] = None):
+        """
+        Initialize client registry.
+
+        Args:
+            settings: Connection settings; defaults to RegistrySettings()
+            pool: Existing pool to manage; one is built from settings if omitted
+        """
+        self.settings = settings if settings is not None else RegistrySettings()
+        self.pool = pool if pool is not None else TWSClientPool(
+            host=self.settings.host,
+            port=self.settings.port,
+            first_client_id=self.settings.first_client_id,
+            contract_db=self.settings.contract_db,
+            bar_sizes=self.settings.bar_sizes,
+            archive=BarArchive(self.settings.archive_dir) if self.settings.archive_dir else None,
+        )
+        # Order state lives on one connection, so order traffic is pinned to it
+        self.orders: OrderManager = self.pool.client(ORDERS).orders
+        self.contracts: ContractResolver = self.pool.client(ACCOUNT).contracts
+        self.portfolio: PortfolioManager = self.pool.client(ACCOUNT).portfolio
+        self.bars: BarAggregator = self.pool.client(MARKET_DATA).bars
+        self.archive: BarArchive = self.pool.archive
+        self.tick_store: TickStore = self.pool.client(MARKET_DATA).tick_store
+        self.clock = ClockSync(self.pool.client(ACCOUNT), interval=self.settings.clock_interval)
+        self.accepting = True
+        self._presubscriptions: List[TickSubscription] = []
+
+    def client(self, workload: str) -> AsyncTWSClient:
+        """Awaitable client that should serve a workload class."""
+        return self.pool.async_client(workload)
+
+    def is_connected(self) -> bool:
+        return self.pool.is_connected()
+
+    def in_flight(self) -> int:
+        """TWS requests still waiting for a reply across the pool."""
+        return sum(len(member.client.requests) for member in self.pool.members)
+
+    async def start(self) -> None:
+        """Start clock sync and warm-start the pool and contract cache if configured."""
+        self.accepting = True
+        # Samples once a connection is up, however it was opened
+        self.clock.start()
+        if not self.settings.warm_start:
+            return
+
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, self.pool.connect):
+            logger.warning("Warm start could not connect every TWS connection")
+        self.portfolio.start()
+
+        # Resolve up front so order and market data paths never wait on a lookup
+        symbols = list(dict.fromkeys(self.settings.presubscribe + self.settings.prewarm_contracts))
+        if symbols:
+            await loop.run_in_executor(None, self.contracts.prewarm, symbols)
+
+        market_data = self.pool.client(MARKET_DATA)
+        for symbol in self.settings.presubscribe:
+            try:
+                # A one-tick queue keeps the line open without buffering
+                self._presubscriptions.append(
+                    market_data.market_data.subscribe(stock_contract(symbol), maxsize=1)
+                )
+            except ConnectionError as e:
+                logger.warning(f"Could not pre-subscribe {symbol}: {e}")
+        if self._presubscriptions:
+            logger.info(f"Pre-subscribed market data for {[s.symbol for s in self._presubscriptions]}")
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stop accepting new requests and wait for in-flight ones to finish.
+
+        Args:
+            timeout: Seconds to wait; defaults to settings.drain_timeout
+
+        Returns:
+            True if every in-flight request finished in time
+        """
+        self.accepting = False
+        timeout = self.settings.drain_timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.in_flight() and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+
+        remaining = self.in_flight()
+        if remaining:
+            logger.warning(f"Abandoning {remaining} in-flight TWS requests after {timeout}s")
+        return remaining == 0
+
+    async def stop(self) -> None:
+        """Drain in-flight requests, release subscriptions and disconnect."""
+        await self.drain()
+        self.portfolio.stop()
+        for subscription in self._presubscriptions:
+            subscription.close()
+        self._presubscriptions = []
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.clock.stop)
+        await loop.run_in_executor(None, self.pool.disconnect)
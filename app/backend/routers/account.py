@@ -0,0 +1,53 @@
+"""
+Account API router serving account values, P&L and positions from the cache.
+"""
+
+import logging
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from .tws import get_portfolio
+from ..models import AccountAPI, PositionAPI
+from ...tws.portfolio import PortfolioManager
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Account"])
+
+
+@router.get("/account", response_model=AccountAPI)
+async def get_account(portfolio: PortfolioManager = Depends(get_portfolio)) -> AccountAPI:
+    """
+    Get account values and P&L.
+
+    Served from the account cache kept current by TWS subscriptions, so no
+    TWS request is made per call. ready is false until the first account
+    download has completed.
+
+    Returns:
+        AccountAPI: Cached account state
+    """
+    state = portfolio.account_state()
+    if not state.ready and not portfolio.start():
+        raise HTTPException(status_code=503, detail="Not connected to TWS")
+    return AccountAPI(**state.model_dump())
+
+
+@router.get("/positions", response_model=List[PositionAPI])
+async def get_positions(
+    symbol: str = Query(None, description="Only include positions in this symbol"),
+    portfolio: PortfolioManager = Depends(get_portfolio),
+) -> List[PositionAPI]:
+    """
+    Get open positions with market value and P&L.
+
+    Returns:
+        List[PositionAPI]: Cached open positions
+    """
+    if not portfolio.ready and not portfolio.start():
+        raise HTTPException(status_code=503, detail="Not connected to TWS")
+    positions = portfolio.positions()
+    if symbol:
+        positions = [p for p in positions if p.symbol == symbol.upper()]
+    return [PositionAPI(**position.model_dump()) for position in positions]
@@ -0,0 +1,168 @@
+"""
+Historical bar API router serving slices of the bar archive.
+"""
+
+import logging
+import math
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from .tws import get_client_registry
+from ..models import BarSeriesAPI, IndicatorSeriesAPI
+from ..registry import ClientRegistry
+from ...tws.bar_aggregator import bars_from_ticks
+from ...tws.bar_archive import HISTORICAL, SOURCES, BarArchive, BarFileError
+from ...tws.indicators import parse_indicator
+from ...tws.tick_store import TickStore
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/bars", tags=["Bars"])
+
+# Indicator source resampling the ticks held in memory instead of archived bars
+TICK_SOURCE = "ticks"
+
+def get_bar_archive(registry: ClientRegistry = Depends(get_client_registry)) -> BarArchive:
+    """Dependency to get the bar archive the registry's clients write to."""
+    return registry.archive
+
+
+def get_tick_store(registry: ClientRegistry = Depends(get_client_registry)) -> TickStore:
+    """Dependency to get the tick store the market data connection records into."""
+    return registry.tick_store
+
+
+@router.get("/{symbol}", response_model=BarSeriesAPI)
+async def get_bars(
+    symbol: str,
+    bar_size: str = Query("1 min", description="TWS bar size, e.g. '1 min'"),
+    start: Optional[datetime] = Query(None, description="First bar time to include"),
+    end: Optional[datetime] = Query(None, description="Last bar time to include"),
+    source: str = Query(HISTORICAL, description="'historical' for TWS history, 'live' for bars built from the stream"),
+    archive: BarArchive = Depends(get_bar_archive),
+) -> BarSeriesAPI:
+    """
+    Get archived bars for a symbol within a date range.
+
+    The range is located by binary search in the memory-mapped bar file,
+    so only the requested slice is read from disk.
+
+    Returns:
+        BarSeriesAPI: Bars as parallel columns
+    """
+    if source not in SOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown bar source: {source!r}")
+    if not archive.exists(symbol, bar_size, source):
+        raise HTTPException(status_code=404, detail=f"No {source} {bar_size} bars archived for {symbol.upper()}")
+
+    try:
+        records = archive.series(symbol, bar_size, source).read(start, end)
+    except BarFileError as e:
+        logger.error(f"Error reading bars for {symbol}: {e}")
+        raise HTTPException(status_code=500, detail="Bar archive is unreadable")
+
+    return BarSeriesAPI(
+        symbol=symbol.upper(),
+        bar_size=bar_size,
+        time=records["time"].tolist(),
+        open=records["open"].tolist(),
+        high=records["high"].tolist(),
+        low=records["low"].tolist(),
+        close=records["close"].tolist(),
+        volume=records["volume"].tolist(),
+        count=records["count"].tolist(),
+    )
+
+
+@router.get("/{symbol}/indicators", response_model=IndicatorSeriesAPI)
+async def get_indicators(
+    symbol: str,
+    indicators: str = Query("sma:20", description="Comma-separated indicators, e.g. 'sma:20,ema:50,rsi:14,atr:14,vwap'"),
+    bar_size: str = Query("1 min", description="TWS bar size, e.g. '1 min'"),
+    start: Optional[datetime] = Query(None, description="First bar time to include"),
+    end: Optional[datetime] = Query(None, description="Last bar time to include"),
+    source: str = Query(
+        HISTORICAL,
+        description="'historical' for TWS history, 'live' for bars built from the stream, "
+        "'ticks' for time bars resampled from today's stored ticks",
+    ),
+    archive: BarArchive = Depends(get_bar_archive),
+    tick_store: TickStore = Depends(get_tick_store),
+) -> IndicatorSeriesAPI:
+    """
+    Get indicator series for archived bars within a date range.
+
+    Indicators are computed in batch over the bar columns. Bars before
+    start are read as warm-up so values at the start of the range match
+    those of an unbounded history. VWAP is anchored at start. With the
+    "ticks" source the bars are resampled from the tick store, so the
+    series runs up to the latest trade, including the bar still open.
+
+    Returns:
+        IndicatorSeriesAPI: Bar times and one value list per indicator
+    """
+    try:
+        specs = [parse_indicator(text) for text in indicators.split(",") if text.strip()]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not specs:
+        raise HTTPException(status_code=400, detail="No indicators requested")
+    if source == TICK_SOURCE:
+        records, first = _tick_bars(tick_store, symbol, bar_size, start, end)
+    else:
+        records, first = _archived_bars(archive, symbol, bar_size, start, end, source)
+
+    values = {}
+    for spec in specs:
+        offset = 0 if spec.kind == "vwap" else min(first, spec.warmup)
+        computed = spec.compute(records[first - offset:])[offset:]
+        values[spec.name] = [None if math.isnan(value) else value for value in computed.tolist()]
+
+    return IndicatorSeriesAPI(
+        symbol=symbol.upper(),
+        bar_size=bar_size,
+        time=records["time"][first:].tolist(),
+        values=values,
+    )
+
+
+def _archived_bars(
+    archive: BarArchive, symbol: str, bar_size: str,
+    start: Optional[datetime], end: Optional[datetime], source: str,
+) -> Tuple[np.ndarray, int]:
+    """Read archived bars up to end, with the index of the first bar at or after start."""
+    if source not in SOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown bar source: {source!r}")
+    if not archive.exists(symbol, bar_size, source):
+        raise HTTPException(status_code=404, detail=f"No {source} {bar_size} bars archived for {symbol.upper()}")
+
+    try:
+        series = archive.series(symbol, bar_size, source)
+        records = series.read(None, end)
+        first = min(series.position(start), len(records)) if start is not None else 0
+    except BarFileError as e:
+        logger.error(f"Error reading bars for {symbol}: {e}")
+        raise HTTPException(status_code=500, detail="Bar archive is unreadable")
+    return records, first
+
+
+def _tick_bars(
+    tick_store: TickStore, symbol: str, bar_size: str,
+    start: Optional[datetime], end: Optional[datetime],
+) -> Tuple[np.ndarray, int]:
+    """Resample stored ticks into bars up to end, with the index of the first bar at or after start."""
+    buffer = tick_store.buffer(symbol.upper())
+    if buffer is None:
+        raise HTTPException(status_code=404, detail=f"No ticks stored for {symbol.upper()}")
+
+    try:
+        records = bars_from_ticks(buffer.snapshot(), bar_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if end is not None:
+        records = records[records["time"] <= int(end.timestamp())]
+    first = int(np.searchsorted(records["time"], start.timestamp())) if start is not None else 0
+    return records, first
@@ -0,0 +1,81 @@
+"""
+Option chain API router serving cached chain snapshots.
+"""
+
+import logging
+import math
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from .tws import get_market_data_client
+from ..models import OptionChainAPI
+from ...tws.async_client import AsyncTWSClient
+from ...tws.errors import TWSRequestError
+from ...tws.options import FIELDS, OptionChain
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/options", tags=["Options"])
+
+
+def chain_columns(chain: OptionChain, right: str) -> Dict[str, List[List[Optional[float]]]]:
+    """Every field of one right as expiry x strike lists, NaN as None."""
+    columns = {}
+    for field in FIELDS:
+        values = chain.column(field, right)
+        columns[field] = np.where(np.isnan(values), None, values).tolist()
+    return columns
+
+
+@router.get("/{symbol}/chain", response_model=OptionChainAPI)
+async def get_option_chain(
+    symbol: str,
+    expirations: str = Query("", description="Comma-separated expirations as YYYYMMDD; defaults to the nearest few"),
+    min_strike: Optional[float] = Query(None, description="Lowest strike included"),
+    max_strike: Optional[float] = Query(None, description="Highest strike included"),
+    tws_client: AsyncTWSClient = Depends(get_market_data_client),
+) -> OptionChainAPI:
+    """
+    Get bid, ask, last, implied volatility and greeks for a slice of an option chain.
+
+    Each field is a table with one row per expiration and one column per
+    strike. Chains are snapshotted with a bounded number of concurrent
+    requests and served from memory for a few seconds afterwards, so
+    repeated polls do not reach TWS.
+
+    Returns:
+        OptionChainAPI: The chain snapshot
+    """
+    if not tws_client.is_connected():
+        raise HTTPException(status_code=503, detail="Not connected to TWS")
+
+    wanted = [expiry.strip() for expiry in expirations.split(",") if expiry.strip()]
+    try:
+        chain = await tws_client.option_chain(symbol, wanted or None, min_strike, max_strike)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TWSRequestError as e:
+        raise HTTPException(status_code=404, detail=e.error_string)
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return OptionChainAPI(
+        symbol=chain.symbol,
+        trading_class=chain.trading_class,
+        multiplier=chain.multiplier,
+        underlying_price=None if math.isnan(chain.underlying_price) else chain.underlying_price,
+        expirations=chain.expirations,
+        strikes=chain.strikes.tolist(),
+        calls=chain_columns(chain, "C"),
+        puts=chain_columns(chain, "P"),
+        requested=chain.requested,
+        completed=chain.completed,
+        failed=chain.failed,
+        elapsed_ms=chain.elapsed * 1000,
+        as_of=datetime.fromtimestamp(chain.created_at),
+    )
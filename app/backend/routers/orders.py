@@ -0,0 +1,189 @@
+"""
+Order API router for placing, cancelling and inspecting orders.
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator, Iterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from .tws import get_order_manager
+from ..models import BatchOrderResultAPI, OrderAPI, OrderBatchRequestAPI, OrderRequestAPI
+from ...tws.contracts import stock_contract
+from ...tws.models import BatchOrderResult
+from ...tws.orders import OrderManager, build_order
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/orders", tags=["Orders"])
+
+
+def stream_results(results: Iterator[BatchOrderResult]) -> StreamingResponse:
+    """
+    Stream batch results as NDJSON, one line per order as it is sent.
+
+    The iteration runs on a worker thread and always runs to the end, so a
+    client that disconnects early cannot leave a basket half sent.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Optional[BatchOrderResult]]" = asyncio.Queue()
+
+    def produce() -> None:
+        try:
+            for result in results:
+                loop.call_soon_threadsafe(queue.put_nowait, result)
+        except Exception:
+            logger.exception("Error in batch order operation")
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    loop.run_in_executor(None, produce)
+
+    async def lines() -> AsyncIterator[str]:
+        while True:
+            result = await queue.get()
+            if result is None:
+                break
+            yield BatchOrderResultAPI(**result.model_dump()).model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("", response_model=OrderAPI, status_code=201)
+async def place_order(
+    request: OrderRequestAPI,
+    orders: OrderManager = Depends(get_order_manager),
+) -> OrderAPI:
+    """
+    Place a stock order.
+
+    The order id is allocated locally and the order is written to TWS
+    without waiting for a reply; follow its progress with GET
+    /api/orders/{order_id} or the /ws/orders stream.
+
+    Returns:
+        OrderAPI: The order as submitted
+    """
+    try:
+        order = build_order(
+            request.action, request.quantity, request.order_type,
+            request.limit_price, request.stop_price, request.tif,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    contract = stock_contract(request.symbol, request.exchange, request.currency)
+    try:
+        state = orders.place(contract, order)
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return OrderAPI(**state.model_dump())
+
+
+@router.post("/batch", response_class=StreamingResponse)
+async def place_order_batch(
+    request: OrderBatchRequestAPI,
+    orders: OrderManager = Depends(get_order_manager),
+) -> StreamingResponse:
+    """
+    Place a basket of orders in one call.
+
+    The whole basket is validated before anything is sent. Order ids are
+    reserved in one block and placeOrder messages are queued back to back
+    for the outbound scheduler, which paces them under IB's 50 messages per
+    second limit ahead of market data and historical requests. The response streams one
+    BatchOrderResultAPI per order as NDJSON, in basket order.
+
+    Returns:
+        StreamingResponse: application/x-ndjson results
+    """
+    built = []
+    errors = []
+    for index, item in enumerate(request.orders):
+        try:
+            order = build_order(
+                item.action, item.quantity, item.order_type, item.limit_price, item.stop_price, item.tif,
+            )
+        except ValueError as e:
+            errors.append(f"orders[{index}]: {e}")
+            continue
+        built.append((stock_contract(item.symbol, item.exchange, item.currency), order))
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+
+    try:
+        results = orders.place_batch(built)
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return stream_results(results)
+
+
+@router.post("/cancel-all", response_class=StreamingResponse)
+async def cancel_all_orders(
+    global_cancel: bool = Query(
+        False, description="Use reqGlobalCancel, also cancelling orders of other clients and TWS"
+    ),
+    orders: OrderManager = Depends(get_order_manager),
+) -> StreamingResponse:
+    """
+    Cancel every working order.
+
+    Sends a cancelOrder per working order of this client, or a single
+    reqGlobalCancel with global_cancel=true. The response streams one
+    BatchOrderResultAPI per working order as NDJSON.
+
+    Returns:
+        StreamingResponse: application/x-ndjson results
+    """
+    try:
+        results = orders.cancel_all(global_cancel=global_cancel)
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return stream_results(results)
+
+
+@router.get("", response_model=List[OrderAPI])
+async def list_orders(
+    open_only: bool = Query(False, description="Only include working orders"),
+    orders: OrderManager = Depends(get_order_manager),
+) -> List[OrderAPI]:
+    """
+    List tracked orders in submission order.
+
+    Returns:
+        List[OrderAPI]: Live state of each order
+    """
+    return [OrderAPI(**state.model_dump()) for state in orders.orders(open_only=open_only)]
+
+
+@router.get("/{order_id}", response_model=OrderAPI)
+async def get_order(order_id: int, orders: OrderManager = Depends(get_order_manager)) -> OrderAPI:
+    """
+    Get the live state of an order.
+
+    Returns:
+        OrderAPI: The order's status, fills and last error
+    """
+    state = orders.get(order_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Unknown order {order_id}")
+    return OrderAPI(**state.model_dump())
+
+
+@router.delete("/{order_id}", response_model=OrderAPI)
+async def cancel_order(order_id: int, orders: OrderManager = Depends(get_order_manager)) -> OrderAPI:
+    """
+    Request cancellation of a working order.
+
+    Returns:
+        OrderAPI: The order, PendingCancel until TWS confirms
+    """
+    try:
+        state = orders.cancel(order_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown order {order_id}")
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return OrderAPI(**state.model_dump())
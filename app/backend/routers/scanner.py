@@ -0,0 +1,93 @@
+"""
+Market scanner API router serving full scan rankings.
+"""
+
+import asyncio
+import logging
+from typing import Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from .tws import get_market_data_client
+from ..models import ScannerResultAPI, ScanRowAPI
+from ...tws.async_client import AsyncTWSClient
+from ...tws.errors import TWSRequestError
+from ...tws.scanner import DEFAULT_INSTRUMENT, DEFAULT_LOCATION, MAX_ROWS, ScanParams
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/scanner", tags=["Scanner"])
+
+# Seconds to wait for the first ranking of a scan that is not already running
+SCAN_TIMEOUT = 15.0
+
+
+def parse_filters(text: str) -> Dict[str, str]:
+    """
+    Parse generic scanner filters given as "tag=value,tag=value".
+
+    Raises:
+        ValueError: If an entry has no value
+    """
+    filters: Dict[str, str] = {}
+    for entry in text.split(","):
+        if not entry.strip():
+            continue
+        tag, separator, value = entry.partition("=")
+        if not separator or not tag.strip() or not value.strip():
+            raise ValueError(f"Invalid scanner filter: {entry!r}")
+        filters[tag.strip()] = value.strip()
+    return filters
+
+
+def scan_params(scan_code: str, instrument: str, location: str, rows: int, filters: str) -> ScanParams:
+    """
+    Build scan parameters from query values.
+
+    Raises:
+        ValueError: If a value is invalid
+    """
+    return ScanParams.create(scan_code, instrument, location, rows, parse_filters(filters))
+
+
+@router.get("/{scan_code}", response_model=ScannerResultAPI)
+async def get_scan(
+    scan_code: str,
+    instrument: str = Query(DEFAULT_INSTRUMENT, description="Instrument type, e.g. 'STK'"),
+    location: str = Query(DEFAULT_LOCATION, description="Location code, e.g. 'STK.US.MAJOR'"),
+    rows: int = Query(MAX_ROWS, ge=1, le=MAX_ROWS, description="Number of ranked rows"),
+    filters: str = Query("", description="Generic filters, e.g. 'priceAbove=5,volumeAbove=100000'"),
+    tws_client: AsyncTWSClient = Depends(get_market_data_client),
+) -> ScannerResultAPI:
+    """
+    Get the full current ranking of a scan.
+
+    A scan already streamed to /ws/scanner is answered from its cached
+    ranking; otherwise the scan is run once for this request.
+
+    Returns:
+        ScannerResultAPI: Ranked rows, top first
+    """
+    try:
+        params = scan_params(scan_code, instrument, location, rows, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not tws_client.is_connected():
+        raise HTTPException(status_code=503, detail="Not connected to TWS")
+
+    try:
+        results = await tws_client.scan(params, timeout=SCAN_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timeout waiting for scanner results")
+    except TWSRequestError as e:
+        raise HTTPException(status_code=400, detail=e.error_string)
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return ScannerResultAPI(
+        scan_code=params.scan_code,
+        instrument=params.instrument,
+        location=params.location,
+        results=[ScanRowAPI(**row.model_dump()) for row in results],
+    )
@@ -0,0 +1,409 @@
+"""
+WebSocket streaming router for live TWS data.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+from ibapi.ticktype import TickTypeEnum
+
+from .scanner import scan_params
+from .tws import get_market_data_client, get_order_manager, get_portfolio
+from ...tws.async_client import AsyncTWSClient
+from ...tws.contracts import stock_contract
+from ...tws.depth import DEFAULT_ROWS
+from ...tws.market_data import Tick
+from ...tws.orders import OrderManager
+from ...tws.portfolio import PortfolioManager
+from ...tws.scanner import DEFAULT_INSTRUMENT, DEFAULT_LOCATION, MAX_ROWS
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/ws", tags=["Streaming"])
+
+# Per-symbol tick buffer for one connection; bounds memory for slow clients
+TICK_QUEUE_SIZE = 256
+
+# Default and smallest spacing in seconds between order book messages
+DEPTH_INTERVAL = 0.1
+MIN_DEPTH_INTERVAL = 0.01
+
+
+Message = Dict[str, Any]
+
+
+class StreamError(Exception):
+    """Raised by a stream payload to report an error to the client and close the socket."""
+
+
+def coalesce_ticks(ticks: List[Tick]) -> Dict[str, Dict[str, Any]]:
+    """
+    Collapse queued ticks to the latest value of each field per symbol.
+
+    Args:
+        ticks: Ticks in arrival order
+
+    Returns:
+        Mapping of symbol to {field name: latest value, "time": last update}
+    """
+    updates: Dict[str, Dict[str, Any]] = {}
+    for tick in ticks:
+        fields = updates.setdefault(tick.symbol, {})
+        value = tick.price if tick.price is not None else tick.size
+        fields[TickTypeEnum.to_str(tick.field).lower()] = value
+        fields["time"] = tick.time
+    return updates
+
+
+async def accept_symbols(websocket: WebSocket, symbols: str, tws_client: AsyncTWSClient) -> Optional[List[str]]:
+    """
+    Accept the socket and parse the requested symbols.
+
+    Returns:
+        The upper-cased symbols, or None once the socket was closed because
+        none were requested or TWS is not connected
+    """
+    await websocket.accept()
+
+    symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    if not symbol_list:
+        await websocket.close(code=1008, reason="No symbols requested")
+        return None
+
+    if not await require_connection(websocket, tws_client):
+        return None
+    return symbol_list
+
+
+async def require_connection(websocket: WebSocket, tws_client: AsyncTWSClient) -> bool:
+    """Report an error and close the socket if TWS is not connected."""
+    if tws_client.is_connected():
+        return True
+    await websocket.send_json({"type": "error", "message": "Not connected to TWS"})
+    await websocket.close(code=1011)
+    return False
+
+
+async def run_stream(
+    websocket: WebSocket,
+    name: str,
+    subscribe: Callable[[Callable[[], None]], Iterator[Any]],
+    payload: Callable[[List[Any]], Optional[Message]],
+    snapshot: Optional[Callable[[List[Any]], Message]] = None,
+    interval: float = 0.0,
+    on_text: Optional[Callable[[str], bool]] = None,
+) -> None:
+    """
+    Push messages built from TWS subscriptions until the client disconnects.
+
+    The reader thread only sets a wakeup event; messages are built and sent
+    on the event loop, so updates arriving while a send is in progress are
+    folded into the next payload instead of queueing up.
+
+    Args:
+        websocket: Accepted socket
+        name: What is streamed, for logging
+        subscribe: Generator yielding each subscription it opens, given a
+            thread-safe notify callback; every one yielded is closed when the
+            stream ends, even if a later one fails to open
+        payload: Builds the next message from the subscriptions, or returns
+            None if there is nothing to send; called once after subscribing
+            and after every notification. Raising StreamError sends the error
+            and closes the socket.
+        snapshot: Builds a message sent once before any payload
+        interval: Minimum seconds between payload messages
+        on_text: Called with each text the client sends; returning True
+            builds a payload without waiting for a notification
+    """
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+
+    def notify() -> None:
+        loop.call_soon_threadsafe(wakeup.set)
+
+    subscriptions: List[Any] = []
+    try:
+        for subscription in subscribe(notify):
+            subscriptions.append(subscription)
+        logger.info(f"Streaming {name}")
+        if snapshot is not None:
+            await websocket.send_json(snapshot(subscriptions))
+
+        async def send_updates() -> None:
+            while True:
+                try:
+                    message = payload(subscriptions)
+                except StreamError as e:
+                    await websocket.send_json({"type": "error", "message": str(e)})
+                    await websocket.close(code=1011)
+                    return
+                if message is not None:
+                    await websocket.send_json(message)
+                    if interval:
+                        # Updates arriving meanwhile are folded into the next message
+                        await asyncio.sleep(interval)
+                await wakeup.wait()
+                wakeup.clear()
+
+        async def watch_disconnect() -> None:
+            while True:
+                text = await websocket.receive_text()
+                if on_text is not None and on_text(text):
+                    wakeup.set()
+
+        tasks = [asyncio.ensure_future(send_updates()), asyncio.ensure_future(watch_disconnect())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                raise exc
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Error streaming {name}: {e}")
+        try:
+            await websocket.close(code=1011)
+        except RuntimeError:
+            # The socket was already closed
+            pass
+    finally:
+        for subscription in subscriptions:
+            subscription.close()
+        logger.info(f"Stopped streaming {name}")
+
+
+@router.websocket("/ticks")
+async def stream_ticks(
+    websocket: WebSocket,
+    symbols: str = Query(..., description="Comma-separated symbols to stream"),
+    tws_client: AsyncTWSClient = Depends(get_market_data_client),
+) -> None:
+    """
+    Stream live tick updates for the requested symbols.
+
+    When the client falls behind, queued ticks are coalesced so it receives
+    the latest value per symbol rather than a backlog, and the next update
+    is not sent until the previous one was written to the socket.
+    """
+    symbol_list = await accept_symbols(websocket, symbols, tws_client)
+    if symbol_list is None:
+        return
+
+    def subscribe(notify: Callable[[], None]) -> Iterator[Any]:
+        for symbol in symbol_list:
+            yield tws_client.market_data.subscribe(stock_contract(symbol), maxsize=TICK_QUEUE_SIZE, notify=notify)
+
+    def payload(subscriptions: List[Any]) -> Optional[Message]:
+        ticks: List[Tick] = []
+        for subscription in subscriptions:
+            if subscription.error is not None:
+                raise StreamError(f"{subscription.symbol}: {subscription.error}")
+            ticks.extend(subscription.drain())
+        return {"type": "ticks", "data": coalesce_ticks(ticks)} if ticks else None
+
+    await run_stream(websocket, f"ticks for {symbol_list}", subscribe, payload)
+
+
+@router.websocket("/bars")
+async def stream_bars(
+    websocket: WebSocket,
+    symbols: str = Query(..., description="Comma-separated symbols to stream"),
+    bar_size: str = Query("1 min", description="Bar size, e.g. '15 secs', '1 min' or '500 volume'"),
+    tws_client: AsyncTWSClient = Depends(get_market_data_client),
+) -> None:
+    """
+    Push each live bar of the requested symbols as it closes.
+
+    Bars are aggregated from the market data stream, which is kept open
+    for the symbols while the socket is connected.
+    """
+    symbol_list = await accept_symbols(websocket, symbols, tws_client)
+    if symbol_list is None:
+        return
+
+    try:
+        spec = tws_client.bars.add_bar_size(bar_size)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    def subscribe(notify: Callable[[], None]) -> Iterator[Any]:
+        yield tws_client.bars.subscribe(symbol_list, [spec.bar_size], notify=notify)
+        # The bars only need the stream kept open, not the ticks themselves
+        for symbol in symbol_list:
+            yield tws_client.market_data.subscribe(stock_contract(symbol), maxsize=1)
+
+    def payload(subscriptions: List[Any]) -> Optional[Message]:
+        closed = [bar._asdict() for bar in subscriptions[0].drain()]
+        return {"type": "bars", "data": closed} if closed else None
+
+    await run_stream(websocket, f"{spec.bar_size} bars for {symbol_list}", subscribe, payload)
+
+
+@router.websocket("/depth")
+async def stream_depth(
+    websocket: WebSocket,
+    symbols: str = Query(..., description="Comma-separated symbols to stream"),
+    rows: int = Query(DEFAULT_ROWS, ge=1, le=50, description="Levels per side"),
+    smart: bool = Query(False, description="Aggregate depth across exchanges"),
+    interval: float = Query(DEPTH_INTERVAL, description="Minimum seconds between messages"),
+    tws_client: AsyncTWSClient = Depends(get_market_data_client),
+) -> None:
+    """
+    Stream order books for the requested symbols.
+
+    The stream opens with a snapshot of every book. After that, at most
+    one message is sent per interval, holding for each changed book only
+    the levels from the shallowest changed one down ("from" per side);
+    the client replaces its copy of that side from there on.
+    """
+    symbol_list = await accept_symbols(websocket, symbols, tws_client)
+    if symbol_list is None:
+        return
+
+    def subscribe(notify: Callable[[], None]) -> Iterator[Any]:
+        for symbol in symbol_list:
+            yield tws_client.depth.subscribe(stock_contract(symbol), rows=rows, smart=smart, notify=notify)
+
+    def snapshot(subscriptions: List[Any]) -> Message:
+        return {"type": "snapshot", "data": {s.symbol: s.snapshot() for s in subscriptions}}
+
+    def payload(subscriptions: List[Any]) -> Optional[Message]:
+        diffs = {}
+        for subscription in subscriptions:
+            diff = subscription.diff()
+            if diff is not None:
+                diffs[subscription.symbol] = diff
+        return {"type": "depth", "data": diffs} if diffs else None
+
+    await run_stream(
+        websocket, f"market depth for {symbol_list}", subscribe, payload,
+        snapshot=snapshot, interval=max(interval, MIN_DEPTH_INTERVAL),
+    )
+
+
+@router.websocket("/scanner")
+async def stream_scanner(
+    websocket: WebSocket,
+    scan_code: str = Query(..., description="Scan to run, e.g. 'TOP_PERC_GAIN'"),
+    instrument: str = Query(DEFAULT_INSTRUMENT, description="Instrument type, e.g. 'STK'"),
+    location: str = Query(DEFAULT_LOCATION, description="Location code, e.g. 'STK.US.MAJOR'"),
+    rows: int = Query(MAX_ROWS, ge=1, le=MAX_ROWS, description="Number of ranked rows"),
+    filters: str = Query("", description="Generic filters, e.g. 'priceAbove=5,volumeAbove=100000'"),
+    tws_client: AsyncTWSClient = Depends(get_market_data_client),
+) -> None:
+    """
+    Stream ranking changes of a market scan.
+
+    The stream opens with the full ranking once TWS has sent it. After
+    that, each message carries only the rows that entered, the conIds that
+    exited and the rows that moved since the previous message; refreshes
+    that change nothing are not sent. Sending the text "snapshot" asks for
+    the full ranking again.
+    """
+    await websocket.accept()
+
+    try:
+        params = scan_params(scan_code, instrument, location, rows, filters)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    if not await require_connection(websocket, tws_client):
+        return
+
+    resync = True
+
+    def subscribe(notify: Callable[[], None]) -> Iterator[Any]:
+        yield tws_client.scanner.subscribe(params, notify=notify)
+
+    def payload(subscriptions: List[Any]) -> Optional[Message]:
+        nonlocal resync
+        subscription = subscriptions[0]
+        if subscription.error is not None:
+            raise StreamError(subscription.error)
+        if not subscription.ready.done():
+            return None
+        if resync:
+            resync = False
+            rows = [row.model_dump() for row in subscription.snapshot()]
+            return {"type": "snapshot", "scan_id": subscription.scan_id, "data": rows}
+        diff = subscription.diff()
+        return {"type": "scanner", "data": diff.model_dump()} if diff is not None else None
+
+    def on_text(text: str) -> bool:
+        nonlocal resync
+        if text != "snapshot":
+            return False
+        resync = True
+        return True
+
+    await run_stream(websocket, f"scanner {params.scan_code}", subscribe, payload, on_text=on_text)
+
+
+@router.websocket("/orders")
+async def stream_orders(
+    websocket: WebSocket,
+    orders: OrderManager = Depends(get_order_manager),
+) -> None:
+    """
+    Push order state changes as they happen.
+
+    The stream opens with a snapshot of the working orders. After that,
+    each message carries the latest state of every order that changed
+    since the previous message.
+    """
+    await websocket.accept()
+
+    def subscribe(notify: Callable[[], None]) -> Iterator[Any]:
+        yield orders.subscribe(notify=notify)
+
+    def snapshot(subscriptions: List[Any]) -> Message:
+        return {"type": "snapshot", "data": [s.model_dump(mode="json") for s in orders.orders(open_only=True)]}
+
+    def payload(subscriptions: List[Any]) -> Optional[Message]:
+        states = [orders.get(order_id) for order_id in subscriptions[0].drain()]
+        updates = [state.model_dump(mode="json") for state in states if state is not None]
+        return {"type": "orders", "data": updates} if updates else None
+
+    await run_stream(websocket, "orders", subscribe, payload, snapshot=snapshot)
+
+
+@router.websocket("/portfolio")
+async def stream_portfolio(
+    websocket: WebSocket,
+    portfolio: PortfolioManager = Depends(get_portfolio),
+) -> None:
+    """
+    Push account, position and P&L changes as they happen.
+
+    The stream opens with a snapshot of the account and open positions.
+    After that, each message carries only the account values, positions
+    (position 0 once closed) and P&L that changed since the previous one.
+    """
+    await websocket.accept()
+
+    def subscribe(notify: Callable[[], None]) -> Iterator[Any]:
+        yield portfolio.subscribe(notify=notify)
+
+    def snapshot(subscriptions: List[Any]) -> Message:
+        return {
+            "type": "snapshot",
+            "data": {
+                "account": portfolio.account_state().model_dump(mode="json"),
+                "positions": [position.model_dump(mode="json") for position in portfolio.positions()],
+            },
+        }
+
+    def payload(subscriptions: List[Any]) -> Optional[Message]:
+        keys = subscriptions[0].drain()
+        if not keys:
+            return None
+        return {"type": "portfolio", "data": portfolio.changes(keys).model_dump(mode="json")}
+
+    await run_stream(websocket, "portfolio", subscribe, payload, snapshot=snapshot)
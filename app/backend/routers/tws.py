@@ -2,44 +2,106 @@
 TWS API router for Interactive Brokers operations.
 """
 
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import JSONResponse
+from starlette.requests import HTTPConnection
 
-from ..models import TimeResponseAPI, ConnectionStatusAPI
-from ...tws.client import TWSClient
+from ..models import (
+    TimeResponseAPI, ClockStatusAPI, ConnectionStatusAPI, ContractInfoAPI, PoolMemberAPI, PoolStatsAPI,
+)
+from ..registry import ClientRegistry
+from ...tws.async_client import AsyncTWSClient
+from ...tws.clock import ClockSync
+from ...tws.contract_resolver import ContractResolver
+from ...tws.contracts import stock_contract
+from ...tws.errors import NO_SECURITY_DEFINITION, TWSRequestError
+from ...tws.orders import OrderManager
+from ...tws.portfolio import PortfolioManager
+from ...tws.pool import ACCOUNT, MARKET_DATA, TWSClientPool
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tws", tags=["TWS"])
 
-# Global TWS client instance
-_tws_client: TWSClient = None
+def get_client_registry(connection: HTTPConnection) -> ClientRegistry:
+    """Dependency to get the client registry created by the application lifespan."""
+    registry = getattr(connection.app.state, "tws_registry", None)
+    if registry is None:
+        raise HTTPException(status_code=503, detail="TWS client registry is not initialized")
+    if not registry.accepting:
+        raise HTTPException(status_code=503, detail="Shutting down")
+    return registry
+
+
+def get_tws_pool(registry: ClientRegistry = Depends(get_client_registry)) -> TWSClientPool:
+    """Dependency to get the TWS connection pool."""
+    return registry.pool
+
+
+def get_tws_client(pool: TWSClientPool = Depends(get_tws_pool)) -> AsyncTWSClient:
+    """Dependency to get the pool connection for account requests."""
+    return pool.async_client(ACCOUNT)
+
+
+def get_market_data_client(pool: TWSClientPool = Depends(get_tws_pool)) -> AsyncTWSClient:
+    """Dependency to get the pool connection for market data streams."""
+    return pool.async_client(MARKET_DATA)
+
+
+def get_order_manager(registry: ClientRegistry = Depends(get_client_registry)) -> OrderManager:
+    """Dependency to get the order manager of the pool's order connection."""
+    return registry.orders
 
 
-def get_tws_client() -> TWSClient:
-    """Dependency to get the TWS client instance."""
-    global _tws_client
-    if _tws_client is None:
-        _tws_client = TWSClient(host="127.0.0.1", port=7500, client_id=1)
-    return _tws_client
+def get_portfolio(registry: ClientRegistry = Depends(get_client_registry)) -> PortfolioManager:
+    """Dependency to get the account cache, subscribing it on first use."""
+    registry.portfolio.start()
+    return registry.portfolio
+
+
+def get_contract_resolver(registry: ClientRegistry = Depends(get_client_registry)) -> ContractResolver:
+    """Dependency to get the shared contract resolver."""
+    return registry.contracts
+
+
+def get_clock_sync(connection: HTTPConnection) -> Optional[ClockSync]:
+    """Dependency to get the server clock model, if the registry runs one."""
+    registry = getattr(connection.app.state, "tws_registry", None)
+    return registry.clock if registry is not None else None
 
 
 @router.get("/current-time", response_model=TimeResponseAPI)
-async def get_current_time(tws_client: TWSClient = Depends(get_tws_client)) -> TimeResponseAPI:
+async def get_current_time(
+    live: bool = Query(False, description="Ask TWS instead of using the synced clock"),
+    clock: Optional[ClockSync] = Depends(get_clock_sync),
+    tws_client: AsyncTWSClient = Depends(get_tws_client),
+) -> TimeResponseAPI:
     """
-    Request current time from TWS.
+    Get the TWS server time.
+
+    Served from the local clock plus the tracked server offset once clock
+    sync has samples, with uncertainty_ms bounding the error; otherwise,
+    or with live=true, requested from TWS.
 
     Returns:
         TimeResponseAPI: Response containing current time or error information
     """
+    if not live and clock is not None:
+        estimate = clock.current_time()
+        if estimate is not None:
+            return TimeResponseAPI(success=True, **estimate.model_dump())
+
     try:
         logger.info("Processing current time request")
 
         # Connect if not already connected
         if not tws_client.is_connected():
             logger.info("TWS not connected, attempting to connect...")
-            if not tws_client.connect():
+            if not await tws_client.connect():
                 logger.error("Failed to connect to TWS")
                 return TimeResponseAPI(
                     success=False,
@@ -47,7 +109,7 @@ async def get_current_time(tws_client: TWSClient = Depends(get_tws_client)) -> T
                 )
 
         # Request current time
-        time_response = tws_client.request_current_time()
+        time_response = await tws_client.current_time()
 
         if time_response:
             logger.info(f"Successfully retrieved time: {time_response.current_time}")
@@ -72,8 +134,52 @@ async def get_current_time(tws_client: TWSClient = Depends(get_tws_client)) -> T
         )
 
 
+@router.get("/clock", response_model=ClockStatusAPI)
+async def get_clock_status(registry: ClientRegistry = Depends(get_client_registry)) -> ClockStatusAPI:
+    """
+    Get the estimated offset, drift and uncertainty of the TWS server clock.
+
+    Returns:
+        ClockStatusAPI: State of the clock sync
+    """
+    return ClockStatusAPI(**registry.clock.status().model_dump())
+
+
+@router.get("/contracts/{symbol}", response_model=ContractInfoAPI)
+async def resolve_contract(
+    symbol: str,
+    exchange: str = Query("SMART", description="Destination exchange"),
+    currency: str = Query("USD", description="Contract currency"),
+    contracts: ContractResolver = Depends(get_contract_resolver),
+) -> ContractInfoAPI:
+    """
+    Resolve a stock symbol to its TWS contract and conId.
+
+    Served from the resolver's memory or SQLite cache when possible; only
+    uncached symbols wait for reqContractDetails.
+
+    Returns:
+        ContractInfoAPI: The resolved contract
+    """
+    contract = stock_contract(symbol, exchange, currency)
+    info = contracts.lookup(contract)
+    if info is None:
+        try:
+            loop = asyncio.get_running_loop()
+            info = await loop.run_in_executor(None, contracts.resolve, contract)
+        except TWSRequestError as e:
+            if e.error_code == NO_SECURITY_DEFINITION:
+                raise HTTPException(status_code=404, detail=f"Unknown contract {symbol.upper()}")
+            raise HTTPException(status_code=502, detail=str(e))
+        except ConnectionError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except TimeoutError as e:
+            raise HTTPException(status_code=504, detail=str(e))
+    return ContractInfoAPI(**info.model_dump())
+
+
 @router.get("/connection-status", response_model=ConnectionStatusAPI)
-async def get_connection_status(tws_client: TWSClient = Depends(get_tws_client)) -> ConnectionStatusAPI:
+async def get_connection_status(tws_client: AsyncTWSClient = Depends(get_tws_client)) -> ConnectionStatusAPI:
     """
     Get TWS connection status.
 
@@ -88,6 +194,9 @@ async def get_connection_status(tws_client: TWSClient = Depends(get_tws_client))
             host=status.host,
             port=status.port,
             connection_time=status.connection_time,
+            connect_latency_ms=status.connect_latency_ms,
+            reconnects=status.reconnects,
+            last_recovery_ms=status.last_recovery_ms,
             error_message=status.error_message
         )
     except Exception as e:
@@ -101,23 +210,42 @@ async def get_connection_status(tws_client: TWSClient = Depends(get_tws_client))
         )
 
 
+@router.get("/pool", response_model=PoolStatsAPI)
+async def get_pool_stats(pool: TWSClientPool = Depends(get_tws_pool)) -> PoolStatsAPI:
+    """
+    Get connection, health and routing statistics of the TWS connection pool.
+
+    Returns:
+        PoolStatsAPI: One entry per pooled connection
+    """
+    stats = pool.stats()
+    return PoolStatsAPI(
+        size=stats.size,
+        connected=stats.connected,
+        healthy=stats.healthy,
+        fallbacks=stats.fallbacks,
+        members=[PoolMemberAPI(**member.model_dump()) for member in stats.members],
+    )
+
+
 @router.post("/connect")
-async def connect_to_tws(tws_client: TWSClient = Depends(get_tws_client)) -> JSONResponse:
+async def connect_to_tws(pool: TWSClientPool = Depends(get_tws_pool)) -> JSONResponse:
     """
-    Connect to TWS.
+    Connect every connection of the TWS pool.
 
     Returns:
         JSONResponse: Connection result
     """
     try:
-        if tws_client.is_connected():
+        if pool.is_connected():
             return JSONResponse(
                 content={"success": True, "message": "Already connected to TWS"},
                 status_code=200
             )
 
         logger.info("Attempting to connect to TWS...")
-        if tws_client.connect():
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, pool.connect):
             logger.info("Successfully connected to TWS")
             return JSONResponse(
                 content={"success": True, "message": "Successfully connected to TWS"},
@@ -139,15 +267,16 @@ async def connect_to_tws(tws_client: TWSClient = Depends(get_tws_client)) -> JSO
 
 
 @router.post("/disconnect")
-async def disconnect_from_tws(tws_client: TWSClient = Depends(get_tws_client)) -> JSONResponse:
+async def disconnect_from_tws(pool: TWSClientPool = Depends(get_tws_pool)) -> JSONResponse:
     """
-    Disconnect from TWS.
+    Disconnect every connection of the TWS pool.
 
     Returns:
         JSONResponse: Disconnection result
     """
     try:
-        tws_client.disconnect()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, pool.disconnect)
         logger.info("Disconnected from TWS")
         return JSONResponse(
             content={"success": True, "message": "Disconnected from TWS"},
@@ -0,0 +1,102 @@
+"""
+Tests for account API endpoints and the portfolio stream.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ..main import app
+from ..routers.tws import get_portfolio
+from ...tws.client import TWSClient
+from ...tws.contracts import stock_contract
+
+
+client = TestClient(app)
+
+ACCOUNT = "DU123456"
+
+
+@pytest.fixture
+def tws():
+    """Fixture serving the account endpoints from a client with a mocked EClient."""
+    tws = TWSClient()
+    tws.client = Mock()
+    tws.client.isConnected.return_value = True
+    tws._connected = True
+    tws.wrapper.managedAccounts(ACCOUNT)
+    app.dependency_overrides[get_portfolio] = lambda: tws.portfolio
+    yield tws
+    app.dependency_overrides.pop(get_portfolio, None)
+
+
+def position(tws: TWSClient, symbol: str, con_id: int, quantity: float, avg_cost: float) -> None:
+    """Deliver a position update from TWS."""
+    contract = stock_contract(symbol)
+    contract.conId = con_id
+    tws.wrapper.position(ACCOUNT, contract, quantity, avg_cost)
+
+
+class TestAccountEndpoints:
+    """Test class for /api/account and /api/positions."""
+
+    def test_get_account(self, tws):
+        """Test account values and P&L are served from the cache."""
+        tws.portfolio.start()
+        tws.wrapper.updateAccountValue("NetLiquidation", "100000.00", "USD", ACCOUNT)
+        tws.wrapper.accountDownloadEnd(ACCOUNT)
+        tws.wrapper.pnl(tws.client.reqPnL.call_args[0][0], 120.0, 80.0, 40.0)
+
+        response = client.get("/api/account")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["account"] == ACCOUNT
+        assert data["ready"] is True
+        assert data["values"][0]["key"] == "NetLiquidation"
+        assert data["pnl"]["daily_pnl"] == 120.0
+        tws.client.reqAccountUpdates.assert_called_once()
+
+    def test_get_positions(self, tws):
+        """Test open positions are listed and can be filtered by symbol."""
+        tws.portfolio.start()
+        position(tws, "AAPL", 265598, 100, 150.0)
+        position(tws, "MSFT", 272093, 50, 300.0)
+        position(tws, "IBM", 8314, 0, 0.0)
+
+        response = client.get("/api/positions")
+        filtered = client.get("/api/positions", params={"symbol": "msft"})
+
+        assert response.status_code == 200
+        assert sorted(p["symbol"] for p in response.json()) == ["AAPL", "MSFT"]
+        assert [(p["symbol"], p["position"]) for p in filtered.json()] == [("MSFT", 50)]
+
+    def test_not_connected(self, tws):
+        """Test the endpoints report 503 before a connection is made."""
+        tws._connected = False
+
+        assert client.get("/api/account").status_code == 503
+        assert client.get("/api/positions").status_code == 503
+
+
+class TestPortfolioStream:
+    """Test class for the /ws/portfolio endpoint."""
+
+    def test_snapshot_then_changes(self, tws):
+        """Test the stream opens with the cached state and pushes only changes."""
+        tws.portfolio.start()
+        position(tws, "AAPL", 265598, 100, 150.0)
+        position(tws, "MSFT", 272093, 50, 300.0)
+
+        with client.websocket_connect("/ws/portfolio") as websocket:
+            snapshot = websocket.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert len(snapshot["data"]["positions"]) == 2
+
+            position(tws, "AAPL", 265598, 0, 0.0)
+            message = websocket.receive_json()
+
+        assert message["type"] == "portfolio"
+        assert [(p["symbol"], p["position"]) for p in message["data"]["positions"]] == [("AAPL", 0)]
+        assert message["data"]["values"] == []
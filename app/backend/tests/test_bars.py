@@ -0,0 +1,156 @@
+"""
+Tests for the archived bars API endpoint.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from ibapi.ticktype import TickTypeEnum
+
+from ..main import app
+from ..routers.bars import get_bar_archive, get_tick_store
+from ...tws.bar_archive import LIVE, BarArchive
+from ...tws.market_data import Tick
+from ...tws.models import Bar
+from ...tws.tick_store import TickStore
+
+
+client = TestClient(app)
+
+BASE = datetime(2023, 1, 3, 9, 30)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """Fixture providing an archive with ten one-minute AAPL bars."""
+    archive = BarArchive(tmp_path)
+    archive.append_bars("AAPL", "1 min", [
+        Bar(time=BASE + timedelta(minutes=i), open=i, high=i, low=i, close=i, volume=10 * i)
+        for i in range(10)
+    ])
+    app.dependency_overrides[get_bar_archive] = lambda: archive
+    yield archive
+    app.dependency_overrides.pop(get_bar_archive, None)
+
+
+@pytest.fixture
+def tick_store():
+    """Fixture providing a tick store with one AAPL trade per minute for five minutes."""
+    store = TickStore(capacity=64)
+    for i in range(5):
+        timestamp = (BASE + timedelta(minutes=i, seconds=30)).timestamp()
+        store.append_tick(Tick("AAPL", TickTypeEnum.LAST, float(i), None, timestamp))
+        store.append_tick(Tick("AAPL", TickTypeEnum.LAST_SIZE, None, 10 * i, timestamp))
+    app.dependency_overrides[get_tick_store] = lambda: store
+    yield store
+    app.dependency_overrides.pop(get_tick_store, None)
+
+
+class TestBarsEndpoint:
+    """Test class for the /api/bars endpoint."""
+
+    def test_get_bars_range(self, archive):
+        """Test a date range is served as parallel columns."""
+        response = client.get("/api/bars/aapl", params={
+            "bar_size": "1 min",
+            "start": (BASE + timedelta(minutes=2)).isoformat(),
+            "end": (BASE + timedelta(minutes=4)).isoformat(),
+        })
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["symbol"] == "AAPL"
+        assert data["close"] == [2.0, 3.0, 4.0]
+        assert data["volume"] == [20.0, 30.0, 40.0]
+        assert data["time"][0] == int((BASE + timedelta(minutes=2)).timestamp())
+
+    def test_get_all_bars(self, archive):
+        """Test omitting the range returns every bar."""
+        response = client.get("/api/bars/AAPL")
+        assert response.status_code == 200
+        assert len(response.json()["close"]) == 10
+
+    def test_live_series(self, archive):
+        """Test bars built from the stream are served from their own series."""
+        archive.append_bars("AAPL", "1 min", [
+            Bar(time=BASE + timedelta(minutes=20), open=1, high=1, low=1, close=99, volume=1)
+        ], source=LIVE)
+
+        live = client.get("/api/bars/AAPL", params={"source": "live"}).json()
+        historical = client.get("/api/bars/AAPL").json()
+
+        assert live["close"] == [99.0]
+        assert len(historical["close"]) == 10
+        assert client.get("/api/bars/AAPL", params={"source": "other"}).status_code == 400
+
+    def test_unknown_series(self, archive):
+        """Test requesting a series that was never archived."""
+        response = client.get("/api/bars/MSFT")
+        assert response.status_code == 404
+
+
+@pytest.mark.usefixtures("tick_store")
+class TestIndicatorsEndpoint:
+    """Test class for the /api/bars/{symbol}/indicators endpoint."""
+
+    def test_indicators_over_range(self, archive):
+        """Test indicators are aligned with the bar times and warmed up before start."""
+        response = client.get("/api/bars/aapl/indicators", params={
+            "indicators": "sma:3,vwap",
+            "start": (BASE + timedelta(minutes=2)).isoformat(),
+            "end": (BASE + timedelta(minutes=4)).isoformat(),
+        })
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["time"] == [int((BASE + timedelta(minutes=i)).timestamp()) for i in (2, 3, 4)]
+        assert data["values"]["sma:3"] == [1.0, 2.0, 3.0]
+        assert data["values"]["vwap"] == pytest.approx([2.0, (2 * 20 + 3 * 30) / 50, (2 * 20 + 3 * 30 + 4 * 40) / 90])
+
+    def test_warming_up_is_null(self, archive):
+        """Test values before an indicator has enough bars are null."""
+        response = client.get("/api/bars/AAPL/indicators", params={"indicators": "sma:3"})
+
+        assert response.json()["values"]["sma:3"][:3] == [None, None, 1.0]
+
+    def test_invalid_indicator(self, archive):
+        """Test an unknown indicator is rejected."""
+        response = client.get("/api/bars/AAPL/indicators", params={"indicators": "macd"})
+        assert response.status_code == 400
+
+    def test_live_series(self, archive):
+        """Test bars built from the stream are served from their own series."""
+        archive.append_bars("AAPL", "1 min", [
+            Bar(time=BASE + timedelta(minutes=20), open=1, high=1, low=1, close=99, volume=1)
+        ], source=LIVE)
+
+        live = client.get("/api/bars/AAPL", params={"source": "live"}).json()
+        historical = client.get("/api/bars/AAPL").json()
+
+        assert live["close"] == [99.0]
+        assert len(historical["close"]) == 10
+        assert client.get("/api/bars/AAPL", params={"source": "other"}).status_code == 400
+
+    def test_unknown_series(self, archive):
+        """Test requesting indicators for a series that was never archived."""
+        response = client.get("/api/bars/MSFT/indicators")
+        assert response.status_code == 404
+
+    def test_intraday_from_tick_store(self, archive):
+        """Test the ticks source resamples stored ticks into bars, warmed up before start."""
+        response = client.get("/api/bars/AAPL/indicators", params={
+            "indicators": "sma:3", "source": "ticks", "start": (BASE + timedelta(minutes=3)).isoformat(),
+        })
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["time"] == [int((BASE + timedelta(minutes=i)).timestamp()) for i in (3, 4)]
+        assert data["values"]["sma:3"] == [2.0, 3.0]
+
+    def test_tick_source_needs_time_bars(self, archive):
+        """Test the ticks source rejects bar sizes other than time and unknown symbols."""
+        assert client.get(
+            "/api/bars/AAPL/indicators", params={"source": "ticks", "bar_size": "100 ticks"}
+        ).status_code == 400
+        assert client.get("/api/bars/MSFT/indicators", params={"source": "ticks"}).status_code == 404
@@ -0,0 +1,251 @@
+"""
+Tests for the response cache middleware.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+
+from ..cache import ResponseCache, ResponseCacheMiddleware, etag_matches
+from ..main import app, response_cache
+from ..routers.tws import get_tws_client
+from ...tws.async_client import AsyncTWSClient
+from ...tws.models import ConnectionStatus
+
+
+class SlowApp:
+    """ASGI application answering every request after a delay and counting calls."""
+
+    def __init__(self, delay: float = 0.05, status: int = 200):
+        self.delay = delay
+        self.status = status
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send) -> None:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        body = f"{scope['path']}?{scope['query_string'].decode()}#{self.calls}".encode()
+        await send({
+            "type": "http.response.start",
+            "status": self.status,
+            "headers": [(b"content-type", b"text/plain"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+async def request(
+    middleware: ResponseCacheMiddleware, path: str, query: bytes = b"",
+    method: str = "GET", headers: Optional[Dict[bytes, bytes]] = None,
+) -> Dict:
+    """Send one request through the middleware and collect its status, headers and body."""
+    scope = {
+        "type": "http", "method": method, "path": path, "query_string": query,
+        "headers": list((headers or {}).items()),
+    }
+    messages: List[Dict] = []
+
+    async def receive() -> Dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message) -> None:
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return {
+        "status": messages[0]["status"],
+        "headers": dict(messages[0]["headers"]),
+        "body": b"".join(m.get("body", b"") for m in messages[1:]),
+    }
+
+
+def make_middleware(upstream: SlowApp, ttl: float = 60.0) -> ResponseCacheMiddleware:
+    return ResponseCacheMiddleware(upstream, ResponseCache({"/status": ttl}))
+
+
+class TestResponseCacheMiddleware:
+    """Test class for ResponseCacheMiddleware over a stub application."""
+
+    def test_concurrent_requests_share_one_call(self):
+        """Test identical GETs in flight together are answered by one upstream call."""
+        upstream = SlowApp()
+        middleware = make_middleware(upstream)
+
+        async def burst():
+            return await asyncio.gather(*(request(middleware, "/status") for _ in range(20)))
+
+        responses = asyncio.run(burst())
+
+        assert upstream.calls == 1
+        assert {r["body"] for r in responses} == {b"/status?#1"}
+        assert (middleware.cache.upstream_calls, middleware.cache.coalesced) == (1, 19)
+
+    def test_served_from_cache_until_ttl(self):
+        """Test a response is replayed within its TTL and refreshed after it."""
+        upstream = SlowApp(delay=0)
+        middleware = make_middleware(upstream, ttl=0.1)
+
+        async def poll():
+            first = await request(middleware, "/status")
+            second = await request(middleware, "/status")
+            await asyncio.sleep(0.15)
+            third = await request(middleware, "/status")
+            return first, second, third
+
+        first, second, third = asyncio.run(poll())
+
+        assert first["body"] == second["body"] == b"/status?#1"
+        assert third["body"] == b"/status?#2"
+        assert first["headers"][b"etag"] == second["headers"][b"etag"] != third["headers"][b"etag"]
+        assert first["headers"][b"cache-control"] == b"no-cache"
+
+    def test_query_strings_cached_apart(self):
+        """Test different query strings are separate cache entries."""
+        upstream = SlowApp(delay=0)
+        middleware = make_middleware(upstream)
+
+        async def poll():
+            return [await request(middleware, "/status", query) for query in (b"live=true", b"", b"live=true")]
+
+        bodies = [r["body"] for r in asyncio.run(poll())]
+
+        assert bodies == [b"/status?live=true#1", b"/status?#2", b"/status?live=true#1"]
+
+    def test_matching_etag_gets_304(self):
+        """Test a client already holding the response gets a bodiless 304."""
+        middleware = make_middleware(SlowApp(delay=0))
+
+        async def revalidate():
+            first = await request(middleware, "/status")
+            again = await request(middleware, "/status", headers={b"if-none-match": first["headers"][b"etag"]})
+            stale = await request(middleware, "/status", headers={b"if-none-match": b'"other"'})
+            return first, again, stale
+
+        first, again, stale = asyncio.run(revalidate())
+
+        assert (again["status"], again["body"]) == (304, b"")
+        assert again["headers"][b"etag"] == first["headers"][b"etag"]
+        assert b"content-length" not in again["headers"]
+        assert (stale["status"], stale["body"]) == (200, first["body"])
+        assert middleware.cache.not_modified == 1
+
+    def test_errors_are_not_cached(self):
+        """Test a failed response is shared with concurrent callers but not stored."""
+        upstream = SlowApp(status=503)
+        middleware = make_middleware(upstream)
+
+        async def poll():
+            burst = await asyncio.gather(request(middleware, "/status"), request(middleware, "/status"))
+            return burst, await request(middleware, "/status")
+
+        burst, later = asyncio.run(poll())
+
+        assert [r["status"] for r in burst] == [503, 503]
+        assert b"etag" not in later["headers"]
+        assert upstream.calls == 2
+
+    def test_disconnected_caller_does_not_cancel_waiters(self):
+        """Test cancelling the request that started the upstream call leaves the others served."""
+        upstream = SlowApp(delay=0.1)
+        middleware = make_middleware(upstream)
+
+        async def poll():
+            leader = asyncio.ensure_future(request(middleware, "/status"))
+            await asyncio.sleep(0.01)
+            follower = asyncio.ensure_future(request(middleware, "/status"))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(poll())["body"] == b"/status?#1"
+        assert upstream.calls == 1
+
+    @pytest.mark.parametrize("method, path", [("POST", "/status"), ("GET", "/other")])
+    def test_passes_through_uncached(self, method, path):
+        """Test other methods and routes without a TTL always reach the application."""
+        upstream = SlowApp(delay=0)
+        middleware = make_middleware(upstream)
+
+        async def poll():
+            return [await request(middleware, path, method=method) for _ in range(2)]
+
+        responses = asyncio.run(poll())
+
+        assert upstream.calls == 2
+        assert all(b"etag" not in r["headers"] for r in responses)
+
+    def test_head_shares_get_entry(self):
+        """Test a HEAD is answered from the cached GET without a body."""
+        upstream = SlowApp(delay=0)
+        middleware = make_middleware(upstream)
+
+        async def poll():
+            return await request(middleware, "/status"), await request(middleware, "/status", method="HEAD")
+
+        get, head = asyncio.run(poll())
+
+        assert head["body"] == b""
+        assert head["headers"][b"etag"] == get["headers"][b"etag"]
+        assert upstream.calls == 1
+
+    @pytest.mark.parametrize("header, expected", [
+        (b'"abc"', True), (b'W/"abc"', True), (b'"x", "abc"', True), (b"*", True), (b'"abcd"', False),
+    ])
+    def test_etag_matches(self, header, expected):
+        """Test If-None-Match lists, wildcards and weak tags are compared correctly."""
+        assert etag_matches(header, b'"abc"') is expected
+
+
+class TestCachedStatusRoutes:
+    """Test class for the cache wired in front of the polled TWS status routes."""
+
+    @pytest.fixture
+    def mock_tws_client(self):
+        """Fixture resolving the TWS client dependency to a mock."""
+        mock = MagicMock(spec=AsyncTWSClient)
+        mock.get_connection_status.return_value = ConnectionStatus(
+            connected=True, client_id=1, host="127.0.0.1", port=7500,
+        )
+        app.dependency_overrides[get_tws_client] = lambda: mock
+        response_cache.clear()
+        yield mock
+        response_cache.clear()
+        app.dependency_overrides.pop(get_tws_client, None)
+
+    def test_polling_tabs_hit_client_once(self, mock_tws_client):
+        """Test repeated polls within the TTL reach the TWS client once and revalidate to 304."""
+        client = TestClient(app)
+
+        first = client.get("/api/tws/connection-status")
+        for _ in range(5):
+            assert client.get("/api/tws/connection-status").json() == first.json()
+        revalidated = client.get("/api/tws/connection-status", headers={"If-None-Match": first.headers["etag"]})
+
+        assert mock_tws_client.get_connection_status.call_count == 1
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+
+    def test_refreshed_after_ttl(self, mock_tws_client):
+        """Test the route reaches the client again once its TTL has passed."""
+        client = TestClient(app)
+        ttl = response_cache.ttl("/api/tws/connection-status")
+
+        client.get("/api/tws/connection-status")
+        time.sleep(ttl + 0.05)
+        client.get("/api/tws/connection-status")
+
+        assert mock_tws_client.get_connection_status.call_count == 2
+
+    def test_cors_headers_on_cached_response(self, mock_tws_client):
+        """Test responses replayed from the cache still carry CORS headers."""
+        client = TestClient(app)
+        origin = {"Origin": "http://localhost:3000"}
+
+        client.get("/api/tws/connection-status", headers=origin)
+        cached = client.get("/api/tws/connection-status", headers=origin)
+
+        assert cached.headers["access-control-allow-origin"] == "http://localhost:3000"
+        assert mock_tws_client.get_connection_status.call_count == 1
@@ -0,0 +1,84 @@
+"""
+Tests for the option chain API endpoint.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ..main import app
+from ..routers.tws import get_market_data_client
+from ...tws.async_client import AsyncTWSClient
+from ...tws.client import TWSClient
+from ...tws.errors import NO_SECURITY_DEFINITION, TWSRequestError
+from ...tws.options import ChainParameters, OptionChain
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def tws():
+    """Fixture serving the option endpoint from a client whose chain snapshots are mocked."""
+    tws = TWSClient()
+    tws.client = Mock()
+    tws.client.isConnected.return_value = True
+    tws._connected = True
+    tws.options.snapshot = Mock()
+    app.dependency_overrides[get_market_data_client] = lambda: AsyncTWSClient(tws)
+    yield tws
+    app.dependency_overrides.pop(get_market_data_client, None)
+
+
+def sample_chain() -> OptionChain:
+    """Build a two expiry, two strike chain with one call delta missing."""
+    parameters = ChainParameters("AAPL", 265598, "SMART", "AAPL", "100", ("20991016", "20991120"), (100.0, 105.0))
+    chain = OptionChain(parameters, parameters.expirations, parameters.strikes)
+    chain.column("delta", "C")[:] = [[0.6, 0.4], [0.55, float("nan")]]
+    chain.column("delta", "P")[:] = -0.5
+    chain.underlying_price = 102.5
+    chain.requested = chain.completed = 8
+    return chain
+
+
+class TestOptionChainEndpoint:
+    """Test class for /api/options/{symbol}/chain."""
+
+    def test_get_chain(self, tws):
+        """Test the chain is returned as expiry x strike tables with null for missing values."""
+        tws.options.snapshot.return_value = sample_chain()
+
+        response = client.get(
+            "/api/options/aapl/chain", params={"expirations": "20991016,20991120", "min_strike": 100}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["expirations"] == ["20991016", "20991120"]
+        assert data["strikes"] == [100.0, 105.0]
+        assert data["calls"]["delta"] == [[0.6, 0.4], [0.55, None]]
+        assert data["puts"]["delta"] == [[-0.5, -0.5], [-0.5, -0.5]]
+        assert data["calls"]["iv"] == [[None, None], [None, None]]
+        assert data["underlying_price"] == 102.5
+        assert tws.options.snapshot.call_args[0][:2] == ("aapl", ["20991016", "20991120"])
+        assert tws.options.snapshot.call_args[1]["min_strike"] == 100
+
+    def test_invalid_slice(self, tws):
+        """Test an empty or oversized slice is reported as a bad request."""
+        tws.options.snapshot.side_effect = ValueError("2400 options requested; narrow the slice to 1000")
+
+        assert client.get("/api/options/AAPL/chain").status_code == 400
+
+    def test_unknown_symbol(self, tws):
+        """Test a symbol without listed options is reported as not found."""
+        tws.options.snapshot.side_effect = TWSRequestError(1, NO_SECURITY_DEFINITION, "No options listed for XYZ")
+
+        assert client.get("/api/options/XYZ/chain").status_code == 404
+
+    def test_not_connected(self, tws):
+        """Test the endpoint reports 503 when TWS is not connected."""
+        tws._connected = False
+
+        assert client.get("/api/options/AAPL/chain").status_code == 503
+        tws.options.snapshot.assert_not_called()
@@ -0,0 +1,162 @@
+"""
+Tests for order API endpoints and the order stream.
+"""
+
+import json
+from unittest.mock import Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ..main import app
+from ..routers.tws import get_order_manager
+from ...tws.client import TWSClient
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def tws():
+    """Fixture serving the order endpoints from a client with a mocked EClient."""
+    tws = TWSClient()
+    tws.client = Mock()
+    tws.client.isConnected.return_value = True
+    tws._connected = True
+    tws.wrapper.nextValidId(100)
+    app.dependency_overrides[get_order_manager] = lambda: tws.orders
+    yield tws
+    app.dependency_overrides.pop(get_order_manager, None)
+
+
+def fill(tws: TWSClient, order_id: int, quantity: float, price: float) -> None:
+    """Deliver an orderStatus reporting a complete fill."""
+    tws.wrapper.orderStatus(order_id, "Filled", quantity, 0.0, price, 1, 0, price, 1, "", 0.0)
+
+
+class TestOrderEndpoints:
+    """Test class for /api/orders."""
+
+    def test_place_order(self, tws):
+        """Test placing a limit order returns its locally allocated id."""
+        response = client.post("/api/orders", json={
+            "symbol": "aapl", "action": "BUY", "quantity": 10, "order_type": "LMT", "limit_price": 150.0,
+        })
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["order_id"] == 100
+        assert data["symbol"] == "AAPL"
+        assert data["status"] == "PendingSubmit"
+        contract, order = tws.client.placeOrder.call_args[0][1:]
+        assert (contract.symbol, order.lmtPrice) == ("AAPL", 150.0)
+
+    def test_invalid_order(self, tws):
+        """Test an order missing its limit price is rejected."""
+        response = client.post("/api/orders", json={
+            "symbol": "AAPL", "action": "BUY", "quantity": 10, "order_type": "LMT",
+        })
+
+        assert response.status_code == 400
+        tws.client.placeOrder.assert_not_called()
+
+    def test_not_connected(self, tws):
+        """Test placing while disconnected answers 503."""
+        tws._connected = False
+
+        response = client.post("/api/orders", json={"symbol": "AAPL", "action": "BUY", "quantity": 1})
+
+        assert response.status_code == 503
+
+    def test_get_and_list_orders(self, tws):
+        """Test order state reflects TWS callbacks."""
+        first = client.post("/api/orders", json={"symbol": "AAPL", "action": "BUY", "quantity": 1}).json()
+        client.post("/api/orders", json={"symbol": "MSFT", "action": "SELL", "quantity": 2})
+        fill(tws, first["order_id"], 1, 101.25)
+
+        order = client.get(f"/api/orders/{first['order_id']}").json()
+        assert order["status"] == "Filled"
+        assert order["avg_fill_price"] == 101.25
+        assert len(client.get("/api/orders").json()) == 2
+        assert [o["symbol"] for o in client.get("/api/orders", params={"open_only": True}).json()] == ["MSFT"]
+        assert client.get("/api/orders/999").status_code == 404
+
+    def test_cancel_order(self, tws):
+        """Test DELETE requests cancellation."""
+        order_id = client.post("/api/orders", json={"symbol": "AAPL", "action": "BUY", "quantity": 1}).json()["order_id"]
+
+        response = client.delete(f"/api/orders/{order_id}")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "PendingCancel"
+        tws.client.cancelOrder.assert_called_once_with(order_id)
+        assert client.delete("/api/orders/999").status_code == 404
+
+
+class TestBatchEndpoints:
+    """Test class for /api/orders/batch and /api/orders/cancel-all."""
+
+    def test_batch_streams_results(self, tws):
+        """Test a basket streams one NDJSON result per order."""
+        basket = [{"symbol": f"SYM{i}", "action": "BUY", "quantity": 1} for i in range(20)]
+
+        response = client.post("/api/orders/batch", json={"orders": basket})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        results = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["index"] for r in results] == list(range(20))
+        assert [r["order_id"] for r in results] == list(range(100, 120))
+        assert all(r["success"] for r in results)
+        assert tws.client.placeOrder.call_count == 20
+
+    def test_batch_validated_before_sending(self, tws):
+        """Test one invalid order rejects the basket without sending anything."""
+        basket = [
+            {"symbol": "AAPL", "action": "BUY", "quantity": 1},
+            {"symbol": "MSFT", "action": "BUY", "quantity": 1, "order_type": "LMT"},
+        ]
+
+        response = client.post("/api/orders/batch", json={"orders": basket})
+
+        assert response.status_code == 400
+        assert "orders[1]" in response.json()["detail"][0]
+        tws.client.placeOrder.assert_not_called()
+
+    def test_cancel_all(self, tws):
+        """Test cancel-all streams a result per working order."""
+        for symbol in ("AAPL", "MSFT"):
+            client.post("/api/orders", json={"symbol": symbol, "action": "BUY", "quantity": 1})
+
+        response = client.post("/api/orders/cancel-all")
+
+        results = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["order"]["status"] for r in results] == ["PendingCancel", "PendingCancel"]
+        assert tws.client.cancelOrder.call_count == 2
+
+    def test_cancel_all_not_connected(self, tws):
+        """Test cancel-all answers 503 when disconnected."""
+        tws._connected = False
+
+        assert client.post("/api/orders/cancel-all", params={"global_cancel": True}).status_code == 503
+        tws.client.reqGlobalCancel.assert_not_called()
+
+
+class TestOrderStream:
+    """Test class for the /ws/orders endpoint."""
+
+    def test_snapshot_then_updates(self, tws):
+        """Test the stream opens with working orders and pushes changes."""
+        working = client.post("/api/orders", json={"symbol": "AAPL", "action": "BUY", "quantity": 5}).json()
+
+        with client.websocket_connect("/ws/orders") as websocket:
+            snapshot = websocket.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert [o["order_id"] for o in snapshot["data"]] == [working["order_id"]]
+
+            fill(tws, working["order_id"], 5, 99.5)
+            message = websocket.receive_json()
+
+        assert message["type"] == "orders"
+        assert message["data"][0]["status"] == "Filled"
+        assert message["data"][0]["filled"] == 5
@@ -0,0 +1,168 @@
+"""
+Tests for the backend's TWS client registry and its lifespan wiring.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ..main import app, response_cache
+from ..registry import ClientRegistry, RegistrySettings
+from ...tws.models import Bar
+from ...tws.pool import MARKET_DATA, ORDERS
+from ...tws.simulator import TWSSimulator
+
+
+@pytest.fixture
+def simulator():
+    """Fixture providing a simulator served from a background thread."""
+    with TWSSimulator() as simulator:
+        yield simulator
+
+
+class TestRegistrySettings:
+    """Test class for registry settings."""
+
+    def test_defaults(self):
+        """Test the defaults match a local TWS without warm start."""
+        settings = RegistrySettings.from_env({})
+
+        assert (settings.host, settings.port, settings.first_client_id) == ("127.0.0.1", 7500, 1)
+        assert settings.warm_start is False
+        assert settings.presubscribe == []
+
+    def test_from_env(self):
+        """Test IBXTAC_* variables override the defaults."""
+        settings = RegistrySettings.from_env({
+            "IBXTAC_TWS_PORT": "7497",
+            "IBXTAC_TWS_CLIENT_ID": "20",
+            "IBXTAC_WARM_START": "yes",
+            "IBXTAC_PRESUBSCRIBE": "aapl, msft,",
+            "IBXTAC_DRAIN_TIMEOUT": "2.5",
+            "IBXTAC_PREWARM_CONTRACTS": "ibm",
+            "IBXTAC_BAR_SIZES": "1 secs, 500 volume",
+        })
+
+        assert settings.port == 7497
+        assert settings.first_client_id == 20
+        assert settings.warm_start is True
+        assert settings.presubscribe == ["AAPL", "MSFT"]
+        assert settings.drain_timeout == 2.5
+        assert settings.prewarm_contracts == ["IBM"]
+        assert settings.bar_sizes == ["1 secs", "500 volume"]
+
+
+class TestClientRegistry:
+    """Test class for ClientRegistry functionality."""
+
+    def test_warm_start_connects_and_presubscribes(self, simulator, tmp_path):
+        """Test warm start connects the pool, opens market data lines and resolves contracts."""
+        registry = ClientRegistry(RegistrySettings(
+            port=simulator.port, warm_start=True, presubscribe=["AAPL", "MSFT"],
+            prewarm_contracts=["IBM"], contract_db=str(tmp_path / "contracts.sqlite3"),
+        ))
+
+        async def run():
+            await registry.start()
+            connected = registry.is_connected()
+            counts = registry.pool.client(MARKET_DATA).market_data.subscriber_counts()
+            await registry.stop()
+            return connected, counts
+
+        connected, counts = asyncio.run(run())
+
+        assert connected
+        assert counts == {"AAPL": 1, "MSFT": 1}
+        assert not registry.is_connected()
+        assert registry.contracts.lookup("IBM").con_id == simulator.con_id("IBM")
+        assert registry.contracts.lookup("AAPL") is not None
+
+    def test_lazy_start_does_not_connect(self):
+        """Test the pool is left disconnected without warm start."""
+        registry = ClientRegistry(RegistrySettings(port=1))
+
+        asyncio.run(registry.start())
+
+        assert not registry.is_connected()
+        assert registry.accepting
+
+    def test_one_archive_for_every_member(self, tmp_path):
+        """Test the pool members and their bar aggregators write to the registry's archive."""
+        registry = ClientRegistry(RegistrySettings(archive_dir=str(tmp_path)))
+
+        assert registry.archive.root == tmp_path
+        for member in registry.pool.members:
+            assert member.client.archive is registry.archive
+            assert member.client.bars.archive is registry.archive
+            assert member.client.historical.archive is registry.archive
+
+    def test_drain_waits_for_in_flight_requests(self):
+        """Test drain stops accepting and waits for pending replies."""
+        registry = ClientRegistry(RegistrySettings())
+        requests = registry.pool.client(ORDERS).requests
+        req_id, _ = requests.register()
+
+        async def run():
+            asyncio.get_running_loop().call_later(0.1, requests.resolve, req_id, None)
+            return await registry.drain(timeout=5.0)
+
+        assert asyncio.run(run()) is True
+        assert registry.accepting is False
+
+    def test_drain_timeout(self):
+        """Test drain gives up on requests that never finish."""
+        registry = ClientRegistry(RegistrySettings())
+        registry.pool.client(ORDERS).requests.register()
+
+        assert asyncio.run(registry.drain(timeout=0.1)) is False
+
+
+class TestLifespanWiring:
+    """Test class for the application lifespan and dependency wiring."""
+
+    def test_routers_share_the_lifespan_registry(self, simulator, monkeypatch):
+        """Test the endpoints use the warm-started registry from the lifespan."""
+        monkeypatch.setenv("IBXTAC_TWS_PORT", str(simulator.port))
+        monkeypatch.setenv("IBXTAC_WARM_START", "1")
+        response_cache.clear()
+
+        with TestClient(app) as client:
+            registry = app.state.tws_registry
+            status = client.get("/api/tws/connection-status").json()
+            pool = client.get("/api/tws/pool").json()
+            health = client.get("/health").json()
+
+        assert status["connected"] is True
+        assert pool["connected"] == pool["size"] == len(registry.pool.members)
+        assert health["tws_connected"] is True
+        # Shutting down disconnected the same pool
+        assert not registry.is_connected()
+        del app.state.tws_registry
+
+    def test_rejects_requests_while_draining(self):
+        """Test endpoints answer 503 once the registry is draining."""
+        registry = ClientRegistry(RegistrySettings())
+        registry.accepting = False
+        app.state.tws_registry = registry
+        try:
+            response = TestClient(app).get("/api/tws/pool")
+        finally:
+            del app.state.tws_registry
+
+        assert response.status_code == 503
+
+    def test_bars_served_from_registry_archive(self, tmp_path):
+        """Test /api/bars reads the archive the registry's clients write to."""
+        registry = ClientRegistry(RegistrySettings(archive_dir=str(tmp_path)))
+        registry.archive.append_bars("AAPL", "1 min", [
+            Bar(time=datetime(2023, 1, 3, 9, 30), open=1, high=1, low=1, close=1, volume=10)
+        ])
+        app.state.tws_registry = registry
+        try:
+            response = TestClient(app).get("/api/bars/AAPL")
+        finally:
+            del app.state.tws_registry
+
+        assert response.json()["close"] == [1.0]
@@ -0,0 +1,81 @@
+"""
+Tests for the market scanner API endpoint.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+from fastapi.testclient import TestClient
+from ibapi.contract import ContractDetails
+
+from ..main import app
+from ..routers.scanner import parse_filters
+from ..routers.tws import get_market_data_client
+from ...tws.async_client import AsyncTWSClient
+from ...tws.client import TWSClient
+from ...tws.scanner import ScanParams
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def tws():
+    """Fixture serving the scanner endpoint from a client with a mocked EClient."""
+    tws = TWSClient()
+    tws.client = Mock()
+    tws.client.isConnected.return_value = True
+    tws._connected = True
+    app.dependency_overrides[get_market_data_client] = lambda: AsyncTWSClient(tws)
+    yield tws
+    app.dependency_overrides.pop(get_market_data_client, None)
+
+
+def scanner_row(tws: TWSClient, req_id: int, rank: int, symbol: str, con_id: int) -> None:
+    """Deliver one ranked scanner row from TWS."""
+    details = ContractDetails()
+    details.contract.conId = con_id
+    details.contract.symbol = symbol
+    details.contract.secType = "STK"
+    tws.wrapper.scannerData(req_id, rank, details, "", "", "", "")
+
+
+class TestScannerEndpoint:
+    """Test class for /api/scanner/{scan_code}."""
+
+    def test_parse_filters(self):
+        """Test filters are read as comma-separated tag=value pairs."""
+        assert parse_filters("priceAbove=5, volumeAbove=100000,") == {"priceAbove": "5", "volumeAbove": "100000"}
+        with pytest.raises(ValueError):
+            parse_filters("priceAbove")
+
+    def test_running_scan_served_from_cache(self, tws):
+        """Test a scan that is already streaming is answered without a new TWS request."""
+        subscription = tws.scanner.subscribe(ScanParams.create("TOP_PERC_GAIN", rows=10))
+        req_id = tws.client.reqScannerSubscription.call_args[0][0]
+        scanner_row(tws, req_id, 0, "AAPL", 265598)
+        scanner_row(tws, req_id, 1, "MSFT", 272093)
+        tws.wrapper.scannerDataEnd(req_id)
+
+        response = client.get("/api/scanner/top_perc_gain", params={"rows": 10})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["scan_code"] == "TOP_PERC_GAIN"
+        assert [(r["rank"], r["symbol"]) for r in data["results"]] == [(0, "AAPL"), (1, "MSFT")]
+        assert tws.client.reqScannerSubscription.call_count == 1
+        tws.client.cancelScannerSubscription.assert_not_called()
+        subscription.close()
+
+    def test_invalid_filters(self, tws):
+        """Test malformed filters are rejected before any TWS request."""
+        response = client.get("/api/scanner/TOP_PERC_GAIN", params={"filters": "priceAbove"})
+
+        assert response.status_code == 400
+        tws.client.reqScannerSubscription.assert_not_called()
+
+    def test_not_connected(self, tws):
+        """Test the endpoint reports 503 when TWS is not connected."""
+        tws._connected = False
+
+        assert client.get("/api/scanner/TOP_PERC_GAIN").status_code == 503
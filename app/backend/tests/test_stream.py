@@ -0,0 +1,242 @@
+"""
+Tests for WebSocket streaming endpoints.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+from fastapi.testclient import TestClient
+from ibapi.contract import ContractDetails
+from starlette.websockets import WebSocketDisconnect
+
+from ..main import app
+from ..routers.stream import coalesce_ticks
+from ..routers.tws import get_market_data_client
+from ...tws.async_client import AsyncTWSClient
+from ...tws.client import TWSClient
+from ...tws.market_data import Tick
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def tws_client():
+    """Fixture providing a connected async client over a mocked EClient."""
+    tws = TWSClient()
+    tws.client = Mock()
+    tws.client.isConnected.return_value = True
+    tws._connected = True
+    return AsyncTWSClient(tws)
+
+
+@contextmanager
+def serving(tws_client: AsyncTWSClient):
+    """Resolve the market data client dependency to the given client."""
+    app.dependency_overrides[get_market_data_client] = lambda: tws_client
+    try:
+        yield
+    finally:
+        app.dependency_overrides.pop(get_market_data_client, None)
+
+
+def wait_for_requests(tws: TWSClient, count: int) -> None:
+    """Wait until the endpoint has issued the expected reqMktData calls."""
+    deadline = time.time() + 2
+    while tws.client.reqMktData.call_count < count and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class TestTickStream:
+    """Test class for the /ws/ticks endpoint."""
+
+    def test_coalesce_keeps_latest_value(self):
+        """Test coalescing keeps the newest value per symbol and field."""
+        ticks = [
+            Tick("AAPL", 1, 100.0, None, 1.0),
+            Tick("AAPL", 1, 101.0, None, 2.0),
+            Tick("AAPL", 0, None, 300, 3.0),
+            Tick("MSFT", 4, 50.0, None, 4.0),
+        ]
+
+        updates = coalesce_ticks(ticks)
+
+        assert updates == {
+            "AAPL": {"bid": 101.0, "bid_size": 300, "time": 3.0},
+            "MSFT": {"last": 50.0, "time": 4.0},
+        }
+
+    def test_streams_ticks_for_symbols(self, tws_client):
+        """Test ticks for the requested symbols are pushed to the socket."""
+        with serving(tws_client):
+            with client.websocket_connect("/ws/ticks?symbols=aapl,msft") as websocket:
+                wait_for_requests(tws_client.client, 2)
+                calls = tws_client.client.client.reqMktData.call_args_list
+                req_ids = {call[0][1].symbol: call[0][0] for call in calls}
+
+                tws_client.client.wrapper.tickPrice(req_ids["AAPL"], 4, 150.5, None)
+                message = websocket.receive_json()
+
+        assert message["type"] == "ticks"
+        assert message["data"]["AAPL"]["last"] == 150.5
+
+    def test_disconnect_cancels_subscriptions(self, tws_client):
+        """Test closing the socket releases the market data lines."""
+        with serving(tws_client):
+            with client.websocket_connect("/ws/ticks?symbols=AAPL"):
+                wait_for_requests(tws_client.client, 1)
+
+            deadline = time.time() + 2
+            while tws_client.market_data.subscriber_counts() and time.time() < deadline:
+                time.sleep(0.01)
+
+        assert tws_client.market_data.subscriber_counts() == {}
+        tws_client.client.client.cancelMktData.assert_called_once()
+
+    def test_not_connected(self):
+        """Test the stream reports an error when TWS is not connected."""
+        with serving(AsyncTWSClient(TWSClient())):
+            with client.websocket_connect("/ws/ticks?symbols=AAPL") as websocket:
+                message = websocket.receive_json()
+                with pytest.raises(WebSocketDisconnect):
+                    websocket.receive_json()
+
+        assert message["type"] == "error"
+
+    def test_failed_subscribe_releases_earlier_lines(self, tws_client):
+        """Test lines opened before a failing subscription are cancelled."""
+        subscribe = tws_client.market_data.subscribe
+
+        def fail_on_msft(contract, **kwargs):
+            if contract.symbol == "MSFT":
+                raise ConnectionError("lost")
+            return subscribe(contract, **kwargs)
+
+        tws_client.client.market_data.subscribe = fail_on_msft
+        with serving(tws_client):
+            with client.websocket_connect("/ws/ticks?symbols=AAPL,MSFT") as websocket:
+                with pytest.raises(WebSocketDisconnect):
+                    websocket.receive_json()
+
+        assert tws_client.market_data.subscriber_counts() == {}
+        tws_client.client.client.cancelMktData.assert_called_once()
+
+
+class TestBarStream:
+    """Test class for the /ws/bars endpoint."""
+
+    def test_pushes_closed_bars(self, tmp_path):
+        """Test a bar built from streamed trades is pushed once its interval ends."""
+        tws = TWSClient(archive_dir=str(tmp_path))
+        tws.client = Mock()
+        tws.client.isConnected.return_value = True
+        tws._connected = True
+
+        with serving(AsyncTWSClient(tws)):
+            with client.websocket_connect("/ws/bars?symbols=aapl&bar_size=1 secs") as websocket:
+                wait_for_requests(tws, 1)
+                req_id = tws.client.reqMktData.call_args[0][0]
+                tws.wrapper.tickPrice(req_id, 4, 150.5, None)
+                tws.wrapper.tickSize(req_id, 5, 200)
+                message = websocket.receive_json()
+
+        assert message["type"] == "bars"
+        bar = message["data"][0]
+        assert (bar["symbol"], bar["bar_size"], bar["close"], bar["volume"]) == ("AAPL", "1 secs", 150.5, 200)
+        tws.bars.stop()
+
+    def test_invalid_bar_size(self, tws_client):
+        """Test an unknown bar size closes the socket."""
+        with serving(tws_client):
+            with client.websocket_connect("/ws/bars?symbols=AAPL&bar_size=3 weeks") as websocket:
+                with pytest.raises(WebSocketDisconnect):
+                    websocket.receive_json()
+
+
+class TestDepthStream:
+    """Test class for the /ws/depth endpoint."""
+
+    def test_snapshot_then_diffs(self, tws_client):
+        """Test the stream opens with the books and then pushes changed levels."""
+        with serving(tws_client):
+            with client.websocket_connect("/ws/depth?symbols=aapl&rows=5&interval=0.01") as websocket:
+                snapshot = websocket.receive_json()
+                req_id = tws_client.client.client.reqMktDepth.call_args[0][0]
+
+                tws_client.client.wrapper.updateMktDepth(req_id, 0, 0, 1, 150.0, 300)
+                message = websocket.receive_json()
+
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["data"]["AAPL"]["bids"]["price"] == []
+        assert message["type"] == "depth"
+        assert message["data"]["AAPL"]["bids"] == {
+            "from": 0, "price": [150.0], "size": [300.0], "market_maker": [""],
+        }
+        assert tws_client.client.client.reqMktDepth.call_args[0][2] == 5
+
+    def test_not_connected(self):
+        """Test the stream reports an error when TWS is not connected."""
+        with serving(AsyncTWSClient(TWSClient())):
+            with client.websocket_connect("/ws/depth?symbols=AAPL") as websocket:
+                message = websocket.receive_json()
+
+        assert message["type"] == "error"
+
+
+class TestScannerStream:
+    """Test class for the /ws/scanner endpoint."""
+
+    @staticmethod
+    def refresh(tws: TWSClient, req_id: int, symbols: List[str]) -> None:
+        """Deliver one scanner refresh ranking the symbols in order."""
+        for rank, symbol in enumerate(symbols):
+            details = ContractDetails()
+            details.contract.conId = sum(map(ord, symbol))
+            details.contract.symbol = symbol
+            tws.wrapper.scannerData(req_id, rank, details, "", "", "", "")
+        tws.wrapper.scannerDataEnd(req_id)
+
+    def test_snapshot_then_diffs(self, tws_client):
+        """Test the stream opens with the full ranking and then pushes only changes."""
+        tws = tws_client.client
+        with serving(tws_client):
+            with client.websocket_connect("/ws/scanner?scan_code=TOP_PERC_GAIN&rows=3") as websocket:
+                deadline = time.time() + 2
+                while not tws.client.reqScannerSubscription.called and time.time() < deadline:
+                    time.sleep(0.01)
+                req_id = tws.client.reqScannerSubscription.call_args[0][0]
+
+                self.refresh(tws, req_id, ["AAPL", "MSFT", "IBM"])
+                snapshot = websocket.receive_json()
+                self.refresh(tws, req_id, ["AAPL", "MSFT", "IBM"])
+                self.refresh(tws, req_id, ["MSFT", "AAPL", "TSLA"])
+                message = websocket.receive_json()
+                websocket.send_text("snapshot")
+                resync = websocket.receive_json()
+
+        assert snapshot["type"] == "snapshot"
+        assert [row["symbol"] for row in snapshot["data"]] == ["AAPL", "MSFT", "IBM"]
+        assert message["type"] == "scanner"
+        assert [row["symbol"] for row in message["data"]["entered"]] == ["TSLA"]
+        assert message["data"]["exited"] == [sum(map(ord, "IBM"))]
+        assert len(message["data"]["moved"]) == 2
+        assert resync["type"] == "snapshot"
+        assert [row["symbol"] for row in resync["data"]] == ["MSFT", "AAPL", "TSLA"]
+        tws.client.cancelScannerSubscription.assert_called_once_with(req_id)
+
+    def test_scan_error(self, tws_client):
+        """Test a scan rejected by TWS is reported and the socket closed."""
+        tws = tws_client.client
+        with serving(tws_client):
+            with client.websocket_connect("/ws/scanner?scan_code=NOT_A_SCAN") as websocket:
+                deadline = time.time() + 2
+                while not tws.client.reqScannerSubscription.called and time.time() < deadline:
+                    time.sleep(0.01)
+                tws.wrapper.error(tws.client.reqScannerSubscription.call_args[0][0], 165, "no items retrieved")
+                message = websocket.receive_json()
+
+        assert message["type"] == "error"
+        assert "165" in message["message"]
@@ -2,20 +2,71 @@
 Tests for TWS API endpoints.
 """
 
+from datetime import datetime
+
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock
 
-from ..main import app
+from ..main import app, response_cache
 from ..models import TimeResponseAPI, ConnectionStatusAPI
-from ...tws.client import TWSClient
-from ...tws.models import TimeResponse, ConnectionStatus
+from ..routers.tws import get_clock_sync, get_contract_resolver, get_tws_client, get_tws_pool
+from ...tws.async_client import AsyncTWSClient
+from ...tws.clock import ClockSync
+from ...tws.contract_resolver import ContractResolver
+from ...tws.errors import NO_SECURITY_DEFINITION, TWSRequestError
+from ...tws.models import ContractInfo, TimeResponse, ConnectionStatus, PoolMemberStatus, PoolStats
+from ...tws.pool import TWSClientPool
 
 
 # Create test client
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Fixture keeping responses cached by one test from answering the next."""
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+@pytest.fixture
+def mock_tws_client():
+    """Fixture resolving the TWS client dependency to a mock."""
+    mock = MagicMock(spec=AsyncTWSClient)
+    app.dependency_overrides[get_tws_client] = lambda: mock
+    yield mock
+    app.dependency_overrides.pop(get_tws_client, None)
+
+
+@pytest.fixture
+def mock_tws_pool():
+    """Fixture resolving the TWS pool dependency to a mock."""
+    mock = MagicMock(spec=TWSClientPool)
+    app.dependency_overrides[get_tws_pool] = lambda: mock
+    yield mock
+    app.dependency_overrides.pop(get_tws_pool, None)
+
+
+@pytest.fixture
+def mock_clock():
+    """Fixture resolving the clock sync dependency to a mock."""
+    mock = MagicMock(spec=ClockSync)
+    app.dependency_overrides[get_clock_sync] = lambda: mock
+    yield mock
+    app.dependency_overrides.pop(get_clock_sync, None)
+
+
+@pytest.fixture
+def mock_resolver():
+    """Fixture resolving the contract resolver dependency to a mock."""
+    mock = MagicMock(spec=ContractResolver)
+    app.dependency_overrides[get_contract_resolver] = lambda: mock
+    yield mock
+    app.dependency_overrides.pop(get_contract_resolver, None)
+
+
 class TestTWSEndpoints:
     """Test class for TWS API endpoints."""
 
@@ -39,7 +90,6 @@ class TestTWSEndpoints:
         assert "message" in data
         assert "version" in data
 
-    @patch('app.backend.routers.tws._tws_client')
     def test_connection_status_success(self, mock_tws_client):
         """Test connection status endpoint with successful connection."""
         # Mock the connection status
@@ -62,7 +112,6 @@ class TestTWSEndpoints:
         assert data["host"] == "127.0.0.1"
         assert data["port"] == 7500
 
-    @patch('app.backend.routers.tws._tws_client')
     def test_connection_status_failure(self, mock_tws_client):
         """Test connection status endpoint with connection failure."""
         # Mock a connection error
@@ -75,7 +124,6 @@ class TestTWSEndpoints:
         assert data["connected"] is False
         assert "error_message" in data
 
-    @patch('app.backend.routers.tws._tws_client')
     def test_current_time_success(self, mock_tws_client):
         """Test current time endpoint with successful response."""
         from datetime import datetime
@@ -87,7 +135,7 @@ class TestTWSEndpoints:
             server_version=123,
             connection_time=datetime(2023, 1, 1, 11, 59, 0)
         )
-        mock_tws_client.request_current_time.return_value = mock_time_response
+        mock_tws_client.current_time.return_value = mock_time_response
 
         response = client.get("/api/tws/current-time")
         assert response.status_code == 200
@@ -97,7 +145,6 @@ class TestTWSEndpoints:
         assert "current_time" in data
         assert data["server_version"] == 123
 
-    @patch('app.backend.routers.tws._tws_client')
     def test_current_time_not_connected(self, mock_tws_client):
         """Test current time endpoint when not connected to TWS."""
         # Mock not connected and failed connection attempt
@@ -112,12 +159,11 @@ class TestTWSEndpoints:
         assert "error_message" in data
         assert "Failed to connect to TWS" in data["error_message"]
 
-    @patch('app.backend.routers.tws._tws_client')
     def test_current_time_request_failed(self, mock_tws_client):
         """Test current time endpoint when time request fails."""
         # Mock connected but failed time request
         mock_tws_client.is_connected.return_value = True
-        mock_tws_client.request_current_time.return_value = None
+        mock_tws_client.current_time.return_value = None
 
         response = client.get("/api/tws/current-time")
         assert response.status_code == 200
@@ -126,11 +172,77 @@ class TestTWSEndpoints:
         assert data["success"] is False
         assert "error_message" in data
 
-    @patch('app.backend.routers.tws._tws_client')
-    def test_connect_endpoint_success(self, mock_tws_client):
+    def test_current_time_from_clock(self, mock_tws_client, mock_clock):
+        """Test current time is served from the synced clock without a TWS request."""
+        from datetime import datetime
+
+        mock_clock.current_time.return_value = TimeResponse(
+            current_time=datetime(2023, 1, 1, 12, 0, 0, 250000),
+            server_version=157,
+            uncertainty_ms=12.5,
+        )
+
+        response = client.get("/api/tws/current-time")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["uncertainty_ms"] == 12.5
+        mock_tws_client.current_time.assert_not_called()
+
+    def test_current_time_live_bypasses_clock(self, mock_tws_client, mock_clock):
+        """Test live=true asks TWS even when the clock is synced."""
+        from datetime import datetime
+
+        mock_tws_client.is_connected.return_value = True
+        mock_tws_client.current_time.return_value = TimeResponse(current_time=datetime(2023, 1, 1, 12, 0, 0))
+
+        response = client.get("/api/tws/current-time", params={"live": "true"})
+
+        assert response.json()["uncertainty_ms"] is None
+        mock_clock.current_time.assert_not_called()
+        mock_tws_client.current_time.assert_called_once()
+
+    def test_current_time_live_never_cached(self, mock_tws_client, mock_clock):
+        """Test every live=true request reaches TWS rather than a cached reply."""
+        from datetime import datetime
+
+        mock_tws_client.is_connected.return_value = True
+        mock_tws_client.current_time.side_effect = [
+            TimeResponse(current_time=datetime(2023, 1, 1, 12, 0, second)) for second in range(3)
+        ]
+
+        seconds = [
+            client.get("/api/tws/current-time", params={"live": "true"}).json()["current_time"][-2:]
+            for _ in range(3)
+        ]
+
+        assert seconds == ["00", "01", "02"]
+        assert mock_tws_client.current_time.call_count == 3
+
+    def test_pool_stats(self, mock_tws_pool):
+        """Test pool statistics endpoint."""
+        member = PoolMemberStatus(
+            client_id=3, workload="orders", connected=True, healthy=True,
+            pending_requests=2, routed=5, health_rtt_ms=1.5,
+        )
+        mock_tws_pool.stats.return_value = PoolStats(
+            size=1, connected=1, healthy=1, fallbacks=0, members=[member]
+        )
+
+        response = client.get("/api/tws/pool")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["size"] == 1
+        assert data["members"][0]["client_id"] == 3
+        assert data["members"][0]["workload"] == "orders"
+        assert data["members"][0]["health_rtt_ms"] == 1.5
+
+    def test_connect_endpoint_success(self, mock_tws_pool):
         """Test connect endpoint with successful connection."""
-        mock_tws_client.is_connected.return_value = False
-        mock_tws_client.connect.return_value = True
+        mock_tws_pool.is_connected.return_value = False
+        mock_tws_pool.connect.return_value = True
 
         response = client.post("/api/tws/connect")
         assert response.status_code == 200
@@ -138,10 +250,9 @@ class TestTWSEndpoints:
         data = response.json()
         assert data["success"] is True
 
-    @patch('app.backend.routers.tws._tws_client')
-    def test_connect_endpoint_already_connected(self, mock_tws_client):
+    def test_connect_endpoint_already_connected(self, mock_tws_pool):
         """Test connect endpoint when already connected."""
-        mock_tws_client.is_connected.return_value = True
+        mock_tws_pool.is_connected.return_value = True
 
         response = client.post("/api/tws/connect")
         assert response.status_code == 200
@@ -150,11 +261,10 @@ class TestTWSEndpoints:
         assert data["success"] is True
         assert "Already connected" in data["message"]
 
-    @patch('app.backend.routers.tws._tws_client')
-    def test_connect_endpoint_failure(self, mock_tws_client):
+    def test_connect_endpoint_failure(self, mock_tws_pool):
         """Test connect endpoint with connection failure."""
-        mock_tws_client.is_connected.return_value = False
-        mock_tws_client.connect.return_value = False
+        mock_tws_pool.is_connected.return_value = False
+        mock_tws_pool.connect.return_value = False
 
         response = client.post("/api/tws/connect")
         assert response.status_code == 503
@@ -162,20 +272,18 @@ class TestTWSEndpoints:
         data = response.json()
         assert data["success"] is False
 
-    @patch('app.backend.routers.tws._tws_client')
-    def test_disconnect_endpoint(self, mock_tws_client):
+    def test_disconnect_endpoint(self, mock_tws_pool):
         """Test disconnect endpoint."""
         response = client.post("/api/tws/disconnect")
         assert response.status_code == 200
 
         data = response.json()
         assert data["success"] is True
-        mock_tws_client.disconnect.assert_called_once()
+        mock_tws_pool.disconnect.assert_called_once()
 
-    @patch('app.backend.routers.tws._tws_client')
-    def test_disconnect_endpoint_with_error(self, mock_tws_client):
+    def test_disconnect_endpoint_with_error(self, mock_tws_pool):
         """Test disconnect endpoint when disconnect fails."""
-        mock_tws_client.disconnect.side_effect = Exception("Disconnect failed")
+        mock_tws_pool.disconnect.side_effect = Exception("Disconnect failed")
 
         response = client.post("/api/tws/disconnect")
         assert response.status_code == 500
@@ -192,4 +300,36 @@ def setup_test_environment():
 
 
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
+
+    def test_contract_from_cache(self, mock_resolver):
+        """Test a cached contract is served without waiting on TWS."""
+        mock_resolver.lookup.return_value = ContractInfo(
+            con_id=265598, symbol="AAPL", sec_type="STK", exchange="SMART", currency="USD",
+            resolved_at=datetime(2024, 1, 1),
+        )
+
+        response = client.get("/api/tws/contracts/aapl")
+
+        assert response.status_code == 200
+        assert response.json()["con_id"] == 265598
+        assert mock_resolver.lookup.call_args[0][0].symbol == "AAPL"
+        mock_resolver.resolve.assert_not_called()
+
+    def test_contract_unknown_symbol(self, mock_resolver):
+        """Test an unknown symbol answers 404."""
+        mock_resolver.lookup.return_value = None
+        mock_resolver.resolve.side_effect = TWSRequestError(1, NO_SECURITY_DEFINITION, "No security definition")
+
+        response = client.get("/api/tws/contracts/NOPE")
+
+        assert response.status_code == 404
+
+    def test_contract_not_connected(self, mock_resolver):
+        """Test a cache miss while disconnected answers 503."""
+        mock_resolver.lookup.return_value = None
+        mock_resolver.resolve.side_effect = ConnectionError("Not connected to TWS")
+
+        response = client.get("/api/tws/contracts/AAPL")
+
+        assert response.status_code == 503
@@ -5,7 +5,42 @@ This package provides a client for connecting to and interacting with
 Interactive Brokers TWS application.
 """
 
+from .async_client import AsyncTWSClient
+from .bar_aggregator import BarAggregator, BarSubscription, LiveBar
 from .client import TWSClient
-from .models import TimeResponse
+from .contract_resolver import ContractResolver
+from .depth import DepthManager, DepthSubscription
+from .errors import TWSRequestError
+from .market_data import MarketDataManager, Tick, TickSubscription
+from .models import Bar, TimeResponse
+from .options import OptionChain, OptionChainService
+from .orders import OrderManager
+from .pool import TWSClientPool
+from .portfolio import PortfolioManager
+from .scanner import ScannerService, ScanSubscription
+from .supervisor import ConnectionSupervisor
 
-__all__ = ["TWSClient", "TimeResponse"]
\ No newline at end of file
+__all__ = [
+    "AsyncTWSClient",
+    "Bar",
+    "BarAggregator",
+    "BarSubscription",
+    "ConnectionSupervisor",
+    "ContractResolver",
+    "DepthManager",
+    "DepthSubscription",
+    "LiveBar",
+    "MarketDataManager",
+    "OptionChain",
+    "OptionChainService",
+    "OrderManager",
+    "PortfolioManager",
+    "ScanSubscription",
+    "ScannerService",
+    "TWSClient",
+    "TWSClientPool",
+    "TWSRequestError",
+    "Tick",
+    "TickSubscription",
+    "TimeResponse",
+]
\ No newline at end of file
@@ -0,0 +1,257 @@
+"""
+asyncio facade over the TWS client for use from the FastAPI event loop.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Sequence
+
+from .client import CURRENT_TIME_KEY, TWSClient
+from .bar_aggregator import BarAggregator
+from .depth import DepthManager
+from .market_data import MarketDataManager
+from .orders import OrderManager
+from .models import ConnectionStatus, ScanRow, TimeResponse
+from .options import OptionChain, OptionChainService
+from .scanner import ScannerService, ScanParams
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTWSClient:
+    """
+    Awaitable TWS client.
+
+    Replies are produced on the EClient.run reader thread; they are handed
+    back to the event loop with loop.call_soon_threadsafe so that waiting
+    for TWS never blocks the loop.
+    """
+
+    def __init__(
+        self,
+        client: Optional[TWSClient] = None,
+        host: str = "127.0.0.1",
+        port: int = 7500,
+        client_id: int = 1,
+        auto_reconnect: bool = False,
+    ):
+        """
+        Initialize async TWS client.
+
+        Args:
+            client: Existing TWSClient to wrap; a new one is created if omitted
+            host: TWS host address
+            port: TWS port number
+            client_id: Unique client identifier
+            auto_reconnect: Reconnect and replay subscriptions when the connection drops
+        """
+        self.client = (
+            client if client is not None
+            else TWSClient(host, port, client_id, auto_reconnect=auto_reconnect)
+        )
+
+    @property
+    def host(self) -> str:
+        return self.client.host
+
+    @property
+    def port(self) -> int:
+        return self.client.port
+
+    @property
+    def client_id(self) -> int:
+        return self.client.client_id
+
+    @property
+    def market_data(self) -> MarketDataManager:
+        """Shared market data subscriptions of the wrapped client."""
+        return self.client.market_data
+
+    @property
+    def bars(self) -> BarAggregator:
+        """Live bars built from the wrapped client's streamed trades."""
+        return self.client.bars
+
+    @property
+    def depth(self) -> DepthManager:
+        """Shared market depth subscriptions of the wrapped client."""
+        return self.client.depth
+
+    @property
+    def scanner(self) -> ScannerService:
+        """Shared market scanner subscriptions of the wrapped client."""
+        return self.client.scanner
+
+    @property
+    def options(self) -> OptionChainService:
+        """Option chain snapshots of the wrapped client."""
+        return self.client.options
+
+    @property
+    def orders(self) -> OrderManager:
+        """Order placement and live order state of the wrapped client."""
+        return self.client.orders
+
+    def is_connected(self) -> bool:
+        """Check if client is connected to TWS."""
+        return self.client.is_connected()
+
+    def get_connection_status(self) -> ConnectionStatus:
+        """Get current connection status."""
+        return self.client.get_connection_status()
+
+    async def connect(self, timeout: Optional[float] = None) -> bool:
+        """
+        Connect to TWS without blocking the event loop.
+
+        Args:
+            timeout: Handshake deadline in seconds; defaults to the client's
+
+        Returns:
+            True if connection successful, False otherwise
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.client.connect, timeout)
+
+    async def disconnect(self) -> None:
+        """Disconnect from TWS without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.client.disconnect)
+
+    async def request(self, send: Callable[[int], None], timeout: float = 5.0) -> Any:
+        """
+        Send a request correlated by request id and await its reply.
+
+        Args:
+            send: Callable that issues the EClient request for the given id
+            timeout: Timeout in seconds for the reply
+
+        Returns:
+            The value the matching TWSWrapper callback resolved the request with
+
+        Raises:
+            asyncio.TimeoutError: If TWS does not answer in time
+            TWSRequestError: If TWS answers with an error
+            ConnectionError: If the client is not connected
+        """
+        req_id, future = self.client.submit(send)
+        try:
+            return await asyncio.wait_for(self._bridge(future), timeout)
+        except asyncio.TimeoutError:
+            self.client.requests.discard(req_id, future)
+            raise
+
+    async def current_time(self, timeout: float = 5.0) -> Optional[TimeResponse]:
+        """
+        Request current time from TWS.
+
+        Args:
+            timeout: Timeout in seconds for the request
+
+        Returns:
+            TimeResponse if successful, None otherwise
+        """
+        if not self.is_connected():
+            logger.error("Not connected to TWS")
+            return None
+
+        future = self.client.submit_current_time()
+        try:
+            current_time = await asyncio.wait_for(self._bridge(future), timeout)
+        except asyncio.TimeoutError:
+            logger.error("Timeout waiting for time response from TWS")
+            self.client.requests.discard(CURRENT_TIME_KEY, future)
+            return None
+        except Exception as e:
+            logger.error(f"Error in time request: {e}")
+            return None
+
+        return TimeResponse(
+            current_time=current_time,
+            server_version=self.client.wrapper.server_version,
+            connection_time=self.client.wrapper.connection_time
+        )
+
+    async def scan(self, params: ScanParams, timeout: float = 10.0) -> List[ScanRow]:
+        """
+        Get the full ranking of a scan.
+
+        Answered at once when the scan is already streaming; otherwise the
+        scan is started, its first ranking awaited and the scan cancelled
+        again.
+
+        Args:
+            params: Scan to run
+            timeout: Timeout in seconds for the first ranking
+
+        Returns:
+            Ranked rows, top first
+
+        Raises:
+            asyncio.TimeoutError: If TWS does not answer in time
+            TWSRequestError: If TWS rejects the scan
+            ConnectionError: If the client is not connected
+        """
+        with self.client.scanner.subscribe(params) as subscription:
+            await asyncio.wait_for(self._bridge(subscription.ready), timeout)
+            return subscription.snapshot()
+
+    async def option_chain(
+        self,
+        symbol: str,
+        expirations: Optional[Sequence[str]] = None,
+        min_strike: Optional[float] = None,
+        max_strike: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> OptionChain:
+        """
+        Snapshot an option chain without blocking the event loop.
+
+        Args:
+            symbol: Underlying stock symbol
+            expirations: Expirations as YYYYMMDD; defaults to the nearest few
+            min_strike: Lowest strike included
+            max_strike: Highest strike included
+            timeout: Seconds to wait for the whole chain
+
+        Returns:
+            The chain, served from memory while its TTL lasts
+
+        Raises:
+            ValueError: If the slice is empty or too large
+            TWSRequestError: If TWS lists no options for the symbol
+            ConnectionError: If the client is not connected
+            TimeoutError: If TWS does not list the chain in time
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            lambda: self.client.options.snapshot(
+                symbol, expirations, min_strike=min_strike, max_strike=max_strike, timeout=timeout
+            ),
+        )
+
+    def _bridge(self, future: Future) -> "asyncio.Future[Any]":
+        """Mirror a reader-thread future onto the running event loop."""
+        loop = asyncio.get_running_loop()
+        aio_future = loop.create_future()
+
+        def transfer(done: Future) -> None:
+            if aio_future.done():
+                return
+            exc = done.exception()
+            if exc is not None:
+                aio_future.set_exception(exc)
+            else:
+                aio_future.set_result(done.result())
+
+        def schedule(done: Future) -> None:
+            try:
+                loop.call_soon_threadsafe(transfer, done)
+            except RuntimeError:
+                # The loop closed while the request was in flight
+                pass
+
+        future.add_done_callback(schedule)
+        return aio_future
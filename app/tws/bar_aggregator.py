@@ -0,0 +1,563 @@
+"""
+Live OHLCV bars aggregated from the streamed tick data.
+
+Every trade is folded into each configured bar series of its symbol as
+it arrives, so a tick costs O(1) per series and tick history is never
+re-scanned. Time bars ("1 secs", "15 secs", "1 min", ...) close on their
+interval boundary; volume bars ("1000 volume") close once that many
+shares have traded and tick bars ("100 ticks") after that many trades.
+"""
+
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from ibapi.ticktype import TickTypeEnum
+
+from .bar_archive import BAR_DTYPE, LIVE
+from .market_data import Tick
+from .models import Bar
+
+if TYPE_CHECKING:
+    from .bar_archive import BarArchive
+    from .tick_store import TickColumns
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BAR_SIZES = ("1 secs", "15 secs", "1 min")
+
+# Bar kinds
+TIME = "time"
+VOLUME = "volume"
+TICKS = "ticks"
+
+# Unit name -> (kind, seconds per unit for time bars)
+_UNITS = {
+    "s": (TIME, 1), "sec": (TIME, 1), "secs": (TIME, 1),
+    "m": (TIME, 60), "min": (TIME, 60), "mins": (TIME, 60),
+    "h": (TIME, 3600), "hour": (TIME, 3600), "hours": (TIME, 3600),
+    "volume": (VOLUME, 1), "ticks": (TICKS, 1),
+}
+_TIME_NAMES = {1: "sec", 60: "min", 3600: "hour"}
+
+_TRADE_PRICES = (TickTypeEnum.LAST, TickTypeEnum.DELAYED_LAST)
+_TRADE_SIZES = (TickTypeEnum.LAST_SIZE, TickTypeEnum.DELAYED_LAST_SIZE)
+
+
+class BarSpec(NamedTuple):
+    """A parsed bar size."""
+
+    bar_size: str  # canonical name, e.g. "15 secs"
+    kind: str
+    size: int  # seconds, shares or trades per bar
+
+
+def parse_bar_size(bar_size: str) -> BarSpec:
+    """
+    Parse a bar size such as "1 min", "15s", "500 volume" or "100 ticks".
+
+    Args:
+        bar_size: Bar size in TWS notation or its short form
+
+    Returns:
+        The spec, named canonically in TWS notation
+
+    Raises:
+        ValueError: If the bar size is not understood
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([A-Za-z]+)\s*", bar_size)
+    unit = _UNITS.get(match.group(2).lower()) if match else None
+    count = int(match.group(1)) if match else 0
+    if unit is None or count <= 0:
+        raise ValueError(f"Unsupported bar size: {bar_size!r}")
+
+    kind, seconds = unit
+    if kind != TIME:
+        return BarSpec(f"{count} {kind}", kind, count)
+    # TWS spells seconds in the plural even for "1 secs"
+    name = _TIME_NAMES[seconds]
+    plural = "s" if count > 1 or seconds == 1 else ""
+    return BarSpec(f"{count} {name}{plural}", kind, count * seconds)
+
+
+def bars_from_ticks(columns: "TickColumns", bar_size: str) -> np.ndarray:
+    """
+    Build time bars from stored tick columns in one vectorized pass.
+
+    Trades are paired with their sizes as in the live aggregation: a trade
+    price takes the size tick that follows it before the next trade price,
+    and standalone size ticks are ignored. The last bar may still be open.
+
+    Args:
+        columns: Ticks of one symbol, oldest first, as kept by the TickStore
+        bar_size: Time bar size, e.g. "1 min"
+
+    Returns:
+        Bar records of BAR_DTYPE, oldest first
+
+    Raises:
+        ValueError: If the bar size is not a time bar size
+    """
+    spec = parse_bar_size(bar_size)
+    if spec.kind != TIME:
+        raise ValueError(f"Only time bars can be built from ticks, not {spec.bar_size!r}")
+
+    trades = np.flatnonzero(np.isin(columns.fields, _TRADE_PRICES + _TRADE_SIZES))
+    is_price = np.isin(columns.fields[trades], _TRADE_PRICES)
+    prices_at = np.flatnonzero(is_price)
+    if len(prices_at) == 0:
+        return np.empty(0, dtype=BAR_DTYPE)
+
+    # The size of a trade is the next trade tick, if that is a size
+    sized = np.zeros(len(prices_at), dtype=bool)
+    has_next = prices_at + 1 < len(trades)
+    sized[has_next] = ~is_price[prices_at[has_next] + 1]
+    volumes = np.zeros(len(prices_at), dtype=np.float64)
+    volumes[sized] = columns.sizes[trades[prices_at[sized] + 1]]
+
+    rows = trades[prices_at]
+    prices = columns.prices[rows]
+    buckets = columns.timestamps[rows] // (spec.size * 1_000_000_000)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(prices)]
+
+    records = np.empty(len(starts), dtype=BAR_DTYPE)
+    records["time"] = buckets[starts] * spec.size
+    records["open"] = prices[starts]
+    records["high"] = np.maximum.reduceat(prices, starts)
+    records["low"] = np.minimum.reduceat(prices, starts)
+    records["close"] = prices[ends - 1]
+    records["volume"] = np.add.reduceat(volumes, starts)
+    records["count"] = ends - starts
+    return records
+
+
+class LiveBar(NamedTuple):
+    """A bar built from live trades."""
+
+    symbol: str
+    bar_size: str
+    start: float  # seconds since the epoch
+    end: float  # interval end for time bars, last trade time otherwise
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    count: int
+
+    def to_bar(self) -> Bar:
+        return Bar(
+            time=datetime.fromtimestamp(self.start), open=self.open, high=self.high, low=self.low,
+            close=self.close, volume=self.volume, bar_count=self.count,
+        )
+
+
+class _Series:
+    """The bar being built for one symbol and bar size, plus recent closed bars."""
+
+    __slots__ = (
+        "symbol", "spec", "start", "end", "open", "high", "low", "close", "volume", "count", "history", "first_start",
+    )
+
+    def __init__(self, symbol: str, spec: BarSpec, history: int):
+        self.symbol = symbol
+        self.spec = spec
+        self.count = 0
+        # Start of the first bar, which began before the stream did
+        self.first_start: Optional[float] = None
+        self.history: Deque[LiveBar] = deque(maxlen=history)
+
+    def add(self, price: float, size: float, timestamp: float) -> Optional[LiveBar]:
+        """Fold one trade into the bar; returns the bar it closed, if any."""
+        closed = None
+        spec = self.spec
+        if self.count and spec.kind == TIME and timestamp >= self.end:
+            closed = self.finish()
+
+        if self.count:
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
+            self.close = price
+            self.volume += size
+            self.count += 1
+        else:
+            if spec.kind == TIME:
+                self.start = math.floor(timestamp / spec.size) * spec.size
+                self.end = self.start + spec.size
+                if self.first_start is None:
+                    self.first_start = self.start
+            else:
+                self.start = timestamp
+            self.open = self.high = self.low = self.close = price
+            self.volume = size
+            self.count = 1
+
+        if spec.kind == TIME:
+            return closed
+        self.end = timestamp
+        if (self.volume if spec.kind == VOLUME else self.count) >= spec.size:
+            return self.finish()
+        return None
+
+    def current(self) -> Optional[LiveBar]:
+        if not self.count:
+            return None
+        return LiveBar(
+            self.symbol, self.spec.bar_size, self.start, self.end,
+            self.open, self.high, self.low, self.close, self.volume, self.count,
+        )
+
+    def finish(self) -> LiveBar:
+        bar = self.current()
+        self.history.append(bar)
+        self.count = 0
+        return bar
+
+
+class BarSubscription:
+    """
+    One consumer's queue of closed bars.
+
+    The queue is bounded; when the consumer falls behind the oldest bars
+    are dropped.
+    """
+
+    def __init__(
+        self,
+        aggregator: "BarAggregator",
+        symbols: Optional[Iterable[str]],
+        bar_sizes: Optional[Iterable[str]],
+        maxsize: int,
+        notify: Optional[Callable[[], None]] = None,
+    ):
+        self.symbols = frozenset(s.upper() for s in symbols) if symbols else None
+        self.bar_sizes = frozenset(parse_bar_size(b).bar_size for b in bar_sizes) if bar_sizes else None
+        self.dropped = 0
+        self._aggregator = aggregator
+        self._queue: Deque[LiveBar] = deque(maxlen=maxsize)
+        self._condition = threading.Condition()
+        self._notify = notify
+        self._closed = False
+
+    def wants(self, bar: LiveBar) -> bool:
+        return (self.symbols is None or bar.symbol in self.symbols) and (
+            self.bar_sizes is None or bar.bar_size in self.bar_sizes
+        )
+
+    def put(self, bar: LiveBar) -> None:
+        """Queue a closed bar for the consumer."""
+        with self._condition:
+            was_empty = not self._queue
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(bar)
+            self._condition.notify()
+        if was_empty and self._notify is not None:
+            self._notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[LiveBar]:
+        """
+        Take the oldest queued bar.
+
+        Args:
+            timeout: Seconds to wait for a bar; None waits indefinitely
+
+        Returns:
+            The bar, or None on timeout
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._queue, timeout):
+                return None
+            return self._queue.popleft()
+
+    def drain(self) -> List[LiveBar]:
+        """Take every queued bar without waiting."""
+        with self._condition:
+            bars = list(self._queue)
+            self._queue.clear()
+            return bars
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop receiving bars."""
+        if not self._closed:
+            self._closed = True
+            self._aggregator.unsubscribe(self)
+
+    def __enter__(self) -> "BarSubscription":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class BarAggregator:
+    """
+    Builds multi-resolution bars per symbol from the market data stream.
+
+    Ticks arrive through append_tick on the reader thread. A background
+    thread closes time bars whose interval has ended even when no further
+    trade arrives, and appends closed time bars to the archive's live
+    series in batches, apart from the historical bars. The first bar of
+    each series is missing the trades before the stream started and is not
+    archived. The archive is keyed by whole seconds, and several volume or
+    tick bars can start within one second, so those are kept in the
+    in-memory history only.
+    """
+
+    def __init__(
+        self,
+        bar_sizes: Sequence[str] = DEFAULT_BAR_SIZES,
+        archive: Optional["BarArchive"] = None,
+        history: int = 1000,
+        interval: float = 0.25,
+        queue_size: int = 1000,
+    ):
+        """
+        Initialize bar aggregator.
+
+        Args:
+            bar_sizes: Bar series to build for every symbol
+            archive: Bar archive receiving closed time bars; None keeps bars in memory only
+            history: Closed bars kept in memory per symbol and bar size
+            interval: Seconds between checks for time bars due to close
+            queue_size: Default per-subscriber queue capacity
+        """
+        self.specs: List[BarSpec] = []
+        self.archive = archive
+        self.history_size = history
+        self.interval = interval
+        self.queue_size = queue_size
+        self.trades = 0
+        self.bars_closed = 0
+        self._lock = threading.Lock()
+        self._series: Dict[str, Tuple[_Series, ...]] = {}
+        # Last trade price per symbol, waiting for its size
+        self._pending: Dict[str, Tuple[float, float]] = {}
+        self._subscribers: Tuple[BarSubscription, ...] = ()
+        self._unpersisted: List[LiveBar] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        for bar_size in bar_sizes:
+            self.add_bar_size(bar_size)
+
+    def add_bar_size(self, bar_size: str) -> BarSpec:
+        """
+        Start building another bar series for every symbol.
+
+        Raises:
+            ValueError: If the bar size is not understood
+        """
+        spec = parse_bar_size(bar_size)
+        with self._lock:
+            if spec not in self.specs:
+                self.specs.append(spec)
+                for symbol, series in self._series.items():
+                    self._series[symbol] = series + (_Series(symbol, spec, self.history_size),)
+        return spec
+
+    def append_tick(self, tick: Tick) -> None:
+        """Fold a Tick from the market data stream into the symbol's bars."""
+        field = tick.field
+        if field in _TRADE_PRICES:
+            with self._lock:
+                pending = self._pending.get(tick.symbol)
+                self._pending[tick.symbol] = (tick.price, tick.time)
+                # A trade reported without a size still moves the prices
+                closed = self._trade(tick.symbol, *pending, 0) if pending is not None else None
+        elif field in _TRADE_SIZES:
+            with self._lock:
+                pending = self._pending.pop(tick.symbol, None)
+                # TWS repeats each trade size as a standalone tick; only the
+                # size paired with a trade price is counted
+                if pending is None:
+                    return
+                closed = self._trade(tick.symbol, *pending, tick.size)
+        else:
+            return
+
+        if self._thread is None:
+            self.start()
+        if closed:
+            self._publish(closed)
+
+    def add_trade(self, symbol: str, price: float, size: float, timestamp: Optional[float] = None) -> None:
+        """Fold one trade into a symbol's bars directly."""
+        with self._lock:
+            closed = self._trade(symbol.upper(), price, timestamp or time.time(), size)
+        if closed:
+            self._publish(closed)
+
+    def _trade(self, symbol: str, price: float, timestamp: float, size: float) -> List[LiveBar]:
+        series = self._series.get(symbol)
+        if series is None:
+            series = tuple(_Series(symbol, spec, self.history_size) for spec in self.specs)
+            self._series[symbol] = series
+        self.trades += 1
+        closed = []
+        for item in series:
+            bar = item.add(price, size, timestamp)
+            if bar is not None:
+                closed.append(bar)
+        return closed
+
+    def close_expired(self, now: Optional[float] = None) -> int:
+        """
+        Close time bars whose interval has ended.
+
+        Args:
+            now: Current time in seconds since the epoch; defaults to the wall clock
+
+        Returns:
+            Number of bars closed
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            closed = [
+                item.finish()
+                for series in self._series.values()
+                for item in series
+                if item.count and item.spec.kind == TIME and now >= item.end
+            ]
+        if closed:
+            self._publish(closed)
+        return len(closed)
+
+    def _publish(self, bars: List[LiveBar]) -> None:
+        with self._lock:
+            self.bars_closed += len(bars)
+            if self.archive is not None:
+                first_starts = {
+                    (item.symbol, item.spec.bar_size): item.first_start
+                    for symbol in {bar.symbol for bar in bars}
+                    for item in self._series.get(symbol, ())
+                    if item.spec.kind == TIME
+                }
+                self._unpersisted.extend(
+                    bar for bar in bars
+                    if (bar.symbol, bar.bar_size) in first_starts
+                    and bar.start != first_starts[(bar.symbol, bar.bar_size)]
+                )
+        for subscription in self._subscribers:
+            for bar in bars:
+                if subscription.wants(bar):
+                    subscription.put(bar)
+
+    def flush(self) -> int:
+        """
+        Append closed time bars to the archive's live series.
+
+        Returns:
+            Number of bars written
+        """
+        with self._lock:
+            bars, self._unpersisted = self._unpersisted, []
+        if not bars or self.archive is None:
+            return 0
+
+        series: Dict[Tuple[str, str], List[tuple]] = {}
+        for bar in bars:
+            series.setdefault((bar.symbol, bar.bar_size), []).append(
+                (int(bar.start), bar.open, bar.high, bar.low, bar.close, bar.volume, bar.count)
+            )
+        written = 0
+        for (symbol, bar_size), records in series.items():
+            try:
+                written += self.archive.series(symbol, bar_size, LIVE).append(
+                    np.array(records, dtype=BAR_DTYPE)
+                )
+            except Exception as e:
+                logger.error(f"Error archiving {bar_size} bars for {symbol}: {e}")
+        return written
+
+    def current(self, symbol: str, bar_size: str) -> Optional[LiveBar]:
+        """The bar still being built, or None if no trade has arrived in it."""
+        item = self._find(symbol, bar_size)
+        if item is None:
+            return None
+        with self._lock:
+            return item.current()
+
+    def history(self, symbol: str, bar_size: str) -> List[LiveBar]:
+        """Recently closed bars for a symbol, oldest first."""
+        item = self._find(symbol, bar_size)
+        if item is None:
+            return []
+        with self._lock:
+            return list(item.history)
+
+    def _find(self, symbol: str, bar_size: str) -> Optional[_Series]:
+        name = parse_bar_size(bar_size).bar_size
+        for item in self._series.get(symbol.upper(), ()):
+            if item.spec.bar_size == name:
+                return item
+        return None
+
+    def subscribe(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        bar_sizes: Optional[Iterable[str]] = None,
+        maxsize: Optional[int] = None,
+        notify: Optional[Callable[[], None]] = None,
+    ) -> BarSubscription:
+        """
+        Subscribe to bar-close events.
+
+        Args:
+            symbols: Only deliver bars for these symbols; None for all
+            bar_sizes: Only deliver bars of these sizes; None for all
+            maxsize: Queue capacity for this subscriber; defaults to queue_size
+            notify: Called when the queue becomes non-empty
+
+        Returns:
+            Subscription to read closed bars from; close it when done
+        """
+        subscription = BarSubscription(self, symbols, bar_sizes, maxsize or self.queue_size, notify)
+        with self._lock:
+            self._subscribers = self._subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: BarSubscription) -> None:
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+
+    def start(self) -> None:
+        """Start closing and archiving bars in the background."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="bar-aggregator", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and archive any bars already closed."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout=2)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.close_expired()
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error closing bars: {e}")
@@ -0,0 +1,235 @@
+"""
+Append-only binary bar archive read through numpy.memmap.
+
+Each contract/bar size/source series is one file: a fixed 64-byte header
+followed by fixed-width OHLCV records in time order. A sidecar ``.idx``
+file holds the time of every INDEX_STRIDE-th record, so a date range is
+located by binary search over a few pages instead of parsing or loading
+the whole file.
+"""
+
+import logging
+import os
+import re
+import struct
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from .models import Bar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = Path.home() / ".cache" / "ibxtac" / "bars"
+
+MAGIC = b"IBXBARS\0"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+# magic, version, record size, index stride
+_HEADER = struct.Struct("<8sHHI")
+
+# Records per sparse index entry
+INDEX_STRIDE = 1024
+
+# Series sources: bars fetched from TWS history and bars aggregated from the
+# live stream. They are kept apart so a backfill is never cut short by live
+# bars already stored for the same span.
+HISTORICAL = "historical"
+LIVE = "live"
+SOURCES = (HISTORICAL, LIVE)
+
+BAR_DTYPE = np.dtype([
+    ("time", "<i8"),  # bar start, seconds since the epoch
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("count", "<i8"),
+])
+
+
+class BarFileError(Exception):
+    """Raised when a bar file is corrupt or has an unsupported format."""
+
+
+def bars_to_records(bars: Iterable[Bar]) -> np.ndarray:
+    """Convert Bar models to archive records."""
+    return np.array(
+        [
+            (int(bar.time.timestamp()), bar.open, bar.high, bar.low, bar.close,
+             bar.volume, bar.bar_count or 0)
+            for bar in bars
+        ],
+        dtype=BAR_DTYPE,
+    )
+
+
+class BarFile:
+    """One append-only series of fixed-width bar records."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".idx")
+        self._lock = threading.Lock()
+        self._mmap: Optional[np.memmap] = None
+        self._index: Optional[np.ndarray] = None
+        if self.path.exists():
+            self._check_header()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "wb") as f:
+                header = _HEADER.pack(MAGIC, FORMAT_VERSION, BAR_DTYPE.itemsize, INDEX_STRIDE)
+                f.write(header.ljust(HEADER_SIZE, b"\0"))
+            open(self.index_path, "wb").close()
+
+    def _check_header(self) -> None:
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise BarFileError(f"{self.path}: truncated header")
+        magic, version, record_size, stride = _HEADER.unpack_from(header)
+        if magic != MAGIC:
+            raise BarFileError(f"{self.path}: not a bar file")
+        if version != FORMAT_VERSION or record_size != BAR_DTYPE.itemsize or stride != INDEX_STRIDE:
+            raise BarFileError(f"{self.path}: unsupported format version {version}")
+
+    def __len__(self) -> int:
+        return (os.path.getsize(self.path) - HEADER_SIZE) // BAR_DTYPE.itemsize
+
+    def _records(self) -> np.ndarray:
+        """Memory-mapped view of every record; remapped after appends."""
+        count = len(self)
+        if self._mmap is None or len(self._mmap) != count:
+            if count == 0:
+                return np.empty(0, dtype=BAR_DTYPE)
+            self._mmap = np.memmap(
+                self.path, dtype=BAR_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,)
+            )
+        return self._mmap
+
+    def _sparse_index(self) -> np.ndarray:
+        if self._index is None:
+            records = self._records()
+            index = np.fromfile(self.index_path, dtype="<i8") if self.index_path.exists() else None
+            expected = -(-len(records) // INDEX_STRIDE)
+            if index is None or len(index) != expected:
+                # An interrupted append can leave the index behind; rebuild it
+                logger.warning(f"Rebuilding sparse index for {self.path}")
+                index = np.ascontiguousarray(records["time"][::INDEX_STRIDE], dtype="<i8")
+                index.tofile(self.index_path)
+            self._index = index
+        return self._index
+
+    def last_time(self) -> Optional[int]:
+        """Time of the newest record, or None if the file is empty."""
+        records = self._records()
+        return int(records["time"][-1]) if len(records) else None
+
+    def append(self, records: np.ndarray) -> int:
+        """
+        Append records newer than the last stored bar.
+
+        Records at or before the last stored time are skipped, so
+        overlapping backfills can be appended safely.
+
+        Args:
+            records: Array of BAR_DTYPE records in time order
+
+        Returns:
+            Number of records written
+        """
+        with self._lock:
+            last = self.last_time()
+            if last is not None:
+                records = records[records["time"] > last]
+            if len(records) == 0:
+                return 0
+
+            first_position = len(self)
+            with open(self.path, "ab") as f:
+                f.write(np.ascontiguousarray(records, dtype=BAR_DTYPE).tobytes())
+
+            # Index the records whose position lands on a stride boundary
+            offset = (-first_position) % INDEX_STRIDE
+            indexed = records["time"][offset::INDEX_STRIDE].astype("<i8")
+            if len(indexed):
+                with open(self.index_path, "ab") as f:
+                    f.write(indexed.tobytes())
+            self._index = None
+            return len(records)
+
+    def _position(self, timestamp: int, side: str) -> int:
+        """Binary search for a record position using the sparse index."""
+        records = self._records()
+        index = self._sparse_index()
+        block = int(np.searchsorted(index, timestamp, side=side))
+        lo = max(block - 1, 0) * INDEX_STRIDE
+        hi = min(block * INDEX_STRIDE + 1, len(records)) if block < len(index) else len(records)
+        # Only the pages for one stride of times are touched
+        return lo + int(np.searchsorted(records["time"][lo:hi], timestamp, side=side))
+
+    def position(self, when: datetime) -> int:
+        """Index of the first record at or after a time."""
+        return self._position(int(when.timestamp()), "left")
+
+    def read(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> np.ndarray:
+        """
+        Records with start <= time <= end as a read-only memmap slice.
+
+        Args:
+            start: First bar time to include; None for the beginning
+            end: Last bar time to include; None for the end
+
+        Returns:
+            BAR_DTYPE array backed by the file, not loaded into memory
+        """
+        records = self._records()
+        lo = 0 if start is None else self.position(start)
+        hi = len(records) if end is None else self._position(int(end.timestamp()), "right")
+        return records[lo:max(lo, hi)]
+
+
+class BarArchive:
+    """Directory of bar files, one per contract, bar size and source."""
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_ARCHIVE_DIR):
+        self.root = Path(root)
+        self._files: Dict[Tuple[str, str, str], BarFile] = {}
+        self._lock = threading.Lock()
+
+    def path(self, symbol: str, bar_size: str, source: str = HISTORICAL) -> Path:
+        """
+        File holding one symbol's bars of one size and source.
+
+        Raises:
+            ValueError: If the source is not one of SOURCES
+        """
+        if source not in SOURCES:
+            raise ValueError(f"Unknown bar source: {source!r}")
+        slug = re.sub(r"[^A-Za-z0-9]+", "", bar_size)
+        suffix = "" if source == HISTORICAL else f".{source}"
+        return self.root / symbol.upper() / f"{slug}{suffix}.bars"
+
+    def exists(self, symbol: str, bar_size: str, source: str = HISTORICAL) -> bool:
+        return self.path(symbol, bar_size, source).exists()
+
+    def series(self, symbol: str, bar_size: str, source: str = HISTORICAL) -> BarFile:
+        """Open (or create) the bar file for a symbol, bar size and source."""
+        key = (symbol.upper(), bar_size, source)
+        with self._lock:
+            bar_file = self._files.get(key)
+            if bar_file is None:
+                bar_file = BarFile(self.path(symbol, bar_size, source))
+                self._files[key] = bar_file
+            return bar_file
+
+    def append_bars(self, symbol: str, bar_size: str, bars: Iterable[Bar], source: str = HISTORICAL) -> int:
+        """Append Bar models to a series, skipping ones already stored."""
+        records = bars_to_records(bars)
+        if len(records) == 0:
+            return 0
+        return self.series(symbol, bar_size, source).append(np.sort(records, order="time"))
@@ -5,16 +5,165 @@ TWS client implementation for connecting to Interactive Brokers TWS.
 import logging
 import threading
 import time
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
 from datetime import datetime
-from typing import Optional, Callable
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
 
-from ibapi.client import EClient
+from ibapi.contract import Contract, ContractDetails
+from ibapi.execution import Execution
+from ibapi.order import Order
+from ibapi.order_state import OrderState
 from ibapi.wrapper import EWrapper
 
-from .models import TimeResponse, ConnectionStatus
+from .bar_aggregator import DEFAULT_BAR_SIZES, BarAggregator
+from .bar_archive import BarArchive
+from .contract_resolver import ContractCache, ContractResolver
+from .depth import DepthManager
+from .errors import CONNECTIVITY_LOST, NO_REQUEST_ID, WARNING_ERROR_CODES, TWSRequestError
+from .historical import BarCache, HistoricalDataService
+from .market_data import MarketDataManager
+from .models import Bar, TimeResponse, ConnectionStatus
+from .options import OptionChainService
+from .orders import OrderManager
+from .pacing import PacedEClient
+from .portfolio import PortfolioManager
+from .scanner import ScannerService
+from .supervisor import ConnectionSupervisor
+from .tick_store import TickStore
 
 logger = logging.getLogger(__name__)
 
+# reqCurrentTime carries no request id, so its replies are correlated by key
+CURRENT_TIME_KEY = "currentTime"
+
+# TWS reports errors for request ids and order ids in one id space, and order
+# ids count up from nextValidId (often 1 on a fresh account). Request ids start
+# far above any order id so an error can never be applied to both.
+FIRST_REQUEST_ID = 1 << 30
+
+
+class RequestRegistry:
+    """
+    Correlates outstanding TWS requests with the futures waiting on them.
+
+    Request ids are handed out monotonically so many requests can be in
+    flight over the one socket, and each TWSWrapper callback resolves only
+    the future registered under its own request id.
+    """
+
+    def __init__(self, first_id: int = 1):
+        self._lock = threading.Lock()
+        self._next_id = first_id
+        self._pending: Dict[Hashable, Future] = {}
+        self._partial: Dict[Hashable, List[Any]] = {}
+
+    def next_id(self) -> int:
+        """Allocate the next request id."""
+        with self._lock:
+            req_id = self._next_id
+            self._next_id += 1
+            return req_id
+
+    def register(self) -> Tuple[int, Future]:
+        """Allocate a request id and register a future for its reply."""
+        future: Future = Future()
+        with self._lock:
+            req_id = self._next_id
+            self._next_id += 1
+            self._pending[req_id] = future
+        return req_id, future
+
+    def register_shared(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        Join the pending future for a request that has no request id.
+
+        Args:
+            key: Correlation key for the request type
+
+        Returns:
+            The pending future and whether it was newly created, in which
+            case the caller is responsible for sending the request
+        """
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._pending[key] = future
+            return future, True
+
+    def append(self, key: Hashable, item: Any) -> bool:
+        """Collect one part of a multi-message reply (e.g. historicalData)."""
+        with self._lock:
+            if key not in self._pending:
+                return False
+            self._partial.setdefault(key, []).append(item)
+            return True
+
+    def complete(self, key: Hashable) -> bool:
+        """Resolve a multi-message reply with the parts collected so far."""
+        with self._lock:
+            items = self._partial.pop(key, [])
+        return self.resolve(key, items)
+
+    def resolve(self, key: Hashable, result: Any) -> bool:
+        """Complete the future registered under key with a result."""
+        with self._lock:
+            future = self._pending.pop(key, None)
+            self._partial.pop(key, None)
+        if future is None:
+            return False
+        try:
+            future.set_result(result)
+        except InvalidStateError:
+            # The caller cancelled the request while the reply was in flight
+            return False
+        return True
+
+    def fail(self, key: Hashable, exc: BaseException) -> bool:
+        """Complete the future registered under key with an exception."""
+        with self._lock:
+            future = self._pending.pop(key, None)
+            self._partial.pop(key, None)
+        if future is None:
+            return False
+        try:
+            future.set_exception(exc)
+        except InvalidStateError:
+            return False
+        return True
+
+    def fail_all(self, exc: BaseException) -> int:
+        """Fail every outstanding request, e.g. when the connection drops."""
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._partial.clear()
+        failed = 0
+        for future in pending:
+            try:
+                future.set_exception(exc)
+                failed += 1
+            except InvalidStateError:
+                pass
+        return failed
+
+    def discard(self, key: Hashable, future: Optional[Future] = None) -> None:
+        """Forget a request whose caller gave up waiting for it."""
+        with self._lock:
+            if future is None or self._pending.get(key) is future:
+                self._pending.pop(key, None)
+                self._partial.pop(key, None)
+
+    def is_pending(self, key: Hashable) -> bool:
+        """Check whether a request is still waiting for its reply."""
+        with self._lock:
+            return key in self._pending
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
 
 class TWSWrapper(EWrapper):
     """Wrapper class that handles callbacks from TWS."""
@@ -25,21 +174,211 @@ class TWSWrapper(EWrapper):
         self.server_version: Optional[int] = None
         self.connection_time: Optional[datetime] = None
         self.error_message: Optional[str] = None
-        self._time_received_event = threading.Event()
+        self.error_code: Optional[int] = None
+        self.next_order_id: Optional[int] = None
+        self.accounts: List[str] = []
+        self.requests = RequestRegistry(first_id=FIRST_REQUEST_ID)
+        self._ready_event = threading.Event()
+        self._handlers: Dict[str, List[Callable[..., None]]] = {}
+        self._handlers_lock = threading.Lock()
+
+    def add_handler(self, callback: str, handler: Callable[..., None]) -> None:
+        """
+        Route a TWS callback to an additional handler.
+
+        Handlers run on the reader thread with the callback's arguments and
+        must not block.
+
+        Args:
+            callback: EWrapper callback name, e.g. "tickPrice"
+            handler: Callable invoked with the callback arguments
+        """
+        with self._handlers_lock:
+            # Copy on write so dispatch can iterate without locking
+            self._handlers[callback] = self._handlers.get(callback, []) + [handler]
+
+    def remove_handler(self, callback: str, handler: Callable[..., None]) -> None:
+        """Stop routing a TWS callback to a handler."""
+        with self._handlers_lock:
+            handlers = [h for h in self._handlers.get(callback, []) if h != handler]
+            if handlers:
+                self._handlers[callback] = handlers
+            else:
+                self._handlers.pop(callback, None)
+
+    def _dispatch(self, callback: str, *args: Any) -> None:
+        """Invoke the handlers registered for a callback."""
+        for handler in self._handlers.get(callback, ()):
+            try:
+                handler(*args)
+            except Exception:
+                logger.exception(f"Error in {callback} handler")
 
     def currentTime(self, time: int) -> None:
         """Callback for receiving current time from TWS."""
         self.current_time = datetime.fromtimestamp(time)
         logger.info(f"Received current time from TWS: {self.current_time}")
-        self._time_received_event.set()
+        self.requests.resolve(CURRENT_TIME_KEY, self.current_time)
 
     def error(self, reqId: int, errorCode: int, errorString: str, advancedOrderRejectJson: str = "") -> None:
         """Callback for error messages from TWS."""
         error_msg = f"TWS Error {errorCode}: {errorString}"
         logger.error(error_msg)
         self.error_message = error_msg
-        if errorCode in [1100, 1101, 1102]:  # Connection lost errors
-            self._time_received_event.set()
+        self.error_code = errorCode
+        if errorCode == CONNECTIVITY_LOST:
+            # 1101/1102 only report the link restored; nothing in flight was lost
+            self.requests.fail_all(TWSRequestError(reqId, errorCode, errorString))
+        elif reqId != NO_REQUEST_ID and errorCode not in WARNING_ERROR_CODES:
+            self.requests.fail(reqId, TWSRequestError(reqId, errorCode, errorString))
+        self._dispatch("error", reqId, errorCode, errorString)
+
+    def connectionClosed(self) -> None:
+        """Callback when the socket to TWS is closed."""
+        logger.info("TWS connection closed")
+        self.requests.fail_all(ConnectionError("Connection to TWS closed"))
+        # Wake a pending handshake; connect() then sees the closed socket
+        self._ready_event.set()
+        self._dispatch("connectionClosed")
+
+    def tickPrice(self, reqId: int, tickType: int, price: float, attrib: Any) -> None:
+        """Callback for market data price ticks."""
+        self._dispatch("tickPrice", reqId, tickType, price, attrib)
+
+    def tickSize(self, reqId: int, tickType: int, size: int) -> None:
+        """Callback for market data size ticks."""
+        self._dispatch("tickSize", reqId, tickType, size)
+
+    def tickOptionComputation(
+        self, reqId: int, tickType: int, tickAttrib: int, impliedVol: Optional[float], delta: Optional[float],
+        optPrice: Optional[float], pvDividend: Optional[float], gamma: Optional[float], vega: Optional[float],
+        theta: Optional[float], undPrice: Optional[float],
+    ) -> None:
+        """Callback for option greeks and implied volatility; None marks values TWS has not computed."""
+        self._dispatch(
+            "tickOptionComputation", reqId, tickType, tickAttrib, impliedVol, delta,
+            optPrice, pvDividend, gamma, vega, theta, undPrice,
+        )
+
+    def tickSnapshotEnd(self, reqId: int) -> None:
+        """Callback when all ticks of a market data snapshot were sent."""
+        self.requests.complete(reqId)
+
+    def updateMktDepth(self, reqId: int, position: int, operation: int, side: int, price: float, size: int) -> None:
+        """Callback for market depth updates."""
+        self._dispatch("updateMktDepth", reqId, position, operation, side, price, size)
+
+    def updateMktDepthL2(
+        self, reqId: int, position: int, marketMaker: str, operation: int,
+        side: int, price: float, size: int, isSmartDepth: bool,
+    ) -> None:
+        """Callback for market depth updates carrying the market maker or exchange."""
+        self._dispatch("updateMktDepthL2", reqId, position, marketMaker, operation, side, price, size, isSmartDepth)
+
+    def scannerData(
+        self, reqId: int, rank: int, contractDetails: ContractDetails,
+        distance: str, benchmark: str, projection: str, legsStr: str,
+    ) -> None:
+        """Callback for one ranked row of a scanner refresh."""
+        self._dispatch("scannerData", reqId, rank, contractDetails, distance, benchmark, projection, legsStr)
+
+    def scannerDataEnd(self, reqId: int) -> None:
+        """Callback when all rows of a scanner refresh were sent."""
+        self._dispatch("scannerDataEnd", reqId)
+
+    def historicalData(self, reqId: int, bar: Any) -> None:
+        """Callback for one bar of a historical data request."""
+        self.requests.append(reqId, bar)
+
+    def historicalDataEnd(self, reqId: int, start: str, end: str) -> None:
+        """Callback when all bars of a historical data request were sent."""
+        self.requests.complete(reqId)
+
+    def contractDetails(self, reqId: int, contractDetails: ContractDetails) -> None:
+        """Callback for one contract matching a contract details request."""
+        self.requests.append(reqId, contractDetails)
+
+    def contractDetailsEnd(self, reqId: int) -> None:
+        """Callback when all contracts of a contract details request were sent."""
+        self.requests.complete(reqId)
+
+    def securityDefinitionOptionParameter(
+        self, reqId: int, exchange: str, underlyingConId: int, tradingClass: str,
+        multiplier: str, expirations: Any, strikes: Any,
+    ) -> None:
+        """Callback for the option expirations and strikes listed on one exchange."""
+        self.requests.append(reqId, (exchange, underlyingConId, tradingClass, multiplier, expirations, strikes))
+
+    def securityDefinitionOptionParameterEnd(self, reqId: int) -> None:
+        """Callback when the option parameters of every exchange were sent."""
+        self.requests.complete(reqId)
+
+    def orderStatus(
+        self, orderId: int, status: str, filled: float, remaining: float, avgFillPrice: float,
+        permId: int, parentId: int, lastFillPrice: float, clientId: int, whyHeld: str, mktCapPrice: float,
+    ) -> None:
+        """Callback for order status changes."""
+        self._dispatch(
+            "orderStatus", orderId, status, filled, remaining, avgFillPrice,
+            permId, parentId, lastFillPrice, clientId, whyHeld, mktCapPrice,
+        )
+
+    def openOrder(self, orderId: int, contract: Contract, order: Order, orderState: OrderState) -> None:
+        """Callback for an open order, e.g. in reply to reqOpenOrders."""
+        self._dispatch("openOrder", orderId, contract, order, orderState)
+
+    def openOrderEnd(self) -> None:
+        """Callback when all open orders were sent."""
+        self._dispatch("openOrderEnd")
+
+    def execDetails(self, reqId: int, contract: Contract, execution: Execution) -> None:
+        """Callback for an execution of an order."""
+        self._dispatch("execDetails", reqId, contract, execution)
+
+    def managedAccounts(self, accountsList: str) -> None:
+        """Callback with the accounts this session may trade, sent on connect."""
+        self.accounts = [account for account in accountsList.split(",") if account]
+        logger.info(f"Managed accounts: {self.accounts}")
+
+    def updateAccountValue(self, key: str, val: str, currency: str, accountName: str) -> None:
+        """Callback for one account value of a reqAccountUpdates subscription."""
+        self._dispatch("updateAccountValue", key, val, currency, accountName)
+
+    def updatePortfolio(
+        self, contract: Contract, position: float, marketPrice: float, marketValue: float,
+        averageCost: float, unrealizedPNL: float, realizedPNL: float, accountName: str,
+    ) -> None:
+        """Callback for one position of a reqAccountUpdates subscription."""
+        self._dispatch(
+            "updatePortfolio", contract, position, marketPrice, marketValue,
+            averageCost, unrealizedPNL, realizedPNL, accountName,
+        )
+
+    def updateAccountTime(self, timeStamp: str) -> None:
+        """Callback with the time of the last account update."""
+        self._dispatch("updateAccountTime", timeStamp)
+
+    def accountDownloadEnd(self, accountName: str) -> None:
+        """Callback when the initial account download is complete."""
+        self._dispatch("accountDownloadEnd", accountName)
+
+    def position(self, account: str, contract: Contract, position: float, avgCost: float) -> None:
+        """Callback for one position of a reqPositions subscription."""
+        self._dispatch("position", account, contract, position, avgCost)
+
+    def positionEnd(self) -> None:
+        """Callback when all positions were sent."""
+        self._dispatch("positionEnd")
+
+    def pnl(self, reqId: int, dailyPnL: float, unrealizedPnL: float, realizedPnL: float) -> None:
+        """Callback for account P&L updates."""
+        self._dispatch("pnl", reqId, dailyPnL, unrealizedPnL, realizedPnL)
+
+    def pnlSingle(
+        self, reqId: int, pos: int, dailyPnL: float, unrealizedPnL: float, realizedPnL: float, value: float,
+    ) -> None:
+        """Callback for P&L updates of a single position."""
+        self._dispatch("pnlSingle", reqId, pos, dailyPnL, unrealizedPnL, realizedPnL, value)
 
     def connectAck(self) -> None:
         """Callback when connection is acknowledged."""
@@ -49,22 +388,39 @@ class TWSWrapper(EWrapper):
     def nextValidId(self, orderId: int) -> None:
         """Callback when next valid order ID is received."""
         logger.info(f"Next valid order ID: {orderId}")
-
-    def wait_for_time(self, timeout: float = 5.0) -> bool:
-        """Wait for time response with timeout."""
-        return self._time_received_event.wait(timeout)
-
-    def reset_time_event(self) -> None:
-        """Reset the time received event."""
-        self._time_received_event.clear()
-        self.current_time = None
+        self.next_order_id = orderId
+        self._dispatch("nextValidId", orderId)
+        # TWS sends nextValidId once the API session is usable
+        self._ready_event.set()
+
+    def wait_until_ready(self, timeout: float) -> bool:
+        """Wait for the connection handshake to complete."""
+        return self._ready_event.wait(timeout)
+
+    def reset_handshake(self) -> None:
+        """Prepare for a new connection handshake."""
+        self._ready_event.clear()
+        self.next_order_id = None
         self.error_message = None
+        self.error_code = None
 
 
 class TWSClient:
     """Main TWS client for connecting to Interactive Brokers TWS."""
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 7500, client_id: int = 1):
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 7500,
+        client_id: int = 1,
+        connect_timeout: float = 5.0,
+        cache_dir: Optional[str] = None,
+        archive_dir: Optional[str] = None,
+        contract_db: Optional[str] = None,
+        bar_sizes: Sequence[str] = DEFAULT_BAR_SIZES,
+        auto_reconnect: bool = False,
+        archive: Optional[BarArchive] = None,
+    ):
         """
         Initialize TWS client.
 
@@ -72,42 +428,94 @@ class TWSClient:
             host: TWS host address
             port: TWS port number (usually 7496 for live, 7497 for paper)
             client_id: Unique client identifier
+            connect_timeout: Deadline in seconds for the connection handshake
+            cache_dir: Directory for cached historical bars
+            archive_dir: Directory of the binary bar archive
+            contract_db: SQLite file caching resolved contracts
+            bar_sizes: Live bar series built from streamed trades, e.g. "1 min" or "500 volume"
+            auto_reconnect: Reconnect and replay subscriptions when the connection drops
+            archive: Bar archive shared with other clients; one is opened on archive_dir if omitted
         """
         self.host = host
         self.port = port
         self.client_id = client_id
+        self.connect_timeout = connect_timeout
+        self.connect_latency: Optional[float] = None
 
         self.wrapper = TWSWrapper()
-        self.client = EClient(self.wrapper)
+        self.client = PacedEClient(self.wrapper)
+        self.requests = self.wrapper.requests
+        self.tick_store = TickStore()
+        if archive is None:
+            archive = BarArchive(archive_dir) if archive_dir else BarArchive()
+        self.archive = archive
+        self.bars = BarAggregator(bar_sizes, archive=self.archive)
+        self.market_data = MarketDataManager(self, tick_store=self.tick_store, bar_aggregator=self.bars)
+        self.depth = DepthManager(self)
+        self.scanner = ScannerService(self)
+        self.historical = HistoricalDataService(
+            self, cache=BarCache(cache_dir) if cache_dir else None, archive=self.archive
+        )
+        self.contracts = ContractResolver(self, cache=ContractCache(contract_db) if contract_db else None)
+        self.options = OptionChainService(self)
+        self.orders = OrderManager(self)
+        self.portfolio = PortfolioManager(self)
+        self.supervisor = ConnectionSupervisor(self) if auto_reconnect else None
         self._connection_thread: Optional[threading.Thread] = None
         self._connected = False
 
-    def connect(self) -> bool:
+    def connect(self, timeout: Optional[float] = None) -> bool:
         """
         Connect to TWS.
 
+        Returns as soon as TWS completes the API handshake by sending
+        nextValidId, rather than after a fixed delay.
+
+        Args:
+            timeout: Handshake deadline in seconds; defaults to connect_timeout
+
         Returns:
             True if connection successful, False otherwise
         """
+        if timeout is None:
+            timeout = self.connect_timeout
+
         try:
             logger.info(f"Connecting to TWS at {self.host}:{self.port} with client ID {self.client_id}")
+            started = time.perf_counter()
+            # A reader thread left over from a dropped connection resets the
+            # EClient as it exits, so let it finish before reusing the EClient
+            previous = self._connection_thread
+            if previous is not None and previous.is_alive() and previous is not threading.current_thread():
+                previous.join(timeout=2)
+
+            self.wrapper.reset_handshake()
             self.client.connect(self.host, self.port, self.client_id)
 
+            if not self.client.isConnected():
+                logger.error("Failed to connect to TWS")
+                return False
+
             # Start the client in a separate thread
             self._connection_thread = threading.Thread(target=self.client.run, daemon=True)
             self._connection_thread.start()
 
-            # Wait a moment for connection to establish
-            time.sleep(1)
+            if not self.wrapper.wait_until_ready(timeout):
+                logger.error(f"Timed out after {timeout}s waiting for TWS handshake")
+                self.client.disconnect()
+                return False
 
-            if self.client.isConnected():
-                self._connected = True
-                logger.info("Successfully connected to TWS")
-                return True
-            else:
-                logger.error("Failed to connect to TWS")
+            if not self.client.isConnected():
+                logger.error("Connection to TWS closed during handshake")
                 return False
 
+            self.connect_latency = time.perf_counter() - started
+            self._connected = True
+            logger.info(f"Successfully connected to TWS in {self.connect_latency * 1000:.1f} ms")
+            if self.supervisor is not None:
+                self.supervisor.start()
+            return True
+
         except Exception as e:
             logger.error(f"Error connecting to TWS: {e}")
             return False
@@ -115,11 +523,18 @@ class TWSClient:
     def disconnect(self) -> None:
         """Disconnect from TWS."""
         try:
+            # An intentional disconnect must not trigger a reconnect
+            if self.supervisor is not None:
+                self.supervisor.stop()
+
             if self.client.isConnected():
                 self.client.disconnect()
                 self._connected = False
                 logger.info("Disconnected from TWS")
 
+            self.requests.fail_all(ConnectionError("Disconnected from TWS"))
+            self.bars.stop()
+
             if self._connection_thread and self._connection_thread.is_alive():
                 self._connection_thread.join(timeout=2)
 
@@ -138,9 +553,62 @@ class TWSClient:
             host=self.host,
             port=self.port,
             connection_time=self.wrapper.connection_time,
+            connect_latency_ms=(
+                self.connect_latency * 1000 if self.connect_latency is not None else None
+            ),
+            reconnects=self.supervisor.reconnects if self.supervisor is not None else 0,
+            last_recovery_ms=(
+                self.supervisor.status().last_recovery_ms if self.supervisor is not None else None
+            ),
             error_message=self.wrapper.error_message
         )
 
+    def submit(self, send: Callable[[int], None]) -> Tuple[int, Future]:
+        """
+        Send a request that is correlated by request id.
+
+        Args:
+            send: Callable that issues the EClient request for the given id
+
+        Returns:
+            The allocated request id and a future resolved by the reply
+        """
+        req_id, future = self.requests.register()
+        if not self.is_connected():
+            self.requests.fail(req_id, ConnectionError("Not connected to TWS"))
+            return req_id, future
+
+        try:
+            send(req_id)
+        except Exception as e:
+            self.requests.fail(req_id, e)
+        return req_id, future
+
+    def submit_current_time(self) -> Future:
+        """
+        Request current time from TWS without blocking.
+
+        Concurrent callers share the single outstanding reqCurrentTime,
+        since the reply carries no request id and answers all of them.
+
+        Returns:
+            Future resolved with the server time as a datetime
+        """
+        future, created = self.requests.register_shared(CURRENT_TIME_KEY)
+        if not created:
+            return future
+
+        if not self.is_connected():
+            self.requests.fail(CURRENT_TIME_KEY, ConnectionError("Not connected to TWS"))
+            return future
+
+        try:
+            logger.info("Requesting current time from TWS")
+            self.client.reqCurrentTime()
+        except Exception as e:
+            self.requests.fail(CURRENT_TIME_KEY, e)
+        return future
+
     def request_current_time(self, timeout: float = 5.0) -> Optional[TimeResponse]:
         """
         Request current time from TWS.
@@ -155,32 +623,51 @@ class TWSClient:
             logger.error("Not connected to TWS")
             return None
 
+        future = self.submit_current_time()
         try:
-            # Reset previous time data
-            self.wrapper.reset_time_event()
+            current_time = future.result(timeout)
+        except FutureTimeoutError:
+            logger.error("Timeout waiting for time response from TWS")
+            self.requests.discard(CURRENT_TIME_KEY, future)
+            return None
+        except Exception as e:
+            logger.error(f"Error in time request: {e}")
+            return None
 
-            # Request current time
-            logger.info("Requesting current time from TWS")
-            self.client.reqCurrentTime()
+        return TimeResponse(
+            current_time=current_time,
+            server_version=self.wrapper.server_version,
+            connection_time=self.wrapper.connection_time
+        )
 
-            # Wait for response
-            if self.wrapper.wait_for_time(timeout):
-                if self.wrapper.current_time and not self.wrapper.error_message:
-                    return TimeResponse(
-                        current_time=self.wrapper.current_time,
-                        server_version=self.wrapper.server_version,
-                        connection_time=self.wrapper.connection_time
-                    )
-                else:
-                    logger.error(f"Error in time request: {self.wrapper.error_message}")
-                    return None
-            else:
-                logger.error("Timeout waiting for time response from TWS")
-                return None
+    def fetch_historical_bars(
+        self,
+        contract: Contract,
+        end: datetime,
+        duration: str,
+        bar_size: str,
+        what_to_show: str = "TRADES",
+        use_rth: bool = True,
+    ) -> Optional[List[Bar]]:
+        """
+        Fetch historical bars via reqHistoricalData.
 
-        except Exception as e:
-            logger.error(f"Error requesting current time: {e}")
-            return None
+        Long ranges are split into day (intraday bars) or year (daily bars)
+        chunks that are paced within IB's historical data limits, requested
+        concurrently and cached on disk.
+
+        Args:
+            contract: Contract to fetch bars for
+            end: End of the requested range
+            duration: TWS duration string, e.g. "5 D"
+            bar_size: TWS bar size setting, e.g. "1 min"
+            what_to_show: TWS data type, e.g. "TRADES" or "MIDPOINT"
+            use_rth: Only include regular trading hours
+
+        Returns:
+            Bars in chronological order if successful, None otherwise
+        """
+        return self.historical.fetch(contract, end, duration, bar_size, what_to_show, use_rth)
 
     def __enter__(self):
         """Context manager entry."""
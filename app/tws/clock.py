@@ -0,0 +1,303 @@
+"""
+Server clock tracking from periodic reqCurrentTime samples.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, Deque, List, NamedTuple, Optional, Tuple
+
+from .client import CURRENT_TIME_KEY, TWSClient
+from .models import ClockStatus, TimeResponse
+
+logger = logging.getLogger(__name__)
+
+# currentTime replies are whole seconds
+SERVER_TIME_RESOLUTION = 1.0
+
+
+class ClockSample(NamedTuple):
+    """One reqCurrentTime round trip, in local monotonic seconds."""
+
+    sent: float
+    received: float
+    server_time: float
+
+    @property
+    def rtt(self) -> float:
+        return self.received - self.sent
+
+    @property
+    def midpoint(self) -> float:
+        return (self.sent + self.received) / 2
+
+    def offset_bounds(self) -> Tuple[float, float]:
+        """
+        Range of server-minus-monotonic offsets consistent with the sample.
+
+        TWS stamped the reply somewhere between sending and receiving, and
+        truncated its clock to the second, so the true offset lies between
+        ``server_time - received`` and ``server_time + 1 - sent``.
+        """
+        return (
+            self.server_time - self.received,
+            self.server_time + SERVER_TIME_RESOLUTION - self.sent,
+        )
+
+
+def estimate_drift(samples: List[ClockSample], min_span: float) -> float:
+    """
+    Least-squares slope of sample offsets over time.
+
+    Args:
+        samples: Samples to fit
+        min_span: Seconds the samples must span before drift is estimated
+
+    Returns:
+        Seconds of offset gained per second, 0 with too little history
+    """
+    if len(samples) < 3 or samples[-1].midpoint - samples[0].midpoint < min_span:
+        return 0.0
+    xs = [s.midpoint for s in samples]
+    ys = [sum(s.offset_bounds()) / 2 for s in samples]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+
+
+class ClockSync:
+    """
+    Models the TWS server clock so current time can be served locally.
+
+    A background thread samples reqCurrentTime, first in a short burst and
+    then every ``interval`` seconds. Each sample bounds the offset between
+    the server clock and the local monotonic clock by its round trip and the
+    one-second resolution of the reply. Samples whose round trip is well
+    above the minimum seen are discarded as queued or congested, and the
+    bounds of the rest are intersected (corrected for estimated drift) to
+    give the offset and its uncertainty. Reading the time is then a local
+    clock read with no TWS traffic.
+    """
+
+    def __init__(
+        self,
+        client: TWSClient,
+        interval: float = 30.0,
+        window: int = 16,
+        burst: int = 4,
+        burst_spacing: float = 0.3,
+        rtt_filter: float = 2.0,
+        max_drift_ppm: float = 100.0,
+        min_drift_span: float = 600.0,
+        timeout: float = 5.0,
+        monotonic: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize clock sync.
+
+        Args:
+            client: Client whose TWS clock is tracked
+            interval: Seconds between samples once synced; 0 disables the thread
+            window: Number of recent samples kept
+            burst: Samples taken in quick succession after start
+            burst_spacing: Seconds between burst samples; not a whole second so
+                the samples straddle different points of the server's second
+            rtt_filter: Discard samples slower than this multiple of the minimum RTT
+            max_drift_ppm: Assumed bound on unmodelled drift, widening the uncertainty
+            min_drift_span: Seconds of history needed before drift is estimated
+            timeout: Seconds to wait for each reply
+            monotonic: Local clock, for tests
+        """
+        self.client = client
+        self.interval = interval
+        self.burst = burst
+        self.burst_spacing = burst_spacing
+        self.rtt_filter = rtt_filter
+        self.max_drift = max_drift_ppm * 1e-6
+        self.min_drift_span = min_drift_span
+        self.timeout = timeout
+        self._monotonic = monotonic
+
+        self._lock = threading.Lock()
+        self._samples: Deque[ClockSample] = deque(maxlen=window)
+        self._estimate: Optional[Tuple[float, float, float]] = None
+        self.drift = 0.0
+        self.rejected = 0
+        self.last_sample: Optional[datetime] = None
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def synced(self) -> bool:
+        return self._estimate is not None
+
+    def add_sample(self, sample: ClockSample) -> None:
+        """Record a round trip and refresh the offset estimate."""
+        with self._lock:
+            self._samples.append(sample)
+            self.last_sample = datetime.now()
+            self._update()
+
+    def _update(self) -> None:
+        min_rtt = min(s.rtt for s in self._samples)
+        cutoff = max(min_rtt * self.rtt_filter, min_rtt + 0.001)
+        good = [s for s in self._samples if s.rtt <= cutoff]
+        self.rejected = len(self._samples) - len(good)
+        drift = estimate_drift(good, self.min_drift_span)
+        drift = max(-self.max_drift, min(self.max_drift, drift))
+
+        # Carry every interval forward to the newest sample and intersect
+        reference = self._samples[-1].midpoint
+        low, high = float("-inf"), float("inf")
+        for s in good:
+            age = reference - s.midpoint
+            lo, hi = s.offset_bounds()
+            slack = self.max_drift * abs(age)
+            low = max(low, lo + drift * age - slack)
+            high = min(high, hi + drift * age + slack)
+
+        if low > high:
+            # Disagreeing samples mean the server clock stepped; start over
+            logger.warning("TWS clock samples are inconsistent, resetting clock sync")
+            newest = self._samples[-1]
+            self._samples.clear()
+            self._samples.append(newest)
+            low, high = newest.offset_bounds()
+            drift = 0.0
+
+        self.drift = drift
+        self._estimate = (reference, (low + high) / 2, (high - low) / 2)
+
+    def offset(self) -> Optional[Tuple[float, float]]:
+        """
+        Current server-minus-monotonic offset.
+
+        Returns:
+            (offset, uncertainty) in seconds, or None before the first sample
+        """
+        estimate = self._estimate
+        if estimate is None:
+            return None
+        reference, offset, uncertainty = estimate
+        age = self._monotonic() - reference
+        return offset + self.drift * age, uncertainty + self.max_drift * abs(age)
+
+    def now(self) -> Optional[Tuple[float, float]]:
+        """
+        Estimated server time without a TWS round trip.
+
+        Returns:
+            (epoch seconds, uncertainty in seconds), or None before the first sample
+        """
+        local = self._monotonic()
+        estimate = self.offset()
+        if estimate is None:
+            return None
+        offset, uncertainty = estimate
+        return local + offset, uncertainty
+
+    def current_time(self) -> Optional[TimeResponse]:
+        """Estimated server time in the shape of a reqCurrentTime response."""
+        estimate = self.now()
+        if estimate is None:
+            return None
+        server_time, uncertainty = estimate
+        return TimeResponse(
+            current_time=datetime.fromtimestamp(server_time),
+            server_version=self.client.wrapper.server_version,
+            connection_time=self.client.wrapper.connection_time,
+            uncertainty_ms=uncertainty * 1000,
+        )
+
+    def sample(self) -> Optional[ClockSample]:
+        """
+        Take one reqCurrentTime sample.
+
+        Skipped while another caller's reqCurrentTime is outstanding, since
+        its reply could predate this request and skew the round trip.
+
+        Returns:
+            The recorded sample, or None if none was taken
+        """
+        if not self.client.is_connected() or self.client.requests.is_pending(CURRENT_TIME_KEY):
+            return None
+
+        received: List[float] = []
+        done = threading.Event()
+
+        def on_reply(_: Future) -> None:
+            # Runs on the reader thread as the reply is decoded
+            received.append(self._monotonic())
+            done.set()
+
+        sent = self._monotonic()
+        future = self.client.submit_current_time()
+        future.add_done_callback(on_reply)
+        if not done.wait(self.timeout):
+            logger.warning("Timeout waiting for clock sample from TWS")
+            self.client.requests.discard(CURRENT_TIME_KEY, future)
+            return None
+        try:
+            server_time = future.result()
+        except Exception as e:
+            logger.warning(f"Clock sample failed: {e!r}")
+            return None
+
+        sample = ClockSample(sent, received[0], server_time.timestamp())
+        self.add_sample(sample)
+        return sample
+
+    def status(self) -> ClockStatus:
+        """Offset, drift and uncertainty of the current estimate."""
+        estimate = self.offset()
+        with self._lock:
+            samples = list(self._samples)
+        return ClockStatus(
+            synced=estimate is not None,
+            offset_ms=estimate[0] * 1000 if estimate else None,
+            uncertainty_ms=estimate[1] * 1000 if estimate else None,
+            drift_ppm=self.drift * 1e6,
+            samples=len(samples),
+            rejected=self.rejected,
+            min_rtt_ms=min(s.rtt for s in samples) * 1000 if samples else None,
+            last_sample=self.last_sample,
+        )
+
+    def start(self) -> None:
+        """Start sampling on a background thread."""
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            taken = 0
+            while not self._stop.is_set():
+                try:
+                    if self.sample() is not None:
+                        taken += 1
+                except Exception:
+                    logger.exception("Error sampling TWS clock")
+                if not self.client.is_connected():
+                    delay = min(self.interval, 1.0)
+                elif taken < self.burst:
+                    delay = self.burst_spacing
+                else:
+                    delay = self.interval
+                self._stop.wait(delay)
+
+        self._thread = threading.Thread(target=run, name="tws-clock-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sampling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout + 1)
+            self._thread = None
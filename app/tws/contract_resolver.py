@@ -0,0 +1,412 @@
+"""
+Contract resolution through reqContractDetails with memory and SQLite caches.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError, wait
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from ibapi.contract import Contract, ContractDetails
+
+from .contracts import ContractKey, contract_key, stock_contract
+from .errors import NO_SECURITY_DEFINITION, TWSRequestError
+from .models import ContractInfo
+
+if TYPE_CHECKING:
+    from .client import TWSClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTRACT_DB = Path.home() / ".cache" / "ibxtac" / "contracts.sqlite3"
+
+# Contract definitions rarely change, but exchanges and names do occasionally
+DEFAULT_TTL = 7 * 86400.0
+
+
+def cache_key(key: ContractKey) -> str:
+    """Text form of a contract key for the SQLite cache."""
+    return "|".join(str(part) for part in key)
+
+
+def contract_info(details: ContractDetails) -> ContractInfo:
+    """Convert an ibapi ContractDetails to a ContractInfo."""
+    contract = details.contract
+    return ContractInfo(
+        con_id=contract.conId,
+        symbol=contract.symbol,
+        sec_type=contract.secType,
+        exchange=contract.exchange,
+        primary_exchange=contract.primaryExchange or "",
+        currency=contract.currency,
+        local_symbol=contract.localSymbol or "",
+        trading_class=contract.tradingClass or "",
+        long_name=details.longName or "",
+        min_tick=details.minTick or None,
+        time_zone=details.timeZoneId or "",
+        resolved_at=datetime.now(),
+    )
+
+
+def resolved_contract(info: ContractInfo) -> Contract:
+    """Build a Contract identified by conId from a resolved contract."""
+    contract = Contract()
+    contract.conId = info.con_id
+    contract.symbol = info.symbol
+    contract.secType = info.sec_type
+    contract.exchange = info.exchange
+    contract.primaryExchange = info.primary_exchange
+    contract.currency = info.currency
+    contract.localSymbol = info.local_symbol
+    contract.tradingClass = info.trading_class
+    return contract
+
+
+class ContractCache:
+    """
+    On-disk SQLite cache of resolved contracts with a time to live.
+
+    The database is opened on first use, so clients that never resolve a
+    contract never create it. Unreadable or locked databases are logged and
+    treated as cache misses.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CONTRACT_DB,
+        ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize contract cache.
+
+        Args:
+            path: SQLite database file
+            ttl: Seconds a resolved contract stays valid
+            clock: Wall clock, for tests
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database; called with the lock held."""
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            # WAL lets the pool's connections read while one of them writes
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS contracts "
+                "(key TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._db = db
+        return self._db
+
+    def now(self) -> float:
+        """Current time on the clock that entry expiries are measured against."""
+        return self._clock()
+
+    def load(self, key: ContractKey) -> Optional[Tuple[ContractInfo, float]]:
+        """
+        Load an unexpired contract.
+
+        Returns:
+            The contract and its expiry time, or None if missing or expired
+        """
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT data, expires FROM contracts WHERE key = ? AND expires > ?",
+                    (cache_key(key), self._clock()),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Ignoring unreadable contract cache {self.path}: {e}")
+            return None
+        if row is None:
+            return None
+        try:
+            return ContractInfo.model_validate_json(row[0]), row[1]
+        except ValueError as e:
+            logger.warning(f"Ignoring corrupt contract cache entry {cache_key(key)}: {e}")
+            return None
+
+    def store(self, key: ContractKey, info: ContractInfo) -> float:
+        """
+        Store a resolved contract.
+
+        Returns:
+            The expiry time of the entry
+        """
+        expires = self._clock() + self.ttl
+        try:
+            with self._lock:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO contracts (key, data, expires) VALUES (?, ?, ?)",
+                    (cache_key(key), info.model_dump_json(), expires),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write contract cache {self.path}: {e}")
+        return expires
+
+    def purge(self) -> int:
+        """Delete expired entries, returning how many were removed."""
+        try:
+            with self._lock:
+                cursor = self._connect().execute(
+                    "DELETE FROM contracts WHERE expires <= ?", (self._clock(),)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not purge contract cache {self.path}: {e}")
+            return 0
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class ContractResolver:
+    """
+    Resolves contracts to conIds without repeating TWS round trips.
+
+    Lookups are served from an in-memory LRU, then the SQLite cache, and
+    only then from reqContractDetails. Concurrent lookups of the same
+    contract share one TWS request, and prewarm() resolves a symbol list in
+    one concurrent burst at startup so hot paths find it in memory.
+    """
+
+    def __init__(
+        self,
+        client: "TWSClient",
+        cache: Optional[ContractCache] = None,
+        max_entries: int = 4096,
+        timeout: float = 10.0,
+    ):
+        """
+        Initialize contract resolver.
+
+        Args:
+            client: TWS client used to send requests
+            cache: SQLite cache; defaults to DEFAULT_CONTRACT_DB
+            max_entries: Contracts kept in memory
+            timeout: Default seconds to wait for TWS
+        """
+        self.cache = cache if cache is not None else ContractCache()
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.requests = 0
+        self.joined = 0
+        self._client = client
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[ContractKey, Tuple[ContractInfo, float]]" = OrderedDict()
+        self._in_flight: Dict[ContractKey, Tuple[Future, Optional[int]]] = {}
+
+    def _remember(self, key: ContractKey, info: ContractInfo, expires: float) -> None:
+        """Add a contract to the LRU; called with the lock held."""
+        self._memory[key] = (info, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _recall(self, key: ContractKey) -> Optional[ContractInfo]:
+        """Unexpired contract from the LRU; called with the lock held."""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= self.cache.now():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return entry[0]
+
+    def lookup(self, contract: Union[str, Contract]) -> Optional[ContractInfo]:
+        """
+        Resolve a contract from the caches only, never waiting on TWS.
+
+        Args:
+            contract: Contract or stock symbol
+
+        Returns:
+            The cached contract, or None if it has not been resolved yet
+        """
+        key = contract_key(_as_contract(contract))
+        with self._lock:
+            info = self._recall(key)
+            if info is not None:
+                self.memory_hits += 1
+                return info
+        stored = self.cache.load(key)
+        if stored is None:
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, *stored)
+        return stored[0]
+
+    def resolve_async(self, contract: Union[str, Contract]) -> Future:
+        """
+        Resolve a contract without blocking on TWS.
+
+        Args:
+            contract: Contract or stock symbol
+
+        Returns:
+            Future resolved with the ContractInfo, or failed with
+            TWSRequestError (e.g. unknown symbol) or ConnectionError
+        """
+        contract = _as_contract(contract)
+        key = contract_key(contract)
+        with self._lock:
+            info = self._recall(key)
+            if info is not None:
+                self.memory_hits += 1
+                return _done(info)
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                self.joined += 1
+                return in_flight[0]
+            future: Future = Future()
+            self._in_flight[key] = (future, None)
+
+        stored = self.cache.load(key)
+        if stored is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(key, *stored)
+                self._in_flight.pop(key, None)
+            future.set_result(stored[0])
+            return future
+
+        logger.info(f"Requesting contract details for {contract.symbol} {contract.secType}")
+        with self._lock:
+            self.requests += 1
+        req_id, reply = self._client.submit(
+            lambda req_id: self._client.client.reqContractDetails(req_id, contract)
+        )
+        with self._lock:
+            if self._in_flight.get(key, (None,))[0] is future:
+                self._in_flight[key] = (future, req_id)
+        reply.add_done_callback(lambda reply: self._on_reply(key, req_id, future, reply))
+        return future
+
+    def _on_reply(self, key: ContractKey, req_id: int, future: Future, reply: Future) -> None:
+        # Runs on the reader thread as contractDetailsEnd is decoded
+        try:
+            details = reply.result()
+            if not details:
+                raise TWSRequestError(req_id, NO_SECURITY_DEFINITION, "No contract details returned")
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            return
+
+        if len(details) > 1:
+            logger.warning(
+                f"{len(details)} contracts match {key[0]} {key[1]} on {key[2]}; using conId "
+                f"{details[0].contract.conId}"
+            )
+        info = contract_info(details[0])
+        expires = self.cache.store(key, info)
+        with self._lock:
+            self._remember(key, info, expires)
+            self._in_flight.pop(key, None)
+        future.set_result(info)
+
+    def resolve(self, contract: Union[str, Contract], timeout: Optional[float] = None) -> ContractInfo:
+        """
+        Resolve a contract, waiting for TWS if it is not cached.
+
+        Args:
+            contract: Contract or stock symbol
+            timeout: Seconds to wait; defaults to the resolver's timeout
+
+        Returns:
+            The resolved contract
+
+        Raises:
+            TWSRequestError: If TWS rejects the lookup, e.g. unknown symbol
+            ConnectionError: If not connected to TWS
+            TimeoutError: If TWS does not answer in time
+        """
+        contract = _as_contract(contract)
+        future = self.resolve_async(contract)
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            self._abandon(contract_key(contract), future)
+            raise TimeoutError(f"Timeout resolving contract {contract.symbol}")
+
+    def _abandon(self, key: ContractKey, future: Future) -> None:
+        """Fail a lookup TWS never answered, so later callers retry it."""
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is None or in_flight[0] is not future:
+                return
+            req_id = in_flight[1]
+        if req_id is not None:
+            self._client.requests.fail(req_id, TimeoutError("Timeout waiting for contract details"))
+
+    def prewarm(self, contracts: Iterable[Union[str, Contract]], timeout: Optional[float] = None) -> int:
+        """
+        Resolve many contracts concurrently, e.g. at startup.
+
+        Cached contracts are loaded into memory and the rest are requested
+        from TWS together rather than one round trip at a time.
+
+        Args:
+            contracts: Contracts or stock symbols
+            timeout: Seconds to wait for the whole batch
+
+        Returns:
+            Number of contracts resolved
+        """
+        started = time.monotonic()
+        unique = {}
+        for contract in contracts:
+            contract = _as_contract(contract)
+            unique.setdefault(contract_key(contract), contract)
+        futures = {self.resolve_async(contract): contract for contract in unique.values()}
+        done, not_done = wait(futures, timeout=self.timeout if timeout is None else timeout)
+
+        resolved = 0
+        for future in done:
+            if future.exception() is None:
+                resolved += 1
+            else:
+                logger.warning(f"Could not resolve {futures[future].symbol}: {future.exception()}")
+        for future in not_done:
+            logger.warning(f"Timeout resolving {futures[future].symbol}")
+            self._abandon(contract_key(futures[future]), future)
+        logger.info(
+            f"Prewarmed {resolved}/{len(futures)} contracts in {(time.monotonic() - started) * 1000:.0f} ms"
+        )
+        return resolved
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._memory)
+
+
+def _as_contract(contract: Union[str, Contract]) -> Contract:
+    return stock_contract(contract) if isinstance(contract, str) else contract
+
+
+def _done(result: Any) -> Future:
+    future: Future = Future()
+    future.set_result(result)
+    return future
@@ -0,0 +1,47 @@
+"""
+Helpers for building and identifying TWS contracts.
+"""
+
+from typing import Tuple
+
+from ibapi.contract import Contract
+
+ContractKey = Tuple[str, str, str, str, str, float, str]
+
+
+def stock_contract(symbol: str, exchange: str = "SMART", currency: str = "USD") -> Contract:
+    """
+    Build a stock contract.
+
+    Args:
+        symbol: Ticker symbol
+        exchange: Destination exchange (SMART for IB smart routing)
+        currency: Contract currency
+
+    Returns:
+        Contract for the stock
+    """
+    contract = Contract()
+    contract.symbol = symbol.upper()
+    contract.secType = "STK"
+    contract.exchange = exchange
+    contract.currency = currency
+    return contract
+
+
+def contract_key(contract: Contract) -> ContractKey:
+    """
+    Identify a contract for de-duplication.
+
+    Two Contract objects with the same key refer to the same instrument,
+    so requests for them can share one TWS subscription.
+    """
+    return (
+        contract.symbol,
+        contract.secType,
+        contract.exchange,
+        contract.currency,
+        contract.lastTradeDateOrContractMonth,
+        contract.strike,
+        contract.right,
+    )
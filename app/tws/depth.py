@@ -0,0 +1,373 @@
+"""
+Market depth (order book) subscriptions kept in fixed-size level arrays.
+
+Each side of a book is a set of preallocated NumPy arrays with one row
+per depth level. TWS addresses levels by position, so an insert or delete
+is a single in-place slice shift and an update is a single write; no
+objects are created per update. Consumers pull throttled diffs holding
+only the levels at or below the shallowest position changed since their
+previous diff.
+"""
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from ibapi.contract import Contract
+
+from .contracts import ContractKey, contract_key
+
+if TYPE_CHECKING:
+    from .client import TWSClient
+
+logger = logging.getLogger(__name__)
+
+# updateMktDepth operations
+INSERT = 0
+UPDATE = 1
+DELETE = 2
+
+# updateMktDepth sides
+ASK = 0
+BID = 1
+
+DEFAULT_ROWS = 10
+# Exchange or market maker codes longer than this are truncated
+MARKET_MAKER_DTYPE = "<U12"
+
+
+class BookSide:
+    """One side of an order book as parallel fixed-size level arrays."""
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.prices = np.zeros(rows, dtype=np.float64)
+        self.sizes = np.zeros(rows, dtype=np.float64)
+        self.market_makers = np.zeros(rows, dtype=MARKET_MAKER_DTYPE)
+        self.depth = 0
+
+    def apply(self, position: int, operation: int, price: float, size: float, market_maker: str) -> int:
+        """
+        Apply one depth update.
+
+        Args:
+            position: Level addressed by TWS, 0 being the best price
+            operation: INSERT, UPDATE or DELETE
+            price: Level price
+            size: Level size
+            market_maker: Exchange or market maker of the level, "" for L1 depth
+
+        Returns:
+            Shallowest level whose contents changed, or rows if none did
+        """
+        if position < 0 or position >= self.rows:
+            return self.rows
+        depth = self.depth
+        if operation == DELETE:
+            if position >= depth:
+                return self.rows
+            for column in (self.prices, self.sizes, self.market_makers):
+                column[position:depth - 1] = column[position + 1:depth]
+            self.depth = depth - 1
+            return position
+
+        # An update past the end of the book adds a level
+        if operation == INSERT or position >= depth:
+            position = min(position, depth)
+            end = min(depth, self.rows - 1)
+            for column in (self.prices, self.sizes, self.market_makers):
+                column[position + 1:end + 1] = column[position:end]
+            self.depth = end + 1
+        self.prices[position] = price
+        self.sizes[position] = size
+        self.market_makers[position] = market_maker
+        return position
+
+    def clear(self) -> None:
+        self.depth = 0
+
+    def levels(self, start: int = 0) -> Tuple[List[float], List[float], List[str]]:
+        """Prices, sizes and market makers of the levels from start down."""
+        end = self.depth
+        return (
+            self.prices[start:end].tolist(),
+            self.sizes[start:end].tolist(),
+            self.market_makers[start:end].tolist(),
+        )
+
+
+class OrderBook:
+    """Bid and ask sides of one contract's book."""
+
+    def __init__(self, symbol: str, rows: int):
+        self.symbol = symbol
+        self.rows = rows
+        self.bids = BookSide(rows)
+        self.asks = BookSide(rows)
+        self.updates = 0
+        self.time = 0.0
+        self.lock = threading.Lock()
+
+    def side(self, side: int) -> BookSide:
+        return self.bids if side == BID else self.asks
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every level of both sides, column-wise."""
+        with self.lock:
+            return self._levels(0, 0)
+
+    def _levels(self, bid_start: int, ask_start: int) -> Dict[str, Any]:
+        bid_prices, bid_sizes, bid_makers = self.bids.levels(bid_start)
+        ask_prices, ask_sizes, ask_makers = self.asks.levels(ask_start)
+        return {
+            "symbol": self.symbol,
+            "time": self.time,
+            "bids": {"price": bid_prices, "size": bid_sizes, "market_maker": bid_makers},
+            "asks": {"price": ask_prices, "size": ask_sizes, "market_maker": ask_makers},
+        }
+
+
+class DepthSubscription:
+    """
+    One consumer's view of a shared order book.
+
+    Changes are not queued. The subscription only remembers the shallowest
+    changed level per side, and diff() returns those levels as they are
+    now, so a consumer that reads at its own rate gets every update since
+    its previous read folded into one diff.
+    """
+
+    def __init__(
+        self,
+        manager: "DepthManager",
+        key: ContractKey,
+        book: OrderBook,
+        notify: Optional[Callable[[], None]] = None,
+    ):
+        self.key = key
+        self.book = book
+        self.symbol = book.symbol
+        self._manager = manager
+        self._notify = notify
+        # Shallowest changed level per side since the last diff; rows when clean
+        self._dirty = [book.rows, book.rows]
+        self._closed = False
+
+    def mark(self, side: int, position: int) -> None:
+        """Record a change at a level; called on the reader thread with the book locked."""
+        was_clean = self._dirty[ASK] == self._dirty[BID] == self.book.rows
+        if position < self._dirty[side]:
+            self._dirty[side] = position
+            if was_clean and self._notify is not None:
+                self._notify()
+
+    def mark_all(self) -> None:
+        self.mark(ASK, 0)
+        self.mark(BID, 0)
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty[ASK] < self.book.rows or self._dirty[BID] < self.book.rows
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every level of the book; the next diff only covers later changes."""
+        with self.book.lock:
+            self._dirty = [self.book.rows, self.book.rows]
+            return self.book._levels(0, 0)
+
+    def diff(self) -> Optional[Dict[str, Any]]:
+        """
+        Changes since the previous diff or snapshot.
+
+        Each side carries "from", the shallowest changed level, and the
+        current levels from there down. Replacing a copy of the side from
+        that level onwards brings it up to date, including levels that
+        were deleted off the end.
+
+        Returns:
+            The diff, or None if nothing changed
+        """
+        book = self.book
+        with book.lock:
+            ask_from, bid_from = self._dirty
+            if ask_from == bid_from == book.rows:
+                return None
+            self._dirty = [book.rows, book.rows]
+            ask_from, bid_from = min(ask_from, book.asks.depth), min(bid_from, book.bids.depth)
+            diff = book._levels(bid_from, ask_from)
+        diff["bids"]["from"] = bid_from
+        diff["asks"]["from"] = ask_from
+        return diff
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop following the book."""
+        if not self._closed:
+            self._closed = True
+            self._manager.unsubscribe(self)
+
+    def __enter__(self) -> "DepthSubscription":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class _DepthStream:
+    """A single reqMktDepth subscription and its consumers."""
+
+    def __init__(self, req_id: int, contract: Contract, book: OrderBook, smart: bool):
+        self.req_id = req_id
+        self.contract = contract
+        self.book = book
+        self.smart = smart
+        self.subscribers: Tuple[DepthSubscription, ...] = ()
+
+
+class DepthManager:
+    """
+    Shares one TWS market depth request per contract between consumers.
+
+    reqMktDepth is sent once per contract and cancelled when the last
+    subscriber goes away; TWS allows only a few concurrent depth requests
+    per account.
+    """
+
+    def __init__(self, client: "TWSClient"):
+        """
+        Initialize market depth manager.
+
+        Args:
+            client: TWS client used to send requests
+        """
+        self._client = client
+        self._lock = threading.Lock()
+        self._streams: Dict[ContractKey, _DepthStream] = {}
+        self._by_req_id: Dict[int, _DepthStream] = {}
+
+        client.wrapper.add_handler("updateMktDepth", self._on_depth)
+        client.wrapper.add_handler("updateMktDepthL2", self._on_depth_l2)
+
+    def subscribe(
+        self,
+        contract: Contract,
+        rows: int = DEFAULT_ROWS,
+        smart: bool = False,
+        notify: Optional[Callable[[], None]] = None,
+    ) -> DepthSubscription:
+        """
+        Follow the order book of a contract.
+
+        Args:
+            contract: Contract whose book to stream
+            rows: Levels per side; only used by the first subscriber
+            smart: Aggregate depth across exchanges (SMART depth)
+            notify: Called on the reader thread when the book changes after a diff was taken
+
+        Returns:
+            Subscription to take snapshots and diffs from; close it when done
+
+        Raises:
+            ConnectionError: If the client is not connected
+        """
+        if not self._client.is_connected():
+            raise ConnectionError("Not connected to TWS")
+
+        key = contract_key(contract)
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                book = OrderBook(contract.symbol, rows)
+                stream = _DepthStream(self._client.requests.next_id(), contract, book, smart)
+                self._streams[key] = stream
+                self._by_req_id[stream.req_id] = stream
+                logger.info(f"Requesting {rows} levels of market depth for {contract.symbol} (reqId {stream.req_id})")
+                self._client.client.reqMktDepth(stream.req_id, contract, rows, smart, [])
+
+            subscription = DepthSubscription(self, key, stream.book, notify)
+            with stream.book.lock:
+                stream.subscribers = stream.subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: DepthSubscription) -> None:
+        """Remove a subscriber, cancelling the depth request if it was the last."""
+        with self._lock:
+            stream = self._streams.get(subscription.key)
+            if stream is None or subscription not in stream.subscribers:
+                return
+            with stream.book.lock:
+                stream.subscribers = tuple(s for s in stream.subscribers if s is not subscription)
+            if stream.subscribers:
+                return
+
+            del self._streams[subscription.key]
+            del self._by_req_id[stream.req_id]
+            logger.info(f"Cancelling market depth for {stream.contract.symbol} (reqId {stream.req_id})")
+            if self._client.is_connected():
+                self._client.client.cancelMktDepth(stream.req_id, stream.smart)
+
+    def resubscribe(self) -> int:
+        """
+        Re-issue reqMktDepth for every active book, e.g. after a reconnect.
+
+        TWS sends the whole book again after a request, so the books are
+        cleared and every subscriber's next diff covers all levels.
+
+        Returns:
+            Number of books re-requested
+        """
+        with self._lock:
+            streams = list(self._streams.values())
+            for stream in streams:
+                self._by_req_id.pop(stream.req_id, None)
+                stream.req_id = self._client.requests.next_id()
+                self._by_req_id[stream.req_id] = stream
+                with stream.book.lock:
+                    stream.book.bids.clear()
+                    stream.book.asks.clear()
+                    for subscription in stream.subscribers:
+                        subscription.mark_all()
+                logger.info(f"Re-requesting market depth for {stream.contract.symbol} (reqId {stream.req_id})")
+                self._client.client.reqMktDepth(
+                    stream.req_id, stream.contract, stream.book.rows, stream.smart, []
+                )
+        return len(streams)
+
+    def book(self, symbol: str) -> Optional[OrderBook]:
+        """Book of a streamed symbol, if any."""
+        symbol = symbol.upper()
+        return next((s.book for s in self._streams.values() if s.contract.symbol == symbol), None)
+
+    def subscriber_counts(self) -> Dict[str, int]:
+        """Number of subscribers per streamed symbol."""
+        with self._lock:
+            return {s.contract.symbol: len(s.subscribers) for s in self._streams.values()}
+
+    def _on_depth(self, reqId: int, position: int, operation: int, side: int, price: float, size: float) -> None:
+        self._apply(reqId, position, operation, side, price, size, "")
+
+    def _on_depth_l2(
+        self, reqId: int, position: int, marketMaker: str, operation: int,
+        side: int, price: float, size: float, isSmartDepth: bool,
+    ) -> None:
+        self._apply(reqId, position, operation, side, price, size, marketMaker)
+
+    def _apply(
+        self, req_id: int, position: int, operation: int, side: int, price: float, size: float, market_maker: str,
+    ) -> None:
+        stream = self._by_req_id.get(req_id)
+        if stream is None:
+            return
+        book = stream.book
+        with book.lock:
+            changed = book.side(side).apply(position, operation, price, size, market_maker)
+            book.updates += 1
+            book.time = time.time()
+            if changed < book.rows:
+                for subscription in stream.subscribers:
+                    subscription.mark(side, changed)
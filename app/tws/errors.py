@@ -0,0 +1,38 @@
+"""
+Error codes and exceptions for TWS requests.
+"""
+
+# TWS uses -1 for messages that are not tied to a particular request
+NO_REQUEST_ID = -1
+
+# Connectivity between TWS and IB servers was lost or restored
+CONNECTIVITY_LOST = 1100
+CONNECTIVITY_RESTORED_DATA_LOST = 1101
+CONNECTIVITY_RESTORED_DATA_MAINTAINED = 1102
+CONNECTIVITY_ERROR_CODES = (
+    CONNECTIVITY_LOST,
+    CONNECTIVITY_RESTORED_DATA_LOST,
+    CONNECTIVITY_RESTORED_DATA_MAINTAINED,
+)
+
+# reqContractDetails matched no contract, e.g. an unknown symbol
+NO_SECURITY_DEFINITION = 200
+
+# Another API session is already connected with the requested client id
+CLIENT_ID_IN_USE = 326
+
+# Market data notices that leave the stream running, e.g. delayed data shown instead
+MARKET_DATA_NOTICE_CODES = (10090, 10167)
+
+# Informational notices (e.g. "market data farm connection is OK")
+WARNING_ERROR_CODES = range(2100, 2200)
+
+
+class TWSRequestError(Exception):
+    """Raised when TWS answers a request with an error message."""
+
+    def __init__(self, req_id: int, error_code: int, error_string: str):
+        super().__init__(f"TWS Error {error_code}: {error_string}")
+        self.req_id = req_id
+        self.error_code = error_code
+        self.error_string = error_string
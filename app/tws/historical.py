@@ -0,0 +1,394 @@
+"""
+Historical bar fetching with IB pacing and an on-disk cache.
+"""
+
+import bisect
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from ibapi.contract import Contract
+
+from .bar_archive import BarArchive
+from .contracts import contract_key
+from .errors import TWSRequestError
+from .models import Bar
+
+if TYPE_CHECKING:
+    from .client import TWSClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "ibxtac" / "historical"
+
+# Historical data service error. Besides "no data" for weekends and
+# holidays, TWS sends it for pacing violations and cancelled or invalid
+# queries, so only the no data message marks a genuinely empty span.
+NO_DATA_ERROR_CODE = 162
+NO_DATA_MESSAGE = "HMDS query returned no data"
+
+# Longest span in seconds IB serves per request for second bars; minute
+# bars and longer are requested a whole day at a time
+SECOND_BAR_SPANS = {"1 secs": 1800, "5 secs": 3600, "10 secs": 14400, "15 secs": 14400, "30 secs": 28800}
+
+_DURATION_DAYS = {"D": 1, "W": 7, "M": 31, "Y": 366}
+
+
+class HistoricalPacer:
+    """
+    Schedules historical data requests within IB's pacing rules.
+
+    IB allows at most 60 historical requests in any 10 minute window and
+    rejects an identical request repeated within 15 seconds. Each request
+    reserves the earliest slot that satisfies both rules, so a burst of
+    requests is spread out rather than triggering a pacing violation.
+    """
+
+    def __init__(
+        self,
+        max_requests: int = 60,
+        window: float = 600.0,
+        identical_interval: float = 15.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_requests = max_requests
+        self.window = window
+        self.identical_interval = identical_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._slots: List[float] = []
+        self._last_identical: Dict[Any, float] = {}
+
+    def reserve(self, key: Any) -> float:
+        """
+        Reserve a send slot for a request.
+
+        Args:
+            key: Identity of the request, for the identical-request rule
+
+        Returns:
+            Seconds to wait before sending the request
+        """
+        with self._lock:
+            now = self._clock()
+            horizon = now - self.window
+            del self._slots[:bisect.bisect_right(self._slots, horizon)]
+
+            at = now
+            last = self._last_identical.get(key)
+            if last is not None:
+                at = max(at, last + self.identical_interval)
+            if len(self._slots) >= self.max_requests:
+                at = max(at, self._slots[-self.max_requests] + self.window)
+
+            bisect.insort(self._slots, at)
+            self._last_identical[key] = at
+            return at - now
+
+    def wait(self, key: Any) -> None:
+        """Block until a request may be sent."""
+        delay = self.reserve(key)
+        if delay > 0:
+            logger.info(f"Pacing historical request for {delay:.1f}s")
+            self._sleep(delay)
+
+
+class BarChunk(NamedTuple):
+    """One historical request covering a cacheable span of bars."""
+
+    day: date
+    end: str
+    duration: str
+    key: str
+
+
+def parse_duration(duration: str) -> timedelta:
+    """
+    Convert a TWS duration string such as "5 D" or "1 Y" to a timedelta.
+
+    Raises:
+        ValueError: If the duration is not in TWS format
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([SDWMY])\s*", duration.upper())
+    if not match:
+        raise ValueError(f"Invalid duration: {duration!r}")
+    amount, unit = int(match.group(1)), match.group(2)
+    if unit == "S":
+        return timedelta(seconds=amount)
+    return timedelta(days=amount * _DURATION_DAYS[unit])
+
+
+def is_intraday(bar_size: str) -> bool:
+    """Check whether a TWS bar size is shorter than one day."""
+    return any(unit in bar_size for unit in ("sec", "min", "hour"))
+
+
+def chunk_seconds(bar_size: str) -> Optional[int]:
+    """Longest span IB serves in one request for a second bar size, None for longer bars."""
+    return SECOND_BAR_SPANS.get(" ".join(bar_size.lower().split()))
+
+
+def is_no_data(error: TWSRequestError) -> bool:
+    """Check whether a historical request error means the span holds no bars."""
+    return error.error_code == NO_DATA_ERROR_CODE and NO_DATA_MESSAGE.lower() in error.error_string.lower()
+
+
+def plan_chunks(end: datetime, duration: str, bar_size: str) -> List[BarChunk]:
+    """
+    Split a historical range into cacheable chunks.
+
+    Minute and hour bars are fetched one calendar day per request, second
+    bars in the largest slices of a day IB allows for their size (only
+    those overlapping the range), and daily or longer bars one calendar
+    year per request.
+
+    Args:
+        end: End of the requested range
+        duration: TWS duration string ending at ``end``
+        bar_size: TWS bar size setting
+
+    Returns:
+        Chunks in chronological order
+    """
+    start = end - parse_duration(duration)
+    chunks: List[BarChunk] = []
+    if is_intraday(bar_size):
+        span = chunk_seconds(bar_size)
+        day = start.date()
+        while day <= end.date():
+            if span is None:
+                chunks.append(BarChunk(day, f"{day:%Y%m%d} 23:59:59", "1 D", f"{day:%Y%m%d}"))
+            else:
+                midnight = datetime.combine(day, datetime.min.time())
+                for offset in range(0, 24 * 3600, span):
+                    chunk_start = midnight + timedelta(seconds=offset)
+                    chunk_end = chunk_start + timedelta(seconds=span - 1)
+                    if chunk_end >= start and chunk_start <= end:
+                        chunks.append(BarChunk(
+                            day, f"{chunk_end:%Y%m%d %H:%M:%S}", f"{span} S", f"{chunk_end:%Y%m%d-%H%M%S}"
+                        ))
+            day += timedelta(days=1)
+    else:
+        for year in range(start.year, end.year + 1):
+            day = date(year, 12, 31)
+            chunks.append(BarChunk(day, f"{day:%Y%m%d} 23:59:59", "1 Y", f"{day:%Y%m%d}"))
+    return chunks
+
+
+def bar_from_ibapi(bar: Any) -> Bar:
+    """Convert an ibapi BarData (requested with formatDate=2) to a Bar."""
+    stamp = str(bar.date).strip()
+    if len(stamp) == 8:
+        bar_time = datetime.strptime(stamp, "%Y%m%d")
+    else:
+        bar_time = datetime.fromtimestamp(int(stamp))
+    return Bar(
+        time=bar_time,
+        open=bar.open,
+        high=bar.high,
+        low=bar.low,
+        close=bar.close,
+        volume=float(bar.volume),
+        wap=bar.average,
+        bar_count=bar.barCount,
+    )
+
+
+class BarCache:
+    """On-disk cache of historical bars keyed by contract, bar size and chunk."""
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_CACHE_DIR):
+        self.root = Path(root)
+
+    def path(self, contract: Contract, bar_size: str, what_to_show: str, use_rth: bool, key: str) -> Path:
+        """Cache file for one chunk of bars."""
+        instrument = "_".join(
+            part for part in (
+                contract.symbol, contract.secType, contract.exchange, contract.currency,
+                contract.lastTradeDateOrContractMonth,
+            ) if part
+        )
+        series = f"{what_to_show}_{'rth' if use_rth else 'all'}"
+        return (
+            self.root / instrument / bar_size.replace(" ", "") / series / f"{key}.json"
+        )
+
+    def load(
+        self, contract: Contract, bar_size: str, what_to_show: str, use_rth: bool, key: str
+    ) -> Optional[List[Bar]]:
+        """Load a cached chunk, or None if it was never stored."""
+        path = self.path(contract, bar_size, what_to_show, use_rth, key)
+        try:
+            with open(path) as f:
+                return [Bar.model_validate(item) for item in json.load(f)]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable bar cache file {path}: {e}")
+            return None
+
+    def store(
+        self,
+        contract: Contract,
+        bar_size: str,
+        what_to_show: str,
+        use_rth: bool,
+        key: str,
+        bars: List[Bar],
+    ) -> None:
+        """Store a chunk atomically so readers never see a partial file."""
+        path = self.path(contract, bar_size, what_to_show, use_rth, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump([bar.model_dump(mode="json") for bar in bars], f)
+        tmp.replace(path)
+
+
+class HistoricalDataService:
+    """
+    Fetches historical bars in paced, concurrent, cached chunks.
+
+    Completed chunks are cached on disk, so backfills only request the
+    days that are missing and repeated requests never reach TWS.
+    """
+
+    def __init__(
+        self,
+        client: "TWSClient",
+        cache: Optional[BarCache] = None,
+        pacer: Optional[HistoricalPacer] = None,
+        max_concurrent: int = 50,
+        archive: Optional[BarArchive] = None,
+    ):
+        """
+        Initialize historical data service.
+
+        Args:
+            client: TWS client used to send requests
+            cache: Bar cache; defaults to DEFAULT_CACHE_DIR
+            pacer: Pacing scheduler shared by all historical requests
+            max_concurrent: Maximum simultaneous open historical requests
+            archive: Optional bar archive that fetched TRADES bars are appended to
+        """
+        self.cache = cache if cache is not None else BarCache()
+        self.archive = archive
+        self.pacer = pacer if pacer is not None else HistoricalPacer()
+        self._client = client
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def fetch(
+        self,
+        contract: Contract,
+        end: datetime,
+        duration: str,
+        bar_size: str,
+        what_to_show: str = "TRADES",
+        use_rth: bool = True,
+        timeout: float = 60.0,
+    ) -> Optional[List[Bar]]:
+        """
+        Fetch historical bars, serving completed chunks from the cache.
+
+        Args:
+            contract: Contract to fetch bars for
+            end: End of the requested range
+            duration: TWS duration string, e.g. "5 D"
+            bar_size: TWS bar size setting, e.g. "1 min"
+            what_to_show: TWS data type, e.g. "TRADES" or "MIDPOINT"
+            use_rth: Only include regular trading hours
+            timeout: Timeout in seconds for each chunk
+
+        Returns:
+            Bars within the range in chronological order, None on failure
+        """
+        start = end - parse_duration(duration)
+        today = date.today()
+        if not self._client.is_connected():
+            logger.error("Not connected to TWS")
+            return None
+
+        bars: Dict[str, List[Bar]] = {}
+        missing: List[BarChunk] = []
+
+        for chunk in plan_chunks(end, duration, bar_size):
+            cached = self.cache.load(contract, bar_size, what_to_show, use_rth, chunk.key)
+            if cached is not None:
+                bars[chunk.key] = cached
+            else:
+                missing.append(chunk)
+
+        logger.info(
+            f"Historical {contract.symbol} {bar_size}: {len(bars)} chunks cached, "
+            f"{len(missing)} to request"
+        )
+
+        failed = False
+        in_flight: List[Tuple[BarChunk, int, Any]] = []
+        for chunk in missing:
+            if not self._slots.acquire(timeout=timeout):
+                logger.error("Timed out waiting for a free historical request slot")
+                failed = True
+                break
+            self.pacer.wait(
+                (contract_key(contract), chunk.end, chunk.duration, bar_size, what_to_show, use_rth)
+            )
+            req_id, future = self._client.submit(
+                lambda req_id, chunk=chunk: self._client.client.reqHistoricalData(
+                    req_id, contract, chunk.end, chunk.duration, bar_size,
+                    what_to_show, int(use_rth), 2, False, []
+                )
+            )
+            future.add_done_callback(lambda _: self._slots.release())
+            in_flight.append((chunk, req_id, future))
+
+        for chunk, req_id, future in in_flight:
+            try:
+                chunk_bars = [bar_from_ibapi(bar) for bar in future.result(timeout)]
+            except TWSRequestError as e:
+                # Anything but a genuinely empty span fails the chunk and is never cached
+                if not is_no_data(e):
+                    logger.error(f"Historical request for {chunk.key} failed: {e}")
+                    failed = True
+                    continue
+                chunk_bars = []
+            except FutureTimeoutError:
+                logger.error(f"Historical request for {chunk.key} timed out")
+                self._client.requests.discard(req_id, future)
+                future.cancel()
+                # Stop TWS serving the request; it still counts against pacing
+                if self._client.is_connected():
+                    self._client.client.cancelHistoricalData(req_id)
+                failed = True
+                continue
+            except Exception as e:
+                logger.error(f"Historical request for {chunk.key} failed: {e}")
+                self._client.requests.discard(req_id, future)
+                future.cancel()
+                failed = True
+                continue
+
+            bars[chunk.key] = chunk_bars
+            # Only spans that have fully elapsed are final and safe to cache
+            if chunk.day < today:
+                self.cache.store(contract, bar_size, what_to_show, use_rth, chunk.key, chunk_bars)
+
+        if failed:
+            return None
+
+        # Adjacent chunks may both hold a bar on their shared boundary
+        by_time = {bar.time: bar for chunk_bars in bars.values() for bar in chunk_bars}
+        result = [by_time[t] for t in sorted(by_time) if start <= t <= end]
+        # The archive holds one series per symbol and bar size, so only trades are kept
+        if self.archive is not None and what_to_show == "TRADES" and result:
+            written = self.archive.append_bars(contract.symbol, bar_size, result)
+            logger.info(f"Archived {written} {contract.symbol} {bar_size} bars")
+        return result
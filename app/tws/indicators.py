@@ -0,0 +1,360 @@
+"""
+Technical indicators computed incrementally per bar or in batch over arrays.
+
+Every indicator comes in two forms that produce the same values: a
+function taking NumPy columns for a whole history, and a class whose
+update() folds in one new bar with O(1) work. Values are NaN until an
+indicator has seen enough bars.
+
+EMA, RSI and ATR are recursive. Their batch forms evaluate the recurrence
+y[i] = a * x[i] + (1 - a) * y[i - 1] block by block as a scaled cumulative
+sum, so the Python loop runs once per block rather than once per bar.
+"""
+
+import math
+import re
+from collections import deque
+from typing import Callable, Deque, Dict, NamedTuple, Optional
+
+import numpy as np
+
+# Smallest factor (1 - a) ** k allowed inside one block of the recurrence,
+# keeping the rescaled terms well inside float64 range
+_MIN_DECAY = 1e-100
+_MAX_BLOCK = 4096
+
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _check_period(period: int) -> None:
+    if period < 1:
+        raise ValueError("period must be at least 1")
+
+
+def _recurrence(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """
+    Evaluate y[i] = alpha * x[i] + (1 - alpha) * y[i - 1] with y[-1] = initial.
+
+    Within a block of k values y[i] = d**(i+1) * y0 + alpha * d**i * sum(x[j] / d**j),
+    with d = 1 - alpha, so each block is one cumulative sum.
+    """
+    result = np.empty(len(values), dtype=np.float64)
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        result[:] = values
+        return result
+    block = _MAX_BLOCK if decay == 1.0 else int(min(_MAX_BLOCK, max(1, math.log(_MIN_DECAY) / math.log(decay))))
+    steps = np.arange(block, dtype=np.float64)
+    powers = decay ** steps
+    inverse = decay ** -steps
+    previous = initial
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        n = len(chunk)
+        scaled = np.cumsum(chunk * inverse[:n]) * powers[:n]
+        result[start:start + n] = alpha * scaled + previous * decay * powers[:n]
+        previous = result[start + n - 1]
+    return result
+
+
+def sma(close, period: int) -> np.ndarray:
+    """
+    Simple moving average.
+
+    Args:
+        close: Closing prices, oldest first
+        period: Number of bars averaged
+
+    Returns:
+        Array of the same length, NaN for the first period - 1 bars
+    """
+    _check_period(period)
+    close = _as_float(close)
+    result = np.full(len(close), np.nan)
+    if len(close) >= period:
+        sums = np.cumsum(close)
+        result[period - 1] = sums[period - 1]
+        result[period:] = sums[period:] - sums[:-period]
+        result[period - 1:] /= period
+    return result
+
+
+def ema(close, period: int) -> np.ndarray:
+    """
+    Exponential moving average with alpha = 2 / (period + 1).
+
+    The first value is the simple average of the first period bars.
+
+    Args:
+        close: Closing prices, oldest first
+        period: EMA span in bars
+
+    Returns:
+        Array of the same length, NaN for the first period - 1 bars
+    """
+    _check_period(period)
+    close = _as_float(close)
+    result = np.full(len(close), np.nan)
+    if len(close) >= period:
+        seed = close[:period].mean()
+        result[period - 1] = seed
+        result[period:] = _recurrence(close[period:], 2.0 / (period + 1), seed)
+    return result
+
+
+def vwap(high, low, close, volume) -> np.ndarray:
+    """
+    Volume-weighted average of the typical price (high + low + close) / 3.
+
+    The average is anchored at the first bar given.
+
+    Returns:
+        Array of the same length, NaN until some volume has traded
+    """
+    typical = (_as_float(high) + _as_float(low) + _as_float(close)) / 3.0
+    volume = _as_float(volume)
+    traded = np.cumsum(volume)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(traded > 0, np.cumsum(typical * volume) / traded, np.nan)
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """True range of each bar; the first bar uses its high - low."""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    result = high - low
+    if len(close) > 1:
+        previous = close[:-1]
+        result[1:] = np.maximum(result[1:], np.maximum(np.abs(high[1:] - previous), np.abs(low[1:] - previous)))
+    return result
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """
+    Average true range with Wilder smoothing.
+
+    The first value is the simple average of the first period true ranges.
+
+    Returns:
+        Array of the same length, NaN for the first period - 1 bars
+    """
+    _check_period(period)
+    ranges = true_range(high, low, close)
+    result = np.full(len(ranges), np.nan)
+    if len(ranges) >= period:
+        seed = ranges[:period].mean()
+        result[period - 1] = seed
+        result[period:] = _recurrence(ranges[period:], 1.0 / period, seed)
+    return result
+
+
+def rsi(close, period: int = 14) -> np.ndarray:
+    """
+    Relative strength index with Wilder smoothing.
+
+    Returns:
+        Array of the same length, NaN for the first period bars
+    """
+    _check_period(period)
+    close = _as_float(close)
+    result = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return result
+
+    change = np.diff(close)
+    gains = np.maximum(change, 0.0)
+    losses = np.maximum(-change, 0.0)
+    gain_seed, loss_seed = gains[:period].mean(), losses[:period].mean()
+    average_gain = np.concatenate(([gain_seed], _recurrence(gains[period:], 1.0 / period, gain_seed)))
+    average_loss = np.concatenate(([loss_seed], _recurrence(losses[period:], 1.0 / period, loss_seed)))
+    result[period:] = _rsi_value(average_gain, average_loss)
+    return result
+
+
+def _rsi_value(average_gain: np.ndarray, average_loss: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        value = 100.0 - 100.0 / (1.0 + average_gain / average_loss)
+    # No losses at all is full strength; a flat market sits in the middle
+    return np.where(average_loss == 0, np.where(average_gain == 0, 50.0, 100.0), value)
+
+
+class SMA:
+    """Incremental simple moving average."""
+
+    def __init__(self, period: int):
+        _check_period(period)
+        self.period = period
+        self.value = math.nan
+        self._window: Deque[float] = deque()
+        self._sum = 0.0
+
+    def update(self, close: float) -> float:
+        self._window.append(close)
+        self._sum += close
+        if len(self._window) > self.period:
+            self._sum -= self._window.popleft()
+        if len(self._window) == self.period:
+            self.value = self._sum / self.period
+        return self.value
+
+
+class EMA:
+    """Incremental exponential moving average, seeded with the first period's SMA."""
+
+    def __init__(self, period: int):
+        _check_period(period)
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value = math.nan
+        self._seed = SMA(period)
+
+    def update(self, close: float) -> float:
+        if math.isnan(self.value):
+            self.value = self._seed.update(close)
+        else:
+            self.value += self.alpha * (close - self.value)
+        return self.value
+
+
+class VWAP:
+    """Incremental volume-weighted average price, anchored at the first bar or last reset()."""
+
+    def __init__(self):
+        self.value = math.nan
+        self._notional = 0.0
+        self._volume = 0.0
+
+    def update(self, high: float, low: float, close: float, volume: float) -> float:
+        self._notional += (high + low + close) / 3.0 * volume
+        self._volume += volume
+        if self._volume > 0:
+            self.value = self._notional / self._volume
+        return self.value
+
+    def reset(self) -> None:
+        """Start a new anchor period, e.g. at the session open."""
+        self.__init__()
+
+
+class ATR:
+    """Incremental average true range with Wilder smoothing."""
+
+    def __init__(self, period: int = 14):
+        _check_period(period)
+        self.period = period
+        self.value = math.nan
+        self._seed = SMA(period)
+        self._previous_close: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> float:
+        current = high - low
+        if self._previous_close is not None:
+            current = max(current, abs(high - self._previous_close), abs(low - self._previous_close))
+        self._previous_close = close
+        if math.isnan(self.value):
+            self.value = self._seed.update(current)
+        else:
+            self.value += (current - self.value) / self.period
+        return self.value
+
+
+class RSI:
+    """Incremental relative strength index with Wilder smoothing."""
+
+    def __init__(self, period: int = 14):
+        _check_period(period)
+        self.period = period
+        self.value = math.nan
+        self._gain = SMA(period)
+        self._loss = SMA(period)
+        self._average_gain = math.nan
+        self._average_loss = math.nan
+        self._previous_close: Optional[float] = None
+
+    def update(self, close: float) -> float:
+        previous, self._previous_close = self._previous_close, close
+        if previous is None:
+            return self.value
+
+        change = close - previous
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if math.isnan(self._average_gain):
+            self._average_gain = self._gain.update(gain)
+            self._average_loss = self._loss.update(loss)
+            if math.isnan(self._average_gain):
+                return self.value
+        else:
+            self._average_gain += (gain - self._average_gain) / self.period
+            self._average_loss += (loss - self._average_loss) / self.period
+        if self._average_loss == 0:
+            self.value = 50.0 if self._average_gain == 0 else 100.0
+        else:
+            self.value = 100.0 - 100.0 / (1.0 + self._average_gain / self._average_loss)
+        return self.value
+
+
+class IndicatorSpec(NamedTuple):
+    """A parsed indicator request such as "rsi:14"."""
+
+    name: str  # canonical label, e.g. "rsi:14"
+    kind: str
+    period: Optional[int]
+
+    def compute(self, records: np.ndarray) -> np.ndarray:
+        """Batch values over an array of bar records with high, low, close and volume fields."""
+        return BATCH[self.kind](records, self.period)
+
+    def incremental(self) -> Callable[[object], float]:
+        """New O(1) updater taking one bar with high, low, close and volume attributes."""
+        return INCREMENTAL[self.kind](self.period)
+
+    @property
+    def warmup(self) -> int:
+        """Bars of history needed before the values settle."""
+        if self.period is None:
+            return 0
+        # Recursive indicators keep under 0.01% of their seed after ten periods
+        return self.period if self.kind == "sma" else 10 * self.period
+
+
+BATCH: Dict[str, Callable[[np.ndarray, Optional[int]], np.ndarray]] = {
+    "sma": lambda r, period: sma(r["close"], period),
+    "ema": lambda r, period: ema(r["close"], period),
+    "vwap": lambda r, period: vwap(r["high"], r["low"], r["close"], r["volume"]),
+    "atr": lambda r, period: atr(r["high"], r["low"], r["close"], period),
+    "rsi": lambda r, period: rsi(r["close"], period),
+}
+
+
+def _bar_updater(indicator, *fields: str) -> Callable[[object], float]:
+    return lambda bar: indicator.update(*(getattr(bar, field) for field in fields))
+
+
+INCREMENTAL: Dict[str, Callable[[Optional[int]], Callable[[object], float]]] = {
+    "sma": lambda period: _bar_updater(SMA(period), "close"),
+    "ema": lambda period: _bar_updater(EMA(period), "close"),
+    "vwap": lambda period: _bar_updater(VWAP(), "high", "low", "close", "volume"),
+    "atr": lambda period: _bar_updater(ATR(period), "high", "low", "close"),
+    "rsi": lambda period: _bar_updater(RSI(period), "close"),
+}
+
+DEFAULT_PERIODS = {"sma": 20, "ema": 20, "atr": 14, "rsi": 14}
+
+
+def parse_indicator(text: str) -> IndicatorSpec:
+    """
+    Parse an indicator request: "sma:20", "ema:50", "atr", "rsi:14" or "vwap".
+
+    Raises:
+        ValueError: If the indicator or period is not understood
+    """
+    match = re.fullmatch(r"\s*([A-Za-z]+)\s*(?::\s*(\d+))?\s*", text)
+    kind = match.group(1).lower() if match else None
+    if kind not in BATCH:
+        raise ValueError(f"Unsupported indicator: {text!r}")
+    if kind == "vwap":
+        return IndicatorSpec("vwap", kind, None)
+    period = int(match.group(2)) if match.group(2) else DEFAULT_PERIODS[kind]
+    _check_period(period)
+    return IndicatorSpec(f"{kind}:{period}", kind, period)
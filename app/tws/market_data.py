@@ -0,0 +1,288 @@
+"""
+Streaming market data subscriptions shared between consumers.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from ibapi.contract import Contract
+
+from .contracts import ContractKey, contract_key
+from .errors import MARKET_DATA_NOTICE_CODES, WARNING_ERROR_CODES
+
+if TYPE_CHECKING:
+    from .bar_aggregator import BarAggregator
+    from .client import TWSClient
+    from .tick_store import TickStore
+
+logger = logging.getLogger(__name__)
+
+
+class Tick(NamedTuple):
+    """A single price or size update for a subscribed contract."""
+
+    symbol: str
+    field: int
+    price: Optional[float]
+    size: Optional[int]
+    time: float
+
+
+class TickSubscription:
+    """
+    One consumer's view of a shared market data stream.
+
+    Ticks are buffered in a bounded queue; when the consumer falls behind
+    the oldest ticks are dropped so memory stays flat.
+    """
+
+    def __init__(
+        self,
+        manager: "MarketDataManager",
+        key: ContractKey,
+        symbol: str,
+        maxsize: int,
+        notify: Optional[Callable[[], None]] = None,
+    ):
+        self.key = key
+        self.symbol = symbol
+        self.dropped = 0
+        # Set when TWS dropped the stream; no more ticks will arrive
+        self.error: Optional[str] = None
+        self._manager = manager
+        self._queue: Deque[Tick] = deque(maxlen=maxsize)
+        self._condition = threading.Condition()
+        self._notify = notify
+        self._closed = False
+
+    def put(self, tick: Tick) -> None:
+        """Queue a tick for the consumer; called on the reader thread."""
+        with self._condition:
+            was_empty = not self._queue
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(tick)
+            self._condition.notify()
+        # Only wake the consumer when it has something new to drain
+        if was_empty and self._notify is not None:
+            self._notify()
+
+    def fail(self, error: str) -> None:
+        """Mark the stream as dropped by TWS and wake the consumer; called on the reader thread."""
+        with self._condition:
+            self.error = error
+            self._closed = True
+            self._condition.notify_all()
+        if self._notify is not None:
+            self._notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tick]:
+        """
+        Take the oldest queued tick.
+
+        Args:
+            timeout: Seconds to wait for a tick; None waits indefinitely
+
+        Returns:
+            The tick, or None on timeout or once the stream failed
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._queue or self.error is not None, timeout):
+                return None
+            return self._queue.popleft() if self._queue else None
+
+    def drain(self) -> List[Tick]:
+        """Take every queued tick without waiting."""
+        with self._condition:
+            ticks = list(self._queue)
+            self._queue.clear()
+            return ticks
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop receiving ticks."""
+        if not self._closed:
+            self._closed = True
+            self._manager.unsubscribe(self)
+
+    def __enter__(self) -> "TickSubscription":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class _Stream:
+    """A single reqMktData subscription and its consumers."""
+
+    def __init__(self, req_id: int, contract: Contract):
+        self.req_id = req_id
+        self.contract = contract
+        self.subscribers: Tuple[TickSubscription, ...] = ()
+
+
+class MarketDataManager:
+    """
+    Shares one TWS market data line per contract between many consumers.
+
+    reqMktData is sent once per contract regardless of the number of
+    subscribers, and cancelled when the last subscriber goes away, so the
+    account stays inside IB's market data line limits.
+    """
+
+    def __init__(
+        self,
+        client: "TWSClient",
+        queue_size: int = 1000,
+        generic_ticks: str = "",
+        tick_store: Optional["TickStore"] = None,
+        bar_aggregator: Optional["BarAggregator"] = None,
+    ):
+        """
+        Initialize market data manager.
+
+        Args:
+            client: TWS client used to send requests
+            queue_size: Default per-subscriber queue capacity
+            generic_ticks: Comma-separated generic tick types to request
+            tick_store: Optional store that records every received tick
+            bar_aggregator: Optional aggregator building live bars from the trades
+        """
+        self.queue_size = queue_size
+        self.generic_ticks = generic_ticks
+        self.tick_store = tick_store
+        self.bar_aggregator = bar_aggregator
+        self._client = client
+        self._lock = threading.Lock()
+        self._streams: Dict[ContractKey, _Stream] = {}
+        self._by_req_id: Dict[int, _Stream] = {}
+
+        client.wrapper.add_handler("tickPrice", self._on_tick_price)
+        client.wrapper.add_handler("tickSize", self._on_tick_size)
+        client.wrapper.add_handler("error", self._on_error)
+
+    def subscribe(
+        self,
+        contract: Contract,
+        maxsize: Optional[int] = None,
+        notify: Optional[Callable[[], None]] = None,
+    ) -> TickSubscription:
+        """
+        Subscribe to live ticks for a contract.
+
+        Args:
+            contract: Contract to stream
+            maxsize: Queue capacity for this subscriber; defaults to queue_size
+            notify: Called on the reader thread when the queue becomes non-empty
+
+        Returns:
+            Subscription to read ticks from; close it when done
+
+        Raises:
+            ConnectionError: If the client is not connected
+        """
+        if not self._client.is_connected():
+            raise ConnectionError("Not connected to TWS")
+
+        key = contract_key(contract)
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = _Stream(self._client.requests.next_id(), contract)
+                self._streams[key] = stream
+                self._by_req_id[stream.req_id] = stream
+                logger.info(f"Requesting market data for {contract.symbol} (reqId {stream.req_id})")
+                try:
+                    self._client.client.reqMktData(stream.req_id, contract, self.generic_ticks, False, False, [])
+                except Exception:
+                    # Leave no stream behind that later subscribers would join
+                    del self._streams[key]
+                    del self._by_req_id[stream.req_id]
+                    raise
+
+            subscription = TickSubscription(
+                self, key, contract.symbol, maxsize or self.queue_size, notify
+            )
+            stream.subscribers = stream.subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: TickSubscription) -> None:
+        """Remove a subscriber, cancelling the TWS stream if it was the last."""
+        with self._lock:
+            stream = self._streams.get(subscription.key)
+            if stream is None or subscription not in stream.subscribers:
+                return
+            stream.subscribers = tuple(s for s in stream.subscribers if s is not subscription)
+            if stream.subscribers:
+                return
+
+            del self._streams[subscription.key]
+            del self._by_req_id[stream.req_id]
+            logger.info(f"Cancelling market data for {stream.contract.symbol} (reqId {stream.req_id})")
+            if self._client.is_connected():
+                self._client.client.cancelMktData(stream.req_id)
+
+    def resubscribe(self) -> int:
+        """
+        Re-issue reqMktData for every active stream, e.g. after a reconnect.
+
+        Each stream gets a fresh request id so late ticks for the old
+        request cannot be confused with the new one.
+
+        Returns:
+            Number of streams re-requested
+        """
+        with self._lock:
+            streams = list(self._streams.values())
+            for stream in streams:
+                self._by_req_id.pop(stream.req_id, None)
+                stream.req_id = self._client.requests.next_id()
+                self._by_req_id[stream.req_id] = stream
+                logger.info(f"Re-requesting market data for {stream.contract.symbol} (reqId {stream.req_id})")
+                self._client.client.reqMktData(stream.req_id, stream.contract, self.generic_ticks, False, False, [])
+        return len(streams)
+
+    def subscriber_counts(self) -> Dict[str, int]:
+        """Number of subscribers per streamed symbol."""
+        with self._lock:
+            return {s.contract.symbol: len(s.subscribers) for s in self._streams.values()}
+
+    def _on_tick_price(self, reqId: int, tickType: int, price: float, attrib: Any) -> None:
+        stream = self._by_req_id.get(reqId)
+        if stream is not None:
+            self._fan_out(stream, Tick(stream.contract.symbol, tickType, price, None, time.time()))
+
+    def _on_tick_size(self, reqId: int, tickType: int, size: int) -> None:
+        stream = self._by_req_id.get(reqId)
+        if stream is not None:
+            self._fan_out(stream, Tick(stream.contract.symbol, tickType, None, size, time.time()))
+
+    def _on_error(self, reqId: int, errorCode: int, errorString: str) -> None:
+        if errorCode in WARNING_ERROR_CODES or errorCode in MARKET_DATA_NOTICE_CODES:
+            return
+        with self._lock:
+            stream = self._by_req_id.pop(reqId, None)
+            if stream is None:
+                return
+            # TWS has dropped the line; the next subscriber requests it again
+            del self._streams[contract_key(stream.contract)]
+        logger.warning(f"Market data for {stream.contract.symbol} failed: {errorCode} {errorString}")
+        for subscription in stream.subscribers:
+            subscription.fail(f"TWS Error {errorCode}: {errorString}")
+
+    def _fan_out(self, stream: _Stream, tick: Tick) -> None:
+        if self.tick_store is not None:
+            self.tick_store.append_tick(tick)
+        if self.bar_aggregator is not None:
+            self.bar_aggregator.append_tick(tick)
+        for subscription in stream.subscribers:
+            subscription.put(tick)
@@ -3,7 +3,7 @@ Data models for TWS responses and structures.
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -13,6 +13,7 @@ class TimeResponse(BaseModel):
     current_time: datetime
     server_version: Optional[int] = None
     connection_time: Optional[datetime] = None
+    uncertainty_ms: Optional[float] = None
 
     model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
 
@@ -25,4 +26,215 @@ class ConnectionStatus(BaseModel):
     host: str
     port: int
     connection_time: Optional[datetime] = None
-    error_message: Optional[str] = None
\ No newline at end of file
+    connect_latency_ms: Optional[float] = None
+    reconnects: int = 0
+    last_recovery_ms: Optional[float] = None
+    error_message: Optional[str] = None
+
+
+class SupervisorStatus(BaseModel):
+    """Model representing the state of the reconnect supervisor."""
+
+    state: str
+    reconnects: int = 0
+    attempts: int = 0
+    last_drop: Optional[datetime] = None
+    last_recovery_ms: Optional[float] = None
+
+
+class ClockStatus(BaseModel):
+    """Model representing the estimated offset of the TWS server clock."""
+
+    synced: bool
+    offset_ms: Optional[float] = None
+    uncertainty_ms: Optional[float] = None
+    drift_ppm: float = 0.0
+    samples: int = 0
+    rejected: int = 0
+    min_rtt_ms: Optional[float] = None
+    last_sample: Optional[datetime] = None
+
+
+class PoolMemberStatus(BaseModel):
+    """Model representing one connection of a client pool."""
+
+    client_id: int
+    workload: str
+    connected: bool
+    healthy: bool
+    pending_requests: int
+    routed: int
+    health_failures: int = 0
+    health_rtt_ms: Optional[float] = None
+
+
+class PoolStats(BaseModel):
+    """Model representing the state of a client pool."""
+
+    size: int
+    connected: int
+    healthy: int
+    fallbacks: int
+    members: List[PoolMemberStatus]
+
+
+class OrderFill(BaseModel):
+    """Model representing one execution of an order."""
+
+    exec_id: str
+    time: str
+    shares: float
+    price: float
+
+
+class OrderState(BaseModel):
+    """Model representing the live state of an order."""
+
+    order_id: int
+    perm_id: Optional[int] = None
+    client_id: Optional[int] = None
+    symbol: str
+    action: str
+    order_type: str
+    quantity: float
+    limit_price: Optional[float] = None
+    stop_price: Optional[float] = None
+    tif: str = ""
+    status: str
+    filled: float = 0.0
+    remaining: float = 0.0
+    avg_fill_price: Optional[float] = None
+    last_fill_price: Optional[float] = None
+    why_held: str = ""
+    error_code: Optional[int] = None
+    error_message: Optional[str] = None
+    submitted_at: datetime
+    updated_at: datetime
+    fills: List[OrderFill] = []
+
+
+class BatchOrderResult(BaseModel):
+    """Model representing the outcome of one order in a batch operation."""
+
+    index: int
+    order_id: Optional[int] = None
+    success: bool
+    order: Optional[OrderState] = None
+    error_message: Optional[str] = None
+
+
+class AccountValue(BaseModel):
+    """Model representing one account value from reqAccountUpdates."""
+
+    account: str
+    key: str
+    value: str
+    currency: str = ""
+
+
+class AccountPnL(BaseModel):
+    """Model representing the daily, unrealized and realized P&L of an account."""
+
+    account: str
+    daily_pnl: Optional[float] = None
+    unrealized_pnl: Optional[float] = None
+    realized_pnl: Optional[float] = None
+    updated_at: Optional[datetime] = None
+
+
+class PositionState(BaseModel):
+    """Model representing the live state of a position; closed positions have position 0."""
+
+    account: str
+    con_id: int
+    symbol: str
+    sec_type: str
+    currency: str
+    exchange: str = ""
+    position: float
+    avg_cost: Optional[float] = None
+    market_price: Optional[float] = None
+    market_value: Optional[float] = None
+    unrealized_pnl: Optional[float] = None
+    realized_pnl: Optional[float] = None
+    daily_pnl: Optional[float] = None
+    updated_at: datetime
+
+
+class AccountState(BaseModel):
+    """Model representing the cached state of an account."""
+
+    account: str
+    ready: bool = False
+    account_time: Optional[str] = None
+    values: List[AccountValue] = []
+    pnl: Optional[AccountPnL] = None
+
+
+class PortfolioChanges(BaseModel):
+    """Model representing the account entries that changed since the last update."""
+
+    values: List[AccountValue] = []
+    positions: List[PositionState] = []
+    pnl: List[AccountPnL] = []
+
+
+class ContractInfo(BaseModel):
+    """Model representing a contract resolved through reqContractDetails."""
+
+    con_id: int
+    symbol: str
+    sec_type: str
+    exchange: str
+    primary_exchange: str = ""
+    currency: str
+    local_symbol: str = ""
+    trading_class: str = ""
+    long_name: str = ""
+    min_tick: Optional[float] = None
+    time_zone: str = ""
+    resolved_at: datetime
+
+
+class Bar(BaseModel):
+    """Model representing one OHLCV bar from TWS."""
+
+    time: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    wap: Optional[float] = None
+    bar_count: Optional[int] = None
+
+
+class ScanRow(BaseModel):
+    """Model representing one ranked contract of a market scanner; rank 0 is the top."""
+
+    rank: int
+    con_id: int
+    symbol: str
+    sec_type: str
+    exchange: str = ""
+    currency: str = ""
+    distance: str = ""
+    benchmark: str = ""
+    projection: str = ""
+
+
+class ScanMove(BaseModel):
+    """Model representing a contract that changed rank within a scan."""
+
+    con_id: int
+    rank: int
+    previous_rank: int
+
+
+class ScanDiff(BaseModel):
+    """Model representing how a scan's ranking changed since a consumer's last read."""
+
+    scan_id: int
+    entered: List[ScanRow] = []
+    exited: List[int] = []
+    moved: List[ScanMove] = []
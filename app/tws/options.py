@@ -0,0 +1,403 @@
+"""
+Option chain snapshots gathered into columnar strike x expiry tables.
+
+A chain's expirations and strikes are listed once with reqSecDefOptParams.
+Every option in the requested slice is then snapshotted with reqMktData.
+The snapshots are fanned out over a bounded window of concurrent requests
+that leaves the lines held by streaming subscriptions free. Each reply is
+written straight into preallocated NumPy arrays indexed by right, expiry
+and strike, and finished chains are cached for a short TTL.
+"""
+
+import bisect
+import itertools
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import date
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from ibapi.contract import Contract
+from ibapi.ticktype import TickTypeEnum
+
+from .errors import NO_SECURITY_DEFINITION, TWSRequestError
+
+if TYPE_CHECKING:
+    from .client import TWSClient
+
+logger = logging.getLogger(__name__)
+
+RIGHTS = ("C", "P")
+FIELDS = ("bid", "ask", "last", "iv", "delta", "gamma", "vega", "theta", "model_price")
+
+# Market data lines of a default IB account; snapshots hold one line while open
+DEFAULT_MAX_LINES = 100
+# Nearest expirations snapshotted when none are requested
+DEFAULT_EXPIRATIONS = 4
+DEFAULT_MAX_OPTIONS = 1000
+DEFAULT_TTL = 10.0
+# Expirations and strikes change at most daily
+PARAMETERS_TTL = 3600.0
+
+_PRICE_FIELDS = {
+    TickTypeEnum.BID: "bid",
+    TickTypeEnum.ASK: "ask",
+    TickTypeEnum.LAST: "last",
+    TickTypeEnum.DELAYED_BID: "bid",
+    TickTypeEnum.DELAYED_ASK: "ask",
+    TickTypeEnum.DELAYED_LAST: "last",
+}
+_MODEL_TICKS = (TickTypeEnum.MODEL_OPTION, TickTypeEnum.DELAYED_MODEL_OPTION)
+
+
+class ChainParameters(NamedTuple):
+    """Expirations and strikes listed for an underlying by reqSecDefOptParams."""
+
+    symbol: str
+    underlying_con_id: int
+    exchange: str
+    trading_class: str
+    multiplier: str
+    expirations: Tuple[str, ...]  # YYYYMMDD, nearest first
+    strikes: Tuple[float, ...]  # ascending
+
+
+class OptionChain:
+    """
+    Snapshot of an option chain as arrays indexed [right, expiry, strike].
+
+    Values TWS did not send, including those of options that do not exist
+    for every expiry and strike listed, are NaN.
+    """
+
+    def __init__(self, parameters: ChainParameters, expirations: Sequence[str], strikes: Sequence[float]):
+        self.symbol = parameters.symbol
+        self.trading_class = parameters.trading_class
+        self.multiplier = parameters.multiplier
+        self.expirations = list(expirations)
+        self.strikes = np.asarray(strikes, dtype=np.float64)
+        shape = (len(RIGHTS), len(self.expirations), len(self.strikes))
+        self.columns: Dict[str, np.ndarray] = {field: np.full(shape, np.nan) for field in FIELDS}
+        self.underlying_price = math.nan
+        self.requested = 0
+        self.completed = 0
+        self.failed = 0
+        self.created_at = time.time()
+        self.elapsed = 0.0
+
+    def column(self, field: str, right: str) -> np.ndarray:
+        """Values of one field for calls ("C") or puts ("P") as an expiry x strike array."""
+        return self.columns[field][RIGHTS.index(right)]
+
+    def __len__(self) -> int:
+        return len(RIGHTS) * len(self.expirations) * len(self.strikes)
+
+
+class _Cell:
+    """Where one option's snapshot is written."""
+
+    __slots__ = ("chain", "index", "bid", "ask", "open")
+
+    def __init__(self, chain: OptionChain, index: Tuple[int, int, int]):
+        self.chain = chain
+        self.index = index
+        self.bid = False
+        self.ask = False
+        # Holds one of the service's snapshot slots until released
+        self.open = True
+
+
+class OptionChainService:
+    """
+    Snapshots option chains for an underlying.
+
+    Concurrent requests for the same slice share one build, and finished
+    chains are served from memory until their TTL expires.
+    """
+
+    def __init__(
+        self,
+        client: "TWSClient",
+        max_lines: int = DEFAULT_MAX_LINES,
+        ttl: float = DEFAULT_TTL,
+        timeout: float = 30.0,
+    ):
+        """
+        Initialize option chain service.
+
+        Args:
+            client: TWS client used to send requests
+            max_lines: Market data lines of the account; streaming subscriptions use some of them
+            ttl: Seconds a finished chain is served from memory
+            timeout: Default seconds to wait for a whole chain
+        """
+        self.max_lines = max_lines
+        self.ttl = ttl
+        self.timeout = timeout
+        self.builds = 0
+        self.hits = 0
+        self.joined = 0
+        self._client = client
+        self._lock = threading.Lock()
+        self._chains: Dict[Tuple[Any, ...], Tuple[float, OptionChain]] = {}
+        self._in_flight: Dict[Tuple[Any, ...], Future] = {}
+        self._parameters: Dict[str, Tuple[float, ChainParameters]] = {}
+        self._cells: Dict[int, _Cell] = {}
+        # Snapshots open now, bounded by window()
+        self._open = 0
+        self._slots = threading.Condition()
+
+        client.wrapper.add_handler("tickPrice", self._on_tick_price)
+        client.wrapper.add_handler("tickOptionComputation", self._on_option_computation)
+
+    def window(self) -> int:
+        """Snapshots that may be open at once: the lines streaming subscriptions leave free."""
+        streaming = len(self._client.market_data.subscriber_counts())
+        return max(1, self.max_lines - streaming)
+
+    def parameters(self, symbol: str, timeout: Optional[float] = None) -> ChainParameters:
+        """
+        List the expirations and strikes of an underlying's options.
+
+        Args:
+            symbol: Underlying stock symbol
+            timeout: Seconds to wait for TWS; defaults to the service timeout
+
+        Returns:
+            The SMART listing of the symbol's own trading class if TWS sends
+            one, otherwise the first listing
+
+        Raises:
+            TWSRequestError: If TWS lists no options for the symbol
+            ConnectionError: If not connected to TWS
+            TimeoutError: If TWS does not answer in time
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            cached = self._parameters.get(symbol)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        timeout = self.timeout if timeout is None else timeout
+        underlying = self._client.contracts.resolve(symbol, timeout)
+        req_id, future = self._client.submit(
+            lambda req_id: self._client.client.reqSecDefOptParams(req_id, symbol, "", "STK", underlying.con_id)
+        )
+        try:
+            listings = future.result(timeout)
+        except FutureTimeoutError:
+            self._client.requests.discard(req_id, future)
+            raise TimeoutError(f"Timeout listing options of {symbol}")
+        if not listings:
+            raise TWSRequestError(req_id, NO_SECURITY_DEFINITION, f"No options listed for {symbol}")
+
+        # Weeklies and other trading classes are listed separately
+        listings = sorted(listings, key=lambda listing: (listing[0] != "SMART", listing[2] != symbol))
+        exchange, con_id, trading_class, multiplier, expirations, strikes = listings[0]
+        parameters = ChainParameters(
+            symbol, con_id, exchange, trading_class, multiplier, tuple(sorted(expirations)), tuple(sorted(strikes)),
+        )
+        with self._lock:
+            self._parameters[symbol] = (time.monotonic() + PARAMETERS_TTL, parameters)
+        return parameters
+
+    def snapshot(
+        self,
+        symbol: str,
+        expirations: Optional[Sequence[str]] = None,
+        min_strike: Optional[float] = None,
+        max_strike: Optional[float] = None,
+        max_options: int = DEFAULT_MAX_OPTIONS,
+        timeout: Optional[float] = None,
+    ) -> OptionChain:
+        """
+        Snapshot bid, ask, last, implied volatility and greeks of a chain slice.
+
+        Args:
+            symbol: Underlying stock symbol
+            expirations: Expirations as YYYYMMDD; defaults to the nearest DEFAULT_EXPIRATIONS
+            min_strike: Lowest strike included
+            max_strike: Highest strike included
+            max_options: Largest number of options one chain may request
+            timeout: Seconds to wait for the whole chain; defaults to the service timeout
+
+        Returns:
+            The chain; options TWS did not answer in time are left NaN and counted as failed
+
+        Raises:
+            ValueError: If the slice is empty or larger than max_options
+            TWSRequestError: If TWS lists no options for the symbol
+            ConnectionError: If not connected to TWS
+            TimeoutError: If TWS does not list the chain in time
+        """
+        if not self._client.is_connected():
+            raise ConnectionError("Not connected to TWS")
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        parameters = self.parameters(symbol, timeout)
+        chosen, strikes = _slice(parameters, expirations, min_strike, max_strike)
+        if not chosen or not strikes:
+            raise ValueError(f"No {symbol.upper()} options match the requested expirations and strikes")
+        if len(RIGHTS) * len(chosen) * len(strikes) > max_options:
+            raise ValueError(
+                f"{len(RIGHTS) * len(chosen) * len(strikes)} options requested; narrow the slice to {max_options}"
+            )
+
+        key = (parameters.symbol, tuple(chosen), tuple(strikes))
+        with self._lock:
+            cached = self._chains.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self.hits += 1
+                return cached[1]
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                future: Future = Future()
+                self._in_flight[key] = future
+                self.builds += 1
+            else:
+                self.joined += 1
+
+        if in_flight is not None:
+            try:
+                return in_flight.result(max(deadline - time.monotonic(), 0.0))
+            except FutureTimeoutError:
+                raise TimeoutError(f"Timeout waiting for the {symbol.upper()} option chain")
+
+        try:
+            chain = self._build(OptionChain(parameters, chosen, strikes), parameters, deadline)
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._chains = {k: v for k, v in self._chains.items() if v[0] > time.monotonic()}
+            # A chain TWS answered none of, e.g. after a dropped connection, is not worth keeping
+            if chain.completed:
+                self._chains[key] = (time.monotonic() + self.ttl, chain)
+            self._in_flight.pop(key, None)
+        future.set_result(chain)
+        return chain
+
+    def _build(self, chain: OptionChain, parameters: ChainParameters, deadline: float) -> OptionChain:
+        """Fan the chain's snapshots out over the line window and wait for them."""
+        started = time.monotonic()
+        strikes = chain.strikes.tolist()
+        pending: List[Tuple[int, _Cell, Future]] = []
+        for index in itertools.product(range(len(RIGHTS)), range(len(chain.expirations)), range(len(strikes))):
+            with self._slots:
+                if not self._slots.wait_for(lambda: self._open < self.window(), max(deadline - time.monotonic(), 0.0)):
+                    break
+                self._open += 1
+            r, e, s = index
+            contract = _option_contract(parameters, chain.expirations[e], strikes[s], RIGHTS[r])
+            cell = _Cell(chain, index)
+            req_id, future = self._client.submit(lambda req_id: self._send(req_id, cell, contract))
+            future.add_done_callback(lambda _, req_id=req_id, cell=cell: self._release(req_id, cell))
+            pending.append((req_id, cell, future))
+            chain.requested += 1
+
+        for req_id, cell, future in pending:
+            try:
+                future.result(max(deadline - time.monotonic(), 0.0))
+                chain.completed += 1
+            except FutureTimeoutError:
+                chain.failed += 1
+                self._client.requests.discard(req_id, future)
+                self._release(req_id, cell)
+                if self._client.is_connected():
+                    self._client.client.cancelMktData(req_id)
+            except Exception as e:
+                # e.g. no security definition for a listed expiry and strike pair
+                chain.failed += 1
+                logger.debug(f"Option snapshot {req_id} failed: {e}")
+
+        chain.failed += len(chain) - chain.requested
+        chain.elapsed = time.monotonic() - started
+        logger.info(
+            f"Snapshotted {chain.completed}/{len(chain)} {chain.symbol} options "
+            f"in {chain.elapsed * 1000:.0f} ms"
+        )
+        return chain
+
+    def _send(self, req_id: int, cell: _Cell, contract: Contract) -> None:
+        self._cells[req_id] = cell
+        self._client.client.reqMktData(req_id, contract, "", True, False, [])
+
+    def _release(self, req_id: int, cell: _Cell) -> None:
+        self._cells.pop(req_id, None)
+        with self._slots:
+            if cell.open:
+                cell.open = False
+                self._open -= 1
+                self._slots.notify()
+
+    def _on_tick_price(self, reqId: int, tickType: int, price: float, attrib: Any) -> None:
+        cell = self._cells.get(reqId)
+        field = _PRICE_FIELDS.get(tickType)
+        if cell is None or field is None or price < 0:
+            return
+        cell.chain.columns[field][cell.index] = price
+        if field == "bid":
+            cell.bid = True
+        elif field == "ask":
+            cell.ask = True
+
+    def _on_option_computation(
+        self, reqId: int, tickType: int, tickAttrib: int, impliedVol: Optional[float], delta: Optional[float],
+        optPrice: Optional[float], pvDividend: Optional[float], gamma: Optional[float], vega: Optional[float],
+        theta: Optional[float], undPrice: Optional[float],
+    ) -> None:
+        cell = self._cells.get(reqId)
+        if cell is None or tickType not in _MODEL_TICKS:
+            return
+        columns = cell.chain.columns
+        for field, value in (
+            ("iv", impliedVol), ("delta", delta), ("gamma", gamma),
+            ("vega", vega), ("theta", theta), ("model_price", optPrice),
+        ):
+            if value is not None:
+                columns[field][cell.index] = value
+        if undPrice is not None:
+            cell.chain.underlying_price = undPrice
+        # Model greeks follow the quotes they are computed from, so the
+        # snapshot is complete; TWS would otherwise hold the line for up to
+        # eleven seconds waiting for ticks that may never come
+        if cell.bid and cell.ask and self._client.requests.resolve(reqId, None):
+            self._client.client.cancelMktData(reqId)
+
+
+def _slice(
+    parameters: ChainParameters,
+    expirations: Optional[Sequence[str]],
+    min_strike: Optional[float],
+    max_strike: Optional[float],
+) -> Tuple[List[str], List[float]]:
+    """Expirations and strikes of a chain within the requested slice."""
+    if expirations:
+        wanted = set(expirations)
+        chosen = [expiry for expiry in parameters.expirations if expiry in wanted]
+    else:
+        today = date.today().strftime("%Y%m%d")
+        chosen = [expiry for expiry in parameters.expirations if expiry >= today][:DEFAULT_EXPIRATIONS]
+    strikes = parameters.strikes
+    low = 0 if min_strike is None else bisect.bisect_left(strikes, min_strike)
+    high = len(strikes) if max_strike is None else bisect.bisect_right(strikes, max_strike)
+    return chosen, list(strikes[low:high])
+
+
+def _option_contract(parameters: ChainParameters, expiry: str, strike: float, right: str) -> Contract:
+    contract = Contract()
+    contract.symbol = parameters.symbol
+    contract.secType = "OPT"
+    contract.lastTradeDateOrContractMonth = expiry
+    contract.strike = strike
+    contract.right = right
+    contract.exchange = "SMART"
+    contract.currency = "USD"
+    contract.multiplier = parameters.multiplier
+    contract.tradingClass = parameters.trading_class
+    return contract
@@ -0,0 +1,602 @@
+"""
+Order placement and live order state tracking.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from ibapi.contract import Contract
+from ibapi.order import Order
+
+from .errors import WARNING_ERROR_CODES
+from .models import BatchOrderResult, OrderFill, OrderState
+
+if TYPE_CHECKING:
+    from .client import TWSClient
+
+logger = logging.getLogger(__name__)
+
+# Status assigned locally between placeOrder and TWS's first orderStatus
+PENDING_SUBMIT = "PendingSubmit"
+PENDING_CANCEL = "PendingCancel"
+CANCELLED = "Cancelled"
+FILLED = "Filled"
+INACTIVE = "Inactive"
+
+# No further updates are expected for an order in one of these states
+TERMINAL_STATUSES = frozenset({FILLED, CANCELLED, "ApiCancelled", INACTIVE})
+
+ORDER_REJECTED_ERROR_CODE = 201
+ORDER_CANCELLED_ERROR_CODE = 202
+
+ORDER_TYPES = ("MKT", "LMT", "STP", "STP LMT")
+
+# ibapi's "unset" sentinel for prices
+UNSET_DOUBLE = 1.7976931348623157e308
+
+
+def build_order(
+    action: str,
+    quantity: float,
+    order_type: str = "MKT",
+    limit_price: Optional[float] = None,
+    stop_price: Optional[float] = None,
+    tif: str = "DAY",
+) -> Order:
+    """
+    Build an order.
+
+    Args:
+        action: BUY or SELL
+        quantity: Number of shares
+        order_type: One of ORDER_TYPES
+        limit_price: Limit price for LMT and STP LMT orders
+        stop_price: Trigger price for STP and STP LMT orders
+        tif: Time in force, e.g. DAY or GTC
+
+    Returns:
+        Order ready for placeOrder
+
+    Raises:
+        ValueError: If the fields do not describe a valid order
+    """
+    action = action.upper()
+    order_type = order_type.upper()
+    if action not in ("BUY", "SELL"):
+        raise ValueError(f"Invalid order action: {action}")
+    if order_type not in ORDER_TYPES:
+        raise ValueError(f"Unsupported order type: {order_type}")
+    if quantity <= 0:
+        raise ValueError("Order quantity must be positive")
+    if "LMT" in order_type and limit_price is None:
+        raise ValueError(f"{order_type} orders need a limit price")
+    if "STP" in order_type and stop_price is None:
+        raise ValueError(f"{order_type} orders need a stop price")
+
+    order = Order()
+    order.action = action
+    order.orderType = order_type
+    order.totalQuantity = quantity
+    order.tif = tif
+    if limit_price is not None:
+        order.lmtPrice = limit_price
+    if stop_price is not None:
+        order.auxPrice = stop_price
+    # Defaults of this ibapi release that newer TWS versions reject
+    order.eTradeOnly = False
+    order.firmQuoteOnly = False
+    return order
+
+
+def _price(value: float) -> Optional[float]:
+    return None if value == UNSET_DOUBLE else value
+
+
+class TrackedOrder:
+    """Mutable live state of one order, updated on the reader thread."""
+
+    __slots__ = (
+        "order_id", "perm_id", "client_id", "symbol", "action", "order_type",
+        "quantity", "limit_price", "stop_price", "tif", "status", "filled",
+        "remaining", "avg_fill_price", "last_fill_price", "why_held",
+        "error_code", "error_message", "submitted_at", "updated_at",
+        "fills", "_exec_ids",
+    )
+
+    def __init__(self, order_id: int, contract: Contract, order: Order, status: str = PENDING_SUBMIT):
+        self.order_id = order_id
+        self.perm_id = order.permId or None
+        self.client_id = order.clientId or None
+        self.symbol = contract.symbol
+        self.action = order.action
+        self.order_type = order.orderType
+        self.quantity = float(order.totalQuantity)
+        self.limit_price = _price(order.lmtPrice)
+        self.stop_price = _price(order.auxPrice)
+        self.tif = order.tif
+        self.status = status
+        self.filled = 0.0
+        self.remaining = self.quantity
+        self.avg_fill_price: Optional[float] = None
+        self.last_fill_price: Optional[float] = None
+        self.why_held = ""
+        self.error_code: Optional[int] = None
+        self.error_message: Optional[str] = None
+        self.submitted_at = time.time()
+        self.updated_at = self.submitted_at
+        self.fills: List[OrderFill] = []
+        self._exec_ids: Set[str] = set()
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def transition(self, status: str) -> bool:
+        """
+        Move to a new status.
+
+        Terminal states are final, so a late or duplicated message cannot
+        revive a filled or cancelled order.
+
+        Returns:
+            True if the status changed
+        """
+        if status == self.status or (self.done and status != FILLED):
+            return False
+        self.status = status
+        self.updated_at = time.time()
+        return True
+
+    def update_fill(self, filled: float, avg_price: float, last_price: Optional[float] = None) -> bool:
+        """Record fill progress; stale, smaller fill quantities are ignored."""
+        if filled < self.filled:
+            return False
+        if filled == self.filled and (filled == 0 or avg_price == self.avg_fill_price):
+            return False
+        self.filled = filled
+        self.remaining = max(self.quantity - filled, 0.0)
+        if filled > 0:
+            self.avg_fill_price = avg_price
+        if last_price:
+            self.last_fill_price = last_price
+        self.updated_at = time.time()
+        return True
+
+    def add_fill(self, fill: OrderFill) -> bool:
+        """Record an execution once, however often TWS reports it."""
+        if fill.exec_id in self._exec_ids:
+            return False
+        self._exec_ids.add(fill.exec_id)
+        self.fills.append(fill)
+        self.updated_at = time.time()
+        return True
+
+    def snapshot(self) -> OrderState:
+        return OrderState(
+            order_id=self.order_id,
+            perm_id=self.perm_id,
+            client_id=self.client_id,
+            symbol=self.symbol,
+            action=self.action,
+            order_type=self.order_type,
+            quantity=self.quantity,
+            limit_price=self.limit_price,
+            stop_price=self.stop_price,
+            tif=self.tif,
+            status=self.status,
+            filled=self.filled,
+            remaining=self.remaining,
+            avg_fill_price=self.avg_fill_price,
+            last_fill_price=self.last_fill_price,
+            why_held=self.why_held,
+            error_code=self.error_code,
+            error_message=self.error_message,
+            submitted_at=datetime.fromtimestamp(self.submitted_at),
+            updated_at=datetime.fromtimestamp(self.updated_at),
+            fills=list(self.fills),
+        )
+
+
+class OrderSubscription:
+    """
+    Ids of orders that changed since the consumer last drained.
+
+    Repeated updates of one order collapse into a single entry, so a slow
+    consumer reads each order's latest state instead of a backlog.
+    """
+
+    def __init__(self, manager: "OrderManager", notify: Optional[Callable[[], None]] = None):
+        self._manager = manager
+        self._notify = notify
+        self._lock = threading.Lock()
+        self._changed: Dict[int, None] = {}
+        self._closed = False
+
+    def put(self, order_id: int) -> None:
+        """Mark an order as changed; called on the reader thread."""
+        with self._lock:
+            was_empty = not self._changed
+            self._changed[order_id] = None
+        if was_empty and self._notify is not None:
+            self._notify()
+
+    def drain(self) -> List[int]:
+        """Take the changed order ids in the order they first changed."""
+        with self._lock:
+            order_ids = list(self._changed)
+            self._changed.clear()
+            return order_ids
+
+    def __len__(self) -> int:
+        return len(self._changed)
+
+    def close(self) -> None:
+        """Stop receiving updates."""
+        if not self._closed:
+            self._closed = True
+            self._manager.unsubscribe(self)
+
+    def __enter__(self) -> "OrderSubscription":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class OrderManager:
+    """
+    Places orders and tracks their live state.
+
+    Order ids are allocated locally from the nextValidId seed, so placing an
+    order is a single placeOrder write with no round trip. Orders are kept
+    in dicts keyed by order id and permId; orderStatus, openOrder and
+    execDetails callbacks update them in place and status lookups are O(1).
+    Completed orders beyond ``max_completed`` are evicted oldest first.
+    """
+
+    def __init__(self, client: "TWSClient", max_completed: int = 10_000):
+        """
+        Initialize order manager.
+
+        Args:
+            client: TWS client used to send orders
+            max_completed: Completed orders retained for lookups
+        """
+        self.max_completed = max_completed
+        self._client = client
+        self._lock = threading.Lock()
+        self._next_id: Optional[int] = None
+        self._orders: Dict[int, TrackedOrder] = {}
+        self._by_perm_id: Dict[int, TrackedOrder] = {}
+        self._completed: Deque[int] = deque()
+        self._subscribers: List[OrderSubscription] = []
+
+        wrapper = client.wrapper
+        wrapper.add_handler("nextValidId", self._on_next_valid_id)
+        wrapper.add_handler("orderStatus", self._on_order_status)
+        wrapper.add_handler("openOrder", self._on_open_order)
+        wrapper.add_handler("execDetails", self._on_exec_details)
+        wrapper.add_handler("error", self._on_error)
+
+    def next_order_id(self) -> int:
+        """
+        Allocate the next order id.
+
+        Raises:
+            ConnectionError: If TWS has not sent nextValidId yet
+        """
+        with self._lock:
+            if self._next_id is None:
+                raise ConnectionError("No order id from TWS yet; connect first")
+            order_id = self._next_id
+            self._next_id += 1
+            return order_id
+
+    def reserve_order_ids(self, count: int) -> List[int]:
+        """
+        Allocate a block of consecutive order ids at once.
+
+        Raises:
+            ConnectionError: If TWS has not sent nextValidId yet
+        """
+        with self._lock:
+            if self._next_id is None:
+                raise ConnectionError("No order id from TWS yet; connect first")
+            first = self._next_id
+            self._next_id += count
+        return list(range(first, first + count))
+
+    def place(self, contract: Contract, order: Order, order_id: Optional[int] = None) -> OrderState:
+        """
+        Submit an order.
+
+        Args:
+            contract: Contract to trade
+            order: Order to place, e.g. from build_order
+            order_id: Id from reserve_order_ids; allocated if omitted
+
+        Returns:
+            State of the order as submitted (PendingSubmit)
+
+        Raises:
+            ConnectionError: If the client is not connected
+        """
+        if not self._client.is_connected():
+            raise ConnectionError("Not connected to TWS")
+
+        if order_id is None:
+            order_id = self.next_order_id()
+        tracked = TrackedOrder(order_id, contract, order)
+        tracked.client_id = self._client.client_id
+        with self._lock:
+            self._orders[order_id] = tracked
+        logger.info(f"Placing order {order_id}: {order.action} {order.totalQuantity} {contract.symbol} {order.orderType}")
+        try:
+            self._client.client.placeOrder(order_id, contract, order)
+        except Exception:
+            with self._lock:
+                self._orders.pop(order_id, None)
+            raise
+        self._publish(tracked)
+        return tracked.snapshot()
+
+    def cancel(self, order_id: int) -> OrderState:
+        """
+        Request cancellation of a working order.
+
+        Args:
+            order_id: Order to cancel
+
+        Returns:
+            State of the order, PendingCancel unless it had already finished
+
+        Raises:
+            KeyError: If the order is unknown
+            ConnectionError: If the client is not connected
+        """
+        tracked = self._orders[order_id]
+        if tracked.done:
+            return tracked.snapshot()
+        if not self._client.is_connected():
+            raise ConnectionError("Not connected to TWS")
+
+        logger.info(f"Cancelling order {order_id}")
+        self._client.client.cancelOrder(order_id)
+        with self._lock:
+            changed = tracked.transition(PENDING_CANCEL)
+        if changed:
+            self._publish(tracked)
+        return tracked.snapshot()
+
+    def place_batch(self, orders: Sequence[Tuple[Contract, Order]]) -> Iterator[BatchOrderResult]:
+        """
+        Submit a basket of orders.
+
+        Ids for the whole basket are reserved up front and placeOrder
+        messages are queued back to back without waiting for replies; the
+        client's outbound scheduler paces them under IB's message rate
+        limit. Results are produced as each order is queued, so callers can
+        stream them.
+
+        Args:
+            orders: (contract, order) pairs in submission order
+
+        Returns:
+            Iterator of one result per order, in input order
+
+        Raises:
+            ConnectionError: If the client is not connected
+        """
+        if not self._client.is_connected():
+            raise ConnectionError("Not connected to TWS")
+        order_ids = self.reserve_order_ids(len(orders))
+        logger.info(f"Placing batch of {len(orders)} orders ({order_ids[0] if order_ids else '-'}...)")
+
+        def run() -> Iterator[BatchOrderResult]:
+            for index, ((contract, order), order_id) in enumerate(zip(orders, order_ids)):
+                try:
+                    state = self.place(contract, order, order_id)
+                except Exception as e:
+                    yield BatchOrderResult(index=index, order_id=order_id, success=False, error_message=str(e))
+                    continue
+                yield BatchOrderResult(index=index, order_id=order_id, success=True, order=state)
+
+        return run()
+
+    def cancel_all(self, global_cancel: bool = False) -> Iterator[BatchOrderResult]:
+        """
+        Cancel every working order.
+
+        Args:
+            global_cancel: Send one reqGlobalCancel, which also cancels
+                orders of other API clients and TWS itself, instead of a
+                cancelOrder per order tracked by this client
+
+        Returns:
+            Iterator of one result per working order
+
+        Raises:
+            ConnectionError: If the client is not connected
+        """
+        if not self._client.is_connected():
+            raise ConnectionError("Not connected to TWS")
+        with self._lock:
+            working = [t for t in self._orders.values() if not t.done]
+
+        if global_cancel:
+            logger.warning("Requesting global cancel of all open orders")
+            self._client.client.reqGlobalCancel()
+
+        def run() -> Iterator[BatchOrderResult]:
+            for index, tracked in enumerate(working):
+                try:
+                    if not global_cancel:
+                        self._client.client.cancelOrder(tracked.order_id)
+                    with self._lock:
+                        changed = tracked.transition(PENDING_CANCEL)
+                    if changed:
+                        self._publish(tracked)
+                except Exception as e:
+                    yield BatchOrderResult(
+                        index=index, order_id=tracked.order_id, success=False, error_message=str(e)
+                    )
+                    continue
+                yield BatchOrderResult(
+                    index=index, order_id=tracked.order_id, success=True, order=tracked.snapshot()
+                )
+
+        return run()
+
+    def get(self, order_id: int) -> Optional[OrderState]:
+        """Current state of an order, or None if unknown."""
+        tracked = self._orders.get(order_id)
+        return tracked.snapshot() if tracked is not None else None
+
+    def status(self, order_id: int) -> Optional[str]:
+        """Current status of an order without building a snapshot."""
+        tracked = self._orders.get(order_id)
+        return tracked.status if tracked is not None else None
+
+    def orders(self, open_only: bool = False) -> List[OrderState]:
+        """
+        States of tracked orders in submission order.
+
+        Args:
+            open_only: Only include orders that are still working
+        """
+        with self._lock:
+            tracked = list(self._orders.values())
+        return [t.snapshot() for t in tracked if not (open_only and t.done)]
+
+    def reconcile(self) -> int:
+        """
+        Ask TWS to re-send this client's open orders, e.g. after a reconnect.
+
+        openOrder and orderStatus replies bring tracked orders up to date.
+
+        Returns:
+            Number of orders that were working before the request
+        """
+        with self._lock:
+            working = sum(1 for t in self._orders.values() if not t.done)
+        if self._client.is_connected():
+            self._client.client.reqOpenOrders()
+        return working
+
+    def subscribe(self, notify: Optional[Callable[[], None]] = None) -> OrderSubscription:
+        """
+        Receive the ids of orders as they change.
+
+        Args:
+            notify: Called on the reader thread when updates become available
+
+        Returns:
+            Subscription to drain; close it when done
+        """
+        subscription = OrderSubscription(self, notify)
+        with self._lock:
+            self._subscribers = self._subscribers + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: OrderSubscription) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+
+    def _publish(self, tracked: TrackedOrder) -> None:
+        for subscription in self._subscribers:
+            subscription.put(tracked.order_id)
+
+    def _track_completion(self, tracked: TrackedOrder) -> None:
+        """Queue a finished order for eviction; called with the lock held."""
+        self._completed.append(tracked.order_id)
+        while len(self._completed) > self.max_completed:
+            evicted = self._orders.pop(self._completed.popleft(), None)
+            if evicted is not None and evicted.perm_id:
+                self._by_perm_id.pop(evicted.perm_id, None)
+
+    def _set_perm_id(self, tracked: TrackedOrder, perm_id: int) -> None:
+        if perm_id and tracked.perm_id != perm_id:
+            tracked.perm_id = perm_id
+            self._by_perm_id[perm_id] = tracked
+
+    def _on_next_valid_id(self, orderId: int) -> None:
+        with self._lock:
+            # Never hand out an id twice, even if TWS re-sends an older seed
+            if self._next_id is None or orderId > self._next_id:
+                self._next_id = orderId
+
+    def _on_order_status(
+        self, orderId: int, status: str, filled: float, remaining: float, avgFillPrice: float,
+        permId: int, parentId: int, lastFillPrice: float, clientId: int, whyHeld: str, mktCapPrice: float,
+    ) -> None:
+        with self._lock:
+            tracked = self._orders.get(orderId) or self._by_perm_id.get(permId)
+            if tracked is None:
+                logger.debug(f"orderStatus for untracked order {orderId}")
+                return
+            was_done = tracked.done
+            self._set_perm_id(tracked, permId)
+            changed = tracked.update_fill(float(filled), avgFillPrice, lastFillPrice)
+            changed = tracked.transition(status) or changed
+            if whyHeld != tracked.why_held:
+                tracked.why_held = whyHeld
+                changed = True
+            if tracked.done and not was_done:
+                self._track_completion(tracked)
+        if changed:
+            self._publish(tracked)
+
+    def _on_open_order(self, orderId: int, contract: Contract, order: Order, orderState: Any) -> None:
+        with self._lock:
+            tracked = self._orders.get(orderId) or self._by_perm_id.get(order.permId)
+            created = tracked is None
+            if created:
+                # Placed by an earlier session or in TWS itself
+                tracked = TrackedOrder(orderId, contract, order, status=orderState.status)
+                self._orders[orderId] = tracked
+            was_done = tracked.done and not created
+            self._set_perm_id(tracked, order.permId)
+            changed = tracked.transition(orderState.status) or created
+            if tracked.done and not was_done:
+                self._track_completion(tracked)
+        if changed:
+            self._publish(tracked)
+
+    def _on_exec_details(self, reqId: int, contract: Contract, execution: Any) -> None:
+        with self._lock:
+            tracked = self._orders.get(execution.orderId) or self._by_perm_id.get(execution.permId)
+            if tracked is None:
+                return
+            fill = OrderFill(
+                exec_id=execution.execId,
+                time=execution.time,
+                shares=float(execution.shares),
+                price=execution.price,
+            )
+            changed = tracked.add_fill(fill)
+            if changed:
+                # execDetails may arrive before the matching orderStatus
+                tracked.update_fill(float(execution.cumQty), execution.avgPrice, execution.price)
+        if changed:
+            self._publish(tracked)
+
+    def _on_error(self, reqId: int, errorCode: int, errorString: str) -> None:
+        tracked = self._orders.get(reqId)
+        if tracked is None or errorCode in WARNING_ERROR_CODES:
+            return
+        with self._lock:
+            was_done = tracked.done
+            tracked.error_code = errorCode
+            tracked.error_message = errorString
+            tracked.updated_at = time.time()
+            if errorCode == ORDER_REJECTED_ERROR_CODE:
+                tracked.transition(INACTIVE)
+            elif errorCode == ORDER_CANCELLED_ERROR_CODE:
+                tracked.transition(CANCELLED)
+            if tracked.done and not was_done:
+                self._track_completion(tracked)
+        self._publish(tracked)
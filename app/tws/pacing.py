@@ -0,0 +1,282 @@
+"""
+Outbound message pacing within IB's API message rate limit.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ibapi import comm
+from ibapi.client import EClient
+from ibapi.message import OUT
+
+logger = logging.getLogger(__name__)
+
+# TWS disconnects API clients that send more than 50 messages per second
+MAX_MESSAGES_PER_SECOND = 50
+
+
+class MessagePacer:
+    """
+    Token bucket spacing outbound messages to TWS.
+
+    Up to ``burst`` messages go out back to back; after that messages are
+    released at ``max_per_second - burst`` per second, so no one-second
+    window ever holds more than ``max_per_second`` messages. Reservations
+    queue in order: each caller is told how long to wait for its own slot.
+    """
+
+    def __init__(
+        self,
+        max_per_second: float = MAX_MESSAGES_PER_SECOND,
+        burst: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize message pacer.
+
+        Args:
+            max_per_second: Most messages allowed in any one-second window
+            burst: Messages that may be sent without spacing
+            clock: Monotonic clock, for tests
+            sleep: Sleep function, for tests
+        """
+        if not 0 < burst < max_per_second:
+            raise ValueError("burst must be positive and below max_per_second")
+        self.rate = max_per_second - burst
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def reserve(self, count: int = 1) -> float:
+        """
+        Reserve send slots for messages.
+
+        Args:
+            count: Number of messages to send together
+
+        Returns:
+            Seconds to wait before sending them
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Tokens go negative while reservations are queued
+            self._tokens -= count
+            return max(0.0, -self._tokens / self.rate)
+
+    def wait(self, count: int = 1) -> None:
+        """Block until messages may be sent."""
+        delay = self.reserve(count)
+        if delay > 0:
+            logger.debug(f"Pacing {count} outbound messages for {delay * 1000:.0f} ms")
+            self._sleep(delay)
+
+
+# Priority classes, most urgent first
+PRIORITY_CANCEL = 0
+PRIORITY_ORDER = 1
+PRIORITY_MARKET_DATA = 2
+PRIORITY_HISTORICAL = 3
+
+# Session control rides with cancels; unlisted requests rank with market data
+MESSAGE_PRIORITIES: Dict[int, int] = {
+    OUT.CANCEL_ORDER: PRIORITY_CANCEL,
+    OUT.REQ_GLOBAL_CANCEL: PRIORITY_CANCEL,
+    OUT.START_API: PRIORITY_CANCEL,
+    OUT.REQ_IDS: PRIORITY_CANCEL,
+    OUT.REQ_CURRENT_TIME: PRIORITY_CANCEL,
+    OUT.PLACE_ORDER: PRIORITY_ORDER,
+    OUT.REQ_OPEN_ORDERS: PRIORITY_ORDER,
+    OUT.REQ_ALL_OPEN_ORDERS: PRIORITY_ORDER,
+    OUT.REQ_AUTO_OPEN_ORDERS: PRIORITY_ORDER,
+    OUT.REQ_EXECUTIONS: PRIORITY_ORDER,
+    OUT.EXERCISE_OPTIONS: PRIORITY_ORDER,
+    OUT.REQ_HISTORICAL_DATA: PRIORITY_HISTORICAL,
+    OUT.CANCEL_HISTORICAL_DATA: PRIORITY_HISTORICAL,
+    OUT.REQ_HEAD_TIMESTAMP: PRIORITY_HISTORICAL,
+    OUT.CANCEL_HEAD_TIMESTAMP: PRIORITY_HISTORICAL,
+    OUT.REQ_HISTOGRAM_DATA: PRIORITY_HISTORICAL,
+    OUT.CANCEL_HISTOGRAM_DATA: PRIORITY_HISTORICAL,
+    OUT.REQ_HISTORICAL_TICKS: PRIORITY_HISTORICAL,
+    OUT.REQ_HISTORICAL_NEWS: PRIORITY_HISTORICAL,
+    OUT.REQ_FUNDAMENTAL_DATA: PRIORITY_HISTORICAL,
+    OUT.CANCEL_FUNDAMENTAL_DATA: PRIORITY_HISTORICAL,
+}
+
+
+def message_id(msg: str) -> int:
+    """Outgoing message id from an encoded EClient message."""
+    return int(msg[:msg.index("\0")])
+
+
+def _order_id(msg: str, msg_id: int) -> int:
+    # placeOrder: id, orderId, ...; cancelOrder: id, version, orderId
+    fields = msg.split("\0", 3)
+    return int(fields[1] if msg_id == OUT.PLACE_ORDER else fields[2])
+
+
+class OutboundScheduler:
+    """
+    Priority queue of outbound TWS messages drained by one writer thread.
+
+    Requests from any thread are queued instead of written to the socket,
+    and the writer sends them most urgent first (cancels, then orders, then
+    market data, then historical requests), FIFO within a class, spaced by
+    a MessagePacer so bursts are smoothed below IB's rate limit. The pacer
+    slot is taken before the next message is picked, so a cancel queued
+    while the writer waits still goes out first.
+
+    A cancel never overtakes the order it refers to: cancelOrder for an
+    order whose placeOrder is still queued, and reqGlobalCancel while any
+    placeOrder is queued, are sent in order behind it.
+    """
+
+    def __init__(self, write: Callable[[str], None], pacer: Optional[MessagePacer] = None):
+        """
+        Initialize outbound scheduler.
+
+        Args:
+            write: Sends one encoded message; called on the writer thread
+            pacer: Rate limit for all outbound messages
+        """
+        self.pacer = pacer if pacer is not None else MessagePacer()
+        self.sent = 0
+        self.dropped = 0
+        self._write = write
+        self._condition = threading.Condition()
+        self._queue: List[Tuple[int, int, int, Optional[int], str]] = []
+        self._sequence = 0
+        self._queued_orders: Dict[int, int] = {}
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def priority(self, msg_id: int, order_id: Optional[int] = None) -> int:
+        """Priority class of a message; called with the queue locked."""
+        priority = MESSAGE_PRIORITIES.get(msg_id, PRIORITY_MARKET_DATA)
+        if msg_id == OUT.CANCEL_ORDER and order_id in self._queued_orders:
+            return PRIORITY_ORDER
+        if msg_id == OUT.REQ_GLOBAL_CANCEL and self._queued_orders:
+            return PRIORITY_ORDER
+        return priority
+
+    def submit(self, msg: str) -> None:
+        """Queue an encoded message for the writer thread."""
+        msg_id = message_id(msg)
+        order_id = _order_id(msg, msg_id) if msg_id in (OUT.PLACE_ORDER, OUT.CANCEL_ORDER) else None
+        with self._condition:
+            priority = self.priority(msg_id, order_id)
+            if msg_id == OUT.PLACE_ORDER:
+                self._queued_orders[order_id] = self._queued_orders.get(order_id, 0) + 1
+            heapq.heappush(self._queue, (priority, self._sequence, msg_id, order_id, msg))
+            self._sequence += 1
+            self._condition.notify()
+            if self._thread is None or not self._thread.is_alive():
+                self._start()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def queued(self) -> Dict[int, int]:
+        """Number of queued messages per priority class."""
+        with self._condition:
+            counts: Dict[int, int] = {}
+            for entry in self._queue:
+                counts[entry[0]] = counts.get(entry[0], 0) + 1
+            return counts
+
+    def clear(self) -> int:
+        """Drop every queued message, e.g. when the connection closes."""
+        with self._condition:
+            dropped = len(self._queue)
+            self._queue.clear()
+            self._queued_orders.clear()
+            self.dropped += dropped
+        if dropped:
+            logger.warning(f"Dropped {dropped} queued outbound messages")
+        return dropped
+
+    def stop(self) -> None:
+        """Stop the writer thread and drop queued messages."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2)
+        self.clear()
+
+    def _start(self) -> None:
+        """Start the writer thread; called with the queue locked."""
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="tws-writer", daemon=True)
+        self._thread.start()
+
+    def _pop(self) -> Tuple[int, int, int, Optional[int], str]:
+        """Take the most urgent message; called with the queue locked."""
+        entry = heapq.heappop(self._queue)
+        order_id = entry[3]
+        if entry[2] == OUT.PLACE_ORDER:
+            remaining = self._queued_orders.get(order_id, 1) - 1
+            if remaining:
+                self._queued_orders[order_id] = remaining
+            else:
+                self._queued_orders.pop(order_id, None)
+        return entry
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._stopping)
+                if self._stopping:
+                    return
+
+            self.pacer.wait()
+
+            with self._condition:
+                if self._stopping:
+                    return
+                if not self._queue:
+                    continue
+                entry = self._pop()
+
+            try:
+                self._write(entry[4])
+                self.sent += 1
+            except Exception as e:
+                self.dropped += 1
+                logger.warning(f"Could not send message {entry[2]}: {e}")
+
+
+class PacedEClient(EClient):
+    """
+    EClient whose requests go through an OutboundScheduler.
+
+    Every request method ends in sendMsg, which here queues the message
+    for the scheduler's writer thread instead of writing to the socket on
+    the calling thread. The connection handshake is written directly.
+    """
+
+    def __init__(self, wrapper: Any, pacer: Optional[MessagePacer] = None):
+        EClient.__init__(self, wrapper)
+        self.scheduler = OutboundScheduler(self._write, pacer)
+
+    def sendMsg(self, msg: str) -> None:
+        self.scheduler.submit(msg)
+
+    def _write(self, msg: str) -> None:
+        conn = self.conn
+        if conn is None or not conn.isConnected():
+            raise ConnectionError("Not connected to TWS")
+        conn.sendMsg(comm.make_msg(msg))
+
+    def disconnect(self) -> None:
+        self.scheduler.stop()
+        EClient.disconnect(self)
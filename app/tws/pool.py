@@ -0,0 +1,292 @@
+"""
+Pool of TWS connections with per-workload routing.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Set
+
+from .async_client import AsyncTWSClient
+from .bar_aggregator import DEFAULT_BAR_SIZES
+from .bar_archive import BarArchive
+from .client import TWSClient
+from .errors import CLIENT_ID_IN_USE
+from .models import PoolMemberStatus, PoolStats
+
+logger = logging.getLogger(__name__)
+
+MARKET_DATA = "market_data"
+HISTORICAL = "historical"
+ORDERS = "orders"
+ACCOUNT = "account"
+WORKLOADS = (MARKET_DATA, HISTORICAL, ORDERS, ACCOUNT)
+
+# One dedicated connection per workload class
+DEFAULT_LAYOUT = {MARKET_DATA: 1, HISTORICAL: 1, ORDERS: 1, ACCOUNT: 1}
+
+
+class ClientIdAllocator:
+    """Hands out client ids that no other pool member is using."""
+
+    def __init__(self, first_id: int = 1):
+        self._lock = threading.Lock()
+        self._next_id = first_id
+        self._in_use: Set[int] = set()
+
+    def allocate(self) -> int:
+        """Allocate the lowest unused client id at or above the next id."""
+        with self._lock:
+            while self._next_id in self._in_use:
+                self._next_id += 1
+            client_id = self._next_id
+            self._in_use.add(client_id)
+            self._next_id += 1
+            return client_id
+
+
+class PoolMember:
+    """One pooled connection and its health."""
+
+    def __init__(self, client: TWSClient, workload: str):
+        self.client = client
+        self.async_client = AsyncTWSClient(client)
+        self.workload = workload
+        self.healthy = False
+        self.health_failures = 0
+        self.health_rtt: Optional[float] = None
+        self.routed = 0
+
+    def is_connected(self) -> bool:
+        return self.client.is_connected()
+
+    def load(self) -> int:
+        """Requests waiting for a reply on this connection."""
+        return len(self.client.requests)
+
+    def status(self) -> PoolMemberStatus:
+        return PoolMemberStatus(
+            client_id=self.client.client_id,
+            workload=self.workload,
+            connected=self.is_connected(),
+            healthy=self.healthy,
+            pending_requests=self.load(),
+            routed=self.routed,
+            health_failures=self.health_failures,
+            health_rtt_ms=self.health_rtt * 1000 if self.health_rtt is not None else None,
+        )
+
+
+class TWSClientPool:
+    """
+    Several TWS connections with distinct client ids, split by workload.
+
+    Each workload class (market data, historical, orders, account) gets its
+    own connections, so a heavy historical backfill queues behind its own
+    socket and pacing instead of delaying order traffic. Members are
+    health-checked with reqCurrentTime; when no healthy member of a class
+    is connected, requests fall back to any healthy member.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 7500,
+        layout: Optional[Dict[str, int]] = None,
+        first_client_id: int = 1,
+        connect_timeout: float = 5.0,
+        health_interval: float = 10.0,
+        health_timeout: float = 2.0,
+        max_health_failures: int = 3,
+        auto_reconnect: bool = True,
+        max_client_id_retries: int = 8,
+        contract_db: Optional[str] = None,
+        bar_sizes: Sequence[str] = DEFAULT_BAR_SIZES,
+        archive: Optional[BarArchive] = None,
+    ):
+        """
+        Initialize client pool.
+
+        Args:
+            host: TWS host address
+            port: TWS port number
+            layout: Number of connections per workload class
+            first_client_id: Lowest client id to allocate
+            connect_timeout: Handshake deadline in seconds for each member
+            health_interval: Seconds between health checks; 0 disables them
+            health_timeout: Deadline in seconds for a health check reply
+            max_health_failures: Consecutive failed checks before a member is unhealthy
+            auto_reconnect: Reconnect members whose connection drops
+            max_client_id_retries: New client ids to try when TWS reports one as taken
+            contract_db: SQLite file caching resolved contracts, shared by every member
+            bar_sizes: Live bar series each member builds from its streamed trades
+            archive: Bar archive shared by every member; defaults to DEFAULT_ARCHIVE_DIR
+        """
+        layout = DEFAULT_LAYOUT if layout is None else layout
+        unknown = set(layout) - set(WORKLOADS)
+        if unknown:
+            raise ValueError(f"Unknown workload classes: {', '.join(sorted(unknown))}")
+
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.max_health_failures = max_health_failures
+        self.max_client_id_retries = max_client_id_retries
+        self.fallbacks = 0
+        self.client_ids = ClientIdAllocator(first_client_id)
+        # One archive for all members, so each bar file has a single writer lock
+        self.archive = archive if archive is not None else BarArchive()
+        self.members: List[PoolMember] = [
+            PoolMember(
+                TWSClient(
+                    host, port, self.client_ids.allocate(),
+                    connect_timeout=connect_timeout, auto_reconnect=auto_reconnect,
+                    contract_db=contract_db, bar_sizes=bar_sizes, archive=self.archive,
+                ),
+                workload,
+            )
+            for workload in WORKLOADS
+            for _ in range(layout.get(workload, 0))
+        ]
+        if not self.members:
+            raise ValueError("A client pool needs at least one connection")
+
+        self._stop_health = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def _connect_member(self, member: PoolMember, timeout: Optional[float]) -> bool:
+        for _ in range(self.max_client_id_retries + 1):
+            if member.client.connect(timeout):
+                member.healthy = True
+                member.health_failures = 0
+                return True
+            if member.client.wrapper.error_code != CLIENT_ID_IN_USE:
+                return False
+            # Another application holds this id; keep it reserved and move on
+            taken = member.client.client_id
+            member.client.client_id = self.client_ids.allocate()
+            logger.warning(f"Client ID {taken} is in use, retrying with {member.client.client_id}")
+        return False
+
+    def connect(self, timeout: Optional[float] = None) -> bool:
+        """
+        Connect every member concurrently and start health checks.
+
+        Args:
+            timeout: Handshake deadline for each member; defaults to connect_timeout
+
+        Returns:
+            True if every member connected
+        """
+        pending = [member for member in self.members if not member.is_connected()]
+        if pending:
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                results = list(executor.map(lambda m: self._connect_member(m, timeout), pending))
+            logger.info(f"Connected {sum(results)} of {len(pending)} pool members")
+        self._start_health_checks()
+        return self.is_connected()
+
+    def disconnect(self) -> None:
+        """Stop health checks and disconnect every member."""
+        self._stop_health.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=self.health_timeout + 1)
+            self._health_thread = None
+        with ThreadPoolExecutor(max_workers=len(self.members)) as executor:
+            list(executor.map(lambda m: m.client.disconnect(), self.members))
+        for member in self.members:
+            member.healthy = False
+
+    def is_connected(self) -> bool:
+        """Check whether every member is connected."""
+        return all(member.is_connected() for member in self.members)
+
+    def member(self, workload: str) -> PoolMember:
+        """
+        Pick the member that should serve a workload.
+
+        Prefers healthy members of the workload's own class with the fewest
+        pending requests, then a healthy member of another class, then any
+        connected member of the class.
+
+        Args:
+            workload: Workload class, e.g. ORDERS
+
+        Returns:
+            The chosen member; not necessarily connected if none are
+        """
+        if workload not in WORKLOADS:
+            raise ValueError(f"Unknown workload class: {workload}")
+        own = [m for m in self.members if m.workload == workload]
+        candidates = [m for m in own if m.is_connected() and m.healthy]
+        if not candidates:
+            candidates = [m for m in self.members if m.is_connected() and m.healthy]
+            if candidates:
+                self.fallbacks += 1
+                logger.warning(f"No healthy connection for {workload} traffic, falling back to another class")
+            else:
+                candidates = [m for m in own if m.is_connected()] or own or self.members
+        chosen = min(candidates, key=PoolMember.load)
+        chosen.routed += 1
+        return chosen
+
+    def client(self, workload: str) -> TWSClient:
+        """TWS client that should serve a workload class."""
+        return self.member(workload).client
+
+    def async_client(self, workload: str) -> AsyncTWSClient:
+        """Awaitable TWS client that should serve a workload class."""
+        return self.member(workload).async_client
+
+    def check_health(self) -> None:
+        """Probe every connected member with reqCurrentTime."""
+        probes = []
+        for member in self.members:
+            if not member.is_connected():
+                member.healthy = False
+                continue
+            probes.append((member, time.perf_counter(), member.client.submit_current_time()))
+
+        for member, started, future in probes:
+            try:
+                future.result(self.health_timeout)
+            except Exception as e:
+                member.health_failures += 1
+                member.healthy = member.health_failures < self.max_health_failures
+                logger.warning(
+                    f"Health check failed for client {member.client.client_id} "
+                    f"({member.health_failures} in a row): {e!r}"
+                )
+                continue
+            member.health_rtt = time.perf_counter() - started
+            member.health_failures = 0
+            member.healthy = True
+
+    def _start_health_checks(self) -> None:
+        if self.health_interval <= 0 or (self._health_thread and self._health_thread.is_alive()):
+            return
+        self._stop_health.clear()
+
+        def run() -> None:
+            while not self._stop_health.wait(self.health_interval):
+                try:
+                    self.check_health()
+                except Exception:
+                    logger.exception("Error checking pool health")
+
+        self._health_thread = threading.Thread(target=run, name="tws-pool-health", daemon=True)
+        self._health_thread.start()
+
+    def stats(self) -> PoolStats:
+        """Connection, health and routing counters for every member."""
+        members = [member.status() for member in self.members]
+        return PoolStats(
+            size=len(members),
+            connected=sum(m.connected for m in members),
+            healthy=sum(m.healthy for m in members),
+            fallbacks=self.fallbacks,
+            members=members,
+        )
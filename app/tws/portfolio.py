@@ -0,0 +1,487 @@
+"""
+Account, position and P&L state kept current by TWS subscriptions.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from ibapi.contract import Contract
+
+from .models import AccountPnL, AccountState, AccountValue, PortfolioChanges, PositionState
+from .orders import UNSET_DOUBLE
+
+if TYPE_CHECKING:
+    from .client import TWSClient
+
+logger = logging.getLogger(__name__)
+
+PositionKey = Tuple[str, int]
+
+# Change keys published to subscribers
+VALUE = "value"
+POSITION = "position"
+PNL = "pnl"
+
+
+def _value(value: Optional[float]) -> Optional[float]:
+    # TWS sends UNSET_DOUBLE for P&L it has not computed yet
+    return None if value is None or value == UNSET_DOUBLE else value
+
+
+class TrackedPosition:
+    """Mutable live state of one position, updated on the reader thread."""
+
+    __slots__ = (
+        "account", "con_id", "symbol", "sec_type", "currency", "exchange",
+        "position", "avg_cost", "market_price", "market_value",
+        "unrealized_pnl", "realized_pnl", "daily_pnl", "updated_at",
+    )
+
+    def __init__(self, account: str, contract: Contract):
+        self.account = account
+        self.con_id = contract.conId
+        self.symbol = contract.symbol
+        self.sec_type = contract.secType
+        self.currency = contract.currency
+        self.exchange = contract.exchange or contract.primaryExchange or ""
+        self.position = 0.0
+        self.avg_cost: Optional[float] = None
+        self.market_price: Optional[float] = None
+        self.market_value: Optional[float] = None
+        self.unrealized_pnl: Optional[float] = None
+        self.realized_pnl: Optional[float] = None
+        self.daily_pnl: Optional[float] = None
+        self.updated_at = time.time()
+
+    def update(self, **fields: Optional[float]) -> bool:
+        """
+        Apply changed fields; unset values leave the current value alone.
+
+        Returns:
+            True if any field changed
+        """
+        changed = False
+        for name, value in fields.items():
+            value = _value(value)
+            if value is not None and getattr(self, name) != value:
+                setattr(self, name, value)
+                changed = True
+        if changed:
+            self.updated_at = time.time()
+        return changed
+
+    def snapshot(self) -> PositionState:
+        return PositionState(
+            account=self.account,
+            con_id=self.con_id,
+            symbol=self.symbol,
+            sec_type=self.sec_type,
+            currency=self.currency,
+            exchange=self.exchange,
+            position=self.position,
+            avg_cost=self.avg_cost,
+            market_price=self.market_price,
+            market_value=self.market_value,
+            unrealized_pnl=self.unrealized_pnl,
+            realized_pnl=self.realized_pnl,
+            daily_pnl=self.daily_pnl,
+            updated_at=datetime.fromtimestamp(self.updated_at),
+        )
+
+
+class PortfolioSubscription:
+    """
+    Keys of account entries that changed since the consumer last drained.
+
+    Repeated updates of one entry collapse into a single key, so a slow
+    consumer reads each entry's latest state instead of a backlog.
+    """
+
+    def __init__(self, manager: "PortfolioManager", notify: Optional[Callable[[], None]] = None):
+        self._manager = manager
+        self._notify = notify
+        self._lock = threading.Lock()
+        self._changed: Dict[Hashable, None] = {}
+        self._closed = False
+
+    def put(self, key: Hashable) -> None:
+        """Mark an entry as changed; called on the reader thread."""
+        with self._lock:
+            was_empty = not self._changed
+            self._changed[key] = None
+        if was_empty and self._notify is not None:
+            self._notify()
+
+    def drain(self) -> List[Hashable]:
+        """Take the changed keys in the order they first changed."""
+        with self._lock:
+            keys = list(self._changed)
+            self._changed.clear()
+            return keys
+
+    def __len__(self) -> int:
+        return len(self._changed)
+
+    def close(self) -> None:
+        """Stop receiving updates."""
+        if not self._closed:
+            self._closed = True
+            self._manager.unsubscribe(self)
+
+    def __enter__(self) -> "PortfolioSubscription":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class PortfolioManager:
+    """
+    In-memory account model fed by account, position and P&L subscriptions.
+
+    start() sends reqAccountUpdates, reqPositions and reqPnL once, plus a
+    reqPnLSingle per open position. Their callbacks apply each delta to
+    dicts keyed by account value and (account, conId), so reads never reach
+    TWS. Snapshots are rebuilt only after something changed, and
+    subscribers receive the keys of changed entries to send as diffs.
+    """
+
+    def __init__(self, client: "TWSClient", account: Optional[str] = None):
+        """
+        Initialize portfolio manager.
+
+        Args:
+            client: TWS client used to subscribe
+            account: Account to follow; defaults to the first managed account
+        """
+        self.account = account
+        self._client = client
+        self._lock = threading.Lock()
+        self._wanted = False
+        self._subscribed = False
+        self._values: Dict[Tuple[str, str], str] = {}
+        self._account_time: Optional[str] = None
+        self._ready = False
+        self._pnl: Optional[AccountPnL] = None
+        self._pnl_req_id: Optional[int] = None
+        self._positions: Dict[PositionKey, TrackedPosition] = {}
+        self._pnl_single: Dict[int, PositionKey] = {}
+        self._pnl_single_ids: Dict[PositionKey, int] = {}
+        # Positions reported since the last reqPositions; the rest are stale
+        self._seen: Optional[Set[PositionKey]] = None
+        self._subscribers: List[PortfolioSubscription] = []
+        self._account_snapshot: Optional[AccountState] = None
+        self._positions_snapshot: Optional[List[PositionState]] = None
+
+        wrapper = client.wrapper
+        wrapper.add_handler("updateAccountValue", self._on_account_value)
+        wrapper.add_handler("updateAccountTime", self._on_account_time)
+        wrapper.add_handler("accountDownloadEnd", self._on_account_download_end)
+        wrapper.add_handler("updatePortfolio", self._on_update_portfolio)
+        wrapper.add_handler("position", self._on_position)
+        wrapper.add_handler("positionEnd", self._on_position_end)
+        wrapper.add_handler("pnl", self._on_pnl)
+        wrapper.add_handler("pnlSingle", self._on_pnl_single)
+        wrapper.add_handler("connectionClosed", self._on_connection_closed)
+
+    @property
+    def ready(self) -> bool:
+        """Whether the first account download has completed."""
+        return self._ready
+
+    def start(self, account: Optional[str] = None) -> bool:
+        """
+        Subscribe to account, position and P&L updates if not already.
+
+        Args:
+            account: Account to follow; overrides the configured account
+
+        Returns:
+            True if the subscriptions are active
+        """
+        with self._lock:
+            if account is not None:
+                self.account = account
+            self._wanted = True
+            if self._subscribed:
+                return True
+            if not self._client.is_connected():
+                return False
+            accounts = self._client.wrapper.accounts
+            if self.account is None and accounts:
+                self.account = accounts[0]
+            if not self.account:
+                logger.warning("No managed account reported by TWS; cannot subscribe to account updates")
+                return False
+            self._subscribed = True
+            self._pnl_single.clear()
+            self._pnl_single_ids.clear()
+            self._seen = set()
+            self._pnl_req_id = self._client.requests.next_id()
+            account, pnl_req_id = self.account, self._pnl_req_id
+
+        logger.info(f"Subscribing to account updates, positions and P&L for {account}")
+        client = self._client.client
+        client.reqAccountUpdates(True, account)
+        client.reqPositions()
+        client.reqPnL(pnl_req_id, account, "")
+        return True
+
+    def resubscribe(self) -> bool:
+        """Re-send the subscriptions after a reconnect, if they were started."""
+        with self._lock:
+            wanted = self._wanted
+            self._subscribed = False
+        return self.start() if wanted else False
+
+    def stop(self) -> None:
+        """Cancel the subscriptions; cached state is kept."""
+        with self._lock:
+            subscribed = self._subscribed
+            self._wanted = False
+            self._subscribed = False
+            pnl_req_id = self._pnl_req_id
+            single_ids = list(self._pnl_single)
+            self._pnl_single.clear()
+            self._pnl_single_ids.clear()
+            self._pnl_req_id = None
+        if not subscribed or not self._client.is_connected():
+            return
+        client = self._client.client
+        client.reqAccountUpdates(False, self.account)
+        client.cancelPositions()
+        if pnl_req_id is not None:
+            client.cancelPnL(pnl_req_id)
+        for req_id in single_ids:
+            client.cancelPnLSingle(req_id)
+
+    def account_state(self) -> AccountState:
+        """Cached account values and P&L; rebuilt only after a change."""
+        with self._lock:
+            if self._account_snapshot is None:
+                self._account_snapshot = AccountState(
+                    account=self.account or "",
+                    ready=self._ready,
+                    account_time=self._account_time,
+                    values=[
+                        AccountValue(account=self.account or "", key=key, value=value, currency=currency)
+                        for (key, currency), value in self._values.items()
+                    ],
+                    pnl=self._pnl,
+                )
+            return self._account_snapshot
+
+    def positions(self) -> List[PositionState]:
+        """Cached open positions; rebuilt only after a change."""
+        with self._lock:
+            if self._positions_snapshot is None:
+                self._positions_snapshot = [
+                    tracked.snapshot() for tracked in self._positions.values() if tracked.position != 0
+                ]
+            return self._positions_snapshot
+
+    def position(self, con_id: int, account: Optional[str] = None) -> Optional[PositionState]:
+        """Live state of one position, including a closed one."""
+        tracked = self._positions.get((account or self.account or "", con_id))
+        return tracked.snapshot() if tracked is not None else None
+
+    def changes(self, keys: List[Hashable]) -> PortfolioChanges:
+        """
+        Current state of the entries named by change keys.
+
+        Args:
+            keys: Keys drained from a PortfolioSubscription
+
+        Returns:
+            Changed account values, positions (position 0 when closed) and P&L
+        """
+        changes = PortfolioChanges()
+        with self._lock:
+            for key in keys:
+                if key[0] == VALUE:
+                    value = self._values.get((key[2], key[3]))
+                    if value is not None:
+                        changes.values.append(
+                            AccountValue(account=key[1], key=key[2], value=value, currency=key[3])
+                        )
+                elif key[0] == POSITION:
+                    tracked = self._positions.get((key[1], key[2]))
+                    if tracked is not None:
+                        changes.positions.append(tracked.snapshot())
+                elif key[0] == PNL and self._pnl is not None:
+                    changes.pnl.append(self._pnl)
+        return changes
+
+    def subscribe(self, notify: Optional[Callable[[], None]] = None) -> PortfolioSubscription:
+        """
+        Receive the keys of account entries as they change.
+
+        Args:
+            notify: Called on the reader thread when updates become available
+
+        Returns:
+            Subscription to drain; close it when done
+        """
+        subscription = PortfolioSubscription(self, notify)
+        with self._lock:
+            self._subscribers = self._subscribers + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: PortfolioSubscription) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+
+    def _publish(self, key: Hashable) -> None:
+        for subscription in self._subscribers:
+            subscription.put(key)
+
+    def _follows(self, account: str) -> bool:
+        return self._subscribed and account == self.account
+
+    def _on_account_value(self, key: str, val: str, currency: str, accountName: str) -> None:
+        with self._lock:
+            if not self._follows(accountName) or self._values.get((key, currency)) == val:
+                return
+            self._values[(key, currency)] = val
+            self._account_snapshot = None
+        self._publish((VALUE, accountName, key, currency))
+
+    def _on_account_time(self, timeStamp: str) -> None:
+        with self._lock:
+            self._account_time = timeStamp
+            self._account_snapshot = None
+
+    def _on_account_download_end(self, accountName: str) -> None:
+        with self._lock:
+            if not self._follows(accountName):
+                return
+            self._ready = True
+            self._account_snapshot = None
+        logger.info(f"Account {accountName} downloaded: {len(self._values)} values")
+
+    def _tracked(self, account: str, contract: Contract) -> TrackedPosition:
+        """Position entry, created on first sight; called with the lock held."""
+        key = (account, contract.conId)
+        tracked = self._positions.get(key)
+        if tracked is None:
+            tracked = self._positions[key] = TrackedPosition(account, contract)
+        return tracked
+
+    def _on_update_portfolio(
+        self, contract: Contract, position: float, marketPrice: float, marketValue: float,
+        averageCost: float, unrealizedPNL: float, realizedPNL: float, accountName: str,
+    ) -> None:
+        with self._lock:
+            if not self._follows(accountName):
+                return
+            tracked = self._tracked(accountName, contract)
+            changed = tracked.update(
+                position=float(position), market_price=marketPrice, market_value=marketValue,
+                avg_cost=averageCost, unrealized_pnl=unrealizedPNL, realized_pnl=realizedPNL,
+            )
+            if changed:
+                self._positions_snapshot = None
+        self._follow_pnl((accountName, contract.conId), tracked.position != 0)
+        if changed:
+            self._publish((POSITION, accountName, contract.conId))
+
+    def _on_position(self, account: str, contract: Contract, position: float, avgCost: float) -> None:
+        with self._lock:
+            if not self._follows(account):
+                return
+            key = (account, contract.conId)
+            if self._seen is not None:
+                self._seen.add(key)
+            tracked = self._tracked(account, contract)
+            was_open = tracked.position != 0
+            changed = tracked.update(avg_cost=avgCost)
+            if tracked.position != float(position):
+                tracked.position = float(position)
+                tracked.updated_at = time.time()
+                changed = True
+            if changed:
+                self._positions_snapshot = None
+        self._follow_pnl(key, tracked.position != 0)
+        if changed:
+            if was_open and tracked.position == 0:
+                logger.info(f"Position in {contract.symbol} closed")
+            self._publish((POSITION, account, contract.conId))
+
+    def _on_position_end(self) -> None:
+        with self._lock:
+            seen, self._seen = self._seen, None
+            if seen is None:
+                return
+            # Positions TWS no longer reports were closed while we were away
+            stale = [
+                tracked for key, tracked in self._positions.items()
+                if key not in seen and tracked.position != 0
+            ]
+            for tracked in stale:
+                tracked.position = 0.0
+                tracked.updated_at = time.time()
+            if stale:
+                self._positions_snapshot = None
+        for tracked in stale:
+            self._follow_pnl((tracked.account, tracked.con_id), False)
+            self._publish((POSITION, tracked.account, tracked.con_id))
+
+    def _follow_pnl(self, key: PositionKey, open_position: bool) -> None:
+        """Start or cancel reqPnLSingle to match whether a position is open."""
+        with self._lock:
+            req_id = self._pnl_single_ids.get(key)
+            if open_position == (req_id is not None) or not self._subscribed:
+                return
+            if open_position:
+                req_id = self._client.requests.next_id()
+                self._pnl_single[req_id] = key
+                self._pnl_single_ids[key] = req_id
+            else:
+                self._pnl_single.pop(req_id, None)
+                self._pnl_single_ids.pop(key, None)
+        if not self._client.is_connected():
+            return
+        if open_position:
+            self._client.client.reqPnLSingle(req_id, key[0], "", key[1])
+        else:
+            self._client.client.cancelPnLSingle(req_id)
+
+    def _on_pnl(self, reqId: int, dailyPnL: float, unrealizedPnL: float, realizedPnL: float) -> None:
+        with self._lock:
+            if reqId != self._pnl_req_id:
+                return
+            pnl = AccountPnL(
+                account=self.account or "",
+                daily_pnl=_value(dailyPnL),
+                unrealized_pnl=_value(unrealizedPnL),
+                realized_pnl=_value(realizedPnL),
+            )
+            if self._pnl is not None and pnl == self._pnl.model_copy(update={"updated_at": None}):
+                return
+            self._pnl = pnl.model_copy(update={"updated_at": datetime.now()})
+            self._account_snapshot = None
+        self._publish((PNL, pnl.account))
+
+    def _on_pnl_single(
+        self, reqId: int, pos: int, dailyPnL: float, unrealizedPnL: float, realizedPnL: float, value: float,
+    ) -> None:
+        with self._lock:
+            key = self._pnl_single.get(reqId)
+            tracked = self._positions.get(key) if key is not None else None
+            if tracked is None:
+                return
+            changed = tracked.update(
+                daily_pnl=dailyPnL, unrealized_pnl=unrealizedPnL, realized_pnl=realizedPnL, market_value=value,
+            )
+            if changed:
+                self._positions_snapshot = None
+        if changed:
+            self._publish((POSITION, key[0], key[1]))
+
+    def _on_connection_closed(self) -> None:
+        # TWS drops every subscription with the connection
+        with self._lock:
+            self._subscribed = False
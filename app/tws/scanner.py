@@ -0,0 +1,380 @@
+"""
+Market scanner subscriptions that publish ranking changes.
+
+TWS answers reqScannerSubscription with the whole ranked list on every
+refresh, whether or not anything moved. The service keeps the current
+ranking of each scan and hands consumers only what changed since they
+last read: contracts that entered, contracts that exited and contracts
+whose rank moved. The full ranking stays available on demand.
+"""
+
+import itertools
+import logging
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from ibapi.contract import ContractDetails
+from ibapi.scanner import ScannerSubscription
+from ibapi.tag_value import TagValue
+
+from .errors import WARNING_ERROR_CODES, TWSRequestError
+from .models import ScanDiff, ScanMove, ScanRow
+
+if TYPE_CHECKING:
+    from .client import TWSClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INSTRUMENT = "STK"
+DEFAULT_LOCATION = "STK.US.MAJOR"
+# TWS returns at most 50 rows per scan
+MAX_ROWS = 50
+
+
+class ScanParams(NamedTuple):
+    """A scanner request; scans with equal parameters share one TWS subscription."""
+
+    scan_code: str
+    instrument: str = DEFAULT_INSTRUMENT
+    location: str = DEFAULT_LOCATION
+    rows: int = MAX_ROWS
+    # Generic filters such as ("priceAbove", "5"), sorted by tag
+    filters: Tuple[Tuple[str, str], ...] = ()
+
+    @classmethod
+    def create(
+        cls,
+        scan_code: str,
+        instrument: str = DEFAULT_INSTRUMENT,
+        location: str = DEFAULT_LOCATION,
+        rows: int = MAX_ROWS,
+        filters: Optional[Dict[str, str]] = None,
+    ) -> "ScanParams":
+        """
+        Build normalized scan parameters.
+
+        Args:
+            scan_code: Scan to run, e.g. "TOP_PERC_GAIN" or "HOT_BY_VOLUME"
+            instrument: Instrument type, e.g. "STK"
+            location: Location code, e.g. "STK.US.MAJOR"
+            rows: Number of ranked rows, at most 50
+            filters: Generic scanner filters as tag -> value, e.g. {"priceAbove": "5"}
+
+        Raises:
+            ValueError: If the scan code is empty or rows is out of range
+        """
+        if not scan_code.strip():
+            raise ValueError("scan_code is required")
+        if not 1 <= rows <= MAX_ROWS:
+            raise ValueError(f"rows must be between 1 and {MAX_ROWS}")
+        return cls(
+            scan_code.strip().upper(),
+            instrument.strip().upper(),
+            location.strip().upper(),
+            rows,
+            tuple(sorted((str(tag), str(value)) for tag, value in (filters or {}).items())),
+        )
+
+    def subscription(self) -> ScannerSubscription:
+        """ScannerSubscription to send with reqScannerSubscription."""
+        subscription = ScannerSubscription()
+        subscription.scanCode = self.scan_code
+        subscription.instrument = self.instrument
+        subscription.locationCode = self.location
+        subscription.numberOfRows = self.rows
+        return subscription
+
+    def filter_options(self) -> List[TagValue]:
+        return [TagValue(tag, value) for tag, value in self.filters]
+
+
+class _Scan:
+    """A single reqScannerSubscription, its current ranking and its consumers."""
+
+    def __init__(self, scan_id: int, req_id: int, params: ScanParams):
+        self.scan_id = scan_id
+        self.req_id = req_id
+        self.params = params
+        # Rows by conId in rank order; replaced as a whole on each refresh
+        self.ranking: Dict[int, ScanRow] = {}
+        self.pending: List[ScanRow] = []
+        self.subscribers: Tuple["ScanSubscription", ...] = ()
+        # Resolved by the first complete ranking, failed by a TWS error
+        self.ready: Future = Future()
+        self.error: Optional[str] = None
+        self.refreshes = 0
+        self.changes = 0
+        self.updated_at: Optional[datetime] = None
+
+
+class ScanSubscription:
+    """
+    One consumer's view of a shared scan.
+
+    Refreshes are not queued. The subscription remembers the ranking it
+    last handed out, and diff() compares it with the ranking as it is now,
+    so a consumer that reads at its own rate gets every change since its
+    previous read folded into one diff.
+    """
+
+    def __init__(
+        self,
+        service: "ScannerService",
+        scan: _Scan,
+        notify: Optional[Callable[[], None]] = None,
+    ):
+        self.scan_id = scan.scan_id
+        self.params = scan.params
+        self._service = service
+        self._scan = scan
+        self._notify = notify
+        # conId -> rank as of the last snapshot or diff
+        self._seen: Dict[int, int] = {}
+        self._dirty = False
+        self._closed = False
+
+    def mark(self) -> None:
+        """Record that the scan changed; called on the reader thread."""
+        if not self._dirty:
+            self._dirty = True
+            if self._notify is not None:
+                self._notify()
+
+    @property
+    def ready(self) -> Future:
+        """Future resolved once the scan has a complete ranking, or failed with TWSRequestError."""
+        return self._scan.ready
+
+    @property
+    def error(self) -> Optional[str]:
+        """Error TWS ended the scan with, if any."""
+        return self._scan.error
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def snapshot(self) -> List[ScanRow]:
+        """The full current ranking; the next diff only covers later changes."""
+        # Clear before reading so a refresh landing in between marks us again
+        self._dirty = False
+        ranking = self._scan.ranking
+        self._seen = {con_id: row.rank for con_id, row in ranking.items()}
+        return list(ranking.values())
+
+    def diff(self) -> Optional[ScanDiff]:
+        """
+        Changes since the previous diff or snapshot.
+
+        Returns:
+            Entered rows, exited conIds and rank moves, or None if nothing changed
+        """
+        if not self._dirty:
+            return None
+        self._dirty = False
+        ranking = self._scan.ranking
+        seen = self._seen
+
+        entered: List[ScanRow] = []
+        moved: List[ScanMove] = []
+        for con_id, row in ranking.items():
+            previous = seen.get(con_id)
+            if previous is None:
+                entered.append(row)
+            elif previous != row.rank:
+                moved.append(ScanMove(con_id=con_id, rank=row.rank, previous_rank=previous))
+        exited = [con_id for con_id in seen if con_id not in ranking]
+        self._seen = {con_id: row.rank for con_id, row in ranking.items()}
+
+        if not (entered or exited or moved):
+            return None
+        return ScanDiff(scan_id=self.scan_id, entered=entered, exited=exited, moved=moved)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop following the scan."""
+        if not self._closed:
+            self._closed = True
+            self._service.unsubscribe(self)
+
+    def __enter__(self) -> "ScanSubscription":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def _scan_row(rank: int, details: ContractDetails, distance: str, benchmark: str, projection: str) -> ScanRow:
+    contract = details.contract
+    return ScanRow(
+        rank=rank,
+        con_id=contract.conId,
+        symbol=contract.symbol,
+        sec_type=contract.secType,
+        exchange=contract.exchange,
+        currency=contract.currency,
+        distance=distance,
+        benchmark=benchmark,
+        projection=projection,
+    )
+
+
+class ScannerService:
+    """
+    Shares one TWS scanner subscription per set of scan parameters.
+
+    reqScannerSubscription is sent once per scan and cancelled when the
+    last subscriber goes away; TWS allows only about ten concurrent scans.
+    """
+
+    def __init__(self, client: "TWSClient"):
+        """
+        Initialize scanner service.
+
+        Args:
+            client: TWS client used to send requests
+        """
+        self._client = client
+        self._lock = threading.Lock()
+        self._scans: Dict[ScanParams, _Scan] = {}
+        self._by_req_id: Dict[int, _Scan] = {}
+        self._scan_ids = itertools.count(1)
+
+        client.wrapper.add_handler("scannerData", self._on_row)
+        client.wrapper.add_handler("scannerDataEnd", self._on_end)
+        client.wrapper.add_handler("error", self._on_error)
+
+    def subscribe(self, params: ScanParams, notify: Optional[Callable[[], None]] = None) -> ScanSubscription:
+        """
+        Follow the ranking of a scan.
+
+        Args:
+            params: Scan to run
+            notify: Called on the reader thread when the ranking changes after a diff was taken
+
+        Returns:
+            Subscription to take snapshots and diffs from; close it when done
+
+        Raises:
+            ConnectionError: If the client is not connected
+        """
+        if not self._client.is_connected():
+            raise ConnectionError("Not connected to TWS")
+
+        with self._lock:
+            scan = self._scans.get(params)
+            if scan is None:
+                scan = _Scan(next(self._scan_ids), self._client.requests.next_id(), params)
+                self._scans[params] = scan
+                self._by_req_id[scan.req_id] = scan
+                logger.info(f"Requesting scanner {params.scan_code} on {params.location} (reqId {scan.req_id})")
+                self._send(scan)
+
+            subscription = ScanSubscription(self, scan, notify)
+            scan.subscribers = scan.subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: ScanSubscription) -> None:
+        """Remove a subscriber, cancelling the scan if it was the last."""
+        with self._lock:
+            scan = self._scans.get(subscription.params)
+            if scan is None or subscription not in scan.subscribers:
+                return
+            scan.subscribers = tuple(s for s in scan.subscribers if s is not subscription)
+            if scan.subscribers:
+                return
+
+            del self._scans[scan.params]
+            del self._by_req_id[scan.req_id]
+            logger.info(f"Cancelling scanner {scan.params.scan_code} (reqId {scan.req_id})")
+            if self._client.is_connected():
+                self._client.client.cancelScannerSubscription(scan.req_id)
+
+    def resubscribe(self) -> int:
+        """
+        Re-issue reqScannerSubscription for every active scan, e.g. after a reconnect.
+
+        Rankings are kept, so the first refresh after the reconnect reaches
+        subscribers as a diff against the ranking they already have.
+
+        Returns:
+            Number of scans re-requested
+        """
+        with self._lock:
+            scans = list(self._scans.values())
+            for scan in scans:
+                self._by_req_id.pop(scan.req_id, None)
+                scan.req_id = self._client.requests.next_id()
+                scan.pending = []
+                self._by_req_id[scan.req_id] = scan
+                logger.info(f"Re-requesting scanner {scan.params.scan_code} (reqId {scan.req_id})")
+                self._send(scan)
+        return len(scans)
+
+    def ranking(self, scan_id: int) -> Optional[List[ScanRow]]:
+        """Current ranking of an active scan, if any."""
+        with self._lock:
+            scan = next((s for s in self._scans.values() if s.scan_id == scan_id), None)
+        return list(scan.ranking.values()) if scan is not None else None
+
+    def subscriber_counts(self) -> Dict[str, int]:
+        """Number of subscribers per active scan code."""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for scan in self._scans.values():
+                counts[scan.params.scan_code] = counts.get(scan.params.scan_code, 0) + len(scan.subscribers)
+            return counts
+
+    def _send(self, scan: _Scan) -> None:
+        params = scan.params
+        self._client.client.reqScannerSubscription(scan.req_id, params.subscription(), [], params.filter_options())
+
+    def _on_row(
+        self, reqId: int, rank: int, contractDetails: ContractDetails,
+        distance: str, benchmark: str, projection: str, legsStr: str,
+    ) -> None:
+        scan = self._by_req_id.get(reqId)
+        if scan is not None:
+            scan.pending.append(_scan_row(rank, contractDetails, distance, benchmark, projection))
+
+    def _on_end(self, reqId: int) -> None:
+        scan = self._by_req_id.get(reqId)
+        if scan is None:
+            return
+        rows, scan.pending = scan.pending, []
+        ranking: Dict[int, ScanRow] = {}
+        for row in sorted(rows, key=lambda r: r.rank):
+            ranking.setdefault(row.con_id, row)
+
+        changed = [(c, r.rank) for c, r in ranking.items()] != [(c, r.rank) for c, r in scan.ranking.items()]
+        scan.ranking = ranking
+        scan.refreshes += 1
+        scan.updated_at = datetime.now()
+        first = not scan.ready.done()
+        if first:
+            scan.ready.set_result(True)
+        if changed or first:
+            scan.changes += 1
+            for subscription in scan.subscribers:
+                subscription.mark()
+
+    def _on_error(self, reqId: int, errorCode: int, errorString: str) -> None:
+        if errorCode in WARNING_ERROR_CODES:
+            return
+        with self._lock:
+            scan = self._by_req_id.pop(reqId, None)
+            if scan is None:
+                return
+            # TWS has dropped the scan; the next subscriber starts a new one
+            self._scans.pop(scan.params, None)
+        logger.warning(f"Scanner {scan.params.scan_code} failed: {errorCode} {errorString}")
+        scan.error = f"TWS Error {errorCode}: {errorString}"
+        if not scan.ready.done():
+            scan.ready.set_exception(TWSRequestError(reqId, errorCode, errorString))
+        for subscription in scan.subscribers:
+            subscription.mark()
@@ -0,0 +1,843 @@
+"""
+Local stand-in for TWS that speaks enough of the API wire protocol for
+tests and benchmarks.
+
+The simulator answers the connection handshake, reqCurrentTime,
+reqMktData (synthetic tick streams at a configurable rate), reqMktDepth
+(synthetic order books updated at a configurable rate),
+reqScannerSubscription (rankings of a fixed universe reshuffled on every refresh),
+reqSecDefOptParams and option snapshots (Black-Scholes quotes and greeks),
+reqHistoricalData (synthetic bars), reqContractDetails, order placement/cancellation with
+orderStatus and execDetails messages, reqOpenOrders and account, position and
+P&L subscriptions that follow the simulated fills, so the real TWSClient and its EReader/decoder
+path can run over localhost without an IB account.
+
+Run it standalone with ``python -m app.tws.simulator --port 7500``.
+"""
+
+import asyncio
+import logging
+import math
+import random
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from ibapi.message import IN, OUT
+from ibapi.server_versions import MAX_CLIENT_VER
+from ibapi.ticktype import TickTypeEnum
+
+from .errors import CLIENT_ID_IN_USE, NO_SECURITY_DEFINITION
+from .historical import NO_DATA_ERROR_CODE, NO_DATA_MESSAGE, is_intraday, parse_duration
+
+logger = logging.getLogger(__name__)
+
+# Highest version this ibapi release understands; the field layouts below assume it
+SERVER_VERSION = MAX_CLIENT_VER
+
+API_PREFIX = b"API\0"
+_LENGTH = struct.Struct("!I")
+
+ORDER_NOT_CANCELLABLE_ERROR_CODE = 161
+
+_BAR_SIZE_SECONDS = {"sec": 1, "min": 60, "hour": 3600, "day": 86400, "week": 604800}
+
+# Upper bound on synthetic bars per historical request
+MAX_BARS = 100_000
+
+# Symbols ranked by simulated scanners
+SCAN_UNIVERSE = (
+    "AAPL", "MSFT", "AMZN", "GOOGL", "META", "NVDA", "TSLA", "AMD", "INTC", "IBM",
+    "ORCL", "CSCO", "NFLX", "ADBE", "CRM", "QCOM", "TXN", "AVGO", "PYPL", "UBER",
+    "SHOP", "SQ", "MU", "F", "GM", "BAC", "JPM", "WFC", "XOM", "CVX",
+)
+
+
+def encode_message(*fields: Any) -> bytes:
+    """Encode fields as one length-prefixed TWS message."""
+    payload = b"".join(
+        (str(int(f)) if isinstance(f, bool) else str(f)).encode() + b"\0" for f in fields
+    )
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def bar_size_seconds(bar_size: str) -> int:
+    """Length in seconds of a TWS bar size setting such as "5 mins"."""
+    amount, unit = bar_size.split()
+    for prefix, seconds in _BAR_SIZE_SECONDS.items():
+        if unit.startswith(prefix):
+            return int(amount) * seconds
+    raise ValueError(f"Invalid bar size: {bar_size!r}")
+
+
+def _cdf(x: float) -> float:
+    """Standard normal cumulative distribution."""
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+def black_scholes(underlying: float, strike: float, expiry: str, right: str) -> Tuple[float, ...]:
+    """
+    Price and greeks of an option with a simple volatility smile and no rates.
+
+    Returns:
+        (price, implied volatility, delta, gamma, vega per vol point, theta per day)
+    """
+    days = max((datetime.strptime(expiry, "%Y%m%d") - datetime.now()).total_seconds() / 86400, 1.0)
+    years = days / 365
+    sigma = 0.3 + 0.1 * abs(math.log(strike / underlying))
+    root = sigma * math.sqrt(years)
+    d1 = (math.log(underlying / strike) + 0.5 * sigma * sigma * years) / root
+    d2 = d1 - root
+    pdf = math.exp(-0.5 * d1 * d1) / math.sqrt(2 * math.pi)
+    if right == "C":
+        price, delta = underlying * _cdf(d1) - strike * _cdf(d2), _cdf(d1)
+    else:
+        price, delta = strike * _cdf(-d2) - underlying * _cdf(-d1), _cdf(d1) - 1
+    gamma = pdf / (underlying * root)
+    vega = underlying * pdf * math.sqrt(years) / 100
+    theta = -underlying * pdf * sigma / (2 * math.sqrt(years)) / 365
+    return round(price, 4), sigma, delta, gamma, vega, theta
+
+
+def _seconds(stamp: datetime) -> int:
+    """Seconds since midnight."""
+    return stamp.hour * 3600 + stamp.minute * 60 + stamp.second
+
+
+class _Order:
+    """An order placed with the simulator."""
+
+    def __init__(self, order_id: int, symbol: str, action: str, quantity: float, client_id: int):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.action = action
+        self.quantity = quantity
+        self.client_id = client_id
+        self.perm_id = random.randint(1_000_000, 9_999_999)
+        self.status = "PreSubmitted"
+
+
+class _Session:
+    """One connected API client."""
+
+    def __init__(
+        self,
+        simulator: "TWSSimulator",
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ):
+        self.simulator = simulator
+        self.reader = reader
+        self.writer = writer
+        self.client_id: Optional[int] = None
+        self.streams: Dict[int, asyncio.Task] = {}
+        self.orders: Dict[int, _Order] = {}
+        self.account_updates = False
+        self.position_updates = False
+        self.pnl_req_id: Optional[int] = None
+        self.pnl_single: Dict[int, str] = {}
+
+    def send(self, *fields: Any) -> None:
+        self.writer.write(encode_message(*fields))
+
+    def error(self, req_id: int, code: int, message: str) -> None:
+        self.send(IN.ERR_MSG, 2, req_id, code, message)
+
+    async def read_message(self) -> Optional[Tuple[str, ...]]:
+        """Read one message and split it into fields, or None at EOF."""
+        try:
+            header = await self.reader.readexactly(_LENGTH.size)
+            payload = await self.reader.readexactly(_LENGTH.unpack(header)[0])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        return tuple(field.decode() for field in payload.split(b"\0")[:-1])
+
+    async def handshake(self) -> bool:
+        """Negotiate the server version and wait for startApi."""
+        try:
+            prefix = await self.reader.readexactly(len(API_PREFIX))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return False
+        if prefix != API_PREFIX:
+            logger.warning("Rejecting connection without API prefix")
+            return False
+
+        versions = await self.read_message()
+        if versions is None:
+            return False
+        logger.debug(f"Client supports API versions {versions[0] if versions else '?'}")
+
+        # ibapi reads the version reply on its own, so it must travel alone
+        self.send(SERVER_VERSION, datetime.now().strftime("%Y%m%d %H:%M:%S EST"))
+        await self.writer.drain()
+
+        fields = await self.read_message()
+        if fields is None or int(fields[0]) != OUT.START_API:
+            logger.warning("Expected startApi after version negotiation")
+            return False
+        client_id = int(fields[2])
+        if client_id in self.simulator.client_ids:
+            self.error(-1, CLIENT_ID_IN_USE,
+                       "Unable to connect as the client id is already in use. Retry with a unique client id.")
+            await self.writer.drain()
+            return False
+        self.client_id = client_id
+        self.simulator.client_ids.add(client_id)
+        logger.info(f"Simulator accepted client ID {self.client_id}")
+
+        self.send(IN.MANAGED_ACCTS, 1, self.simulator.account)
+        self.send(IN.NEXT_VALID_ID, 1, self.simulator.next_order_id)
+        await self.writer.drain()
+        return True
+
+    async def run(self) -> None:
+        """Serve requests until the client disconnects."""
+        self.simulator.sessions.append(self)
+        try:
+            if not await self.handshake():
+                return
+            while True:
+                fields = await self.read_message()
+                if fields is None:
+                    break
+                self.simulator.requests_received += 1
+                try:
+                    self.dispatch(fields)
+                except (IndexError, ValueError) as e:
+                    logger.warning(f"Simulator could not parse message {fields[:1]}: {e}")
+                await self.writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for task in self.streams.values():
+                task.cancel()
+            self.simulator.sessions.remove(self)
+            self.simulator.client_ids.discard(self.client_id)
+            self.writer.close()
+            logger.info(f"Simulator client {self.client_id} disconnected")
+
+    def dispatch(self, fields: Sequence[str]) -> None:
+        msg_id = int(fields[0])
+        if msg_id == OUT.REQ_CURRENT_TIME:
+            self.send(IN.CURRENT_TIME, 1, int(time.time()))
+        elif msg_id == OUT.REQ_MKT_DATA:
+            if fields[5] == "OPT":
+                self.req_option_snapshot(int(fields[2]), fields[4], fields[6], float(fields[7]), fields[8])
+            else:
+                self.req_mkt_data(int(fields[2]), fields[4])
+        elif msg_id == OUT.REQ_SEC_DEF_OPT_PARAMS:
+            self.req_sec_def_opt_params(int(fields[1]), fields[2])
+        elif msg_id == OUT.CANCEL_MKT_DATA:
+            task = self.streams.pop(int(fields[2]), None)
+            if task is not None:
+                task.cancel()
+        elif msg_id == OUT.REQ_MKT_DEPTH:
+            self.req_mkt_depth(int(fields[2]), fields[4], int(fields[15]), fields[16] == "1")
+        elif msg_id == OUT.CANCEL_MKT_DEPTH:
+            task = self.streams.pop(int(fields[2]), None)
+            if task is not None:
+                task.cancel()
+        elif msg_id == OUT.REQ_SCANNER_SUBSCRIPTION:
+            rows = int(fields[2]) if fields[2] else len(SCAN_UNIVERSE)
+            self.req_scanner(int(fields[1]), fields[5], rows)
+        elif msg_id == OUT.CANCEL_SCANNER_SUBSCRIPTION:
+            task = self.streams.pop(int(fields[2]), None)
+            if task is not None:
+                task.cancel()
+        elif msg_id == OUT.REQ_HISTORICAL_DATA:
+            self.req_historical_data(fields)
+        elif msg_id == OUT.REQ_CONTRACT_DATA:
+            self.req_contract_details(int(fields[2]), fields[4], fields[5], fields[10], fields[12])
+        elif msg_id == OUT.PLACE_ORDER:
+            self.place_order(fields)
+        elif msg_id == OUT.CANCEL_ORDER:
+            self.cancel_order(int(fields[2]))
+        elif msg_id == OUT.REQ_GLOBAL_CANCEL:
+            for order_id in list(self.orders):
+                if self.orders[order_id].status not in ("Filled", "Cancelled"):
+                    self.cancel_order(order_id)
+        elif msg_id in (OUT.REQ_OPEN_ORDERS, OUT.REQ_ALL_OPEN_ORDERS):
+            for order in self.orders.values():
+                if order.status not in ("Filled", "Cancelled"):
+                    self.order_status(order, order.status)
+            self.send(IN.OPEN_ORDER_END, 1)
+        elif msg_id == OUT.REQ_ACCT_DATA:
+            self.account_updates = fields[2] == "1"
+            if self.account_updates:
+                self.send_account_values()
+                for symbol in self.simulator.positions:
+                    self.send_portfolio(symbol)
+                self.send(IN.ACCT_UPDATE_TIME, 1, datetime.now().strftime("%H:%M"))
+                self.send(IN.ACCT_DOWNLOAD_END, 1, self.simulator.account)
+        elif msg_id == OUT.REQ_POSITIONS:
+            self.position_updates = True
+            for symbol in self.simulator.positions:
+                self.send_position(symbol)
+            self.send(IN.POSITION_END, 1)
+        elif msg_id == OUT.CANCEL_POSITIONS:
+            self.position_updates = False
+        elif msg_id == OUT.REQ_PNL:
+            self.pnl_req_id = int(fields[1])
+            self.send_pnl()
+        elif msg_id == OUT.CANCEL_PNL:
+            self.pnl_req_id = None
+        elif msg_id == OUT.REQ_PNL_SINGLE:
+            symbol = self.simulator.symbol_for(int(fields[4]))
+            if symbol is None:
+                self.error(int(fields[1]), NO_SECURITY_DEFINITION, "No position for the requested conId")
+                return
+            self.pnl_single[int(fields[1])] = symbol
+            self.send_pnl_single(int(fields[1]), symbol)
+        elif msg_id == OUT.CANCEL_PNL_SINGLE:
+            self.pnl_single.pop(int(fields[1]), None)
+        elif msg_id == OUT.REQ_IDS:
+            self.send(IN.NEXT_VALID_ID, 1, self.simulator.next_order_id)
+        else:
+            logger.debug(f"Simulator ignoring message {msg_id}")
+
+    def req_mkt_data(self, req_id: int, symbol: str) -> None:
+        if req_id in self.streams:
+            self.error(req_id, 322, f"Duplicate ticker id {req_id}")
+            return
+        self.streams[req_id] = asyncio.ensure_future(self.stream_ticks(req_id, symbol))
+
+    async def stream_ticks(self, req_id: int, symbol: str) -> None:
+        """Send bid/ask/last price ticks at the configured rate."""
+        rate = self.simulator.tick_rate
+        kinds = (TickTypeEnum.BID, TickTypeEnum.ASK, TickTypeEnum.LAST)
+        started = time.monotonic()
+        sent = 0
+        while True:
+            # Send whatever is due in one batch so high rates are not bound
+            # by the event loop's sleep resolution
+            due = int((time.monotonic() - started) * rate) + 1 - sent
+            for _ in range(due):
+                price = self.simulator.next_price(symbol)
+                kind = kinds[sent % len(kinds)]
+                spread = {TickTypeEnum.BID: -0.01, TickTypeEnum.ASK: 0.01}.get(kind, 0.0)
+                self.send(IN.TICK_PRICE, 6, req_id, kind, round(price + spread, 2), 100, 0)
+                sent += 1
+            self.simulator.ticks_sent += max(due, 0)
+            await self.writer.drain()
+            await asyncio.sleep(max(1.0 / rate, 0.001))
+
+    def req_sec_def_opt_params(self, req_id: int, symbol: str) -> None:
+        expirations, strikes = self.simulator.option_chain(symbol)
+        self.send(
+            IN.SECURITY_DEFINITION_OPTION_PARAMETER, req_id, "SMART", self.simulator.con_id(symbol), symbol, "100",
+            len(expirations), *expirations, len(strikes), *strikes,
+        )
+        self.send(IN.SECURITY_DEFINITION_OPTION_PARAMETER_END, req_id)
+
+    def req_option_snapshot(self, req_id: int, symbol: str, expiry: str, strike: float, right: str) -> None:
+        if req_id in self.streams:
+            self.error(req_id, 322, f"Duplicate ticker id {req_id}")
+            return
+        self.streams[req_id] = asyncio.ensure_future(self.option_snapshot(req_id, symbol, expiry, strike, right))
+
+    async def option_snapshot(self, req_id: int, symbol: str, expiry: str, strike: float, right: str) -> None:
+        """Send quotes and model greeks of one option after the configured snapshot delay."""
+        simulator = self.simulator
+        simulator.open_snapshots += 1
+        simulator.max_open_snapshots = max(simulator.max_open_snapshots, simulator.open_snapshots)
+        try:
+            if simulator.snapshot_delay:
+                await asyncio.sleep(simulator.snapshot_delay)
+            underlying = simulator.mark_price(symbol)
+            price, iv, delta, gamma, vega, theta = black_scholes(underlying, strike, expiry, right)
+            self.send(IN.TICK_PRICE, 6, req_id, TickTypeEnum.BID, round(max(price - 0.05, 0.0), 2), 10, 0)
+            self.send(IN.TICK_PRICE, 6, req_id, TickTypeEnum.ASK, round(price + 0.05, 2), 10, 0)
+            self.send(
+                IN.TICK_OPTION_COMPUTATION, req_id, TickTypeEnum.MODEL_OPTION, 0,
+                iv, delta, price, 0.0, gamma, vega, theta, underlying,
+            )
+            self.send(IN.TICK_SNAPSHOT_END, 1, req_id)
+            simulator.option_snapshots += 1
+            self.streams.pop(req_id, None)
+        finally:
+            simulator.open_snapshots -= 1
+
+    def req_mkt_depth(self, req_id: int, symbol: str, rows: int, smart: bool) -> None:
+        if req_id in self.streams:
+            self.error(req_id, 322, f"Duplicate ticker id {req_id}")
+            return
+        self.streams[req_id] = asyncio.ensure_future(self.stream_depth(req_id, symbol, rows, smart))
+
+    def send_depth(
+        self, req_id: int, smart: bool, position: int, operation: int, side: int, price: float, size: int,
+    ) -> None:
+        if smart:
+            exchange = ("NSDQ", "ARCA", "BATS")[position % 3]
+            self.send(IN.MARKET_DEPTH_L2, 1, req_id, position, exchange, operation, side, price, size, True)
+        else:
+            self.send(IN.MARKET_DEPTH, 1, req_id, position, operation, side, price, size)
+        self.simulator.depth_updates_sent += 1
+
+    async def stream_depth(self, req_id: int, symbol: str, rows: int, smart: bool) -> None:
+        """Send a full book, then random level updates at the configured depth rate."""
+        rng = random.Random(f"{symbol}{req_id}")
+        mid = self.simulator.mark_price(symbol)
+        # side -> [price, size] per level; side 0 is the ask side, 1 the bid side
+        books = {
+            side: [[round(mid + (0.01 if side == 0 else -0.01) * (level + 1), 2), rng.randint(1, 50) * 100]
+                   for level in range(rows)]
+            for side in (0, 1)
+        }
+        for side, levels in books.items():
+            for position, (price, size) in enumerate(levels):
+                self.send_depth(req_id, smart, position, 0, side, price, size)
+        await self.writer.drain()
+
+        rate = self.simulator.depth_rate
+        started = time.monotonic()
+        sent = 0
+        while True:
+            due = int((time.monotonic() - started) * rate) + 1 - sent
+            for _ in range(due):
+                side = rng.randint(0, 1)
+                levels = books[side]
+                step = 0.01 if side == 0 else -0.01
+                position = rng.randrange(rows)
+                if rng.random() < 0.8:
+                    levels[position][1] = rng.randint(1, 50) * 100
+                    self.send_depth(req_id, smart, position, 1, side, *levels[position])
+                else:
+                    # A level empties out; a new one appears behind the last
+                    del levels[position]
+                    self.send_depth(req_id, smart, position, 2, side, 0.0, 0)
+                    levels.append([round(levels[-1][0] + step, 2), rng.randint(1, 50) * 100])
+                    self.send_depth(req_id, smart, rows - 1, 0, side, *levels[-1])
+                sent += 1
+            await self.writer.drain()
+            await asyncio.sleep(max(1.0 / rate, 0.001))
+
+    def req_scanner(self, req_id: int, scan_code: str, rows: int) -> None:
+        if req_id in self.streams:
+            self.error(req_id, 322, f"Duplicate ticker id {req_id}")
+            return
+        self.streams[req_id] = asyncio.ensure_future(self.stream_scanner(req_id, scan_code, rows))
+
+    async def stream_scanner(self, req_id: int, scan_code: str, rows: int) -> None:
+        """Send the top rows of a random walk over the scan universe at the configured scan interval."""
+        rng = random.Random(f"{scan_code}{req_id}")
+        scores = {symbol: rng.random() for symbol in SCAN_UNIVERSE}
+        while True:
+            ranked = sorted(scores, key=scores.get, reverse=True)[:rows]
+            fields: List[Any] = [IN.SCANNER_DATA, 3, req_id, len(ranked)]
+            for rank, symbol in enumerate(ranked):
+                fields += [
+                    rank, self.simulator.con_id(symbol), symbol, "STK", "", 0.0, "", "SMART", "USD",
+                    symbol, "NMS", symbol, "", "", "", "",
+                ]
+            self.send(*fields)
+            self.simulator.scans_sent += 1
+            await self.writer.drain()
+            for symbol in scores:
+                scores[symbol] += rng.gauss(0.0, 0.1)
+            await asyncio.sleep(self.simulator.scan_interval)
+
+    def req_historical_data(self, fields: Sequence[str]) -> None:
+        req_id = int(fields[1])
+        symbol = fields[3]
+        end_text, bar_size, duration, format_date = fields[15], fields[16], fields[17], int(fields[20])
+
+        # The end may carry a trailing time zone, e.g. "20230105 16:00:00 US/Eastern"
+        end = datetime.strptime(" ".join(end_text.split()[:2]), "%Y%m%d %H:%M:%S") if end_text else datetime.now()
+        start = end - parse_duration(duration)
+        step = bar_size_seconds(bar_size)
+        intraday = is_intraday(bar_size)
+
+        bars: List[Tuple[Any, ...]] = []
+        rng = random.Random(f"{symbol}{start}")
+        price = self.simulator.base_price(symbol)
+        if intraday:
+            # Align bars to multiples of the bar size like TWS does
+            stamp = datetime.fromtimestamp(-(-int(start.timestamp()) // step) * step)
+        else:
+            stamp = start.replace(hour=0, minute=0, second=0)
+        while stamp < end and len(bars) < MAX_BARS:
+            if stamp.weekday() < 5 and (not intraday or 9 * 3600 + 1800 <= _seconds(stamp) < 16 * 3600):
+                open_ = price
+                close = round(max(open_ + rng.uniform(-0.5, 0.5), 0.01), 2)
+                high = round(max(open_, close) + rng.uniform(0, 0.25), 2)
+                low = round(max(min(open_, close) - rng.uniform(0, 0.25), 0.01), 2)
+                if not intraday:
+                    label = stamp.strftime("%Y%m%d")
+                elif format_date == 2:
+                    label = str(int(stamp.timestamp()))
+                else:
+                    label = stamp.strftime("%Y%m%d  %H:%M:%S")
+                volume = rng.randint(100, 10_000)
+                bars.append((label, open_, high, low, close, volume, round((high + low) / 2, 2),
+                             rng.randint(1, 100)))
+                price = close
+            stamp += timedelta(seconds=step)
+
+        if not bars:
+            self.error(req_id, NO_DATA_ERROR_CODE, NO_DATA_MESSAGE)
+            return
+
+        flat = [value for bar in bars for value in bar]
+        self.send(
+            IN.HISTORICAL_DATA, req_id,
+            start.strftime("%Y%m%d  %H:%M:%S"), end.strftime("%Y%m%d  %H:%M:%S"),
+            len(bars), *flat,
+        )
+
+    def req_contract_details(self, req_id: int, symbol: str, sec_type: str, exchange: str, currency: str) -> None:
+        self.simulator.contract_requests += 1
+        if symbol in self.simulator.unknown_symbols or sec_type != "STK":
+            self.error(req_id, NO_SECURITY_DEFINITION, "No security definition has been found for the request")
+            return
+        self.send(
+            IN.CONTRACT_DATA, 8, req_id,
+            symbol, "STK", "", 0.0, "", exchange, currency, symbol, "NMS", symbol,
+            self.simulator.con_id(symbol), 0.01, 1, "", "LMT,MKT,STP", "SMART,NASDAQ", 1, 0,
+            f"{symbol} INC", "NASDAQ", "", "", "", "", "US/Eastern", "", "",
+            "", 0, 0, 1, "", "", "26", "", "COMMON",
+        )
+        self.send(IN.CONTRACT_DATA_END, 1, req_id)
+
+    def place_order(self, fields: Sequence[str]) -> None:
+        order_id = int(fields[1])
+        symbol, action, quantity = fields[3], fields[16], float(fields[17])
+        order = self.orders.get(order_id)
+        if order is None:
+            order = _Order(order_id, symbol, action, quantity, self.client_id or 0)
+            self.orders[order_id] = order
+            self.simulator.next_order_id = max(self.simulator.next_order_id, order_id + 1)
+        elif order.status in ("Filled", "Cancelled"):
+            self.error(order_id, 10148, f"OrderId {order_id} that needs to be modified cannot be modified")
+            return
+
+        self.order_status(order, "Submitted")
+        if self.simulator.fill_orders:
+            fill_price = self.simulator.next_price(symbol)
+            self.exec_details(order, order.quantity, fill_price)
+            self.order_status(order, "Filled", filled=order.quantity, fill_price=fill_price)
+            self.simulator.record_fill(order.symbol, order.action, order.quantity, fill_price)
+
+    def cancel_order(self, order_id: int) -> None:
+        order = self.orders.get(order_id)
+        if order is None or order.status in ("Filled", "Cancelled"):
+            self.error(order_id, ORDER_NOT_CANCELLABLE_ERROR_CODE,
+                       "Cancel attempted when order is not in a cancellable state")
+            return
+        self.order_status(order, "Cancelled")
+
+    def exec_details(self, order: _Order, shares: float, price: float) -> None:
+        self.simulator.exec_count += 1
+        exec_id = f"0000e0d5.{self.simulator.exec_count:08x}.01.01"
+        side = "BOT" if order.action == "BUY" else "SLD"
+        self.send(
+            IN.EXECUTION_DATA, -1, order.order_id,
+            0, order.symbol, "STK", "", 0.0, "", "", "SMART", "USD", order.symbol, order.symbol,
+            exec_id, datetime.now().strftime("%Y%m%d  %H:%M:%S"), self.simulator.account, "SMART", side,
+            shares, price, order.perm_id, order.client_id, 0, shares, price, "", "", "", "", 0,
+        )
+
+    def send_account_values(self) -> None:
+        for key, value in self.simulator.account_values().items():
+            self.send(IN.ACCT_VALUE, 2, key, f"{value:.2f}", "USD", self.simulator.account)
+
+    def send_portfolio(self, symbol: str) -> None:
+        quantity, avg_cost = self.simulator.positions[symbol]
+        mark = self.simulator.mark_price(symbol)
+        self.send(
+            IN.PORTFOLIO_VALUE, 8, self.simulator.con_id(symbol), symbol, "STK", "", 0.0, "", "", "NASDAQ",
+            "USD", symbol, symbol, quantity, mark, round(quantity * mark, 2), avg_cost,
+            round(quantity * (mark - avg_cost), 2), round(self.simulator.realized.get(symbol, 0.0), 2),
+            self.simulator.account,
+        )
+
+    def send_position(self, symbol: str) -> None:
+        quantity, avg_cost = self.simulator.positions[symbol]
+        self.send(
+            IN.POSITION_DATA, 3, self.simulator.account, self.simulator.con_id(symbol), symbol, "STK",
+            "", 0.0, "", "", "NASDAQ", "USD", symbol, symbol, quantity, avg_cost,
+        )
+
+    def send_pnl(self) -> None:
+        if self.pnl_req_id is None:
+            return
+        unrealized, realized = self.simulator.pnl()
+        self.send(IN.PNL, self.pnl_req_id, round(unrealized + realized, 2), round(unrealized, 2), round(realized, 2))
+
+    def send_pnl_single(self, req_id: int, symbol: str) -> None:
+        quantity, avg_cost = self.simulator.positions.get(symbol, (0.0, 0.0))
+        mark = self.simulator.mark_price(symbol)
+        unrealized = quantity * (mark - avg_cost)
+        realized = self.simulator.realized.get(symbol, 0.0)
+        self.send(
+            IN.PNL_SINGLE, req_id, int(quantity), round(unrealized + realized, 2), round(unrealized, 2),
+            round(realized, 2), round(quantity * mark, 2),
+        )
+
+    def push_fill(self, symbol: str) -> None:
+        """Send the account updates a fill causes to this session's subscriptions."""
+        if self.account_updates:
+            self.send_portfolio(symbol)
+            self.send_account_values()
+        if self.position_updates:
+            self.send_position(symbol)
+        self.send_pnl()
+        for req_id, pnl_symbol in self.pnl_single.items():
+            if pnl_symbol == symbol:
+                self.send_pnl_single(req_id, symbol)
+
+    def order_status(self, order: _Order, status: str, filled: float = 0.0, fill_price: float = 0.0) -> None:
+        order.status = status
+        self.send(
+            IN.ORDER_STATUS, order.order_id, status, filled, order.quantity - filled,
+            fill_price, order.perm_id, 0, fill_price, order.client_id, "", 0.0,
+        )
+
+
+class TWSSimulator:
+    """
+    Asyncio server that emulates TWS for TWSClient over localhost.
+
+    Use ``await start()``/``await stop()`` from a running event loop, or
+    ``start_in_thread()``/``stop_in_thread()`` to serve from a background
+    thread for synchronous tests and benchmarks.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        tick_rate: float = 10.0,
+        depth_rate: float = 100.0,
+        scan_interval: float = 1.0,
+        snapshot_delay: float = 0.0,
+        fill_orders: bool = True,
+        next_order_id: int = 1,
+        account: str = "DU123456",
+        unknown_symbols: Sequence[str] = (),
+        positions: Optional[Dict[str, Tuple[float, float]]] = None,
+        cash: float = 100_000.0,
+    ):
+        """
+        Initialize TWS simulator.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free port
+            tick_rate: Price ticks per second for each market data stream
+            depth_rate: Level updates per second for each market depth stream
+            scan_interval: Seconds between refreshes of each scanner subscription
+            snapshot_delay: Seconds each option snapshot stays open before it is answered
+            fill_orders: Fill orders immediately; otherwise they stay Submitted
+            next_order_id: First order id reported by nextValidId
+            account: Account reported by managedAccounts
+            unknown_symbols: Symbols that reqContractDetails reports as unknown
+            positions: Opening positions as symbol -> (quantity, average cost)
+            cash: Opening cash balance of the account
+        """
+        self.host = host
+        self.port = port
+        self.tick_rate = tick_rate
+        self.depth_rate = depth_rate
+        self.scan_interval = scan_interval
+        self.snapshot_delay = snapshot_delay
+        self.fill_orders = fill_orders
+        self.next_order_id = next_order_id
+        self.account = account
+        self.unknown_symbols = set(unknown_symbols)
+        self.positions: Dict[str, Tuple[float, float]] = dict(positions or {})
+        self.realized: Dict[str, float] = {}
+        self.cash = cash
+        self.sessions: List[_Session] = []
+        self.client_ids: Set[int] = set()
+        self.requests_received = 0
+        self.ticks_sent = 0
+        self.depth_updates_sent = 0
+        self.scans_sent = 0
+        self.option_snapshots = 0
+        self.open_snapshots = 0
+        self.max_open_snapshots = 0
+        self.exec_count = 0
+        self.contract_requests = 0
+        self._prices: Dict[str, float] = {}
+        self._rng = random.Random(0)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def base_price(self, symbol: str) -> float:
+        """Deterministic starting price for a symbol."""
+        return float(50 + sum(map(ord, symbol)) % 400)
+
+    def con_id(self, symbol: str) -> int:
+        """Deterministic conId for a symbol."""
+        return 200_000 + zlib.crc32(symbol.encode()) % 100_000_000
+
+    def option_chain(self, symbol: str) -> Tuple[List[str], List[float]]:
+        """Expirations (the next four Fridays) and strikes (21 around the price) listed for a symbol."""
+        today = datetime.now().date()
+        friday = today + timedelta(days=(4 - today.weekday()) % 7)
+        expirations = [(friday + timedelta(weeks=week)).strftime("%Y%m%d") for week in range(4)]
+        center = round(self.base_price(symbol) / 5) * 5
+        strikes = [float(center + 5 * step) for step in range(-10, 11) if center + 5 * step > 0]
+        return expirations, strikes
+
+    def symbol_for(self, con_id: int) -> Optional[str]:
+        """Symbol of a held position with the given conId."""
+        return next((symbol for symbol in self.positions if self.con_id(symbol) == con_id), None)
+
+    def mark_price(self, symbol: str) -> float:
+        """Last simulated price of a symbol."""
+        return self._prices.get(symbol, self.base_price(symbol))
+
+    def record_fill(self, symbol: str, action: str, shares: float, price: float) -> None:
+        """Apply a fill to the account and push it to subscribed sessions."""
+        quantity, avg_cost = self.positions.get(symbol, (0.0, 0.0))
+        signed = shares if action == "BUY" else -shares
+        if quantity == 0 or (quantity > 0) == (signed > 0):
+            new_quantity = quantity + signed
+            avg_cost = (quantity * avg_cost + signed * price) / new_quantity
+        else:
+            closed = min(abs(signed), abs(quantity))
+            direction = 1 if quantity > 0 else -1
+            self.realized[symbol] = self.realized.get(symbol, 0.0) + closed * (price - avg_cost) * direction
+            new_quantity = quantity + signed
+            if new_quantity == 0:
+                avg_cost = 0.0
+            elif (new_quantity > 0) != (quantity > 0):
+                avg_cost = price
+        self.positions[symbol] = (new_quantity, round(avg_cost, 4))
+        self.cash -= signed * price
+        for session in self.sessions:
+            session.push_fill(symbol)
+
+    def pnl(self) -> Tuple[float, float]:
+        """Unrealized and realized P&L of the account."""
+        unrealized = sum(
+            quantity * (self.mark_price(symbol) - avg_cost) for symbol, (quantity, avg_cost) in self.positions.items()
+        )
+        return unrealized, sum(self.realized.values())
+
+    def account_values(self) -> Dict[str, float]:
+        """Account values reported by reqAccountUpdates."""
+        market_value = sum(quantity * self.mark_price(symbol) for symbol, (quantity, _) in self.positions.items())
+        unrealized, realized = self.pnl()
+        return {
+            "NetLiquidation": self.cash + market_value,
+            "TotalCashValue": self.cash,
+            "GrossPositionValue": sum(
+                abs(quantity) * self.mark_price(symbol) for symbol, (quantity, _) in self.positions.items()
+            ),
+            "UnrealizedPnL": unrealized,
+            "RealizedPnL": realized,
+        }
+
+    def next_price(self, symbol: str) -> float:
+        """Advance the symbol's random walk by one step."""
+        price = self._prices.get(symbol, self.base_price(symbol))
+        price = max(round(price + self._rng.choice((-0.01, 0.0, 0.01)), 2), 0.01)
+        self._prices[symbol] = price
+        return price
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            await _Session(self, reader, writer).run()
+        except asyncio.CancelledError:
+            # Cancelled by stop(); finishing normally keeps asyncio from logging it
+            pass
+        finally:
+            self._tasks.discard(task)
+
+    async def start(self) -> int:
+        """
+        Start listening.
+
+        Returns:
+            The port the simulator is listening on
+        """
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"TWS simulator listening on {self.host}:{self.port}")
+        return self.port
+
+    async def stop(self) -> None:
+        """Stop listening and drop every connected client."""
+        if self._server is None:
+            return
+        self._server.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+        logger.info("TWS simulator stopped")
+
+    def start_in_thread(self, timeout: float = 5.0) -> int:
+        """
+        Serve from a daemon thread with its own event loop.
+
+        Returns:
+            The port the simulator is listening on
+        """
+        started = threading.Event()
+
+        def serve() -> None:
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name="tws-simulator", daemon=True)
+        self._thread.start()
+        if not started.wait(timeout):
+            raise RuntimeError("TWS simulator did not start")
+        return self.port
+
+    def stop_in_thread(self) -> None:
+        """Stop a simulator started with start_in_thread."""
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+            self._loop = None
+
+    def __enter__(self) -> "TWSSimulator":
+        self.start_in_thread()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop_in_thread()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local TWS API simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7500)
+    parser.add_argument("--tick-rate", type=float, default=10.0)
+    parser.add_argument("--depth-rate", type=float, default=100.0)
+    parser.add_argument("--scan-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    simulator = TWSSimulator(
+        args.host, args.port, tick_rate=args.tick_rate, depth_rate=args.depth_rate, scan_interval=args.scan_interval,
+    )
+
+    async def main() -> None:
+        await simulator.start()
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
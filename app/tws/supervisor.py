@@ -0,0 +1,268 @@
+"""
+Automatic reconnection to TWS with subscription replay.
+"""
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
+
+from .errors import (
+    CONNECTIVITY_LOST,
+    CONNECTIVITY_RESTORED_DATA_LOST,
+    CONNECTIVITY_RESTORED_DATA_MAINTAINED,
+)
+from .models import SupervisorStatus
+
+if TYPE_CHECKING:
+    from .client import TWSClient
+
+logger = logging.getLogger(__name__)
+
+IDLE = "idle"
+CONNECTED = "connected"
+RECONNECTING = "reconnecting"
+DEGRADED = "degraded"
+
+
+def backoff_delay(
+    attempt: int,
+    initial: float = 0.5,
+    maximum: float = 30.0,
+    multiplier: float = 2.0,
+    jitter: float = 0.5,
+    rng: Callable[[], float] = random.random,
+) -> float:
+    """
+    Delay before a reconnect attempt.
+
+    The delay grows exponentially up to maximum, and up to ``jitter`` of it
+    is randomized so many clients dropped by one gateway restart do not
+    reconnect in lockstep.
+
+    Args:
+        attempt: Zero-based attempt number
+        initial: Delay before the first attempt
+        maximum: Upper bound on the un-jittered delay
+        multiplier: Growth factor per attempt
+        jitter: Fraction of the delay that is randomized, 0 to 1
+        rng: Source of uniform random numbers in [0, 1)
+
+    Returns:
+        Seconds to wait
+    """
+    delay = min(maximum, initial * multiplier ** attempt)
+    return delay * (1.0 - jitter * rng())
+
+
+class ConnectionSupervisor:
+    """
+    Keeps a TWSClient connected and its subscriptions alive.
+
+    When the socket closes unexpectedly the supervisor reconnects with
+    jittered exponential backoff and then runs every replay hook so active
+    streams are re-requested. TWS error 1101 (connectivity to IB restored,
+    market data lost) runs the hooks without reconnecting; 1102 (data
+    maintained) only records the recovery. Reconnects happen on the
+    supervisor's own thread, never on the reader thread.
+    """
+
+    def __init__(
+        self,
+        client: "TWSClient",
+        initial_delay: float = 0.5,
+        max_delay: float = 30.0,
+        multiplier: float = 2.0,
+        jitter: float = 0.5,
+        max_attempts: Optional[int] = None,
+        rng: Callable[[], float] = random.random,
+    ):
+        """
+        Initialize connection supervisor.
+
+        Args:
+            client: Client to keep connected
+            initial_delay: Delay before the first reconnect attempt
+            max_delay: Upper bound on the delay between attempts
+            multiplier: Backoff growth factor per attempt
+            jitter: Fraction of each delay that is randomized
+            max_attempts: Give up after this many attempts; None retries forever
+            rng: Source of uniform random numbers, for tests
+        """
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.max_attempts = max_attempts
+        self._rng = rng
+        self._client = client
+        self._hooks: List[Tuple[str, Callable[[], Any]]] = []
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._needs_reconnect = False
+        self._needs_replay = False
+
+        self.state = IDLE
+        self.reconnects = 0
+        self.attempts = 0
+        self.last_drop: Optional[datetime] = None
+        self.last_recovery: Optional[float] = None
+        self._dropped_at: Optional[float] = None
+
+        client.wrapper.add_handler("connectionClosed", self._on_connection_closed)
+        client.wrapper.add_handler("error", self._on_error)
+        self.add_replay_hook("market_data", client.market_data.resubscribe)
+        self.add_replay_hook("market_depth", client.depth.resubscribe)
+        self.add_replay_hook("scanner", client.scanner.resubscribe)
+        self.add_replay_hook("orders", client.orders.reconcile)
+        self.add_replay_hook("portfolio", client.portfolio.resubscribe)
+
+    def add_replay_hook(self, name: str, hook: Callable[[], Any]) -> None:
+        """
+        Register a callable that re-issues a subscription after a reconnect.
+
+        Hooks run in registration order on the supervisor thread once the
+        connection is usable again.
+
+        Args:
+            name: Name used in logs
+            hook: Callable re-sending the subscription's requests
+        """
+        with self._lock:
+            self._hooks.append((name, hook))
+
+    def remove_replay_hook(self, name: str) -> None:
+        """Stop replaying a subscription."""
+        with self._lock:
+            self._hooks = [(n, h) for n, h in self._hooks if n != name]
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start supervising; called once the client is connected."""
+        with self._lock:
+            if self.running:
+                return
+            self._stopping.clear()
+            self._wake.clear()
+            self._needs_reconnect = self._needs_replay = False
+            self.state = CONNECTED
+            self._thread = threading.Thread(target=self._run, name="tws-supervisor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop supervising, e.g. before an intentional disconnect."""
+        self._stopping.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self.state = IDLE
+
+    def status(self) -> SupervisorStatus:
+        """Reconnect counters and the last time-to-recover."""
+        return SupervisorStatus(
+            state=self.state,
+            reconnects=self.reconnects,
+            attempts=self.attempts,
+            last_drop=self.last_drop,
+            last_recovery_ms=self.last_recovery * 1000 if self.last_recovery is not None else None,
+        )
+
+    def _note_drop(self) -> None:
+        if self._dropped_at is None:
+            self._dropped_at = time.monotonic()
+            self.last_drop = datetime.now()
+
+    def _on_connection_closed(self) -> None:
+        if self._stopping.is_set():
+            return
+        logger.warning("Connection to TWS lost; scheduling reconnect")
+        with self._lock:
+            self._note_drop()
+            self._needs_reconnect = True
+            self.state = RECONNECTING
+        self._wake.set()
+
+    def _on_error(self, reqId: int, errorCode: int, errorString: str) -> None:
+        if self._stopping.is_set():
+            return
+        with self._lock:
+            if errorCode == CONNECTIVITY_LOST:
+                self._note_drop()
+                self.state = DEGRADED
+            elif errorCode == CONNECTIVITY_RESTORED_DATA_LOST:
+                self._needs_replay = True
+                self._wake.set()
+            elif errorCode == CONNECTIVITY_RESTORED_DATA_MAINTAINED:
+                self._recovered()
+
+    def _recovered(self) -> None:
+        """Record time-to-recover for the outage that just ended."""
+        if self._dropped_at is not None:
+            self.last_recovery = time.monotonic() - self._dropped_at
+            logger.info(f"Recovered TWS connection in {self.last_recovery * 1000:.0f} ms")
+        self._dropped_at = None
+        self.state = CONNECTED
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+
+            with self._lock:
+                reconnect, self._needs_reconnect = self._needs_reconnect, False
+                replay, self._needs_replay = self._needs_replay, False
+
+            if reconnect and self._client.is_connected():
+                # Failed attempts of a reconnect that has since succeeded
+                # also report connectionClosed
+                reconnect = False
+            if reconnect and not self._reconnect():
+                break
+            if reconnect or replay:
+                self._replay()
+                with self._lock:
+                    self._recovered()
+
+    def _reconnect(self) -> bool:
+        """Reconnect with backoff; False if stopped or out of attempts."""
+        self.attempts = 0
+        while not self._stopping.is_set():
+            if self.max_attempts is not None and self.attempts >= self.max_attempts:
+                logger.error(f"Giving up reconnecting to TWS after {self.attempts} attempts")
+                self.state = IDLE
+                return False
+
+            delay = backoff_delay(
+                self.attempts, self.initial_delay, self.max_delay,
+                self.multiplier, self.jitter, self._rng,
+            )
+            if self._stopping.wait(delay):
+                return False
+            self.attempts += 1
+            logger.info(f"Reconnecting to TWS (attempt {self.attempts}) after {delay:.2f}s")
+            if self._client.connect():
+                self.reconnects += 1
+                return True
+        return False
+
+    def _replay(self) -> None:
+        """Re-issue every registered subscription."""
+        with self._lock:
+            hooks = list(self._hooks)
+        for name, hook in hooks:
+            try:
+                result = hook()
+                logger.info(f"Replayed {name} subscriptions: {result}")
+            except Exception:
+                logger.exception(f"Error replaying {name} subscriptions")
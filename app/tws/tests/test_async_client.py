@@ -0,0 +1,99 @@
+"""
+Tests for the asyncio TWS client facade.
+"""
+
+import asyncio
+import threading
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+
+from ..async_client import AsyncTWSClient
+from ..client import TWSClient, TWSRequestError
+from ..models import TimeResponse
+
+
+def make_connected_client() -> AsyncTWSClient:
+    """Build an AsyncTWSClient around a TWSClient with a mocked EClient."""
+    client = TWSClient()
+    client.client = Mock()
+    client.client.isConnected.return_value = True
+    client._connected = True
+    return AsyncTWSClient(client)
+
+
+class TestAsyncTWSClient:
+    """Test class for AsyncTWSClient functionality."""
+
+    def test_wraps_existing_client(self):
+        """Test the facade exposes the wrapped client's settings."""
+        client = TWSClient(host="test.host", port=1234, client_id=5)
+        async_client = AsyncTWSClient(client)
+
+        assert async_client.client is client
+        assert async_client.host == "test.host"
+        assert async_client.port == 1234
+        assert async_client.client_id == 5
+
+    def test_current_time_from_reader_thread(self):
+        """Test a reply delivered on another thread resolves the awaitable."""
+        async_client = make_connected_client()
+        wrapper = async_client.client.wrapper
+        test_time = datetime(2023, 1, 1, 12, 0, 0)
+        async_client.client.client.reqCurrentTime.side_effect = lambda: threading.Timer(
+            0.01, wrapper.currentTime, args=(int(test_time.timestamp()),)
+        ).start()
+
+        result = asyncio.run(async_client.current_time(timeout=2.0))
+
+        assert isinstance(result, TimeResponse)
+        assert result.current_time == test_time
+
+    def test_current_time_not_connected(self):
+        """Test current time when not connected."""
+        async_client = AsyncTWSClient(TWSClient())
+
+        assert asyncio.run(async_client.current_time()) is None
+
+    def test_current_time_timeout(self):
+        """Test current time request timeout."""
+        async_client = make_connected_client()
+
+        assert asyncio.run(async_client.current_time(timeout=0.05)) is None
+
+    def test_concurrent_requests_get_own_replies(self):
+        """Test concurrent requests are each resolved with their own reply."""
+        async_client = make_connected_client()
+        wrapper = async_client.client.wrapper
+
+        def send(req_id: int) -> None:
+            threading.Timer(0.01, wrapper.requests.resolve, args=(req_id, req_id * 10)).start()
+
+        async def run():
+            return await asyncio.gather(*(async_client.request(send) for _ in range(5)))
+
+        results = asyncio.run(run())
+
+        assert len(set(results)) == 5
+        assert all(result % 10 == 0 for result in results)
+
+    def test_request_error(self):
+        """Test a TWS error reply raises from the awaitable."""
+        async_client = make_connected_client()
+        wrapper = async_client.client.wrapper
+
+        def send(req_id: int) -> None:
+            wrapper.error(req_id, 200, "No security definition has been found")
+
+        with pytest.raises(TWSRequestError):
+            asyncio.run(async_client.request(send))
+
+    def test_request_timeout_discards_request(self):
+        """Test a timed out request is no longer pending."""
+        async_client = make_connected_client()
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(async_client.request(lambda req_id: None, timeout=0.05))
+
+        assert len(async_client.client.requests) == 0
@@ -0,0 +1,212 @@
+"""
+Tests for live bar aggregation from the tick stream.
+"""
+
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+from ibapi.ticktype import TickTypeEnum
+
+from ..bar_aggregator import BarAggregator, bars_from_ticks, parse_bar_size
+from ..bar_archive import LIVE, BarArchive
+from ..client import TWSClient
+from ..contracts import stock_contract
+from ..market_data import Tick
+from ..models import Bar
+from ..tick_store import TickStore
+
+
+def trade(aggregator: BarAggregator, symbol: str, price: float, size: int, timestamp: float) -> None:
+    """Deliver a trade the way TWS reports it: a last price then its size."""
+    aggregator.append_tick(Tick(symbol, TickTypeEnum.LAST, price, None, timestamp))
+    aggregator.append_tick(Tick(symbol, TickTypeEnum.LAST_SIZE, None, size, timestamp))
+
+
+@pytest.fixture
+def aggregator(tmp_path):
+    """Fixture providing an aggregator archiving to a temporary directory, closing bars only on demand."""
+    aggregator = BarAggregator(
+        ("1 secs", "1 min", "300 volume", "3 ticks"), archive=BarArchive(tmp_path), interval=3600
+    )
+    yield aggregator
+    aggregator.stop()
+
+
+class TestParseBarSize:
+    """Test class for bar size parsing."""
+
+    @pytest.mark.parametrize("bar_size, expected", [
+        ("1 sec", ("1 secs", "time", 1)),
+        ("15s", ("15 secs", "time", 15)),
+        ("1 min", ("1 min", "time", 60)),
+        ("5 mins", ("5 mins", "time", 300)),
+        ("1h", ("1 hour", "time", 3600)),
+        ("500 volume", ("500 volume", "volume", 500)),
+        ("100 ticks", ("100 ticks", "ticks", 100)),
+    ])
+    def test_parse(self, bar_size, expected):
+        """Test bar sizes are parsed and named in TWS notation."""
+        assert tuple(parse_bar_size(bar_size)) == expected
+
+    @pytest.mark.parametrize("bar_size", ["", "0 secs", "1 week", "min"])
+    def test_invalid(self, bar_size):
+        """Test unsupported bar sizes are rejected."""
+        with pytest.raises(ValueError):
+            parse_bar_size(bar_size)
+
+
+class TestBarsFromTicks:
+    """Test class for resampling stored ticks into bars."""
+
+    def test_matches_live_aggregation(self, aggregator):
+        """Test bars resampled from the tick store equal those built live from the same ticks."""
+        store = TickStore(capacity=64)
+        ticks = [
+            Tick("AAPL", TickTypeEnum.LAST, 100.0, None, 60.0), Tick("AAPL", TickTypeEnum.LAST_SIZE, None, 10, 60.0),
+            Tick("AAPL", TickTypeEnum.LAST_SIZE, None, 10, 60.1),
+            Tick("AAPL", TickTypeEnum.LAST, 102.0, None, 60.4), Tick("AAPL", TickTypeEnum.BID, 101.0, None, 60.4),
+            Tick("AAPL", TickTypeEnum.LAST_SIZE, None, 20, 60.4),
+            Tick("AAPL", TickTypeEnum.LAST, 99.0, None, 60.9), Tick("AAPL", TickTypeEnum.LAST_SIZE, None, 30, 60.9),
+            Tick("AAPL", TickTypeEnum.LAST, 101.0, None, 62.2), Tick("AAPL", TickTypeEnum.LAST_SIZE, None, 40, 62.2),
+        ]
+        for tick in ticks:
+            store.append_tick(tick)
+            aggregator.append_tick(tick)
+
+        records = bars_from_ticks(store.buffer("AAPL").snapshot(), "1 secs")
+        live = aggregator.history("AAPL", "1 secs") + [aggregator.current("AAPL", "1 secs")]
+        assert [tuple(record) for record in records.tolist()] == [
+            (int(bar.start), bar.open, bar.high, bar.low, bar.close, bar.volume, bar.count) for bar in live
+        ]
+
+    def test_only_time_bars(self):
+        """Test volume and tick bar sizes are rejected."""
+        store = TickStore(capacity=4)
+        store.append_tick(Tick("AAPL", TickTypeEnum.LAST, 100.0, None, 60.0))
+
+        with pytest.raises(ValueError):
+            bars_from_ticks(store.buffer("AAPL").snapshot(), "100 ticks")
+
+
+class TestBarAggregator:
+    """Test class for BarAggregator functionality."""
+
+    def test_time_bars(self, aggregator):
+        """Test trades build OHLCV bars that close on the interval boundary."""
+        trade(aggregator, "AAPL", 100.0, 10, 60.0)
+        trade(aggregator, "AAPL", 102.0, 20, 60.4)
+        trade(aggregator, "AAPL", 99.0, 30, 60.9)
+        trade(aggregator, "AAPL", 101.0, 40, 61.2)
+
+        closed = aggregator.history("AAPL", "1 sec")
+        assert [tuple(bar[2:]) for bar in closed] == [(60.0, 61.0, 100.0, 102.0, 99.0, 99.0, 60, 3)]
+        current = aggregator.current("AAPL", "1 min")
+        assert (current.start, current.open, current.close, current.volume, current.count) == (
+            60.0, 100.0, 101.0, 100, 4,
+        )
+
+    def test_volume_and_tick_bars(self, aggregator):
+        """Test volume and tick bars close on traded shares and trade count."""
+        for i in range(7):
+            trade(aggregator, "AAPL", 100.0 + i, 100, 10.0 + i)
+
+        volume_bars = aggregator.history("AAPL", "300 volume")
+        tick_bars = aggregator.history("AAPL", "3 ticks")
+        assert [(bar.open, bar.close, bar.volume) for bar in volume_bars] == [(100.0, 102.0, 300), (103.0, 105.0, 300)]
+        assert [(bar.start, bar.end, bar.count) for bar in tick_bars] == [(10.0, 12.0, 3), (13.0, 15.0, 3)]
+        assert aggregator.current("AAPL", "3 ticks").count == 1
+
+    def test_repeated_sizes_not_counted(self, aggregator):
+        """Test the standalone size tick TWS repeats after each trade adds no volume."""
+        trade(aggregator, "AAPL", 100.0, 10, 5.0)
+        aggregator.append_tick(Tick("AAPL", TickTypeEnum.LAST_SIZE, None, 10, 5.0))
+        aggregator.append_tick(Tick("AAPL", TickTypeEnum.BID, 99.0, None, 5.0))
+
+        assert aggregator.current("AAPL", "1 min").volume == 10
+        assert aggregator.trades == 1
+
+    def test_close_expired(self, aggregator):
+        """Test time bars close once their interval has passed without another trade."""
+        subscription = aggregator.subscribe(bar_sizes=["1 secs"])
+        trade(aggregator, "AAPL", 100.0, 10, 5.5)
+
+        assert aggregator.close_expired(now=5.9) == 0
+        assert aggregator.close_expired(now=6.0) == 1
+        assert [(bar.symbol, bar.start) for bar in subscription.drain()] == [("AAPL", 5.0)]
+
+    def test_subscription_filters(self, aggregator):
+        """Test subscribers only receive the symbols and bar sizes they asked for."""
+        msft = aggregator.subscribe(symbols=["msft"], bar_sizes=["3 ticks"])
+        everything = aggregator.subscribe()
+        for i in range(3):
+            trade(aggregator, "AAPL", 100.0, 100, 10.0 + i)
+            trade(aggregator, "MSFT", 200.0, 100, 10.0 + i)
+
+        assert [(bar.symbol, bar.bar_size) for bar in msft.drain()] == [("MSFT", "3 ticks")]
+        assert len(everything.drain()) == 8
+
+        msft.close()
+        trade(aggregator, "MSFT", 200.0, 300, 20.0)
+        assert msft.drain() == []
+
+    def test_closed_time_bars_archived(self, aggregator):
+        """Test closed time bars after the partial first one go to the live series and activity bars do not."""
+        for i in range(4):
+            trade(aggregator, "AAPL", 100.0 + i, 100, 60.0 + i)
+        trade(aggregator, "AAPL", 110.0, 50, 120.0)
+        aggregator.close_expired(now=200.0)
+
+        assert aggregator.flush() == 5
+        records = aggregator.archive.series("AAPL", "1 secs", LIVE).read()
+        # The 60s bar is the first of its series and may have missed trades
+        assert records["time"].tolist() == [61, 62, 63, 120]
+        assert records["close"].tolist() == [101.0, 102.0, 103.0, 110.0]
+        assert aggregator.archive.series("AAPL", "1 min", LIVE).read()["volume"].tolist() == [50]
+        assert not aggregator.archive.exists("AAPL", "1 secs")
+        assert not aggregator.archive.exists("AAPL", "3 ticks", LIVE)
+
+    def test_backfill_not_cut_short_by_live_bars(self, aggregator):
+        """Test historical bars for a span already covered by live bars are still archived."""
+        for i in range(3):
+            trade(aggregator, "AAPL", 100.0 + i, 100, 60.0 + i)
+        aggregator.close_expired(now=200.0)
+        aggregator.flush()
+
+        backfill = [
+            Bar(time=datetime.fromtimestamp(t), open=1.0, high=1.0, low=1.0, close=1.0, volume=10)
+            for t in (59, 60, 61, 62)
+        ]
+
+        assert aggregator.archive.append_bars("AAPL", "1 secs", backfill) == 4
+
+    def test_add_bar_size(self, aggregator):
+        """Test a bar size added later is built for symbols already seen."""
+        trade(aggregator, "AAPL", 100.0, 100, 10.0)
+        aggregator.add_bar_size("2 ticks")
+        trade(aggregator, "AAPL", 101.0, 100, 11.0)
+        trade(aggregator, "AAPL", 102.0, 100, 12.0)
+
+        assert [(bar.open, bar.close) for bar in aggregator.history("AAPL", "2 ticks")] == [(101.0, 102.0)]
+
+
+class TestMarketDataBars:
+    """Test class for bars built from a client's market data stream."""
+
+    def test_stream_feeds_bars(self, tmp_path):
+        """Test trades on a subscribed stream are aggregated into the client's bars."""
+        client = TWSClient(archive_dir=str(tmp_path), bar_sizes=["2 ticks"])
+        client.client = Mock()
+        client.client.isConnected.return_value = True
+        client._connected = True
+        subscription = client.market_data.subscribe(stock_contract("AAPL"))
+        req_id = client.client.reqMktData.call_args[0][0]
+
+        for price in (150.0, 151.0):
+            client.wrapper.tickPrice(req_id, TickTypeEnum.LAST, price, None)
+            client.wrapper.tickSize(req_id, TickTypeEnum.LAST_SIZE, 100)
+
+        bars = client.bars.history("AAPL", "2 ticks")
+        assert [(bar.open, bar.close, bar.volume) for bar in bars] == [(150.0, 151.0, 200)]
+        subscription.close()
+        client.bars.stop()
@@ -0,0 +1,132 @@
+"""
+Tests for the memory-mapped bar archive.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ..bar_archive import (
+    BAR_DTYPE,
+    HEADER_SIZE,
+    INDEX_STRIDE,
+    BarArchive,
+    BarFile,
+    BarFileError,
+)
+from ..models import Bar
+
+BASE = datetime(2023, 1, 3, 9, 30)
+
+
+def make_records(count: int, start: int = 0) -> np.ndarray:
+    """Build one-minute records whose close equals their minute offset."""
+    records = np.zeros(count, dtype=BAR_DTYPE)
+    minutes = np.arange(start, start + count)
+    records["time"] = int(BASE.timestamp()) + minutes * 60
+    records["close"] = minutes
+    return records
+
+
+class TestBarFile:
+    """Test class for BarFile functionality."""
+
+    def test_record_layout(self, tmp_path):
+        """Test the file is a fixed header followed by fixed-width records."""
+        bar_file = BarFile(tmp_path / "AAPL.bars")
+        bar_file.append(make_records(3))
+
+        assert BAR_DTYPE.itemsize == 56
+        assert (tmp_path / "AAPL.bars").stat().st_size == HEADER_SIZE + 3 * 56
+        assert len(bar_file) == 3
+
+    def test_append_skips_overlap(self, tmp_path):
+        """Test overlapping appends only add newer bars."""
+        bar_file = BarFile(tmp_path / "AAPL.bars")
+        bar_file.append(make_records(10))
+
+        written = bar_file.append(make_records(10, start=5))
+
+        assert written == 5
+        assert bar_file.read()["close"].tolist() == list(range(15))
+
+    def test_read_range(self, tmp_path):
+        """Test reading an inclusive time range across index blocks."""
+        bar_file = BarFile(tmp_path / "AAPL.bars")
+        count = 3 * INDEX_STRIDE + 10
+        # Append in uneven pieces so index entries straddle append boundaries
+        bar_file.append(make_records(1000))
+        bar_file.append(make_records(count - 1000, start=1000))
+
+        for first, last in [(0, 0), (5, 20), (1020, 2050), (3000, count - 1)]:
+            records = bar_file.read(
+                BASE + timedelta(minutes=first), BASE + timedelta(minutes=last)
+            )
+            assert records["close"].tolist() == list(range(first, last + 1))
+
+    def test_read_is_memory_mapped(self, tmp_path):
+        """Test reads return views of the file rather than copies."""
+        bar_file = BarFile(tmp_path / "AAPL.bars")
+        bar_file.append(make_records(10))
+
+        records = bar_file.read(BASE, BASE + timedelta(minutes=4))
+
+        assert isinstance(records.base, np.memmap) or isinstance(records, np.memmap)
+
+    def test_read_outside_range(self, tmp_path):
+        """Test ranges before, after or between bars."""
+        bar_file = BarFile(tmp_path / "AAPL.bars")
+        bar_file.append(make_records(10))
+
+        assert len(bar_file.read(end=BASE - timedelta(minutes=1))) == 0
+        assert len(bar_file.read(start=BASE + timedelta(hours=1))) == 0
+        assert len(bar_file.read(BASE + timedelta(seconds=10), BASE + timedelta(seconds=50))) == 0
+
+    def test_reopen_existing_file(self, tmp_path):
+        """Test an existing file is read back after reopening."""
+        BarFile(tmp_path / "AAPL.bars").append(make_records(INDEX_STRIDE + 1))
+
+        reopened = BarFile(tmp_path / "AAPL.bars")
+
+        assert len(reopened) == INDEX_STRIDE + 1
+        assert reopened.read(start=BASE + timedelta(minutes=INDEX_STRIDE))["close"].tolist() == [INDEX_STRIDE]
+
+    def test_rebuilds_missing_index(self, tmp_path):
+        """Test a lost sparse index is rebuilt from the records."""
+        BarFile(tmp_path / "AAPL.bars").append(make_records(2 * INDEX_STRIDE))
+        (tmp_path / "AAPL.idx").unlink()
+
+        reopened = BarFile(tmp_path / "AAPL.bars")
+        records = reopened.read(start=BASE + timedelta(minutes=1500))
+
+        assert records["close"][0] == 1500
+        assert (tmp_path / "AAPL.idx").stat().st_size == 2 * 8
+
+    def test_rejects_foreign_file(self, tmp_path):
+        """Test opening a file that is not a bar file."""
+        path = tmp_path / "bogus.bars"
+        path.write_bytes(b"x" * HEADER_SIZE)
+
+        with pytest.raises(BarFileError):
+            BarFile(path)
+
+
+class TestBarArchive:
+    """Test class for BarArchive functionality."""
+
+    def test_append_bars(self, tmp_path):
+        """Test Bar models are stored per symbol and bar size."""
+        archive = BarArchive(tmp_path)
+        bars = [
+            Bar(time=BASE + timedelta(minutes=i), open=1, high=2, low=0.5, close=1.5, volume=100, bar_count=7)
+            for i in range(3)
+        ]
+
+        assert archive.append_bars("aapl", "1 min", bars) == 3
+
+        assert archive.exists("AAPL", "1 min")
+        assert not archive.exists("AAPL", "5 mins")
+        records = archive.series("AAPL", "1 min").read()
+        assert records["count"].tolist() == [7, 7, 7]
+        assert records["time"][0] == int(BASE.timestamp())
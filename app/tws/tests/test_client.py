@@ -3,14 +3,92 @@ Tests for TWS client integration.
 """
 
 import pytest
+import threading
 import time
+from concurrent.futures import Future
 from datetime import datetime
 from unittest.mock import Mock, patch, MagicMock
 
-from ..client import TWSClient, TWSWrapper
+from ..client import (
+    CURRENT_TIME_KEY,
+    RequestRegistry,
+    TWSClient,
+    TWSRequestError,
+    TWSWrapper,
+)
 from ..models import TimeResponse, ConnectionStatus
 
 
+class TestRequestRegistry:
+    """Test class for request id correlation."""
+
+    def test_ids_are_monotonic(self):
+        """Test that request ids increase monotonically."""
+        registry = RequestRegistry(first_id=10)
+
+        first, _ = registry.register()
+        second = registry.next_id()
+        third, _ = registry.register()
+
+        assert (first, second, third) == (10, 11, 12)
+
+    def test_resolve_only_matching_future(self):
+        """Test that a reply resolves only the future for its request id."""
+        registry = RequestRegistry()
+        req_a, future_a = registry.register()
+        req_b, future_b = registry.register()
+
+        assert registry.resolve(req_b, "b") is True
+
+        assert future_b.result(0) == "b"
+        assert not future_a.done()
+        assert registry.is_pending(req_a)
+        assert len(registry) == 1
+
+    def test_resolve_unknown_request(self):
+        """Test resolving a request that is not pending."""
+        registry = RequestRegistry()
+
+        assert registry.resolve(42, "late") is False
+
+    def test_register_shared_joins_pending(self):
+        """Test that shared requests join the outstanding future."""
+        registry = RequestRegistry()
+
+        future, created = registry.register_shared(CURRENT_TIME_KEY)
+        joined, joined_created = registry.register_shared(CURRENT_TIME_KEY)
+
+        assert created is True
+        assert joined_created is False
+        assert joined is future
+
+    def test_fail_all(self):
+        """Test failing every outstanding request."""
+        registry = RequestRegistry()
+        _, future_a = registry.register()
+        _, future_b = registry.register()
+
+        assert registry.fail_all(ConnectionError("gone")) == 2
+
+        with pytest.raises(ConnectionError):
+            future_a.result(0)
+        with pytest.raises(ConnectionError):
+            future_b.result(0)
+        assert len(registry) == 0
+
+    def test_discard_keeps_newer_future(self):
+        """Test that discarding a stale future leaves a newer one alone."""
+        registry = RequestRegistry()
+        stale, _ = registry.register_shared(CURRENT_TIME_KEY)
+        registry.discard(CURRENT_TIME_KEY, stale)
+        fresh, _ = registry.register_shared(CURRENT_TIME_KEY)
+
+        registry.discard(CURRENT_TIME_KEY, stale)
+
+        assert registry.is_pending(CURRENT_TIME_KEY)
+        assert fresh is not stale
+
+
 class TestTWSWrapper:
     """Test class for TWS wrapper functionality."""
 
@@ -22,6 +100,7 @@ class TestTWSWrapper:
         assert wrapper.server_version is None
         assert wrapper.connection_time is None
         assert wrapper.error_message is None
+        assert wrapper.next_order_id is None
 
     def test_current_time_callback(self):
         """Test current time callback."""
@@ -35,6 +114,15 @@ class TestTWSWrapper:
         assert wrapper.current_time.month == 1
         assert wrapper.current_time.day == 1
 
+    def test_current_time_resolves_pending_request(self):
+        """Test current time callback resolves the pending time request."""
+        wrapper = TWSWrapper()
+        future, _ = wrapper.requests.register_shared(CURRENT_TIME_KEY)
+
+        wrapper.currentTime(int(datetime(2023, 1, 1, 12, 0, 0).timestamp()))
+
+        assert future.result(0) == datetime(2023, 1, 1, 12, 0, 0)
+
     def test_error_callback(self):
         """Test error callback."""
         wrapper = TWSWrapper()
@@ -43,40 +131,79 @@ class TestTWSWrapper:
 
         assert wrapper.error_message == "TWS Error 502: Test error message"
 
+    def test_error_fails_matching_request(self):
+        """Test error callback fails only the request it refers to."""
+        wrapper = TWSWrapper()
+        req_a, future_a = wrapper.requests.register()
+        req_b, future_b = wrapper.requests.register()
+
+        wrapper.error(req_a, 200, "No security definition has been found")
+
+        with pytest.raises(TWSRequestError) as exc_info:
+            future_a.result(0)
+        assert exc_info.value.error_code == 200
+        assert not future_b.done()
+
+    def test_warning_does_not_fail_request(self):
+        """Test informational notices leave requests pending."""
+        wrapper = TWSWrapper()
+        req_id, future = wrapper.requests.register()
+
+        wrapper.error(req_id, 2104, "Market data farm connection is OK")
+
+        assert not future.done()
+
     def test_connection_lost_error(self):
         """Test connection lost error codes."""
         wrapper = TWSWrapper()
+        _, future = wrapper.requests.register()
 
         wrapper.error(1, 1100, "Connection lost")
 
         assert "Connection lost" in wrapper.error_message
+        with pytest.raises(TWSRequestError):
+            future.result(0)
 
-    def test_connect_ack_callback(self):
-        """Test connection acknowledgment callback."""
+    def test_connectivity_restored_keeps_pending(self):
+        """Test the connectivity restored notices do not fail requests in flight."""
         wrapper = TWSWrapper()
+        _, future = wrapper.requests.register()
 
-        wrapper.connectAck()
+        wrapper.error(-1, 1101, "Connectivity between IB and TWS has been restored - data lost.")
+        wrapper.error(-1, 1102, "Connectivity between IB and TWS has been restored - data maintained.")
 
-        assert wrapper.connection_time is not None
+        assert not future.done()
 
-    def test_wait_for_time(self):
-        """Test waiting for time response."""
+    def test_connection_closed_fails_pending(self):
+        """Test connection closed callback fails pending requests."""
         wrapper = TWSWrapper()
+        _, future = wrapper.requests.register()
 
-        # Should timeout immediately since event is not set
-        result = wrapper.wait_for_time(0.1)
-        assert result is False
+        wrapper.connectionClosed()
 
-    def test_reset_time_event(self):
-        """Test resetting time event."""
+        with pytest.raises(ConnectionError):
+            future.result(0)
+
+    def test_next_valid_id_completes_handshake(self):
+        """Test nextValidId marks the handshake as complete."""
         wrapper = TWSWrapper()
-        wrapper.current_time = datetime.now()
-        wrapper.error_message = "Some error"
 
-        wrapper.reset_time_event()
+        assert wrapper.wait_until_ready(0) is False
+        wrapper.nextValidId(100)
 
-        assert wrapper.current_time is None
-        assert wrapper.error_message is None
+        assert wrapper.next_order_id == 100
+        assert wrapper.wait_until_ready(0) is True
+
+        wrapper.reset_handshake()
+        assert wrapper.wait_until_ready(0) is False
+
+    def test_connect_ack_callback(self):
+        """Test connection acknowledgment callback."""
+        wrapper = TWSWrapper()
+
+        wrapper.connectAck()
+
+        assert wrapper.connection_time is not None
 
 
 class TestTWSClient:
@@ -98,25 +225,46 @@ class TestTWSClient:
         assert client.host == "127.0.0.1"
         assert client.port == 7500
         assert client.client_id == 1
+        assert client.connect_timeout == 5.0
 
-    @patch('app.tws.client.EClient')
+    @patch('app.tws.client.PacedEClient')
     def test_connect_success(self, mock_eclient_class):
         """Test successful connection."""
         mock_eclient = Mock()
-        mock_eclient.connect.return_value = None
         mock_eclient.isConnected.return_value = True
         mock_eclient_class.return_value = mock_eclient
 
         client = TWSClient()
         client.client = mock_eclient
+        # TWS completes the handshake by sending nextValidId
+        mock_eclient.connect.side_effect = lambda *args: client.wrapper.nextValidId(1)
 
         result = client.connect()
 
         assert result is True
         assert client._connected is True
+        assert client.wrapper.next_order_id == 1
+        assert client.connect_latency is not None
+        assert client.connect_latency < 1.0
         mock_eclient.connect.assert_called_once_with("127.0.0.1", 7500, 1)
 
-    @patch('app.tws.client.EClient')
+    @patch('app.tws.client.PacedEClient')
+    def test_connect_handshake_timeout(self, mock_eclient_class):
+        """Test connection when TWS never completes the handshake."""
+        mock_eclient = Mock()
+        mock_eclient.isConnected.return_value = True
+        mock_eclient_class.return_value = mock_eclient
+
+        client = TWSClient(connect_timeout=0.05)
+        client.client = mock_eclient
+
+        result = client.connect()
+
+        assert result is False
+        assert client._connected is False
+        mock_eclient.disconnect.assert_called_once()
+
+    @patch('app.tws.client.PacedEClient')
     def test_connect_failure(self, mock_eclient_class):
         """Test connection failure."""
         mock_eclient = Mock()
@@ -132,7 +280,7 @@ class TestTWSClient:
         assert result is False
         assert client._connected is False
 
-    @patch('app.tws.client.EClient')
+    @patch('app.tws.client.PacedEClient')
     def test_connect_exception(self, mock_eclient_class):
         """Test connection with exception."""
         mock_eclient = Mock()
@@ -180,6 +328,7 @@ class TestTWSClient:
         client._connected = True
         client.wrapper.connection_time = datetime(2023, 1, 1, 12, 0, 0)
         client.wrapper.error_message = None
+        client.connect_latency = 0.025
         client.client = Mock()
         client.client.isConnected.return_value = True
 
@@ -190,6 +339,7 @@ class TestTWSClient:
         assert status.host == "test.host"
         assert status.port == 1234
         assert status.client_id == 5
+        assert status.connect_latency_ms == pytest.approx(25.0)
 
     def test_request_current_time_not_connected(self):
         """Test requesting current time when not connected."""
@@ -200,35 +350,35 @@ class TestTWSClient:
 
         assert result is None
 
-    @patch('app.tws.client.EClient')
+    @patch('app.tws.client.PacedEClient')
     def test_request_current_time_success(self, mock_eclient_class):
         """Test successful current time request."""
         # Setup mocks
         mock_eclient = Mock()
         mock_eclient.isConnected.return_value = True
-        mock_eclient.reqCurrentTime.return_value = None
         mock_eclient_class.return_value = mock_eclient
 
         client = TWSClient()
         client.client = mock_eclient
         client._connected = True
 
-        # Mock the wrapper to simulate receiving time
+        # Simulate TWS answering the request
         test_time = datetime(2023, 1, 1, 12, 0, 0)
-        client.wrapper.current_time = test_time
+        mock_eclient.reqCurrentTime.side_effect = lambda: client.wrapper.currentTime(
+            int(test_time.timestamp())
+        )
         client.wrapper.server_version = 123
         client.wrapper.connection_time = datetime(2023, 1, 1, 11, 59, 0)
 
-        with patch.object(client.wrapper, 'wait_for_time', return_value=True):
-            with patch.object(client.wrapper, 'reset_time_event'):
-                result = client.request_current_time()
+        result = client.request_current_time()
 
         assert result is not None
         assert isinstance(result, TimeResponse)
         assert result.current_time == test_time
         assert result.server_version == 123
+        assert len(client.requests) == 0
 
-    @patch('app.tws.client.EClient')
+    @patch('app.tws.client.PacedEClient')
     def test_request_current_time_timeout(self, mock_eclient_class):
         """Test current time request timeout."""
         mock_eclient = Mock()
@@ -239,13 +389,12 @@ class TestTWSClient:
         client.client = mock_eclient
         client._connected = True
 
-        with patch.object(client.wrapper, 'wait_for_time', return_value=False):
-            with patch.object(client.wrapper, 'reset_time_event'):
-                result = client.request_current_time()
+        result = client.request_current_time(timeout=0.05)
 
         assert result is None
+        assert not client.requests.is_pending(CURRENT_TIME_KEY)
 
-    @patch('app.tws.client.EClient')
+    @patch('app.tws.client.PacedEClient')
     def test_request_current_time_with_error(self, mock_eclient_class):
         """Test current time request with error response."""
         mock_eclient = Mock()
@@ -255,14 +404,80 @@ class TestTWSClient:
         client = TWSClient()
         client.client = mock_eclient
         client._connected = True
-        client.wrapper.error_message = "Some error occurred"
+        mock_eclient.reqCurrentTime.side_effect = lambda: client.wrapper.error(
+            -1, 1100, "Connectivity between IB and TWS has been lost"
+        )
 
-        with patch.object(client.wrapper, 'wait_for_time', return_value=True):
-            with patch.object(client.wrapper, 'reset_time_event'):
-                result = client.request_current_time()
+        result = client.request_current_time()
 
         assert result is None
 
+    def test_concurrent_current_time_requests_share_reply(self):
+        """Test concurrent callers share one outstanding reqCurrentTime."""
+        client = TWSClient()
+        client.client = Mock()
+        client.client.isConnected.return_value = True
+        client._connected = True
+
+        results = []
+        callers = [
+            threading.Thread(target=lambda: results.append(client.request_current_time(2.0)))
+            for _ in range(5)
+        ]
+        for caller in callers:
+            caller.start()
+        while client.client.reqCurrentTime.call_count == 0:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        client.wrapper.currentTime(int(datetime(2023, 1, 1, 12, 0, 0).timestamp()))
+        for caller in callers:
+            caller.join()
+
+        client.client.reqCurrentTime.assert_called_once()
+        assert len(results) == 5
+        assert all(r.current_time == datetime(2023, 1, 1, 12, 0, 0) for r in results)
+
+    def test_submit_correlates_by_request_id(self):
+        """Test submitted requests are resolved by their own request id."""
+        client = TWSClient()
+        client.client = Mock()
+        client.client.isConnected.return_value = True
+        client._connected = True
+        sent = []
+
+        req_a, future_a = client.submit(sent.append)
+        req_b, future_b = client.submit(sent.append)
+        client.wrapper.requests.resolve(req_b, "reply b")
+
+        assert sent == [req_a, req_b]
+        assert req_b > req_a
+        assert future_b.result(0) == "reply b"
+        assert not future_a.done()
+
+    def test_submit_not_connected(self):
+        """Test submitting a request while disconnected fails its future."""
+        client = TWSClient()
+        send = Mock()
+
+        _, future = client.submit(send)
+
+        send.assert_not_called()
+        with pytest.raises(ConnectionError):
+            future.result(0)
+
+    def test_disconnect_fails_pending_requests(self):
+        """Test disconnect fails requests that are still outstanding."""
+        client = TWSClient()
+        client.client = Mock()
+        client.client.isConnected.return_value = True
+        client._connected = True
+        _, future = client.submit(lambda req_id: None)
+
+        client.disconnect()
+
+        with pytest.raises(ConnectionError):
+            future.result(0)
+
     def test_context_manager_success(self):
         """Test using client as context manager with successful connection."""
         with patch.object(TWSClient, 'connect', return_value=True):
@@ -281,7 +496,7 @@ class TestTWSClient:
 @pytest.fixture
 def mock_tws_client():
     """Fixture providing a mocked TWS client."""
-    with patch('app.tws.client.EClient'):
+    with patch('app.tws.client.PacedEClient'):
         client = TWSClient()
         client.client = Mock()
         return client
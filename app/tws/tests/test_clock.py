@@ -0,0 +1,164 @@
+"""
+Tests for server clock tracking.
+"""
+
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from ..client import TWSClient
+from ..clock import ClockSample, ClockSync, estimate_drift
+from ..simulator import TWSSimulator
+
+
+class FakeClock:
+    """Settable monotonic clock."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    """Fixture providing a settable monotonic clock."""
+    return FakeClock()
+
+
+@pytest.fixture
+def clock_sync(fake_clock):
+    """Fixture providing a clock sync over a mocked client."""
+    return ClockSync(Mock(spec=TWSClient), max_drift_ppm=0.0, monotonic=fake_clock)
+
+
+def server_sample(offset: float, sent: float, rtt: float, stamp_at: float = 0.5) -> ClockSample:
+    """Sample of a server whose clock is monotonic + offset, stamped part-way through the RTT."""
+    stamped = sent + rtt * stamp_at
+    return ClockSample(sent, sent + rtt, float(int(stamped + offset)))
+
+
+class TestClockSample:
+    """Test class for single-sample offset bounds."""
+
+    def test_bounds_cover_rtt_and_resolution(self):
+        """Test a sample bounds the offset by its RTT plus one second."""
+        sample = ClockSample(sent=10.0, received=10.2, server_time=1000.0)
+
+        low, high = sample.offset_bounds()
+
+        assert low == pytest.approx(989.8)
+        assert high == pytest.approx(991.0)
+        assert sample.rtt == pytest.approx(0.2)
+
+
+class TestClockSync:
+    """Test class for offset estimation."""
+
+    def test_not_synced_without_samples(self, clock_sync):
+        """Test no time is served before the first sample."""
+        assert not clock_sync.synced
+        assert clock_sync.now() is None
+        assert clock_sync.current_time() is None
+        assert clock_sync.status().synced is False
+
+    def test_samples_narrow_uncertainty(self, clock_sync):
+        """Test samples at different phases of the server second tighten the bound."""
+        offset = 1_700_000_000.37
+        clock_sync.add_sample(server_sample(offset, 100.0, 0.002))
+        first = clock_sync.offset()[1]
+
+        for sent in (100.3, 100.6, 100.9, 101.2):
+            clock_sync.add_sample(server_sample(offset, sent, 0.002))
+        estimate, uncertainty = clock_sync.offset()
+
+        assert first == pytest.approx(0.501)
+        assert uncertainty < 0.2
+        assert abs(estimate - offset) <= uncertainty
+
+    def test_slow_samples_are_filtered(self, clock_sync):
+        """Test samples far above the minimum RTT do not widen or skew the estimate."""
+        offset = 5000.0
+        for sent in (10.0, 10.3, 10.6, 10.9):
+            clock_sync.add_sample(server_sample(offset, sent, 0.002))
+        before = clock_sync.offset()
+
+        # Queued behind other traffic and stamped at the start of its long trip
+        clock_sync.add_sample(server_sample(offset, 11.2, 0.8, stamp_at=0.0))
+
+        assert clock_sync.rejected == 1
+        assert clock_sync.offset()[1] == pytest.approx(before[1], abs=1e-9)
+
+    def test_now_is_local_clock_plus_offset(self, clock_sync, fake_clock):
+        """Test the served time advances with the local clock."""
+        offset = 2000.25
+        for sent in (10.0, 10.3, 10.6, 10.9):
+            clock_sync.add_sample(server_sample(offset, sent, 0.001))
+
+        fake_clock.now = 500.0
+        server_time, uncertainty = clock_sync.now()
+
+        assert server_time == pytest.approx(500.0 + offset, abs=uncertainty)
+
+    def test_uncertainty_grows_with_age(self, fake_clock):
+        """Test the drift allowance widens the bound as the estimate ages."""
+        clock_sync = ClockSync(Mock(spec=TWSClient), max_drift_ppm=100.0, monotonic=fake_clock)
+        clock_sync.add_sample(ClockSample(1000.0, 1000.002, 5000.0))
+
+        fake_clock.now = 1000.001
+        fresh = clock_sync.offset()[1]
+        fake_clock.now = 2000.0
+        aged = clock_sync.offset()[1]
+
+        assert aged - fresh == pytest.approx(0.1, rel=0.01)
+
+    def test_clock_step_resets(self, clock_sync):
+        """Test samples contradicting the history restart the estimate."""
+        for sent in (10.0, 10.3, 10.6):
+            clock_sync.add_sample(server_sample(5000.0, sent, 0.001))
+
+        clock_sync.add_sample(server_sample(5060.0, 11.0, 0.001))
+
+        estimate, uncertainty = clock_sync.offset()
+        assert clock_sync.status().samples == 1
+        assert abs(estimate - 5060.0) <= uncertainty
+
+    def test_drift_estimate(self):
+        """Test the drift fit recovers a constant rate and needs enough history."""
+        samples = [ClockSample(t, t, 100.0 + t * 1.001) for t in range(0, 1200, 60)]
+
+        assert estimate_drift(samples, min_span=600.0) == pytest.approx(0.001, rel=0.05)
+        assert estimate_drift(samples[:5], min_span=600.0) == 0.0
+
+
+class TestClockSyncAgainstSimulator:
+    """Test class for sampling a TWS simulator."""
+
+    def test_tracks_server_time(self):
+        """Test samples from the simulator yield the wall-clock time."""
+        with TWSSimulator() as simulator:
+            client = TWSClient(port=simulator.port)
+            assert client.connect(timeout=5.0)
+            clock_sync = ClockSync(client, burst_spacing=0.1)
+            try:
+                for _ in range(4):
+                    assert clock_sync.sample() is not None
+                    time.sleep(0.13)
+                response = clock_sync.current_time()
+                now = time.time()
+            finally:
+                client.disconnect()
+
+        assert response is not None
+        assert abs(response.current_time.timestamp() - now) <= response.uncertainty_ms / 1000 + 0.05
+        assert response.uncertainty_ms < 1000
+
+    def test_skips_sample_while_request_outstanding(self):
+        """Test a reqCurrentTime already in flight is not used as a sample."""
+        client = TWSClient()
+        client.is_connected = Mock(return_value=True)
+        client.requests.register_shared("currentTime")
+
+        assert ClockSync(client).sample() is None
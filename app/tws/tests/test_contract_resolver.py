@@ -0,0 +1,261 @@
+"""
+Tests for contract resolution and the SQLite contract cache.
+"""
+
+import threading
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+from ibapi.contract import ContractDetails
+
+from ..client import TWSClient
+from ..contract_resolver import ContractCache, ContractResolver, resolved_contract
+from ..contracts import contract_key, stock_contract
+from ..errors import NO_SECURITY_DEFINITION, TWSRequestError
+from ..models import ContractInfo
+from ..simulator import TWSSimulator
+
+
+class FakeClock:
+    """Settable wall clock."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Fixture providing a fake wall clock."""
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    """Fixture providing a contract cache in a temporary directory."""
+    cache = ContractCache(tmp_path / "contracts.sqlite3", ttl=3600, clock=clock)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def client(cache):
+    """Fixture providing a connected TWS client with a mocked EClient."""
+    client = TWSClient()
+    client.client = Mock()
+    client.client.isConnected.return_value = True
+    client._connected = True
+    client.contracts = ContractResolver(client, cache=cache, timeout=0.2)
+    return client
+
+
+def details(symbol: str, con_id: int) -> ContractDetails:
+    """Build the ContractDetails TWS would send for a stock."""
+    item = ContractDetails()
+    item.contract = stock_contract(symbol)
+    item.contract.conId = con_id
+    item.contract.primaryExchange = "NASDAQ"
+    item.longName = f"{symbol} INC"
+    item.minTick = 0.01
+    return item
+
+
+def reply(client: TWSClient, *items: ContractDetails) -> None:
+    """Answer the last reqContractDetails with the given contracts."""
+    req_id = client.client.reqContractDetails.call_args[0][0]
+    for item in items:
+        client.wrapper.contractDetails(req_id, item)
+    client.wrapper.contractDetailsEnd(req_id)
+
+
+def info(symbol: str, con_id: int) -> ContractInfo:
+    return ContractInfo(
+        con_id=con_id, symbol=symbol, sec_type="STK", exchange="SMART", currency="USD",
+        resolved_at=datetime.now(),
+    )
+
+
+class TestContractCache:
+    """Test class for the SQLite contract cache."""
+
+    def test_store_and_load(self, cache):
+        """Test a stored contract is loaded back with its expiry."""
+        key = contract_key(stock_contract("AAPL"))
+        expires = cache.store(key, info("AAPL", 265598))
+
+        loaded, loaded_expires = cache.load(key)
+
+        assert loaded.con_id == 265598
+        assert loaded_expires == expires == cache.now() + 3600
+
+    def test_expired_entries_are_misses(self, cache, clock):
+        """Test entries older than the TTL are not served and can be purged."""
+        key = contract_key(stock_contract("AAPL"))
+        cache.store(key, info("AAPL", 265598))
+
+        clock.now += 3601
+
+        assert cache.load(key) is None
+        assert cache.purge() == 1
+
+    def test_lazy_database(self, tmp_path):
+        """Test the database file is only created on first use."""
+        ContractCache(tmp_path / "lazy.sqlite3")
+
+        assert not (tmp_path / "lazy.sqlite3").exists()
+
+    def test_shared_between_connections(self, tmp_path, cache, clock):
+        """Test a second cache on the same file sees stored contracts."""
+        key = contract_key(stock_contract("AAPL"))
+        cache.store(key, info("AAPL", 265598))
+        other = ContractCache(tmp_path / "contracts.sqlite3", clock=clock)
+
+        assert other.load(key)[0].con_id == 265598
+        other.close()
+
+
+class TestContractResolver:
+    """Test class for ContractResolver with a mocked EClient."""
+
+    def test_resolve_requests_once(self, client):
+        """Test a resolved contract is served from memory afterwards."""
+        future = client.contracts.resolve_async("aapl")
+        reply(client, details("AAPL", 265598))
+
+        assert future.result(1).con_id == 265598
+        assert client.contracts.resolve("AAPL").long_name == "AAPL INC"
+        client.client.reqContractDetails.assert_called_once()
+        assert client.contracts.memory_hits == 1
+
+    def test_concurrent_lookups_share_request(self, client):
+        """Test concurrent lookups of one contract send a single request."""
+        futures = [client.contracts.resolve_async("AAPL") for _ in range(5)]
+
+        reply(client, details("AAPL", 265598))
+
+        client.client.reqContractDetails.assert_called_once()
+        assert {f.result(1).con_id for f in futures} == {265598}
+        assert client.contracts.joined == 4
+
+    def test_disk_cache_survives_restart(self, client, cache):
+        """Test a new resolver over the same cache does not ask TWS again."""
+        client.contracts.resolve_async("AAPL")
+        reply(client, details("AAPL", 265598))
+        client.client.reqContractDetails.reset_mock()
+
+        restarted = ContractResolver(client, cache=cache)
+
+        assert restarted.lookup("AAPL").con_id == 265598
+        assert restarted.resolve("AAPL").con_id == 265598
+        client.client.reqContractDetails.assert_not_called()
+        assert (restarted.disk_hits, restarted.memory_hits) == (1, 1)
+
+    def test_lookup_never_requests(self, client):
+        """Test lookup only consults the caches."""
+        assert client.contracts.lookup("AAPL") is None
+        client.client.reqContractDetails.assert_not_called()
+
+    def test_unknown_symbol_is_not_cached(self, client):
+        """Test a rejected lookup fails every waiter and is retried later."""
+        future = client.contracts.resolve_async("NOPE")
+        req_id = client.client.reqContractDetails.call_args[0][0]
+        client.wrapper.error(req_id, NO_SECURITY_DEFINITION, "No security definition has been found")
+
+        with pytest.raises(TWSRequestError):
+            future.result(1)
+        client.contracts.resolve_async("NOPE")
+        assert client.client.reqContractDetails.call_count == 2
+
+    def test_ambiguous_uses_first_match(self, client):
+        """Test the first of several matching contracts is used."""
+        future = client.contracts.resolve_async("AAPL")
+        reply(client, details("AAPL", 1), details("AAPL", 2))
+
+        assert future.result(1).con_id == 1
+
+    def test_timeout_releases_lookup(self, client):
+        """Test a lookup TWS never answers times out and can be retried."""
+        with pytest.raises(TimeoutError):
+            client.contracts.resolve("AAPL", timeout=0.05)
+
+        assert len(client.requests) == 0
+        client.contracts.resolve_async("AAPL")
+        assert client.client.reqContractDetails.call_count == 2
+
+    def test_not_connected(self, client):
+        """Test lookups fail fast while disconnected."""
+        client._connected = False
+
+        with pytest.raises(ConnectionError):
+            client.contracts.resolve("AAPL")
+
+    def test_lru_evicts_least_recent(self, client, clock):
+        """Test the memory cache keeps only the most recently used contracts."""
+        resolver = ContractResolver(client, cache=client.contracts.cache, max_entries=2)
+        for con_id, symbol in enumerate(("AAPL", "MSFT", "IBM")):
+            resolver.resolve_async(symbol)
+            reply(client, details(symbol, con_id))
+
+        assert len(resolver) == 2
+        assert resolver.resolve("MSFT").con_id == 1
+        assert resolver.memory_hits == 1
+        assert resolver.lookup("AAPL").con_id == 0
+        assert resolver.disk_hits == 1
+
+    def test_memory_entries_expire(self, client, clock):
+        """Test the memory cache honours the TTL."""
+        client.contracts.resolve_async("AAPL")
+        reply(client, details("AAPL", 265598))
+
+        clock.now += 3601
+
+        assert client.contracts.lookup("AAPL") is None
+
+    def test_resolved_contract(self):
+        """Test a resolved contract is identified by conId."""
+        contract = resolved_contract(info("AAPL", 265598))
+
+        assert (contract.conId, contract.symbol, contract.secType) == (265598, "AAPL", "STK")
+
+
+class TestContractResolverIntegration:
+    """Test class for ContractResolver against the simulator."""
+
+    def test_prewarm(self, tmp_path):
+        """Test prewarming resolves a symbol list in one burst and skips unknown symbols."""
+        with TWSSimulator(unknown_symbols=["NOPE"]) as simulator:
+            client = TWSClient(port=simulator.port, contract_db=str(tmp_path / "contracts.sqlite3"))
+            assert client.connect(timeout=5.0)
+            try:
+                resolved = client.contracts.prewarm(["AAPL", "MSFT", "IBM", "NOPE", "AAPL"])
+
+                assert resolved == 3
+                assert simulator.contract_requests == 4
+                assert client.contracts.lookup("MSFT").con_id == simulator.con_id("MSFT")
+                assert client.contracts.lookup("MSFT").primary_exchange == "NASDAQ"
+            finally:
+                client.disconnect()
+
+    def test_concurrent_threads_share_request(self, tmp_path):
+        """Test threads resolving the same symbol at once cause one TWS request."""
+        with TWSSimulator() as simulator:
+            client = TWSClient(port=simulator.port, contract_db=str(tmp_path / "contracts.sqlite3"))
+            assert client.connect(timeout=5.0)
+            try:
+                results = []
+                threads = [
+                    threading.Thread(target=lambda: results.append(client.contracts.resolve("AAPL")))
+                    for _ in range(8)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+                assert len({r.con_id for r in results}) == 1
+                assert simulator.contract_requests == 1
+            finally:
+                client.disconnect()
@@ -0,0 +1,196 @@
+"""
+Tests for market depth books and subscriptions.
+"""
+
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from ..client import TWSClient
+from ..contracts import stock_contract
+from ..depth import ASK, BID, DELETE, INSERT, UPDATE, BookSide
+from ..simulator import TWSSimulator
+
+
+@pytest.fixture
+def client():
+    """Fixture providing a connected TWS client with a mocked EClient."""
+    client = TWSClient()
+    client.client = Mock()
+    client.client.isConnected.return_value = True
+    client._connected = True
+    return client
+
+
+def levels(side: BookSide):
+    prices, sizes, _ = side.levels()
+    return list(zip(prices, sizes))
+
+
+class TestBookSide:
+    """Test class for the fixed-size level arrays."""
+
+    def test_insert_shifts_levels_down(self):
+        """Test inserting above existing levels moves them one row deeper."""
+        side = BookSide(5)
+        side.apply(0, INSERT, 100.0, 1, "")
+        side.apply(1, INSERT, 99.0, 2, "")
+
+        assert side.apply(0, INSERT, 101.0, 3, "") == 0
+        assert levels(side) == [(101.0, 3), (100.0, 1), (99.0, 2)]
+
+    def test_insert_into_full_side_drops_deepest(self):
+        """Test a full side keeps its size by dropping the last level."""
+        side = BookSide(3)
+        for position, price in enumerate((100.0, 99.0, 98.0)):
+            side.apply(position, INSERT, price, 1, "")
+
+        side.apply(1, INSERT, 99.5, 5, "")
+
+        assert levels(side) == [(100.0, 1), (99.5, 5), (99.0, 1)]
+
+    def test_update_and_delete(self):
+        """Test updates write in place and deletes shift deeper levels up."""
+        side = BookSide(5)
+        for position, price in enumerate((100.0, 99.0, 98.0)):
+            side.apply(position, INSERT, price, 1, "NSDQ")
+
+        assert side.apply(2, UPDATE, 98.0, 7, "ARCA") == 2
+        assert side.apply(0, DELETE, 0.0, 0, "") == 0
+
+        assert levels(side) == [(99.0, 1), (98.0, 7)]
+        assert side.levels()[2] == ["NSDQ", "ARCA"]
+
+    def test_update_past_end_adds_level(self):
+        """Test an update for a position not yet in the book appends it."""
+        side = BookSide(5)
+
+        side.apply(3, UPDATE, 100.0, 1, "")
+
+        assert levels(side) == [(100.0, 1)]
+
+    def test_out_of_range_ignored(self):
+        """Test positions outside the book and deletes of missing levels change nothing."""
+        side = BookSide(2)
+
+        assert side.apply(5, INSERT, 100.0, 1, "") == 2
+        assert side.apply(0, DELETE, 0.0, 0, "") == 2
+        assert side.depth == 0
+
+
+class TestDepthManager:
+    """Test class for DepthManager with a mocked EClient."""
+
+    def test_one_request_per_contract(self, client):
+        """Test reqMktDepth is sent once and cancelled after the last subscriber."""
+        first = client.depth.subscribe(stock_contract("AAPL"), rows=5)
+        second = client.depth.subscribe(stock_contract("AAPL"))
+
+        req_id, contract, rows, smart, _ = client.client.reqMktDepth.call_args[0]
+        assert (contract.symbol, rows, smart) == ("AAPL", 5, False)
+        client.client.reqMktDepth.assert_called_once()
+
+        first.close()
+        client.client.cancelMktDepth.assert_not_called()
+        second.close()
+        client.client.cancelMktDepth.assert_called_once_with(req_id, False)
+        assert client.depth.subscriber_counts() == {}
+
+    def test_diff_covers_changed_levels(self, client):
+        """Test a diff holds the levels from the shallowest change down."""
+        subscription = client.depth.subscribe(stock_contract("AAPL"), rows=5)
+        req_id = client.client.reqMktDepth.call_args[0][0]
+        for position, price in enumerate((100.0, 99.9, 99.8)):
+            client.wrapper.updateMktDepth(req_id, position, INSERT, BID, price, 100)
+        client.wrapper.updateMktDepth(req_id, 0, INSERT, ASK, 100.1, 200)
+        subscription.snapshot()
+
+        client.wrapper.updateMktDepth(req_id, 2, UPDATE, BID, 99.8, 300)
+        client.wrapper.updateMktDepth(req_id, 1, UPDATE, BID, 99.9, 400)
+        diff = subscription.diff()
+
+        assert diff["bids"] == {"from": 1, "price": [99.9, 99.8], "size": [400.0, 300.0], "market_maker": ["", ""]}
+        assert diff["asks"]["from"] == 1
+        assert diff["asks"]["price"] == []
+        assert subscription.diff() is None
+
+    def test_diff_after_delete_truncates(self, client):
+        """Test a delete off the end is reported as a shorter side."""
+        subscription = client.depth.subscribe(stock_contract("AAPL"), rows=5)
+        req_id = client.client.reqMktDepth.call_args[0][0]
+        for position, price in enumerate((100.0, 99.9)):
+            client.wrapper.updateMktDepth(req_id, position, INSERT, BID, price, 100)
+        subscription.diff()
+
+        client.wrapper.updateMktDepth(req_id, 1, DELETE, BID, 0.0, 0)
+
+        assert subscription.diff()["bids"] == {"from": 1, "price": [], "size": [], "market_maker": []}
+
+    def test_notify_once_per_diff(self, client):
+        """Test consumers are woken on the first change after each diff only."""
+        notify = Mock()
+        subscription = client.depth.subscribe(stock_contract("AAPL"), notify=notify)
+        req_id = client.client.reqMktDepth.call_args[0][0]
+
+        for size in range(5):
+            client.wrapper.updateMktDepth(req_id, 0, UPDATE, BID, 100.0, size)
+        assert notify.call_count == 1
+
+        subscription.diff()
+        client.wrapper.updateMktDepth(req_id, 0, UPDATE, BID, 100.0, 9)
+        assert notify.call_count == 2
+
+    def test_level2_market_maker(self, client):
+        """Test L2 updates record the market maker of each level."""
+        subscription = client.depth.subscribe(stock_contract("AAPL"), smart=True)
+        req_id = client.client.reqMktDepth.call_args[0][0]
+
+        client.wrapper.updateMktDepthL2(req_id, 0, "ARCA", INSERT, ASK, 100.1, 200, True)
+
+        assert subscription.snapshot()["asks"]["market_maker"] == ["ARCA"]
+
+    def test_resubscribe_clears_books(self, client):
+        """Test a reconnect re-requests the book under a new id and starts it afresh."""
+        subscription = client.depth.subscribe(stock_contract("AAPL"))
+        old_req_id = client.client.reqMktDepth.call_args[0][0]
+        client.wrapper.updateMktDepth(old_req_id, 0, INSERT, BID, 100.0, 100)
+        subscription.diff()
+
+        assert client.depth.resubscribe() == 1
+
+        new_req_id = client.client.reqMktDepth.call_args[0][0]
+        assert new_req_id != old_req_id
+        client.wrapper.updateMktDepth(old_req_id, 0, INSERT, BID, 50.0, 100)
+        diff = subscription.diff()
+        assert (diff["bids"]["from"], diff["bids"]["price"]) == (0, [])
+
+    def test_subscribe_not_connected(self):
+        """Test subscribing fails fast while disconnected."""
+        with pytest.raises(ConnectionError):
+            TWSClient().depth.subscribe(stock_contract("AAPL"))
+
+
+class TestDepthAgainstSimulator:
+    """Test class for order books fed by the simulator."""
+
+    @pytest.mark.parametrize("smart", [False, True])
+    def test_book_follows_updates(self, smart):
+        """Test the book stays full and ordered under a fast update stream."""
+        with TWSSimulator(depth_rate=5000) as simulator:
+            client = TWSClient(port=simulator.port)
+            assert client.connect(timeout=5.0)
+            try:
+                with client.depth.subscribe(stock_contract("AAPL"), rows=5, smart=smart) as subscription:
+                    deadline = time.monotonic() + 5
+                    while subscription.book.updates < 1000 and time.monotonic() < deadline:
+                        time.sleep(0.05)
+                    snapshot = subscription.snapshot()
+
+                assert subscription.book.updates >= 1000
+                asks, bids = snapshot["asks"]["price"], snapshot["bids"]["price"]
+                assert asks == sorted(asks) and bids == sorted(bids, reverse=True)
+                assert bids[0] < asks[0]
+                assert all(snapshot["asks"]["market_maker"]) == smart
+            finally:
+                client.disconnect()
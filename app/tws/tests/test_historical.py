@@ -0,0 +1,240 @@
+"""
+Tests for historical bar fetching, pacing and caching.
+"""
+
+from datetime import date, datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+from ibapi.common import BarData
+
+from ..bar_archive import BarArchive
+from ..client import TWSClient
+from ..contracts import stock_contract
+from ..historical import (
+    BarCache,
+    HistoricalDataService,
+    HistoricalPacer,
+    parse_duration,
+    plan_chunks,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_bar(day: date, close: float) -> BarData:
+    """Build an ibapi bar at 10:00 on the given day."""
+    bar = BarData()
+    bar.date = str(int(datetime(day.year, day.month, day.day, 10, 0).timestamp()))
+    bar.open = bar.high = bar.low = bar.close = close
+    bar.volume = 100
+    bar.barCount = 5
+    bar.average = close
+    return bar
+
+
+@pytest.fixture
+def client():
+    """Fixture providing a connected TWS client that answers historical requests."""
+    client = TWSClient()
+    client.client = Mock()
+    client.client.isConnected.return_value = True
+    client._connected = True
+
+    def answer(req_id, contract, end, duration, bar_size, what, rth, fmt, keep_up, options):
+        day = datetime.strptime(end.split()[0], "%Y%m%d").date()
+        if day.weekday() >= 5:
+            client.wrapper.error(req_id, 162, "HMDS query returned no data")
+            return
+        client.wrapper.historicalData(req_id, make_bar(day, float(day.day)))
+        client.wrapper.historicalDataEnd(req_id, "", "")
+
+    client.client.reqHistoricalData.side_effect = answer
+    return client
+
+
+class TestChunking:
+    """Test class for duration parsing and chunk planning."""
+
+    def test_parse_duration(self):
+        """Test converting TWS duration strings."""
+        assert parse_duration("5 D") == timedelta(days=5)
+        assert parse_duration("2 W") == timedelta(days=14)
+        assert parse_duration("3600 S") == timedelta(hours=1)
+        with pytest.raises(ValueError):
+            parse_duration("five days")
+
+    def test_intraday_chunks_by_day(self):
+        """Test intraday ranges are split into one request per day."""
+        chunks = plan_chunks(datetime(2023, 1, 4, 16, 0), "3 D", "1 min")
+
+        assert [c.day for c in chunks] == [date(2023, 1, d) for d in (1, 2, 3, 4)]
+        assert chunks[0].end == "20230101 23:59:59"
+        assert all(c.duration == "1 D" for c in chunks)
+
+    @pytest.mark.parametrize("bar_size, span", [("1 secs", 1800), ("5 secs", 3600)])
+    def test_second_bars_split_within_day(self, bar_size, span):
+        """Test second bars are requested in slices IB accepts, only where they overlap the range."""
+        chunks = plan_chunks(datetime(2023, 1, 4, 11, 0), "7200 S", bar_size)
+
+        assert all(c.duration == f"{span} S" for c in chunks)
+        assert chunks[0].end == (datetime(2023, 1, 4, 9, 0) + timedelta(seconds=span - 1)).strftime("%Y%m%d %H:%M:%S")
+        assert chunks[-1].end == (datetime(2023, 1, 4, 11, 0) + timedelta(seconds=span - 1)).strftime("%Y%m%d %H:%M:%S")
+        assert len(chunks) == 7200 // span + 1
+        assert len({c.key for c in chunks}) == len(chunks)
+
+    def test_daily_chunks_by_year(self):
+        """Test daily bar ranges are split into one request per year."""
+        chunks = plan_chunks(datetime(2023, 6, 1), "1 Y", "1 day")
+
+        assert [c.day for c in chunks] == [date(2022, 12, 31), date(2023, 12, 31)]
+        assert all(c.duration == "1 Y" for c in chunks)
+
+
+class TestHistoricalPacer:
+    """Test class for historical request pacing."""
+
+    def test_window_limit(self):
+        """Test requests beyond the window limit wait for the oldest to expire."""
+        clock = FakeClock()
+        pacer = HistoricalPacer(max_requests=3, window=10.0, clock=clock)
+
+        delays = [pacer.reserve(("req", i)) for i in range(4)]
+
+        assert delays == [0.0, 0.0, 0.0, 10.0]
+
+    def test_window_slides(self):
+        """Test capacity frees up as old requests leave the window."""
+        clock = FakeClock()
+        pacer = HistoricalPacer(max_requests=2, window=10.0, clock=clock)
+        pacer.reserve("a")
+        clock.now = 6.0
+        pacer.reserve("b")
+
+        clock.now = 11.0
+        assert pacer.reserve("c") == 0.0
+        assert pacer.reserve("d") == pytest.approx(5.0)
+
+    def test_identical_request_interval(self):
+        """Test identical requests are spaced by the identical interval."""
+        clock = FakeClock()
+        pacer = HistoricalPacer(identical_interval=15.0, clock=clock)
+
+        assert pacer.reserve("same") == 0.0
+        assert pacer.reserve("other") == 0.0
+        assert pacer.reserve("same") == 15.0
+
+    def test_wait_sleeps_for_delay(self):
+        """Test wait blocks for the reserved delay."""
+        clock = FakeClock()
+        sleep = Mock()
+        pacer = HistoricalPacer(identical_interval=15.0, clock=clock, sleep=sleep)
+
+        pacer.wait("same")
+        pacer.wait("same")
+
+        sleep.assert_called_once_with(15.0)
+
+
+class TestHistoricalDataService:
+    """Test class for HistoricalDataService functionality."""
+
+    def test_fetch_splits_and_caches(self, client, tmp_path):
+        """Test a range is fetched per day and completed days are cached."""
+        service = HistoricalDataService(client, cache=BarCache(tmp_path))
+
+        bars = service.fetch(stock_contract("AAPL"), datetime(2023, 1, 9, 16, 0), "4 D", "1 min")
+
+        # Jan 7 and 8 are a weekend and return no data; the Jan 5 bar is
+        # before the start of the range
+        assert [bar.time.day for bar in bars] == [6, 9]
+        assert client.client.reqHistoricalData.call_count == 5
+        assert len(list(tmp_path.rglob("*.json"))) == 5
+
+    def test_repeat_fetch_served_from_cache(self, client, tmp_path):
+        """Test a repeated request never reaches TWS."""
+        service = HistoricalDataService(client, cache=BarCache(tmp_path))
+        end = datetime(2023, 1, 9, 16, 0)
+        first = service.fetch(stock_contract("AAPL"), end, "4 D", "1 min")
+        client.client.reqHistoricalData.reset_mock()
+
+        second = service.fetch(stock_contract("AAPL"), end, "4 D", "1 min")
+
+        client.client.reqHistoricalData.assert_not_called()
+        assert second == first
+
+    def test_incremental_backfill(self, client, tmp_path):
+        """Test extending a range only requests the missing days."""
+        service = HistoricalDataService(client, cache=BarCache(tmp_path))
+        service.fetch(stock_contract("AAPL"), datetime(2023, 1, 5, 16, 0), "1 D", "1 min")
+        client.client.reqHistoricalData.reset_mock()
+
+        service.fetch(stock_contract("AAPL"), datetime(2023, 1, 6, 16, 0), "2 D", "1 min")
+
+        requested = [call[0][2] for call in client.client.reqHistoricalData.call_args_list]
+        assert requested == ["20230106 23:59:59"]
+
+    def test_fetch_error(self, client, tmp_path):
+        """Test a failed chunk fails the fetch and is not cached."""
+        client.client.reqHistoricalData.side_effect = (
+            lambda req_id, *args: client.wrapper.error(req_id, 321, "Invalid request")
+        )
+        service = HistoricalDataService(client, cache=BarCache(tmp_path))
+
+        bars = service.fetch(stock_contract("AAPL"), datetime(2023, 1, 5, 16, 0), "1 D", "1 min")
+
+        assert bars is None
+        assert list(tmp_path.rglob("*.json")) == []
+
+    def test_pacing_violation_not_cached_as_empty(self, client, tmp_path):
+        """Test a 162 that is not "no data" fails the fetch instead of caching an empty day."""
+        client.client.reqHistoricalData.side_effect = (
+            lambda req_id, *args: client.wrapper.error(
+                req_id, 162, "Historical Market Data Service error message:Historical data request pacing violation"
+            )
+        )
+        service = HistoricalDataService(client, cache=BarCache(tmp_path))
+
+        bars = service.fetch(stock_contract("AAPL"), datetime(2023, 1, 5, 16, 0), "1 D", "1 min")
+
+        assert bars is None
+        assert list(tmp_path.rglob("*.json")) == []
+
+    def test_timeout_cancels_request(self, client, tmp_path):
+        """Test a chunk that times out is cancelled at TWS and not cached."""
+        client.client.reqHistoricalData.side_effect = None
+        service = HistoricalDataService(client, cache=BarCache(tmp_path))
+
+        bars = service.fetch(stock_contract("AAPL"), datetime(2023, 1, 5, 16, 0), "1 D", "1 min", timeout=0.05)
+
+        assert bars is None
+        req_ids = [call[0][0] for call in client.client.reqHistoricalData.call_args_list]
+        assert [call[0][0] for call in client.client.cancelHistoricalData.call_args_list] == req_ids
+        assert list(tmp_path.rglob("*.json")) == []
+
+    def test_fetch_not_connected(self, tmp_path):
+        """Test fetching while disconnected."""
+        service = HistoricalDataService(TWSClient(), cache=BarCache(tmp_path))
+
+        assert service.fetch(stock_contract("AAPL"), datetime(2023, 1, 5), "1 D", "1 min") is None
+
+    def test_client_fetch_historical_bars(self, client, tmp_path):
+        """Test the client entry point delegates to the service."""
+        client.historical.cache = BarCache(tmp_path / "cache")
+        client.historical.archive = BarArchive(tmp_path / "archive")
+
+        bars = client.fetch_historical_bars(
+            stock_contract("AAPL"), datetime(2023, 1, 5, 16, 0), "1 D", "1 min"
+        )
+
+        assert [bar.close for bar in bars] == [5.0]
+        # Fetched trade bars are appended to the binary archive
+        assert client.historical.archive.series("AAPL", "1 min").read()["close"].tolist() == [5.0]
@@ -0,0 +1,137 @@
+"""
+Tests for incremental and batch technical indicators.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from ..bar_archive import BAR_DTYPE
+from ..indicators import ATR, EMA, RSI, SMA, VWAP, atr, ema, parse_indicator, rsi, sma, true_range, vwap
+
+
+@pytest.fixture
+def records():
+    """Fixture providing a random-walk bar history as archive records."""
+    rng = np.random.default_rng(7)
+    count = 5000
+    records = np.zeros(count, dtype=BAR_DTYPE)
+    records["time"] = np.arange(count) * 60
+    records["close"] = 100 + np.cumsum(rng.normal(0, 0.5, count))
+    records["open"] = records["close"] + rng.normal(0, 0.2, count)
+    records["high"] = np.maximum(records["open"], records["close"]) + rng.random(count)
+    records["low"] = np.minimum(records["open"], records["close"]) - rng.random(count)
+    records["volume"] = rng.integers(1, 1000, count)
+    return records
+
+
+class TestBatchIndicators:
+    """Test class for the NumPy batch indicators."""
+
+    def test_sma(self):
+        """Test the moving average of a short series."""
+        result = sma([1, 2, 3, 4, 5], 3)
+
+        assert np.isnan(result[:2]).all()
+        assert result[2:].tolist() == [2.0, 3.0, 4.0]
+
+    def test_ema_seeded_with_sma(self):
+        """Test the EMA starts from the simple average and then smooths."""
+        result = ema([1, 2, 3, 4], 3)
+
+        assert result[2] == 2.0
+        assert result[3] == pytest.approx(2.0 + 0.5 * (4 - 2.0))
+
+    def test_ema_long_history(self):
+        """Test the blocked recurrence matches a plain loop across many blocks."""
+        values = np.linspace(1, 2, 20_000)
+        expected = [values[:10].mean()]
+        for value in values[10:]:
+            expected.append(expected[-1] + 2 / 11 * (value - expected[-1]))
+
+        assert np.allclose(ema(values, 10)[9:], expected, rtol=1e-12)
+
+    def test_vwap(self):
+        """Test VWAP weights the typical price by volume."""
+        result = vwap([3, 6], [3, 6], [3, 6], [0, 10])
+
+        assert np.isnan(result[0])
+        assert result[1] == 6.0
+
+    def test_true_range_uses_previous_close(self):
+        """Test gaps from the previous close widen the true range."""
+        assert true_range([10, 12], [9, 11], [9.5, 11.5]).tolist() == [1.0, 2.5]
+
+    def test_atr_constant_range(self):
+        """Test a constant bar range gives an equal ATR."""
+        result = atr([2] * 20, [1] * 20, [1.5] * 20, 14)
+
+        assert np.isnan(result[12])
+        assert np.allclose(result[13:], 1.0)
+
+    def test_rsi_extremes(self):
+        """Test a rising series scores 100, a falling one 0 and a flat one 50."""
+        assert rsi(np.arange(20.0), 14)[-1] == 100.0
+        assert rsi(np.arange(20.0)[::-1], 14)[-1] == 0.0
+        assert rsi(np.ones(20), 14)[-1] == 50.0
+        assert np.isnan(rsi(np.arange(20.0), 14)[:14]).all()
+
+    def test_short_history(self):
+        """Test histories shorter than the period are all NaN."""
+        assert np.isnan(sma([1.0], 5)).all()
+        assert np.isnan(rsi([1.0, 2.0], 5)).all()
+        assert len(atr([], [], [], 14)) == 0
+
+    def test_invalid_period(self):
+        """Test periods below one are rejected."""
+        with pytest.raises(ValueError):
+            sma([1.0], 0)
+
+
+class TestIncrementalIndicators:
+    """Test class for the O(1) incremental indicators."""
+
+    @pytest.mark.parametrize("text", ["sma:20", "ema:20", "ema:1", "vwap", "atr:14", "rsi:14", "rsi:2"])
+    def test_matches_batch(self, records, text):
+        """Test folding bars in one at a time gives the batch values."""
+        spec = parse_indicator(text)
+        update = spec.incremental()
+
+        incremental = np.array([update(bar) for bar in records.view(np.recarray)])
+        batch = spec.compute(records)
+
+        assert (np.isnan(incremental) == np.isnan(batch)).all()
+        assert np.allclose(incremental, batch, rtol=1e-9, equal_nan=True)
+
+    def test_values_before_warm_up(self):
+        """Test each indicator reports NaN until it has enough bars."""
+        assert math.isnan(SMA(3).update(1.0))
+        assert math.isnan(EMA(3).update(1.0))
+        assert math.isnan(ATR(3).update(2.0, 1.0, 1.5))
+        assert math.isnan(RSI(3).update(1.0))
+
+    def test_vwap_reset(self):
+        """Test a reset starts a new anchor period."""
+        indicator = VWAP()
+        indicator.update(10, 10, 10, 100)
+        indicator.reset()
+
+        assert math.isnan(indicator.value)
+        assert indicator.update(20, 20, 20, 5) == 20.0
+
+
+class TestParseIndicator:
+    """Test class for indicator request parsing."""
+
+    def test_parse(self):
+        """Test labels, kinds and default periods."""
+        assert tuple(parse_indicator("SMA:50")) == ("sma:50", "sma", 50)
+        assert tuple(parse_indicator("rsi")) == ("rsi:14", "rsi", 14)
+        assert tuple(parse_indicator("vwap")) == ("vwap", "vwap", None)
+
+    @pytest.mark.parametrize("text", ["macd", "sma:0", "sma:x", ""])
+    def test_invalid(self, text):
+        """Test unknown indicators and periods are rejected."""
+        with pytest.raises(ValueError):
+            parse_indicator(text)
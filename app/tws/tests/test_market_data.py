@@ -0,0 +1,178 @@
+"""
+Tests for shared market data subscriptions.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from ..client import TWSClient
+from ..contracts import contract_key, stock_contract
+from ..market_data import MarketDataManager, Tick
+
+
+@pytest.fixture
+def client():
+    """Fixture providing a connected TWS client with a mocked EClient."""
+    client = TWSClient()
+    client.client = Mock()
+    client.client.isConnected.return_value = True
+    client._connected = True
+    return client
+
+
+class TestContracts:
+    """Test class for contract helpers."""
+
+    def test_stock_contract(self):
+        """Test building a stock contract."""
+        contract = stock_contract("aapl")
+
+        assert contract.symbol == "AAPL"
+        assert contract.secType == "STK"
+        assert contract.exchange == "SMART"
+        assert contract.currency == "USD"
+
+    def test_contract_key_identifies_instrument(self):
+        """Test equal contracts share a key and different ones do not."""
+        assert contract_key(stock_contract("AAPL")) == contract_key(stock_contract("AAPL"))
+        assert contract_key(stock_contract("AAPL")) != contract_key(stock_contract("MSFT"))
+
+
+class TestMarketDataManager:
+    """Test class for MarketDataManager functionality."""
+
+    def test_one_request_per_contract(self, client):
+        """Test that reqMktData is sent once no matter how many subscribers."""
+        manager = MarketDataManager(client)
+
+        first = manager.subscribe(stock_contract("AAPL"))
+        second = manager.subscribe(stock_contract("AAPL"))
+
+        client.client.reqMktData.assert_called_once()
+        assert manager.subscriber_counts() == {"AAPL": 2}
+        first.close()
+        second.close()
+
+    def test_ticks_fan_out_to_subscribers(self, client):
+        """Test price and size ticks reach every subscriber of the contract."""
+        manager = MarketDataManager(client)
+        aapl_a = manager.subscribe(stock_contract("AAPL"))
+        aapl_b = manager.subscribe(stock_contract("AAPL"))
+        msft = manager.subscribe(stock_contract("MSFT"))
+        aapl_req_id = client.client.reqMktData.call_args_list[0][0][0]
+
+        client.wrapper.tickPrice(aapl_req_id, 4, 150.25, None)
+        client.wrapper.tickSize(aapl_req_id, 5, 300)
+
+        for subscription in (aapl_a, aapl_b):
+            price_tick, size_tick = subscription.drain()
+            assert isinstance(price_tick, Tick)
+            assert price_tick.symbol == "AAPL"
+            assert (price_tick.field, price_tick.price, price_tick.size) == (4, 150.25, None)
+            assert (size_tick.field, size_tick.price, size_tick.size) == (5, None, 300)
+        assert msft.get(timeout=0) is None
+
+    def test_bounded_queue_drops_oldest(self, client):
+        """Test a slow subscriber keeps only the newest ticks."""
+        manager = MarketDataManager(client)
+        subscription = manager.subscribe(stock_contract("AAPL"), maxsize=2)
+        req_id = client.client.reqMktData.call_args[0][0]
+
+        for price in (1.0, 2.0, 3.0):
+            client.wrapper.tickPrice(req_id, 4, price, None)
+
+        assert [tick.price for tick in subscription.drain()] == [2.0, 3.0]
+        assert subscription.dropped == 1
+
+    def test_notify_when_queue_becomes_non_empty(self, client):
+        """Test the notify hook fires only when the queue was empty."""
+        manager = MarketDataManager(client)
+        notify = Mock()
+        subscription = manager.subscribe(stock_contract("AAPL"), notify=notify)
+        req_id = client.client.reqMktData.call_args[0][0]
+
+        client.wrapper.tickPrice(req_id, 4, 1.0, None)
+        client.wrapper.tickPrice(req_id, 4, 2.0, None)
+        assert notify.call_count == 1
+
+        subscription.drain()
+        client.wrapper.tickPrice(req_id, 4, 3.0, None)
+        assert notify.call_count == 2
+
+    def test_cancel_when_last_subscriber_leaves(self, client):
+        """Test the TWS stream is cancelled only after the last subscriber."""
+        manager = MarketDataManager(client)
+        first = manager.subscribe(stock_contract("AAPL"))
+        second = manager.subscribe(stock_contract("AAPL"))
+        req_id = client.client.reqMktData.call_args[0][0]
+
+        first.close()
+        client.client.cancelMktData.assert_not_called()
+
+        second.close()
+        client.client.cancelMktData.assert_called_once_with(req_id)
+        assert manager.subscriber_counts() == {}
+
+        # Late ticks for the cancelled stream are ignored
+        client.wrapper.tickPrice(req_id, 4, 1.0, None)
+        assert len(second) == 0
+
+    def test_failed_send_leaves_no_stream(self, client):
+        """Test a reqMktData that raises is rolled back so the next subscriber retries."""
+        manager = MarketDataManager(client)
+        client.client.reqMktData.side_effect = ConnectionError("lost")
+
+        with pytest.raises(ConnectionError):
+            manager.subscribe(stock_contract("AAPL"))
+        client.client.reqMktData.side_effect = None
+        manager.subscribe(stock_contract("AAPL"))
+
+        assert client.client.reqMktData.call_count == 2
+        assert manager.subscriber_counts() == {"AAPL": 1}
+
+    def test_error_drops_stream(self, client):
+        """Test a TWS error removes the stream and reaches its subscribers."""
+        manager = MarketDataManager(client)
+        notify = Mock()
+        subscription = manager.subscribe(stock_contract("AAPL"), notify=notify)
+        req_id = client.client.reqMktData.call_args[0][0]
+
+        client.wrapper.error(req_id, 354, "Requested market data is not subscribed")
+
+        assert "354" in subscription.error
+        assert subscription.get(timeout=0) is None
+        notify.assert_called_once()
+        assert manager.subscriber_counts() == {}
+        subscription.close()
+        client.client.cancelMktData.assert_not_called()
+        manager.subscribe(stock_contract("AAPL"))
+        assert client.client.reqMktData.call_count == 2
+
+    def test_delayed_data_notice_keeps_stream(self, client):
+        """Test a notice that delayed data is shown instead leaves the stream running."""
+        manager = MarketDataManager(client)
+        subscription = manager.subscribe(stock_contract("AAPL"))
+        req_id = client.client.reqMktData.call_args[0][0]
+
+        client.wrapper.error(req_id, 10167, "Requested market data is not subscribed. Displaying delayed market data.")
+
+        assert subscription.error is None
+        assert manager.subscriber_counts() == {"AAPL": 1}
+
+    def test_subscribe_not_connected(self):
+        """Test subscribing while disconnected."""
+        manager = MarketDataManager(TWSClient())
+
+        with pytest.raises(ConnectionError):
+            manager.subscribe(stock_contract("AAPL"))
+
+    def test_ticks_recorded_in_tick_store(self, client):
+        """Test received ticks are appended to the client's tick store."""
+        subscription = client.market_data.subscribe(stock_contract("AAPL"))
+        req_id = client.client.reqMktData.call_args[0][0]
+
+        client.wrapper.tickPrice(req_id, 4, 150.25, None)
+
+        assert client.tick_store.buffer("AAPL").snapshot().prices.tolist() == [150.25]
+        subscription.close()
@@ -0,0 +1,199 @@
+"""
+Tests for option chain snapshots.
+"""
+
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+from ibapi.contract import ContractDetails
+from ibapi.ticktype import TickTypeEnum
+
+from ..client import TWSClient
+from ..contracts import stock_contract
+from ..errors import NO_SECURITY_DEFINITION, TWSRequestError
+from ..simulator import TWSSimulator
+
+EXPIRATIONS = {"20991218", "20991120", "20991016"}
+STRIKES = {100.0, 105.0, 110.0}
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Fixture providing a connected TWS client with a mocked EClient and an empty contract cache."""
+    client = TWSClient(contract_db=str(tmp_path / "contracts.db"))
+    client.client = Mock()
+    client.client.isConnected.return_value = True
+    client._connected = True
+    return client
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def list_chain(client: TWSClient) -> None:
+    """Answer the underlying lookup and reqSecDefOptParams with a CBOE and a SMART listing."""
+    assert wait_for(lambda: client.client.reqContractDetails.called)
+    req_id = client.client.reqContractDetails.call_args[0][0]
+    details = ContractDetails()
+    details.contract.conId = 265598
+    details.contract.symbol = "AAPL"
+    details.contract.secType = "STK"
+    client.wrapper.contractDetails(req_id, details)
+    client.wrapper.contractDetailsEnd(req_id)
+
+    assert wait_for(lambda: client.client.reqSecDefOptParams.called)
+    req_id, symbol, exchange, sec_type, con_id = client.client.reqSecDefOptParams.call_args[0]
+    assert (symbol, sec_type, con_id) == ("AAPL", "STK", 265598)
+    client.wrapper.securityDefinitionOptionParameter(req_id, "CBOE", con_id, "AAPL", "100", {"20991016"}, {100.0})
+    client.wrapper.securityDefinitionOptionParameter(req_id, "SMART", con_id, "AAPL", "100", EXPIRATIONS, STRIKES)
+    client.wrapper.securityDefinitionOptionParameterEnd(req_id)
+
+
+def quote(client: TWSClient, req_id: int, contract) -> None:
+    """Answer one option snapshot with a quote and model greeks derived from its strike."""
+    sign = 1 if contract.right == "C" else -1
+    client.wrapper.tickPrice(req_id, TickTypeEnum.BID, contract.strike / 100, None)
+    client.wrapper.tickPrice(req_id, TickTypeEnum.ASK, contract.strike / 100 + 0.1, None)
+    client.wrapper.tickOptionComputation(
+        req_id, TickTypeEnum.MODEL_OPTION, 0, 0.25, sign * 0.5, 1.05, 0.0, 0.02, 0.1, -0.05, 104.0,
+    )
+
+
+def option_requests(client: TWSClient) -> List[int]:
+    """Request ids of the option snapshots sent so far."""
+    return [call[0][0] for call in client.client.reqMktData.call_args_list if call[0][1].secType == "OPT"]
+
+
+class TestOptionChainService:
+    """Test class for OptionChainService with a mocked EClient."""
+
+    def test_snapshot_fills_table(self, client):
+        """Test every option of the slice is requested and written into its cell."""
+        with ThreadPoolExecutor(1) as executor:
+            result = executor.submit(client.options.snapshot, "AAPL", ["20991016", "20991120"], timeout=5)
+            list_chain(client)
+            assert wait_for(lambda: client.client.reqMktData.call_count == 12)
+            for call in client.client.reqMktData.call_args_list:
+                req_id, contract, generic_ticks, snapshot = call[0][:4]
+                assert (contract.secType, contract.tradingClass, snapshot) == ("OPT", "AAPL", True)
+                quote(client, req_id, contract)
+            chain = result.result(timeout=5)
+
+        assert chain.expirations == ["20991016", "20991120"]
+        assert chain.strikes.tolist() == [100.0, 105.0, 110.0]
+        assert (chain.requested, chain.completed, chain.failed) == (12, 12, 0)
+        assert chain.column("bid", "C")[1].tolist() == [1.0, 1.05, 1.1]
+        assert chain.column("delta", "P").tolist() == [[-0.5] * 3] * 2
+        assert chain.column("model_price", "C")[0, 0] == 1.05
+        assert math.isnan(chain.column("last", "C")[0, 0])
+        assert chain.underlying_price == 104.0
+        # Greeks complete the snapshot, so its line is released early
+        assert client.client.cancelMktData.call_count == 12
+
+    def test_window_bounds_open_snapshots(self, client):
+        """Test no more snapshots are open than the lines streaming subscriptions leave free."""
+        client.options.max_lines = 3
+        client.market_data.subscribe(stock_contract("MSFT"))
+        assert client.options.window() == 2
+
+        with ThreadPoolExecutor(1) as executor:
+            result = executor.submit(
+                client.options.snapshot, "AAPL", ["20991016"], min_strike=100, max_strike=105, timeout=5
+            )
+            list_chain(client)
+            for answered in range(4):
+                assert wait_for(lambda: len(option_requests(client)) >= min(answered + 2, 4))
+                # Give the build a chance to overrun the window
+                time.sleep(0.05)
+                requested = option_requests(client)
+                assert len(requested) - answered <= 2
+                client.wrapper.tickSnapshotEnd(requested[answered])
+            chain = result.result(timeout=5)
+
+        assert (chain.requested, chain.completed) == (4, 4)
+
+    def test_missing_options_are_counted_failed(self, client):
+        """Test an expiry and strike pair TWS does not know leaves NaN and counts as failed."""
+        with ThreadPoolExecutor(1) as executor:
+            result = executor.submit(client.options.snapshot, "AAPL", ["20991016"], max_strike=100, timeout=5)
+            list_chain(client)
+            assert wait_for(lambda: client.client.reqMktData.call_count == 2)
+            (call_req, call), (put_req, put) = [c[0][:2] for c in client.client.reqMktData.call_args_list]
+            quote(client, call_req, call)
+            client.wrapper.error(put_req, NO_SECURITY_DEFINITION, "No security definition has been found")
+            chain = result.result(timeout=5)
+
+        assert (chain.completed, chain.failed) == (1, 1)
+        assert math.isnan(chain.column("bid", "P")[0, 0])
+
+    def test_chain_cached_within_ttl(self, client):
+        """Test a repeated request is served from memory until the TTL expires."""
+        with ThreadPoolExecutor(1) as executor:
+            result = executor.submit(client.options.snapshot, "AAPL", ["20991016"], max_strike=100, timeout=5)
+            list_chain(client)
+            assert wait_for(lambda: client.client.reqMktData.call_count == 2)
+            for call in client.client.reqMktData.call_args_list:
+                quote(client, *call[0][:2])
+            chain = result.result(timeout=5)
+
+        assert client.options.snapshot("AAPL", ["20991016"], max_strike=100) is chain
+        assert client.client.reqMktData.call_count == 2
+        assert client.client.reqSecDefOptParams.call_count == 1
+        assert (client.options.builds, client.options.hits) == (1, 1)
+
+    def test_no_listing(self, client):
+        """Test a symbol without listed options is reported as a request error."""
+        with ThreadPoolExecutor(1) as executor:
+            result = executor.submit(client.options.parameters, "AAPL", 5)
+            assert wait_for(lambda: client.client.reqContractDetails.called)
+            req_id = client.client.reqContractDetails.call_args[0][0]
+            details = ContractDetails()
+            details.contract.conId = 265598
+            client.wrapper.contractDetails(req_id, details)
+            client.wrapper.contractDetailsEnd(req_id)
+            assert wait_for(lambda: client.client.reqSecDefOptParams.called)
+            client.wrapper.securityDefinitionOptionParameterEnd(client.client.reqSecDefOptParams.call_args[0][0])
+
+            with pytest.raises(TWSRequestError):
+                result.result(timeout=5)
+
+    def test_not_connected(self):
+        """Test snapshots require a connection."""
+        with pytest.raises(ConnectionError):
+            TWSClient().options.snapshot("AAPL")
+
+
+class TestOptionChainAgainstSimulator:
+    """Test class for option chains snapshotted from the simulator."""
+
+    def test_chain_within_line_window(self, tmp_path):
+        """Test a chain is filled completely without exceeding the line window."""
+        with TWSSimulator(snapshot_delay=0.01) as simulator:
+            client = TWSClient(port=simulator.port, contract_db=str(tmp_path / "contracts.db"))
+            assert client.connect(timeout=5.0)
+            try:
+                client.options.max_lines = 4
+                expirations, strikes = simulator.option_chain("AAPL")
+                chain = client.options.snapshot(
+                    "AAPL", expirations[:2], min_strike=strikes[8], max_strike=strikes[12], timeout=20
+                )
+
+                assert (chain.requested, chain.completed, chain.failed) == (20, 20, 0)
+                assert 1 <= simulator.max_open_snapshots <= 4
+                calls, puts = chain.column("delta", "C"), chain.column("delta", "P")
+                # Deltas fall with the strike and calls minus puts is one
+                assert (calls[:, :-1] > calls[:, 1:]).all()
+                assert abs(calls - puts - 1).max() < 1e-6
+                assert chain.underlying_price == simulator.mark_price("AAPL")
+            finally:
+                client.disconnect()
@@ -0,0 +1,327 @@
+"""
+Tests for order placement and live order state.
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from ibapi.order_state import OrderState as IBOrderState
+
+from ..client import TWSClient
+from ..contracts import stock_contract
+from ..orders import build_order
+from ..simulator import TWSSimulator
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    """Poll until predicate is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def mock_client():
+    """Fixture providing a connected TWS client with a mocked EClient."""
+    client = TWSClient()
+    client.client = Mock()
+    client.client.isConnected.return_value = True
+    client._connected = True
+    client.wrapper.nextValidId(100)
+    return client
+
+
+def execution(order_id: int, exec_id: str, shares: float, price: float, cum_qty: float):
+    """Stand-in for an ibapi Execution."""
+    return SimpleNamespace(
+        orderId=order_id, permId=0, execId=exec_id, time="20230109  10:00:00",
+        shares=shares, price=price, cumQty=cum_qty, avgPrice=price,
+    )
+
+
+def order_status(client: TWSClient, order_id: int, status: str, filled: float = 0.0,
+                 remaining: float = 0.0, avg_price: float = 0.0, perm_id: int = 0) -> None:
+    """Deliver an orderStatus callback."""
+    client.wrapper.orderStatus(order_id, status, filled, remaining, avg_price, perm_id, 0, avg_price, 1, "", 0.0)
+
+
+class TestBuildOrder:
+    """Test class for order construction."""
+
+    def test_limit_order(self):
+        """Test a limit order carries its price and API-compatible flags."""
+        order = build_order("buy", 10, "lmt", limit_price=101.5, tif="GTC")
+
+        assert (order.action, order.orderType, order.totalQuantity) == ("BUY", "LMT", 10)
+        assert order.lmtPrice == 101.5
+        assert order.tif == "GTC"
+        assert order.eTradeOnly is False and order.firmQuoteOnly is False
+
+    @pytest.mark.parametrize("kwargs", [
+        {"action": "HOLD", "quantity": 1},
+        {"action": "BUY", "quantity": 0},
+        {"action": "BUY", "quantity": 1, "order_type": "LMT"},
+        {"action": "SELL", "quantity": 1, "order_type": "STP"},
+        {"action": "SELL", "quantity": 1, "order_type": "TRAIL"},
+    ])
+    def test_invalid_orders(self, kwargs):
+        """Test invalid combinations are rejected before reaching TWS."""
+        with pytest.raises(ValueError):
+            build_order(**kwargs)
+
+
+class TestOrderManager:
+    """Test class for OrderManager with a mocked EClient."""
+
+    def test_ids_allocated_locally(self, mock_client):
+        """Test consecutive orders get consecutive ids without asking TWS."""
+        first = mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 10))
+        second = mock_client.orders.place(stock_contract("MSFT"), build_order("SELL", 5))
+
+        assert (first.order_id, second.order_id) == (100, 101)
+        assert first.status == "PendingSubmit"
+        assert mock_client.client.placeOrder.call_count == 2
+        mock_client.client.reqIds.assert_not_called()
+
+    def test_reseed_never_reuses_ids(self, mock_client):
+        """Test an older nextValidId after a reconnect does not rewind allocation."""
+        mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 1))
+
+        mock_client.wrapper.nextValidId(50)
+        assert mock_client.orders.next_order_id() == 101
+        mock_client.wrapper.nextValidId(500)
+        assert mock_client.orders.next_order_id() == 500
+
+    def test_requires_connection(self, mock_client):
+        """Test placing while disconnected fails without allocating an id."""
+        mock_client._connected = False
+
+        with pytest.raises(ConnectionError):
+            mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 1))
+        assert mock_client.orders.next_order_id() == 100
+
+    def test_status_lifecycle(self, mock_client):
+        """Test orderStatus drives the order through partial and full fills."""
+        order_id = mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 10)).order_id
+
+        order_status(mock_client, order_id, "Submitted", remaining=10, perm_id=777)
+        order_status(mock_client, order_id, "Submitted", filled=4, remaining=6, avg_price=100.0, perm_id=777)
+        assert mock_client.orders.status(order_id) == "Submitted"
+        assert mock_client.orders.get(order_id).filled == 4
+
+        order_status(mock_client, order_id, "Filled", filled=10, avg_price=100.5, perm_id=777)
+        state = mock_client.orders.get(order_id)
+        assert (state.status, state.filled, state.remaining, state.avg_fill_price) == ("Filled", 10, 0, 100.5)
+        assert state.perm_id == 777
+
+    def test_terminal_state_is_final(self, mock_client):
+        """Test late or out-of-order messages cannot revive a finished order."""
+        order_id = mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 10)).order_id
+        order_status(mock_client, order_id, "Filled", filled=10, avg_price=100.0)
+
+        order_status(mock_client, order_id, "Submitted", filled=4, remaining=6, avg_price=99.0)
+
+        state = mock_client.orders.get(order_id)
+        assert (state.status, state.filled, state.avg_fill_price) == ("Filled", 10, 100.0)
+
+    def test_exec_details_deduplicated(self, mock_client):
+        """Test repeated execDetails record each execution once."""
+        order_id = mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 10)).order_id
+        contract = stock_contract("AAPL")
+
+        mock_client.wrapper.execDetails(-1, contract, execution(order_id, "e1", 6, 100.0, 6))
+        mock_client.wrapper.execDetails(-1, contract, execution(order_id, "e1", 6, 100.0, 6))
+        mock_client.wrapper.execDetails(-1, contract, execution(order_id, "e2", 4, 101.0, 10))
+
+        state = mock_client.orders.get(order_id)
+        assert [f.exec_id for f in state.fills] == ["e1", "e2"]
+        assert state.filled == 10
+
+    def test_open_order_adopts_untracked_order(self, mock_client):
+        """Test openOrder from an earlier session starts tracking the order."""
+        order = build_order("SELL", 3, "LMT", limit_price=250.0)
+        order.permId = 4242
+        ib_state = IBOrderState()
+        ib_state.status = "Submitted"
+
+        mock_client.wrapper.openOrder(7, stock_contract("TSLA"), order, ib_state)
+        order_status(mock_client, 7, "Cancelled", remaining=3, perm_id=4242)
+
+        state = mock_client.orders.get(7)
+        assert (state.symbol, state.limit_price, state.status) == ("TSLA", 250.0, "Cancelled")
+
+    def test_rejection_error(self, mock_client):
+        """Test error 201 marks the order rejected and keeps the message."""
+        order_id = mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 10)).order_id
+
+        mock_client.wrapper.error(order_id, 201, "Order rejected - reason: no trading permissions")
+
+        state = mock_client.orders.get(order_id)
+        assert state.status == "Inactive"
+        assert state.error_code == 201
+        assert "permissions" in state.error_message
+
+    def test_order_and_request_errors_kept_apart(self):
+        """Test an order id equal to a low request id is not confused with a request."""
+        client = TWSClient()
+        client.client = Mock()
+        client.client.isConnected.return_value = True
+        client._connected = True
+        # A fresh account seeds order ids at 1, where request ids used to start
+        client.wrapper.nextValidId(1)
+        order_id = client.orders.place(stock_contract("AAPL"), build_order("BUY", 10)).order_id
+        req_id, future = client.requests.register()
+        assert order_id == 1 and req_id != order_id
+
+        client.wrapper.error(order_id, 201, "Order rejected - reason: no trading permissions")
+        assert not future.done()
+
+        client.wrapper.error(req_id, 200, "No security definition has been found")
+        assert future.exception(0).error_code == 200
+        state = client.orders.get(order_id)
+        assert (state.status, state.error_code) == ("Inactive", 201)
+
+    def test_cancel(self, mock_client):
+        """Test cancel sends cancelOrder and is a no-op once the order finished."""
+        order_id = mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 10)).order_id
+
+        assert mock_client.orders.cancel(order_id).status == "PendingCancel"
+        mock_client.client.cancelOrder.assert_called_once_with(order_id)
+        order_status(mock_client, order_id, "Cancelled", remaining=10)
+
+        assert mock_client.orders.cancel(order_id).status == "Cancelled"
+        assert mock_client.client.cancelOrder.call_count == 1
+        with pytest.raises(KeyError):
+            mock_client.orders.cancel(999)
+
+    def test_completed_orders_evicted(self, mock_client):
+        """Test only the newest completed orders are retained."""
+        mock_client.orders.max_completed = 2
+        ids = [
+            mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 1)).order_id
+            for _ in range(4)
+        ]
+        for order_id in ids[:3]:
+            order_status(mock_client, order_id, "Filled", filled=1, avg_price=1.0)
+
+        assert mock_client.orders.get(ids[0]) is None
+        assert [s.order_id for s in mock_client.orders.orders()] == ids[1:]
+        assert [s.order_id for s in mock_client.orders.orders(open_only=True)] == [ids[3]]
+
+    def test_subscription_coalesces_updates(self, mock_client):
+        """Test subscribers see each changed order once per drain."""
+        notify = Mock()
+        subscription = mock_client.orders.subscribe(notify=notify)
+        first = mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 10)).order_id
+        second = mock_client.orders.place(stock_contract("MSFT"), build_order("BUY", 10)).order_id
+        order_status(mock_client, first, "Submitted", remaining=10)
+        order_status(mock_client, first, "Submitted", remaining=10)
+
+        assert subscription.drain() == [first, second]
+        assert notify.call_count == 1
+        subscription.close()
+        order_status(mock_client, first, "Filled", filled=10, avg_price=1.0)
+        assert len(subscription) == 0
+
+    def test_place_batch(self, mock_client):
+        """Test a basket gets one block of ids and one placeOrder per order."""
+        basket = [(stock_contract(s), build_order("BUY", 1)) for s in ("AAPL", "MSFT", "NVDA")]
+        mock_client.orders.next_order_id()
+
+        results = list(mock_client.orders.place_batch(basket))
+
+        assert [r.order_id for r in results] == [101, 102, 103]
+        assert all(r.success and r.order.status == "PendingSubmit" for r in results)
+        sent = [call[0][:2] for call in mock_client.client.placeOrder.call_args_list]
+        assert [(order_id, contract.symbol) for order_id, contract in sent] == [
+            (101, "AAPL"), (102, "MSFT"), (103, "NVDA"),
+        ]
+
+    def test_place_batch_reports_failures(self, mock_client):
+        """Test a send failure is reported for its order and the basket continues."""
+        mock_client.client.placeOrder.side_effect = [None, OSError("broken pipe"), None]
+        basket = [(stock_contract("AAPL"), build_order("BUY", 1))] * 3
+
+        results = list(mock_client.orders.place_batch(basket))
+
+        assert [r.success for r in results] == [True, False, True]
+        assert "broken pipe" in results[1].error_message
+        assert mock_client.orders.get(results[1].order_id) is None
+
+    def test_cancel_all(self, mock_client):
+        """Test cancel_all cancels each working order of this client."""
+        ids = [mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 1)).order_id for _ in range(3)]
+        order_status(mock_client, ids[0], "Filled", filled=1, avg_price=1.0)
+
+        results = list(mock_client.orders.cancel_all())
+
+        assert [r.order_id for r in results] == ids[1:]
+        assert all(r.order.status == "PendingCancel" for r in results)
+        assert [c[0][0] for c in mock_client.client.cancelOrder.call_args_list] == ids[1:]
+        mock_client.client.reqGlobalCancel.assert_not_called()
+
+    def test_global_cancel(self, mock_client):
+        """Test a global cancel is one reqGlobalCancel message."""
+        mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 1))
+
+        results = mock_client.orders.cancel_all(global_cancel=True)
+        mock_client.client.reqGlobalCancel.assert_called_once()
+
+        assert [r.order.status for r in results] == ["PendingCancel"]
+        mock_client.client.cancelOrder.assert_not_called()
+
+    def test_reconcile_requests_open_orders(self, mock_client):
+        """Test reconcile re-requests this client's open orders."""
+        mock_client.orders.place(stock_contract("AAPL"), build_order("BUY", 10))
+
+        assert mock_client.orders.reconcile() == 1
+        mock_client.client.reqOpenOrders.assert_called_once()
+
+
+class TestOrdersAgainstSimulator:
+    """Test class for the order path over a socket to the simulator."""
+
+    def test_place_fill_and_cancel(self):
+        """Test orders are filled, reconciled and cancelled through TWS messages."""
+        with TWSSimulator(next_order_id=100) as simulator:
+            client = TWSClient(port=simulator.port)
+            assert client.connect(timeout=5.0)
+            try:
+                filled = client.orders.place(stock_contract("AAPL"), build_order("BUY", 10)).order_id
+                assert wait_for(lambda: client.orders.status(filled) == "Filled")
+                state = client.orders.get(filled)
+                assert state.filled == 10
+                assert len(state.fills) == 1 and state.fills[0].shares == 10
+
+                simulator.fill_orders = False
+                working = client.orders.place(
+                    stock_contract("MSFT"), build_order("SELL", 5, "LMT", limit_price=500.0)
+                ).order_id
+                assert wait_for(lambda: client.orders.status(working) == "Submitted")
+                assert client.orders.reconcile() == 1
+
+                client.orders.cancel(working)
+                assert wait_for(lambda: client.orders.status(working) == "Cancelled")
+            finally:
+                client.disconnect()
+
+    def test_batch_within_rate_limit(self):
+        """Test a basket larger than the burst is filled and spread over time."""
+        with TWSSimulator(next_order_id=1) as simulator:
+            client = TWSClient(port=simulator.port)
+            assert client.connect(timeout=5.0)
+            try:
+                basket = [(stock_contract("AAPL"), build_order("BUY", 1))] * 30
+                started = time.monotonic()
+                results = list(client.orders.place_batch(basket))
+
+                assert all(r.success for r in results)
+                assert wait_for(lambda: all(client.orders.status(r.order_id) == "Filled" for r in results))
+                assert time.monotonic() - started >= (30 - 10) / 40 * 0.9
+            finally:
+                client.disconnect()
@@ -0,0 +1,214 @@
+"""
+Tests for outbound message pacing.
+"""
+
+import threading
+import time
+
+import pytest
+from ibapi.message import OUT
+
+from ..pacing import (
+    PRIORITY_CANCEL,
+    PRIORITY_HISTORICAL,
+    PRIORITY_MARKET_DATA,
+    PRIORITY_ORDER,
+    MessagePacer,
+    OutboundScheduler,
+    message_id,
+)
+
+
+class FakeClock:
+    """Clock that only advances when slept on."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    """Fixture providing a fake clock."""
+    return FakeClock()
+
+
+class TestMessagePacer:
+    """Test class for the token bucket pacer."""
+
+    def test_burst_is_immediate(self, clock):
+        """Test the first burst of messages needs no waiting."""
+        pacer = MessagePacer(max_per_second=50, burst=10, clock=clock)
+
+        assert [pacer.reserve() for _ in range(10)] == [0.0] * 10
+        assert pacer.reserve() == pytest.approx(1 / 40)
+
+    def test_never_exceeds_limit_in_any_second(self, clock):
+        """Test a long run of messages stays within 50 per one-second window."""
+        pacer = MessagePacer(max_per_second=50, burst=10, clock=clock, sleep=clock.sleep)
+        sent = []
+        for _ in range(500):
+            pacer.wait()
+            sent.append(clock.now)
+
+        for i, start in enumerate(sent):
+            in_window = sum(1 for t in sent[i:] if t < start + 1.0 - 1e-9)
+            assert in_window <= 50
+        assert sent[-1] == pytest.approx((500 - 10) / 40)
+
+    def test_idle_time_refills_burst(self, clock):
+        """Test the bucket refills while no messages are sent."""
+        pacer = MessagePacer(max_per_second=50, burst=10, clock=clock)
+        for _ in range(10):
+            pacer.reserve()
+
+        clock.now += 10.0
+
+        assert pacer.reserve(10) == 0.0
+
+    def test_invalid_burst(self):
+        """Test burst must leave room for a positive refill rate."""
+        with pytest.raises(ValueError):
+            MessagePacer(max_per_second=50, burst=50)
+
+
+def make_fields(*fields) -> str:
+    return "".join(f"{field}\0" for field in fields)
+
+
+def place(order_id: int) -> str:
+    return make_fields(OUT.PLACE_ORDER, order_id, "AAPL")
+
+
+def cancel(order_id: int) -> str:
+    return make_fields(OUT.CANCEL_ORDER, 1, order_id)
+
+
+class BlockedWriter:
+    """Write function that holds the first message until released."""
+
+    def __init__(self):
+        self.written = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, msg: str) -> None:
+        self.started.set()
+        self.release.wait(timeout=5)
+        self.written.append(message_id(msg))
+
+
+@pytest.fixture
+def writer():
+    """Fixture providing a scheduler whose writer is blocked on a first message."""
+    write = BlockedWriter()
+    scheduler = OutboundScheduler(write, MessagePacer(max_per_second=10_000, burst=100))
+    scheduler.submit(make_fields(OUT.REQ_MKT_DATA, 11, 1))
+    assert write.started.wait(timeout=2)
+    yield write, scheduler
+    scheduler.stop()
+
+
+def wait_for_writes(write: BlockedWriter, count: int) -> bool:
+    deadline = time.monotonic() + 2
+    while len(write.written) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return len(write.written) >= count
+
+
+class TestOutboundScheduler:
+    """Test class for the priority scheduler."""
+
+    def test_most_urgent_first(self, writer):
+        """Test queued messages go out by priority class, FIFO within a class."""
+        write, scheduler = writer
+        scheduler.submit(make_fields(OUT.REQ_HISTORICAL_DATA, 6, 1))
+        scheduler.submit(make_fields(OUT.REQ_MKT_DATA, 11, 2))
+        scheduler.submit(place(5))
+        scheduler.submit(cancel(3))
+        scheduler.submit(make_fields(OUT.REQ_MKT_DATA, 11, 3))
+
+        assert scheduler.queued() == {
+            PRIORITY_CANCEL: 1, PRIORITY_ORDER: 1, PRIORITY_MARKET_DATA: 2, PRIORITY_HISTORICAL: 1,
+        }
+        write.release.set()
+
+        assert wait_for_writes(write, 6)
+        assert write.written == [
+            OUT.REQ_MKT_DATA, OUT.CANCEL_ORDER, OUT.PLACE_ORDER,
+            OUT.REQ_MKT_DATA, OUT.REQ_MKT_DATA, OUT.REQ_HISTORICAL_DATA,
+        ]
+        assert scheduler.sent == 6
+
+    def test_cancel_waits_for_queued_place(self, writer):
+        """Test a cancel never overtakes the queued placeOrder it refers to."""
+        write, scheduler = writer
+        scheduler.submit(place(1))
+        scheduler.submit(place(2))
+        scheduler.submit(cancel(2))
+        scheduler.submit(cancel(7))
+
+        assert scheduler.priority(OUT.CANCEL_ORDER, 2) == PRIORITY_ORDER
+        write.release.set()
+
+        assert wait_for_writes(write, 5)
+        assert write.written[1:] == [OUT.CANCEL_ORDER, OUT.PLACE_ORDER, OUT.PLACE_ORDER, OUT.CANCEL_ORDER]
+        assert scheduler.priority(OUT.CANCEL_ORDER, 2) == PRIORITY_CANCEL
+
+    def test_global_cancel_waits_for_queued_places(self, writer):
+        """Test reqGlobalCancel goes out behind orders already queued."""
+        write, scheduler = writer
+        scheduler.submit(make_fields(OUT.REQ_MKT_DATA, 11, 2))
+        scheduler.submit(place(1))
+        scheduler.submit(make_fields(OUT.REQ_GLOBAL_CANCEL, 1))
+        write.release.set()
+
+        assert wait_for_writes(write, 4)
+        assert write.written[1:] == [OUT.PLACE_ORDER, OUT.REQ_GLOBAL_CANCEL, OUT.REQ_MKT_DATA]
+
+    def test_stop_drops_queued(self, writer):
+        """Test stopping the scheduler discards unsent messages."""
+        write, scheduler = writer
+        for order_id in range(5):
+            scheduler.submit(place(order_id))
+        write.release.set()
+        scheduler.stop()
+
+        assert len(scheduler) == 0
+        assert scheduler.sent + scheduler.dropped == 6
+        assert scheduler.priority(OUT.CANCEL_ORDER, 3) == PRIORITY_CANCEL
+
+    def test_writes_are_paced(self, clock):
+        """Test the writer spaces messages with the pacer."""
+        pacer = MessagePacer(max_per_second=50, burst=10, clock=clock, sleep=clock.sleep)
+        written = []
+        scheduler = OutboundScheduler(lambda msg: written.append(clock.now), pacer)
+        for order_id in range(30):
+            scheduler.submit(place(order_id))
+        deadline = time.monotonic() + 2
+        while len(written) < 30 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        scheduler.stop()
+
+        assert len(written) == 30
+        assert written[-1] == pytest.approx((30 - 10) / 40)
+
+    def test_write_failure_is_dropped(self):
+        """Test a message that cannot be written is counted and skipped."""
+        def write(msg):
+            raise ConnectionError("Not connected to TWS")
+
+        scheduler = OutboundScheduler(write)
+        scheduler.submit(place(1))
+        deadline = time.monotonic() + 2
+        while scheduler.dropped < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        scheduler.stop()
+
+        assert scheduler.dropped == 1
+        assert scheduler.sent == 0
@@ -0,0 +1,124 @@
+"""
+Tests for the multi-connection TWS client pool.
+"""
+
+from concurrent.futures import Future
+from unittest.mock import Mock
+
+import pytest
+
+from ..client import TWSClient
+from ..pool import ACCOUNT, HISTORICAL, MARKET_DATA, ORDERS, ClientIdAllocator, TWSClientPool
+from ..simulator import TWSSimulator
+
+
+@pytest.fixture
+def simulator():
+    """Fixture providing a simulator served from a background thread."""
+    with TWSSimulator() as simulator:
+        yield simulator
+
+
+@pytest.fixture
+def pool(simulator):
+    """Fixture providing a connected pool with one connection per workload."""
+    pool = TWSClientPool(port=simulator.port, health_interval=0, auto_reconnect=False)
+    assert pool.connect(timeout=5.0)
+    yield pool
+    pool.disconnect()
+
+
+class TestClientIdAllocator:
+    """Test class for client id allocation."""
+
+    def test_ids_are_distinct(self):
+        """Test allocated ids never repeat."""
+        allocator = ClientIdAllocator(first_id=5)
+
+        assert [allocator.allocate() for _ in range(3)] == [5, 6, 7]
+
+
+class TestTWSClientPool:
+    """Test class for TWSClientPool functionality."""
+
+    def test_layout(self):
+        """Test one member is created per configured connection."""
+        pool = TWSClientPool(layout={HISTORICAL: 2, ORDERS: 1}, first_client_id=10)
+
+        assert [(m.workload, m.client.client_id) for m in pool.members] == [
+            (HISTORICAL, 10), (HISTORICAL, 11), (ORDERS, 12),
+        ]
+
+    def test_rejects_unknown_workload(self):
+        """Test an unknown workload class is reported."""
+        with pytest.raises(ValueError):
+            TWSClientPool(layout={"backfill": 1})
+
+    def test_connects_members_with_distinct_ids(self, pool, simulator):
+        """Test every member holds its own session."""
+        assert pool.is_connected()
+        assert simulator.client_ids == {1, 2, 3, 4}
+
+    def test_routes_by_workload(self, pool):
+        """Test each workload class is served by its own connection."""
+        clients = {workload: pool.client(workload) for workload in (MARKET_DATA, HISTORICAL, ORDERS, ACCOUNT)}
+
+        assert len({id(client) for client in clients.values()}) == 4
+        assert pool.member(ORDERS).workload == ORDERS
+
+    def test_routes_to_least_loaded_member(self):
+        """Test requests go to the member of a class with fewest pending requests."""
+        pool = TWSClientPool(layout={HISTORICAL: 2}, health_interval=0)
+        for member in pool.members:
+            member.client.client = Mock()
+            member.client.client.isConnected.return_value = True
+            member.client._connected = True
+            member.healthy = True
+        busy, idle = pool.members
+        busy.client.requests.register()
+
+        assert pool.member(HISTORICAL) is idle
+
+    def test_fallback_when_class_is_down(self, pool):
+        """Test a workload falls back to a healthy member of another class."""
+        orders = next(m for m in pool.members if m.workload == ORDERS)
+        orders.client.disconnect()
+
+        member = pool.member(ORDERS)
+
+        assert member.is_connected()
+        assert member.workload != ORDERS
+        assert pool.stats().fallbacks == 1
+
+    def test_client_id_in_use(self, simulator):
+        """Test a member moves to the next id when TWS reports its id taken."""
+        other = TWSClient(port=simulator.port, client_id=1)
+        assert other.connect(timeout=5.0)
+        pool = TWSClientPool(port=simulator.port, layout={ORDERS: 1}, health_interval=0, auto_reconnect=False)
+        try:
+            assert pool.connect(timeout=5.0)
+            assert pool.members[0].client.client_id == 2
+        finally:
+            pool.disconnect()
+            other.disconnect()
+
+    def test_health_check(self, pool):
+        """Test health checks record the round-trip of every member."""
+        pool.check_health()
+
+        stats = pool.stats()
+        assert stats.healthy == 4
+        assert all(m.health_rtt_ms is not None for m in stats.members)
+
+    def test_unresponsive_member_becomes_unhealthy(self, pool):
+        """Test repeated failed health checks take a member out of rotation."""
+        pool.health_timeout = 0.01
+        orders = next(m for m in pool.members if m.workload == ORDERS)
+        orders.client.submit_current_time = Mock(side_effect=lambda: Future())
+
+        for _ in range(pool.max_health_failures):
+            pool.check_health()
+
+        assert not orders.healthy
+        assert orders.status().health_failures == pool.max_health_failures
+        assert pool.member(ORDERS) is not orders
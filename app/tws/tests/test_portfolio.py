@@ -0,0 +1,193 @@
+"""
+Tests for the account, position and P&L cache.
+"""
+
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from ..client import TWSClient
+from ..contracts import stock_contract
+from ..orders import UNSET_DOUBLE, build_order
+from ..portfolio import PNL, POSITION, VALUE
+from ..simulator import TWSSimulator
+
+ACCOUNT = "DU123456"
+
+
+@pytest.fixture
+def client():
+    """Fixture providing a connected TWS client with a mocked EClient and subscribed portfolio."""
+    client = TWSClient()
+    client.client = Mock()
+    client.client.isConnected.return_value = True
+    client._connected = True
+    client.wrapper.managedAccounts(ACCOUNT)
+    assert client.portfolio.start()
+    return client
+
+
+def contract(symbol: str, con_id: int):
+    """Build a contract as TWS reports it in position callbacks."""
+    item = stock_contract(symbol)
+    item.conId = con_id
+    return item
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+class TestPortfolioManager:
+    """Test class for PortfolioManager with a mocked EClient."""
+
+    def test_start_subscribes_once(self, client):
+        """Test start sends the account, position and P&L subscriptions once."""
+        assert client.portfolio.start()
+
+        client.client.reqAccountUpdates.assert_called_once_with(True, ACCOUNT)
+        client.client.reqPositions.assert_called_once()
+        client.client.reqPnL.assert_called_once()
+        assert client.client.reqPnL.call_args[0][1] == ACCOUNT
+
+    def test_not_connected(self):
+        """Test start waits for a connection."""
+        client = TWSClient()
+
+        assert not client.portfolio.start()
+
+    def test_account_values_publish_changes_only(self, client):
+        """Test unchanged account values are not published again."""
+        subscription = client.portfolio.subscribe()
+        wrapper = client.wrapper
+        wrapper.updateAccountValue("NetLiquidation", "100000.00", "USD", ACCOUNT)
+        wrapper.updateAccountValue("NetLiquidation", "100000.00", "USD", ACCOUNT)
+        wrapper.updateAccountValue("TotalCashValue", "50000.00", "USD", ACCOUNT)
+        wrapper.updateAccountValue("NetLiquidation", "100500.00", "USD", "OTHER")
+        wrapper.accountDownloadEnd(ACCOUNT)
+
+        assert subscription.drain() == [
+            (VALUE, ACCOUNT, "NetLiquidation", "USD"), (VALUE, ACCOUNT, "TotalCashValue", "USD"),
+        ]
+        state = client.portfolio.account_state()
+        assert state.ready
+        assert {v.key: v.value for v in state.values} == {"NetLiquidation": "100000.00", "TotalCashValue": "50000.00"}
+
+    def test_snapshots_rebuilt_only_after_change(self, client):
+        """Test reads return the cached snapshot until an update arrives."""
+        client.wrapper.updateAccountValue("NetLiquidation", "100000.00", "USD", ACCOUNT)
+        first = client.portfolio.account_state()
+
+        assert client.portfolio.account_state() is first
+        client.wrapper.updateAccountValue("NetLiquidation", "100001.00", "USD", ACCOUNT)
+        assert client.portfolio.account_state() is not first
+
+    def test_update_portfolio_tracks_position(self, client):
+        """Test updatePortfolio creates a position and follows its P&L."""
+        client.wrapper.updatePortfolio(contract("AAPL", 265598), 100, 190.0, 19000.0, 150.0, 4000.0, 0.0, ACCOUNT)
+
+        positions = client.portfolio.positions()
+        assert [(p.symbol, p.position, p.market_value, p.avg_cost) for p in positions] == [
+            ("AAPL", 100, 19000.0, 150.0)
+        ]
+        req_id, account, model, con_id = client.client.reqPnLSingle.call_args[0]
+        assert (account, con_id) == (ACCOUNT, 265598)
+
+        client.wrapper.pnlSingle(req_id, 100, 250.0, 4100.0, 0.0, 19100.0)
+        position = client.portfolio.position(265598)
+        assert (position.daily_pnl, position.unrealized_pnl, position.market_value) == (250.0, 4100.0, 19100.0)
+
+    def test_unset_pnl_values_are_ignored(self, client):
+        """Test values TWS has not computed keep the previous value."""
+        client.wrapper.position(ACCOUNT, contract("AAPL", 265598), 100, 150.0)
+        req_id = client.client.reqPnLSingle.call_args[0][0]
+        client.wrapper.pnlSingle(req_id, 100, 250.0, 4100.0, 0.0, 19100.0)
+
+        client.wrapper.pnlSingle(req_id, 100, UNSET_DOUBLE, UNSET_DOUBLE, UNSET_DOUBLE, 19200.0)
+
+        position = client.portfolio.position(265598)
+        assert (position.daily_pnl, position.market_value) == (250.0, 19200.0)
+
+    def test_closed_position(self, client):
+        """Test a position going flat is published and leaves the open positions."""
+        subscription = client.portfolio.subscribe()
+        client.wrapper.position(ACCOUNT, contract("AAPL", 265598), 100, 150.0)
+        req_id = client.client.reqPnLSingle.call_args[0][0]
+        subscription.drain()
+
+        client.wrapper.position(ACCOUNT, contract("AAPL", 265598), 0, 0.0)
+
+        assert subscription.drain() == [(POSITION, ACCOUNT, 265598)]
+        assert client.portfolio.positions() == []
+        assert client.portfolio.changes([(POSITION, ACCOUNT, 265598)]).positions[0].position == 0
+        client.client.cancelPnLSingle.assert_called_once_with(req_id)
+
+    def test_account_pnl(self, client):
+        """Test account P&L is cached and published when it changes."""
+        subscription = client.portfolio.subscribe()
+        req_id = client.client.reqPnL.call_args[0][0]
+
+        client.wrapper.pnl(req_id, 120.0, 80.0, 40.0)
+        client.wrapper.pnl(req_id, 120.0, 80.0, 40.0)
+        client.wrapper.pnl(req_id + 1000, 1.0, 1.0, 1.0)
+
+        assert subscription.drain() == [(PNL, ACCOUNT)]
+        pnl = client.portfolio.account_state().pnl
+        assert (pnl.daily_pnl, pnl.unrealized_pnl, pnl.realized_pnl) == (120.0, 80.0, 40.0)
+
+    def test_resubscribe_sweeps_stale_positions(self, client):
+        """Test positions TWS no longer reports after a reconnect are closed."""
+        client.wrapper.position(ACCOUNT, contract("AAPL", 265598), 100, 150.0)
+        client.wrapper.position(ACCOUNT, contract("MSFT", 272093), 50, 300.0)
+        client.wrapper.positionEnd()
+
+        client.wrapper.connectionClosed()
+        assert client.portfolio.resubscribe()
+        client.wrapper.position(ACCOUNT, contract("MSFT", 272093), 50, 300.0)
+        client.wrapper.positionEnd()
+
+        assert [p.symbol for p in client.portfolio.positions()] == ["MSFT"]
+        assert client.client.reqPositions.call_count == 2
+
+    def test_stop_cancels_subscriptions(self, client):
+        """Test stop cancels every subscription and keeps the cache."""
+        client.wrapper.position(ACCOUNT, contract("AAPL", 265598), 100, 150.0)
+
+        client.portfolio.stop()
+
+        client.client.reqAccountUpdates.assert_called_with(False, ACCOUNT)
+        client.client.cancelPositions.assert_called_once()
+        client.client.cancelPnL.assert_called_once()
+        client.client.cancelPnLSingle.assert_called_once()
+        assert len(client.portfolio.positions()) == 1
+
+
+class TestPortfolioAgainstSimulator:
+    """Test class for the portfolio cache fed by the simulator."""
+
+    def test_fills_update_positions(self):
+        """Test the cache downloads the account and follows fills incrementally."""
+        with TWSSimulator(positions={"AAPL": (100, 150.0)}) as simulator:
+            client = TWSClient(port=simulator.port)
+            assert client.connect(timeout=5.0)
+            try:
+                assert client.portfolio.start()
+                assert wait_for(lambda: client.portfolio.ready and client.portfolio.positions())
+                subscription = client.portfolio.subscribe()
+
+                client.orders.place(stock_contract("MSFT"), build_order("BUY", 10))
+                assert wait_for(lambda: len(client.portfolio.positions()) == 2)
+                assert wait_for(lambda: client.portfolio.position(simulator.con_id("MSFT")).daily_pnl is not None)
+
+                changes = client.portfolio.changes(subscription.drain())
+                assert {p.symbol for p in changes.positions} == {"MSFT"}
+                assert "TotalCashValue" in {v.key for v in changes.values}
+                assert client.portfolio.position(simulator.con_id("AAPL")).position == 100
+            finally:
+                client.disconnect()
@@ -0,0 +1,236 @@
+"""
+Tests for the market scanner service.
+"""
+
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Sequence
+from unittest.mock import Mock
+
+import pytest
+from ibapi.contract import ContractDetails
+
+from ..client import TWSClient
+from ..errors import TWSRequestError
+from ..scanner import ScanParams
+from ..simulator import TWSSimulator
+
+CON_IDS = {"AAPL": 265598, "MSFT": 272093, "IBM": 8314, "TSLA": 76792991}
+
+
+@pytest.fixture
+def client():
+    """Fixture providing a connected TWS client with a mocked EClient."""
+    client = TWSClient()
+    client.client = Mock()
+    client.client.isConnected.return_value = True
+    client._connected = True
+    return client
+
+
+def refresh(client: TWSClient, req_id: int, symbols: Sequence[str]) -> None:
+    """Deliver one scanner refresh ranking the symbols in order."""
+    for rank, symbol in enumerate(symbols):
+        details = ContractDetails()
+        details.contract.conId = CON_IDS[symbol]
+        details.contract.symbol = symbol
+        details.contract.secType = "STK"
+        details.contract.exchange = "SMART"
+        details.contract.currency = "USD"
+        client.wrapper.scannerData(req_id, rank, details, "", "", "", "")
+    client.wrapper.scannerDataEnd(req_id)
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+class TestScanParams:
+    """Test class for scan parameter normalization."""
+
+    def test_create_normalizes(self):
+        """Test codes are upper-cased and filters sorted so equal scans compare equal."""
+        first = ScanParams.create("top_perc_gain", filters={"volumeAbove": "100000", "priceAbove": "5"})
+        second = ScanParams.create("TOP_PERC_GAIN", filters={"priceAbove": "5", "volumeAbove": "100000"})
+
+        assert first == second
+        assert first.filters == (("priceAbove", "5"), ("volumeAbove", "100000"))
+        assert [(t.tag, t.value) for t in first.filter_options()] == [("priceAbove", "5"), ("volumeAbove", "100000")]
+
+    @pytest.mark.parametrize("scan_code, rows", [("", 10), ("HOT_BY_VOLUME", 0), ("HOT_BY_VOLUME", 51)])
+    def test_create_rejects_invalid(self, scan_code, rows):
+        """Test an empty scan code or an out of range row count is rejected."""
+        with pytest.raises(ValueError):
+            ScanParams.create(scan_code, rows=rows)
+
+
+class TestScannerService:
+    """Test class for ScannerService with a mocked EClient."""
+
+    def test_one_request_per_scan(self, client):
+        """Test subscribers of the same scan share one TWS subscription."""
+        params = ScanParams.create("TOP_PERC_GAIN", rows=10, filters={"priceAbove": "5"})
+
+        first = client.scanner.subscribe(params)
+        second = client.scanner.subscribe(params)
+        client.scanner.subscribe(ScanParams.create("HOT_BY_VOLUME"))
+
+        assert client.client.reqScannerSubscription.call_count == 2
+        req_id, subscription, options, filters = client.client.reqScannerSubscription.call_args_list[0][0]
+        assert (subscription.scanCode, subscription.numberOfRows, subscription.locationCode) == (
+            "TOP_PERC_GAIN", 10, "STK.US.MAJOR"
+        )
+        assert [(t.tag, t.value) for t in filters] == [("priceAbove", "5")]
+        assert first.scan_id == second.scan_id
+        assert client.scanner.subscriber_counts() == {"TOP_PERC_GAIN": 2, "HOT_BY_VOLUME": 1}
+
+    def test_first_refresh_resolves_snapshot(self, client):
+        """Test the first complete ranking resolves ready and is served as a snapshot."""
+        notify = Mock()
+        subscription = client.scanner.subscribe(ScanParams.create("TOP_PERC_GAIN"), notify=notify)
+        req_id = client.client.reqScannerSubscription.call_args[0][0]
+        assert not subscription.ready.done()
+
+        refresh(client, req_id, ["AAPL", "MSFT", "IBM"])
+
+        assert subscription.ready.result(timeout=0) is True
+        notify.assert_called_once()
+        assert [(r.rank, r.symbol, r.con_id) for r in subscription.snapshot()] == [
+            (0, "AAPL", 265598), (1, "MSFT", 272093), (2, "IBM", 8314),
+        ]
+        assert subscription.diff() is None
+
+    def test_diff_reports_entered_exited_and_moved(self, client):
+        """Test a refresh is reduced to the rows that entered, exited or moved."""
+        subscription = client.scanner.subscribe(ScanParams.create("TOP_PERC_GAIN"))
+        req_id = client.client.reqScannerSubscription.call_args[0][0]
+        refresh(client, req_id, ["AAPL", "MSFT", "IBM"])
+        subscription.snapshot()
+
+        refresh(client, req_id, ["MSFT", "AAPL", "TSLA"])
+        diff = subscription.diff()
+
+        assert [(r.symbol, r.rank) for r in diff.entered] == [("TSLA", 2)]
+        assert diff.exited == [CON_IDS["IBM"]]
+        assert [(m.con_id, m.previous_rank, m.rank) for m in diff.moved] == [
+            (CON_IDS["MSFT"], 1, 0), (CON_IDS["AAPL"], 0, 1),
+        ]
+        assert subscription.diff() is None
+
+    def test_unchanged_refresh_is_not_published(self, client):
+        """Test a refresh repeating the same ranking neither notifies nor yields a diff."""
+        notify = Mock()
+        subscription = client.scanner.subscribe(ScanParams.create("TOP_PERC_GAIN"), notify=notify)
+        req_id = client.client.reqScannerSubscription.call_args[0][0]
+        refresh(client, req_id, ["AAPL", "MSFT"])
+        subscription.snapshot()
+
+        refresh(client, req_id, ["AAPL", "MSFT"])
+
+        assert notify.call_count == 1
+        assert subscription.diff() is None
+
+    def test_refreshes_fold_into_one_diff(self, client):
+        """Test a slow reader gets one diff against the ranking it last saw."""
+        notify = Mock()
+        subscription = client.scanner.subscribe(ScanParams.create("TOP_PERC_GAIN"), notify=notify)
+        req_id = client.client.reqScannerSubscription.call_args[0][0]
+        refresh(client, req_id, ["AAPL", "MSFT"])
+        subscription.snapshot()
+
+        refresh(client, req_id, ["IBM", "MSFT"])
+        refresh(client, req_id, ["AAPL", "MSFT"])
+        refresh(client, req_id, ["AAPL", "TSLA"])
+
+        assert notify.call_count == 2
+        diff = subscription.diff()
+        assert [r.symbol for r in diff.entered] == ["TSLA"]
+        assert diff.exited == [CON_IDS["MSFT"]]
+        assert diff.moved == []
+
+    def test_last_unsubscribe_cancels(self, client):
+        """Test the scan is cancelled only when its last subscriber closes."""
+        params = ScanParams.create("TOP_PERC_GAIN")
+        first = client.scanner.subscribe(params)
+        second = client.scanner.subscribe(params)
+        req_id = client.client.reqScannerSubscription.call_args[0][0]
+
+        first.close()
+        client.client.cancelScannerSubscription.assert_not_called()
+        second.close()
+
+        client.client.cancelScannerSubscription.assert_called_once_with(req_id)
+        assert client.scanner.subscriber_counts() == {}
+
+    def test_error_fails_scan(self, client):
+        """Test a TWS error fails the scan and a later subscriber starts a new one."""
+        params = ScanParams.create("NOT_A_SCAN")
+        notify = Mock()
+        subscription = client.scanner.subscribe(params, notify=notify)
+        req_id = client.client.reqScannerSubscription.call_args[0][0]
+
+        client.wrapper.error(req_id, 165, "Historical Market Data Service query message:no items retrieved")
+
+        with pytest.raises(TWSRequestError):
+            subscription.ready.result(timeout=0)
+        assert "165" in subscription.error
+        notify.assert_called_once()
+        client.scanner.subscribe(params)
+        assert client.client.reqScannerSubscription.call_count == 2
+
+    def test_resubscribe_keeps_ranking(self, client):
+        """Test scans are re-requested after a reconnect and diffed against the old ranking."""
+        subscription = client.scanner.subscribe(ScanParams.create("TOP_PERC_GAIN"))
+        old_req_id = client.client.reqScannerSubscription.call_args[0][0]
+        refresh(client, old_req_id, ["AAPL", "MSFT"])
+        subscription.snapshot()
+
+        assert client.scanner.resubscribe() == 1
+        new_req_id = client.client.reqScannerSubscription.call_args[0][0]
+        refresh(client, old_req_id, ["IBM"])
+        refresh(client, new_req_id, ["AAPL", "IBM"])
+
+        assert new_req_id != old_req_id
+        diff = subscription.diff()
+        assert [r.symbol for r in diff.entered] == ["IBM"]
+        assert diff.exited == [CON_IDS["MSFT"]]
+
+    def test_subscribe_not_connected(self):
+        """Test subscribing requires a connection."""
+        with pytest.raises(ConnectionError):
+            TWSClient().scanner.subscribe(ScanParams.create("TOP_PERC_GAIN"))
+
+
+class TestScannerAgainstSimulator:
+    """Test class for scans fed by the simulator."""
+
+    def test_rankings_refresh(self):
+        """Test the simulator's rankings arrive and later refreshes reach the reader as diffs."""
+        with TWSSimulator(scan_interval=0.05) as simulator:
+            client = TWSClient(port=simulator.port)
+            assert client.connect(timeout=5.0)
+            try:
+                subscription = client.scanner.subscribe(ScanParams.create("TOP_PERC_GAIN", rows=10))
+                try:
+                    subscription.ready.result(timeout=5.0)
+                except FutureTimeoutError:
+                    pytest.fail("No scanner results from the simulator")
+                ranking = subscription.snapshot()
+                assert [row.rank for row in ranking] == list(range(10))
+                assert all(row.con_id == simulator.con_id(row.symbol) for row in ranking)
+
+                assert wait_for(lambda: subscription.dirty)
+                diff = subscription.diff()
+                assert diff is None or len(diff.entered) == len(diff.exited)
+
+                subscription.close()
+                sent = simulator.scans_sent
+                time.sleep(0.2)
+                assert simulator.scans_sent <= sent + 1
+            finally:
+                client.disconnect()
@@ -0,0 +1,145 @@
+"""
+Tests running the real TWSClient against the local TWS simulator.
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+from ibapi.order import Order
+
+from ..client import TWSClient
+from ..contracts import stock_contract
+from ..simulator import TWSSimulator, bar_size_seconds, encode_message
+
+
+@pytest.fixture
+def simulator():
+    """Fixture providing a simulator served from a background thread."""
+    with TWSSimulator(tick_rate=200.0, next_order_id=100) as simulator:
+        yield simulator
+
+
+@pytest.fixture
+def client(simulator, tmp_path):
+    """Fixture providing a TWS client connected to the simulator."""
+    client = TWSClient(
+        port=simulator.port,
+        cache_dir=str(tmp_path / "cache"),
+        archive_dir=str(tmp_path / "archive"),
+    )
+    assert client.connect(timeout=5.0)
+    yield client
+    client.disconnect()
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    """Poll until predicate is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestEncoding:
+    """Test class for simulator wire helpers."""
+
+    def test_encode_message(self):
+        """Test fields are NUL-terminated behind a length prefix."""
+        assert encode_message(49, 1, True) == b"\x00\x00\x00\x0749\x001\x001\x00"
+
+    def test_bar_size_seconds(self):
+        """Test converting TWS bar sizes."""
+        assert bar_size_seconds("1 min") == 60
+        assert bar_size_seconds("5 mins") == 300
+        assert bar_size_seconds("1 day") == 86400
+        with pytest.raises(ValueError):
+            bar_size_seconds("1 fortnight")
+
+
+class TestSimulator:
+    """Test class for TWSClient over a real socket to the simulator."""
+
+    def test_handshake(self, client, simulator):
+        """Test the handshake completes with the simulator's order id."""
+        assert client.is_connected()
+        assert client.wrapper.next_order_id == 100
+        assert client.connect_latency is not None
+        assert len(simulator.sessions) == 1
+
+    def test_current_time(self, client):
+        """Test reqCurrentTime round-trips through the decoder."""
+        response = client.request_current_time(timeout=5.0)
+
+        assert response is not None
+        assert abs((datetime.now() - response.current_time).total_seconds()) < 5
+        assert response.server_version is None or response.server_version > 0
+
+    def test_market_data_stream(self, client):
+        """Test synthetic ticks reach a market data subscription."""
+        with client.market_data.subscribe(stock_contract("AAPL")) as subscription:
+            tick = subscription.get(timeout=5.0)
+
+        assert tick is not None
+        assert tick.symbol == "AAPL"
+        assert tick.price is not None and tick.price > 0
+
+    def test_cancel_market_data(self, client, simulator):
+        """Test cancelling the last subscription stops the stream."""
+        subscription = client.market_data.subscribe(stock_contract("AAPL"))
+        assert subscription.get(timeout=5.0) is not None
+        session = simulator.sessions[0]
+
+        subscription.close()
+
+        assert wait_for(lambda: not session.streams)
+
+    def test_historical_bars(self, client):
+        """Test a historical request is answered with weekday bars."""
+        bars = client.fetch_historical_bars(
+            stock_contract("AAPL"), datetime(2023, 1, 9, 16, 0), "4 D", "1 hour"
+        )
+
+        assert bars
+        assert {bar.time.date().day for bar in bars} == {6, 9}
+        assert all(bar.low <= bar.close <= bar.high for bar in bars)
+
+    def test_order_status(self, client):
+        """Test a placed order is reported submitted and then filled."""
+        statuses = []
+        client.wrapper.orderStatus = lambda order_id, status, filled, *args: statuses.append(
+            (order_id, status, filled)
+        )
+        order = Order()
+        order.action = "BUY"
+        order.orderType = "MKT"
+        order.totalQuantity = 10
+
+        client.client.placeOrder(client.wrapper.next_order_id, stock_contract("AAPL"), order)
+
+        assert wait_for(lambda: len(statuses) == 2)
+        assert statuses == [(100, "Submitted", 0.0), (100, "Filled", 10.0)]
+
+    def test_cancel_unfilled_order(self, simulator, client):
+        """Test cancelling an order the simulator left working."""
+        simulator.fill_orders = False
+        statuses = []
+        client.wrapper.orderStatus = lambda order_id, status, *args: statuses.append(status)
+        order = Order()
+        order.action = "SELL"
+        order.orderType = "LMT"
+        order.lmtPrice = 500.0
+        order.totalQuantity = 1
+
+        client.client.placeOrder(100, stock_contract("MSFT"), order)
+        client.client.cancelOrder(100)
+
+        assert wait_for(lambda: statuses == ["Submitted", "Cancelled"])
+
+    def test_disconnect_detected(self, client, simulator):
+        """Test the client notices the simulator going away."""
+        simulator.stop_in_thread()
+
+        assert wait_for(lambda: not client.is_connected())
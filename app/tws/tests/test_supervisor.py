@@ -0,0 +1,155 @@
+"""
+Tests for automatic reconnection and subscription replay.
+"""
+
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from ..client import TWSClient
+from ..contracts import stock_contract
+from ..simulator import TWSSimulator
+from ..supervisor import ConnectionSupervisor, backoff_delay
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    """Poll until predicate is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def mock_client():
+    """Fixture providing a connected TWS client with a mocked EClient."""
+    client = TWSClient()
+    client.client = Mock()
+    client.client.isConnected.return_value = True
+    client._connected = True
+    return client
+
+
+class TestBackoff:
+    """Test class for reconnect backoff delays."""
+
+    def test_exponential_growth_with_cap(self):
+        """Test delays double per attempt up to the maximum."""
+        delays = [backoff_delay(n, initial=1.0, maximum=8.0, jitter=0.0) for n in range(6)]
+
+        assert delays == [1.0, 2.0, 4.0, 8.0, 8.0, 8.0]
+
+    def test_jitter_shortens_delay(self):
+        """Test jitter randomizes up to the given fraction of the delay."""
+        assert backoff_delay(2, initial=1.0, jitter=0.5, rng=lambda: 0.0) == 4.0
+        assert backoff_delay(2, initial=1.0, jitter=0.5, rng=lambda: 0.999) == pytest.approx(2.0, abs=0.01)
+
+
+class TestConnectivityCodes:
+    """Test class for TWS connectivity notifications."""
+
+    def test_data_lost_resubscribes(self, mock_client):
+        """Test error 1101 re-requests market data without reconnecting."""
+        supervisor = ConnectionSupervisor(mock_client)
+        supervisor.start()
+        subscription = mock_client.market_data.subscribe(stock_contract("AAPL"))
+        first_req_id = mock_client.client.reqMktData.call_args[0][0]
+
+        mock_client.wrapper.error(-1, 1100, "Connectivity between IB and TWS has been lost")
+        mock_client.wrapper.error(-1, 1101, "Connectivity restored - data lost")
+
+        assert wait_for(lambda: mock_client.client.reqMktData.call_count == 2)
+        new_req_id = mock_client.client.reqMktData.call_args[0][0]
+        assert new_req_id != first_req_id
+        mock_client.wrapper.tickPrice(new_req_id, 4, 1.5, None)
+        assert subscription.get(timeout=1.0).price == 1.5
+        assert wait_for(lambda: supervisor.status().last_recovery_ms is not None)
+        supervisor.stop()
+
+    def test_data_maintained_records_recovery(self, mock_client):
+        """Test error 1102 ends the outage without replaying subscriptions."""
+        supervisor = ConnectionSupervisor(mock_client)
+        hook = Mock()
+        supervisor.remove_replay_hook("market_data")
+        supervisor.add_replay_hook("test", hook)
+
+        mock_client.wrapper.error(-1, 1100, "Connectivity between IB and TWS has been lost")
+        assert supervisor.status().state == "degraded"
+        mock_client.wrapper.error(-1, 1102, "Connectivity restored - data maintained")
+
+        status = supervisor.status()
+        assert status.state == "connected"
+        assert status.last_recovery_ms is not None
+        hook.assert_not_called()
+
+
+class TestReconnect:
+    """Test class for reconnecting to a restarted TWS."""
+
+    def test_reconnect_and_replay_after_restart(self):
+        """Test a gateway restart is recovered and streams resume."""
+        simulator = TWSSimulator(tick_rate=100.0)
+        port = simulator.start_in_thread()
+        client = TWSClient(port=port, auto_reconnect=True)
+        client.supervisor.initial_delay = 0.05
+        client.supervisor.max_delay = 0.2
+        replayed = Mock(return_value=0)
+        client.supervisor.add_replay_hook("orders", replayed)
+        restarted = None
+        try:
+            assert client.connect(timeout=5.0)
+            subscription = client.market_data.subscribe(stock_contract("AAPL"))
+            assert subscription.get(timeout=5.0) is not None
+
+            simulator.stop_in_thread()
+            assert wait_for(lambda: not client.is_connected())
+            subscription.drain()
+            restarted = TWSSimulator(port=port, tick_rate=100.0)
+            restarted.start_in_thread()
+
+            assert wait_for(lambda: client.is_connected() and client.supervisor.reconnects == 1)
+            assert subscription.get(timeout=5.0) is not None
+            replayed.assert_called_once()
+            status = client.get_connection_status()
+            assert status.reconnects == 1
+            assert status.last_recovery_ms is not None
+            subscription.close()
+        finally:
+            client.disconnect()
+            simulator.stop_in_thread()
+            if restarted is not None:
+                restarted.stop_in_thread()
+
+    def test_intentional_disconnect_does_not_reconnect(self):
+        """Test disconnect() stops supervision instead of reconnecting."""
+        with TWSSimulator() as simulator:
+            client = TWSClient(port=simulator.port, auto_reconnect=True)
+            client.supervisor.initial_delay = 0.01
+            assert client.connect(timeout=5.0)
+
+            client.disconnect()
+            time.sleep(0.2)
+
+            assert not client.is_connected()
+            assert client.supervisor.reconnects == 0
+            assert not client.supervisor.running
+
+    def test_gives_up_after_max_attempts(self):
+        """Test the supervisor stops when TWS does not come back."""
+        simulator = TWSSimulator()
+        port = simulator.start_in_thread()
+        client = TWSClient(port=port, auto_reconnect=True)
+        client.supervisor.initial_delay = 0.01
+        client.supervisor.max_attempts = 2
+        try:
+            assert client.connect(timeout=5.0)
+            simulator.stop_in_thread()
+
+            assert wait_for(lambda: not client.supervisor.running)
+            assert client.supervisor.attempts == 2
+            assert client.supervisor.status().state == "idle"
+        finally:
+            client.disconnect()
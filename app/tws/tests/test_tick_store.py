@@ -0,0 +1,107 @@
+"""
+Tests for the columnar tick store.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from ..market_data import Tick
+from ..tick_store import TickBuffer, TickStore
+
+
+def fill(buffer: TickBuffer, count: int) -> None:
+    """Append ticks whose timestamp, price and size all equal their index."""
+    for i in range(count):
+        buffer.append(i, float(i), i, 4)
+
+
+class TestTickBuffer:
+    """Test class for TickBuffer functionality."""
+
+    def test_column_dtypes(self):
+        """Test the columns use compact fixed-width dtypes."""
+        buffer = TickBuffer(8)
+
+        assert buffer.timestamps.dtype == np.int64
+        assert buffer.prices.dtype == np.float64
+        assert buffer.sizes.dtype == np.int64
+        assert buffer.fields.dtype == np.uint8
+        assert buffer.nbytes == 8 * 25
+
+    def test_invalid_capacity(self):
+        """Test a buffer needs room for at least one tick."""
+        with pytest.raises(ValueError):
+            TickBuffer(0)
+
+    def test_views_before_wrap(self):
+        """Test a partially filled buffer is one zero-copy segment."""
+        buffer = TickBuffer(8)
+        fill(buffer, 5)
+
+        segments = buffer.views()
+
+        assert len(segments) == 1
+        assert segments[0].timestamps.tolist() == [0, 1, 2, 3, 4]
+        assert np.shares_memory(segments[0].prices, buffer.prices)
+
+    def test_views_after_wrap(self):
+        """Test a wrapped buffer returns the newest ticks in order."""
+        buffer = TickBuffer(4)
+        fill(buffer, 6)
+
+        segments = buffer.views()
+
+        assert len(buffer) == 4
+        assert buffer.total == 6
+        assert [s.timestamps.tolist() for s in segments] == [[2, 3], [4, 5]]
+
+    def test_views_last(self):
+        """Test limiting views to the most recent ticks."""
+        buffer = TickBuffer(4)
+        fill(buffer, 6)
+
+        assert [s.sizes.tolist() for s in buffer.views(last=1)] == [[5]]
+        assert [s.sizes.tolist() for s in buffer.views(last=3)] == [[3], [4, 5]]
+        assert buffer.views(last=0) == []
+
+    def test_snapshot_is_a_stable_copy(self):
+        """Test snapshots are contiguous and unaffected by later appends."""
+        buffer = TickBuffer(4)
+        fill(buffer, 6)
+
+        snapshot = buffer.snapshot()
+        buffer.append(99, 99.0, 99, 4)
+
+        assert snapshot.prices.tolist() == [2.0, 3.0, 4.0, 5.0]
+        assert not np.shares_memory(snapshot.prices, buffer.prices)
+
+    def test_snapshot_empty(self):
+        """Test snapshot of an empty buffer."""
+        assert len(TickBuffer(4).snapshot()) == 0
+
+
+class TestTickStore:
+    """Test class for TickStore functionality."""
+
+    def test_append_tick(self):
+        """Test ticks are stored per symbol with missing values filled."""
+        store = TickStore(capacity=16)
+
+        store.append_tick(Tick("AAPL", 4, 150.5, None, 1.5))
+        store.append_tick(Tick("AAPL", 5, None, 200, 2.0))
+        store.append_tick(Tick("MSFT", 4, 300.0, None, 3.0))
+
+        aapl = store.buffer("AAPL").snapshot()
+        assert aapl.timestamps.tolist() == [1_500_000_000, 2_000_000_000]
+        assert aapl.prices[0] == 150.5
+        assert math.isnan(aapl.prices[1])
+        assert aapl.sizes.tolist() == [0, 200]
+        assert aapl.fields.tolist() == [4, 5]
+        assert sorted(store.symbols()) == ["AAPL", "MSFT"]
+        assert store.nbytes == 2 * 16 * 25
+
+    def test_unknown_symbol(self):
+        """Test looking up a symbol with no ticks."""
+        assert TickStore().buffer("AAPL") is None
@@ -0,0 +1,164 @@
+"""
+Columnar in-memory tick storage backed by NumPy ring buffers.
+"""
+
+import math
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from .market_data import Tick
+
+# Roughly a full trading day for a liquid symbol; 25 bytes per tick
+DEFAULT_CAPACITY = 1 << 20
+
+
+class TickColumns(NamedTuple):
+    """Parallel tick columns for one symbol, oldest tick first."""
+
+    timestamps: np.ndarray  # int64 nanoseconds since the epoch
+    prices: np.ndarray  # float64, NaN for size-only ticks
+    sizes: np.ndarray  # int64, 0 for price-only ticks
+    fields: np.ndarray  # uint8 TWS tick type
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+class TickBuffer:
+    """
+    Fixed-capacity ring buffer of ticks for one symbol.
+
+    There is a single writer (the reader thread) and appends are O(1).
+    Once the buffer is full the oldest ticks are overwritten. Readers get
+    zero-copy views of the underlying arrays. Those views see later
+    overwrites, so take a snapshot() to keep a stable copy.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.prices = np.full(capacity, np.nan, dtype=np.float64)
+        self.sizes = np.zeros(capacity, dtype=np.int64)
+        self.fields = np.zeros(capacity, dtype=np.uint8)
+        self._count = 0
+
+    def append(self, timestamp_ns: int, price: float, size: int, field: int) -> None:
+        """Append one tick, overwriting the oldest once full."""
+        index = self._count % self.capacity
+        self.timestamps[index] = timestamp_ns
+        self.prices[index] = price
+        self.sizes[index] = size
+        self.fields[index] = field
+        # Publish the row only after every column has been written
+        self._count += 1
+
+    @property
+    def total(self) -> int:
+        """Number of ticks ever appended, including overwritten ones."""
+        return self._count
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.timestamps.nbytes + self.prices.nbytes + self.sizes.nbytes + self.fields.nbytes
+        )
+
+    def views(self, last: Optional[int] = None) -> List[TickColumns]:
+        """
+        Zero-copy views of the stored ticks, oldest first.
+
+        The ring may wrap, so the ticks come back as up to two contiguous
+        segments.
+
+        Args:
+            last: Only include the most recent ``last`` ticks
+
+        Returns:
+            One or two TickColumns views in chronological order
+        """
+        count = self._count
+        size = min(count, self.capacity)
+        if last is not None:
+            size = min(size, max(last, 0))
+        if size == 0:
+            return []
+
+        end = count % self.capacity or self.capacity
+        start = end - size
+        if start >= 0:
+            return [self._columns(start, end)]
+        return [self._columns(self.capacity + start, self.capacity), self._columns(0, end)]
+
+    def snapshot(self, last: Optional[int] = None) -> TickColumns:
+        """Contiguous copy of the stored ticks, oldest first."""
+        segments = self.views(last)
+        if not segments:
+            return self._columns(0, 0)
+        if len(segments) == 1:
+            return TickColumns(*(column.copy() for column in segments[0]))
+        return TickColumns(*(np.concatenate(columns) for columns in zip(*segments)))
+
+    def _columns(self, start: int, end: int) -> TickColumns:
+        return TickColumns(
+            self.timestamps[start:end],
+            self.prices[start:end],
+            self.sizes[start:end],
+            self.fields[start:end],
+        )
+
+
+class TickStore:
+    """
+    Per-symbol tick ring buffers.
+
+    Memory use is predictable: each symbol costs 25 bytes times the buffer
+    capacity, allocated the first time a tick for it arrives.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        Initialize tick store.
+
+        Args:
+            capacity: Number of ticks retained per symbol
+        """
+        self.capacity = capacity
+        self._buffers: Dict[str, TickBuffer] = {}
+        self._lock = threading.Lock()
+
+    def append(self, symbol: str, timestamp_ns: int, price: float, size: int, field: int) -> None:
+        """Append one tick for a symbol."""
+        buffer = self._buffers.get(symbol)
+        if buffer is None:
+            with self._lock:
+                buffer = self._buffers.setdefault(symbol, TickBuffer(self.capacity))
+        buffer.append(timestamp_ns, price, size, field)
+
+    def append_tick(self, tick: Tick) -> None:
+        """Append a Tick from the market data stream."""
+        self.append(
+            tick.symbol,
+            int(tick.time * 1_000_000_000),
+            math.nan if tick.price is None else tick.price,
+            0 if tick.size is None else tick.size,
+            tick.field,
+        )
+
+    def buffer(self, symbol: str) -> Optional[TickBuffer]:
+        """Ring buffer for a symbol, if any ticks were stored."""
+        return self._buffers.get(symbol)
+
+    def symbols(self) -> List[str]:
+        return list(self._buffers)
+
+    @property
+    def nbytes(self) -> int:
+        """Total memory held by the tick columns."""
+        return sum(buffer.nbytes for buffer in list(self._buffers.values()))
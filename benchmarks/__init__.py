@@ -0,0 +1,3 @@
+"""
+Throughput and latency benchmarks run against the local TWS simulator.
+"""
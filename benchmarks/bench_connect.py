@@ -0,0 +1,32 @@
+"""
+Time to complete the TWS API handshake.
+"""
+
+from typing import Any, Dict
+
+from app.tws.client import TWSClient
+
+from .common import Stopwatch, latency_summary
+
+
+def run(host: str, port: int, iterations: int = 20) -> Dict[str, Any]:
+    """
+    Connect and disconnect repeatedly.
+
+    Args:
+        host: Simulator host
+        port: Simulator port
+        iterations: Number of connections to time
+
+    Returns:
+        Handshake latency summary and the number of failed connects
+    """
+    samples = []
+    for i in range(iterations):
+        client = TWSClient(host, port, client_id=100 + i)
+        with Stopwatch() as watch:
+            connected = client.connect(timeout=5.0)
+        if connected:
+            samples.append(watch.elapsed)
+        client.disconnect()
+    return {**latency_summary(samples), "failures": iterations - len(samples)}
@@ -0,0 +1,93 @@
+"""
+Tick decode throughput through the ibapi decoder and TWSWrapper.
+"""
+
+import time
+from typing import Any, Dict
+
+from ibapi import comm
+from ibapi.decoder import Decoder
+from ibapi.message import IN
+from ibapi.ticktype import TickTypeEnum
+
+from app.tws.client import TWSClient
+from app.tws.contracts import stock_contract
+from app.tws.simulator import SERVER_VERSION, encode_message
+
+from .common import Stopwatch
+
+
+def run_decoder(messages: int = 200_000) -> Dict[str, Any]:
+    """
+    Decode pre-encoded tickPrice messages without a socket.
+
+    Each message goes through the same steps as the EReader/EClient.run
+    loop: length-prefix framing, field splitting, Decoder.interpret and the
+    TWSWrapper handler dispatch.
+
+    Args:
+        messages: Number of tickPrice messages to decode
+
+    Returns:
+        Messages and callbacks per second
+    """
+    client = TWSClient()
+    callbacks = [0]
+
+    def count(*args: Any) -> None:
+        callbacks[0] += 1
+
+    client.wrapper.add_handler("tickPrice", count)
+    client.wrapper.add_handler("tickSize", count)
+    decoder = Decoder(client.wrapper, SERVER_VERSION)
+    buffer = b"".join(
+        encode_message(IN.TICK_PRICE, 6, 1, TickTypeEnum.LAST, 100.0 + i % 100 / 100, 100, 0)
+        for i in range(messages)
+    )
+
+    with Stopwatch() as watch:
+        while buffer:
+            _, text, buffer = comm.read_msg(buffer)
+            decoder.interpret(comm.read_fields(text))
+
+    return {
+        "messages": messages,
+        "messages_per_s": messages / watch.elapsed,
+        "callbacks_per_s": callbacks[0] / watch.elapsed,
+    }
+
+
+def run_stream(host: str, port: int, simulator: Any, duration: float = 3.0, rate: float = 100_000.0) -> Dict[str, Any]:
+    """
+    Ticks received per second over a socket from the simulator.
+
+    Args:
+        host: Simulator host
+        port: Simulator port
+        simulator: The TWSSimulator serving the port, to set its tick rate
+        duration: Seconds to stream for
+        rate: Ticks per second requested from the simulator
+
+    Returns:
+        Ticks received per second and ticks the slow consumer dropped
+    """
+    simulator.tick_rate = rate
+    client = TWSClient(host, port, client_id=300)
+    if not client.connect(timeout=5.0):
+        raise ConnectionError(f"Could not connect to the simulator at {host}:{port}")
+    try:
+        subscription = client.market_data.subscribe(stock_contract("AAPL"), maxsize=1_000_000)
+        received = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < duration:
+            time.sleep(0.05)
+            received += len(subscription.drain())
+        elapsed = time.perf_counter() - started
+        subscription.close()
+        return {
+            "requested_rate": rate,
+            "ticks_per_s": received / elapsed,
+            "dropped": subscription.dropped,
+        }
+    finally:
+        client.disconnect()
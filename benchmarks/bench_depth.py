@@ -0,0 +1,77 @@
+"""
+Market depth update throughput through the decoder and the order book.
+"""
+
+import random
+from typing import Any, Dict
+from unittest.mock import Mock
+
+from ibapi import comm
+from ibapi.decoder import Decoder
+from ibapi.message import IN
+
+from app.tws.client import TWSClient
+from app.tws.contracts import stock_contract
+from app.tws.depth import DELETE, INSERT, UPDATE
+from app.tws.simulator import SERVER_VERSION, encode_message
+
+from .common import Stopwatch
+
+
+def run(updates: int = 200_000, rows: int = 10) -> Dict[str, Any]:
+    """
+    Apply pre-encoded updateMktDepth messages to a book without a socket.
+
+    The mix is mostly size updates with some level inserts and deletes.
+    The same updates are applied twice: through framing, Decoder.interpret
+    and TWSWrapper dispatch into the book, and straight to the wrapper
+    callback to time the book alone. A subscriber takes a diff every 1000
+    updates, as a throttled stream would.
+
+    Args:
+        updates: Number of depth messages to apply
+        rows: Levels per side
+
+    Returns:
+        Updates per second for both paths and diffs taken
+    """
+    client = TWSClient()
+    client.client = Mock()
+    client.client.isConnected.return_value = True
+    client._connected = True
+    subscription = client.depth.subscribe(stock_contract("AAPL"), rows=rows)
+    req_id = client.client.reqMktDepth.call_args[0][0]
+
+    rng = random.Random(0)
+    fields = [(position, INSERT, side, 100.0 + position, 100) for side in (0, 1) for position in range(rows)]
+    for _ in range(updates - len(fields)):
+        draw = rng.random()
+        operation = UPDATE if draw < 0.8 else INSERT if draw < 0.9 else DELETE
+        fields.append((
+            rng.randrange(rows), operation, rng.randint(0, 1), round(100 + rng.random(), 2), rng.randint(1, 50) * 100,
+        ))
+    messages = [encode_message(IN.MARKET_DEPTH, 1, req_id, *update) for update in fields]
+    decoder = Decoder(client.wrapper, SERVER_VERSION)
+
+    diffs = 0
+    with Stopwatch() as decoded_watch:
+        for applied, message in enumerate(messages, 1):
+            _, text, _ = comm.read_msg(message)
+            decoder.interpret(comm.read_fields(text))
+            if applied % 1000 == 0 and subscription.diff() is not None:
+                diffs += 1
+
+    callback = client.wrapper.updateMktDepth
+    with Stopwatch() as book_watch:
+        for applied, update in enumerate(fields, 1):
+            callback(req_id, *update)
+            if applied % 1000 == 0 and subscription.diff() is not None:
+                diffs += 1
+
+    subscription.close()
+    return {
+        "updates": updates,
+        "decoded_updates_per_s": updates / decoded_watch.elapsed,
+        "book_updates_per_s": updates / book_watch.elapsed,
+        "diffs": diffs,
+    }
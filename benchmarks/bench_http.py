@@ -0,0 +1,117 @@
+"""
+HTTP throughput of the FastAPI backend measured with httpx.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from typing import Any, Dict, List
+
+import httpx
+import uvicorn
+
+from app.backend.main import app
+
+from .common import latency_summary
+
+ENDPOINTS = ("/health", "/api/tws/current-time", "/api/tws/current-time?live=true")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _worker(client: httpx.AsyncClient, path: str, deadline: float, samples: List[float]) -> int:
+    errors = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get(path)
+        samples.append(time.perf_counter() - started)
+        if response.status_code != 200 or response.json().get("success") is False:
+            errors += 1
+    return errors
+
+
+async def _load(base_url: str, path: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    samples: List[float] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        # Warm up connections and code paths before timing
+        await client.get(path)
+        started = time.perf_counter()
+        deadline = started + duration
+        errors = await asyncio.gather(
+            *(_worker(client, path, deadline, samples) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started
+    return {
+        **latency_summary(samples),
+        "concurrency": concurrency,
+        "requests_per_s": len(samples) / elapsed,
+        "errors": sum(errors),
+    }
+
+
+def _serve(host: str, port: int, http_port: int) -> None:
+    """Serve the backend with its TWS connections pointed at the simulator."""
+    logging.getLogger("app").setLevel(logging.WARNING)
+    os.environ.update({
+        "IBXTAC_TWS_HOST": host,
+        "IBXTAC_TWS_PORT": str(port),
+        "IBXTAC_TWS_CLIENT_ID": "400",
+        "IBXTAC_WARM_START": "1",
+    })
+    uvicorn.run(app, host="127.0.0.1", port=http_port, log_level="warning", access_log=False)
+
+
+def _wait_for_port(port: int, process: multiprocessing.Process, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not process.is_alive():
+            raise RuntimeError("Backend server failed to start")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("Timed out waiting for the backend server")
+
+
+def run(host: str, port: int, concurrency: int = 32, duration: float = 5.0) -> Dict[str, Any]:
+    """
+    Serve the backend with uvicorn and load it with concurrent httpx clients.
+
+    The server runs in its own process so the load generator does not share
+    its GIL, and the backend warm-starts its connections to the simulator.
+    /api/tws/current-time is served from the synced server clock, while
+    live=true measures the full HTTP -> TWS -> HTTP path.
+
+    Args:
+        host: Simulator host
+        port: Simulator port
+        concurrency: Concurrent HTTP clients
+        duration: Seconds of load per endpoint
+
+    Returns:
+        Throughput and latency per endpoint
+    """
+    http_port = _free_port()
+    process = multiprocessing.get_context("spawn").Process(
+        target=_serve, args=(host, port, http_port), daemon=True
+    )
+    process.start()
+    try:
+        _wait_for_port(http_port, process)
+        base_url = f"http://127.0.0.1:{http_port}"
+        return {
+            path: asyncio.run(_load(base_url, path, concurrency, duration))
+            for path in ENDPOINTS
+        }
+    finally:
+        process.terminate()
+        process.join(timeout=10)
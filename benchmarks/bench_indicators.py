@@ -0,0 +1,67 @@
+"""
+Batch and incremental indicator throughput, and agreement between the two.
+"""
+
+from typing import Any, Dict
+
+import numpy as np
+
+from app.tws.bar_archive import BAR_DTYPE
+from app.tws.indicators import parse_indicator
+
+from .common import Stopwatch
+
+INDICATORS = ("sma:20", "ema:50", "vwap", "atr:14", "rsi:14")
+
+
+def random_walk(bars: int, seed: int = 1) -> np.ndarray:
+    """Synthetic one-minute bar records following a random walk."""
+    rng = np.random.default_rng(seed)
+    records = np.zeros(bars, dtype=BAR_DTYPE)
+    records["time"] = np.arange(bars) * 60
+    records["close"] = 100 + np.cumsum(rng.normal(0, 0.5, bars))
+    records["open"] = records["close"] + rng.normal(0, 0.2, bars)
+    records["high"] = np.maximum(records["open"], records["close"]) + rng.random(bars)
+    records["low"] = np.minimum(records["open"], records["close"]) - rng.random(bars)
+    records["volume"] = rng.integers(1, 1000, bars)
+    records["count"] = 1
+    return records
+
+
+def run(bars: int = 200_000) -> Dict[str, Any]:
+    """
+    Compute each indicator over one history in batch and bar by bar.
+
+    Args:
+        bars: Length of the bar history
+
+    Returns:
+        Per indicator: bars per second for both forms and the largest
+        absolute difference between their values
+    """
+    records = random_walk(bars)
+    # Attribute access per bar, as for live bars from the aggregator
+    rows = list(records.view(np.recarray))
+    results: Dict[str, Any] = {}
+    for text in INDICATORS:
+        spec = parse_indicator(text)
+        with Stopwatch() as batch_watch:
+            batch = spec.compute(records)
+
+        update = spec.incremental()
+        with Stopwatch() as incremental_watch:
+            incremental = np.array([update(bar) for bar in rows])
+
+        if not (np.isnan(batch) == np.isnan(incremental)).all():
+            raise AssertionError(f"{text}: batch and incremental warm-up differ")
+        difference = float(np.nanmax(np.abs(batch - incremental)))
+        if not np.allclose(batch, incremental, rtol=1e-9, equal_nan=True):
+            raise AssertionError(f"{text}: batch and incremental values differ by {difference}")
+
+        results[spec.name] = {
+            "bars": bars,
+            "batch_bars_per_s": bars / batch_watch.elapsed,
+            "incremental_bars_per_s": bars / incremental_watch.elapsed,
+            "max_abs_difference": difference,
+        }
+    return results
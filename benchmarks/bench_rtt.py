@@ -0,0 +1,76 @@
+"""
+Request round-trip latency for concurrent callers of AsyncTWSClient.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from app.tws.async_client import AsyncTWSClient
+from app.tws.contracts import stock_contract
+
+from .common import Stopwatch, latency_summary
+
+# A short, fixed weekday range so every request returns the same 30 bars
+HISTORICAL_END = "20230105 16:00:00"
+HISTORICAL_DURATION = "1800 S"
+
+
+async def _caller(client: AsyncTWSClient, requests: int, historical: bool) -> List[float]:
+    contract = stock_contract("AAPL")
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        if historical:
+            await client.request(
+                lambda req_id: client.client.client.reqHistoricalData(
+                    req_id, contract, HISTORICAL_END, HISTORICAL_DURATION, "1 min",
+                    "TRADES", 0, 2, False, []
+                )
+            )
+        else:
+            await client.current_time()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def _run(host: str, port: int, callers: int, requests: int) -> Dict[str, Any]:
+    client = AsyncTWSClient(host=host, port=port, client_id=200)
+    if not await client.connect(timeout=5.0):
+        raise ConnectionError(f"Could not connect to the simulator at {host}:{port}")
+    results = {}
+    try:
+        for name, historical in (("current_time", False), ("historical", True)):
+            with Stopwatch() as watch:
+                batches = await asyncio.gather(
+                    *(_caller(client, requests, historical) for _ in range(callers))
+                )
+            samples = [sample for batch in batches for sample in batch]
+            results[name] = {
+                **latency_summary(samples),
+                "callers": callers,
+                "requests_per_s": len(samples) / watch.elapsed,
+            }
+    finally:
+        await client.disconnect()
+    return results
+
+
+def run(host: str, port: int, callers: int = 50, requests: int = 20) -> Dict[str, Any]:
+    """
+    Measure request to callback latency with many callers in flight.
+
+    reqCurrentTime replies carry no request id, so concurrent callers share
+    one outstanding request; historical requests are correlated per id and
+    measure the independent request path.
+
+    Args:
+        host: Simulator host
+        port: Simulator port
+        callers: Concurrent callers
+        requests: Sequential requests per caller
+
+    Returns:
+        Latency summary per request type
+    """
+    return asyncio.run(_run(host, port, callers, requests))
@@ -0,0 +1,107 @@
+"""
+Shared helpers for timing benchmarks and recording their results.
+"""
+
+import json
+import logging
+import platform
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of a sample, 0 for no samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def latency_summary(samples: Sequence[float]) -> Dict[str, float]:
+    """Summarize latencies in seconds as milliseconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": sum(samples) / len(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Commit of the working tree, if it is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(results: Dict[str, Any], output: Optional[Path] = None) -> Path:
+    """
+    Write benchmark results with run metadata as JSON.
+
+    Args:
+        results: Benchmark name to metrics
+        output: File to write; defaults to results/<commit>.json
+
+    Returns:
+        Path of the written file
+    """
+    commit = git_commit()
+    if output is None:
+        output = RESULTS_DIR / f"{commit or datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(output, "w") as f:
+        json.dump(document, f, indent=2)
+    return output
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """
+    Describe the relative change of every numeric metric in two runs.
+
+    Args:
+        baseline: Results document of the earlier run
+        current: Results document of the later run
+
+    Returns:
+        One line per metric present in both runs
+    """
+    lines = []
+    for name, metrics in current["results"].items():
+        before = baseline.get("results", {}).get(name, {})
+        for metric, value in metrics.items():
+            old = before.get(metric)
+            if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+                lines.append(f"{name}.{metric}: {old:.3f} -> {value:.3f} ({(value - old) / old:+.1%})")
+    return lines
+
+
+class Stopwatch:
+    """Context manager measuring elapsed wall time."""
+
+    def __enter__(self) -> "Stopwatch":
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.elapsed = time.perf_counter() - self.started
@@ -0,0 +1,84 @@
+"""
+Run the benchmark suite against a local TWS simulator and record JSON results.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --quick --only rtt,decode --compare benchmarks/results/abc1234.json
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from app.tws.simulator import TWSSimulator
+
+from . import bench_connect, bench_decode, bench_depth, bench_http, bench_indicators, bench_rtt
+from .common import compare, write_results
+
+logger = logging.getLogger(__name__)
+
+
+def benchmarks(simulator: TWSSimulator, quick: bool) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Benchmark name to a callable producing its metrics."""
+    host, port = simulator.host, simulator.port
+    scale = 0.2 if quick else 1.0
+    return {
+        "connect": lambda: bench_connect.run(host, port, iterations=max(int(20 * scale), 3)),
+        "rtt": lambda: bench_rtt.run(host, port, callers=50, requests=max(int(20 * scale), 2)),
+        "decode": lambda: bench_decode.run_decoder(messages=int(200_000 * scale)),
+        "stream": lambda: bench_decode.run_stream(host, port, simulator, duration=3.0 * scale),
+        "http": lambda: bench_http.run(host, port, duration=5.0 * scale),
+        "depth": lambda: bench_depth.run(updates=int(200_000 * scale)),
+        "indicators": lambda: bench_indicators.run(bars=int(200_000 * scale)),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="IBxTAC throughput and latency benchmarks")
+    parser.add_argument("--only", help="Comma-separated benchmarks to run")
+    parser.add_argument("--quick", action="store_true", help="Shorter runs for CI smoke checks")
+    parser.add_argument("--output", type=Path, help="Results file; defaults to results/<commit>.json")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    # Per-request logging in the client and routers would dominate the timings
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("ibapi").setLevel(logging.WARNING)
+
+    with TWSSimulator() as simulator:
+        available = benchmarks(simulator, args.quick)
+        selected = args.only.split(",") if args.only else list(available)
+        unknown = set(selected) - set(available)
+        if unknown:
+            parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+        results: Dict[str, Any] = {}
+        for name in selected:
+            logger.info(f"Running {name} benchmark")
+            metrics = available[name]()
+            # Nested groups (e.g. one per endpoint) are flattened to name.group
+            if all(isinstance(value, dict) for value in metrics.values()):
+                results.update({f"{name}.{group}": values for group, values in metrics.items()})
+            else:
+                results[name] = metrics
+
+    output = write_results(results, args.output)
+    print(json.dumps(results, indent=2))
+    logger.info(f"Wrote results to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        with open(output) as f:
+            current = json.load(f)
+        for line in compare(baseline, current):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())